@@ -21,6 +21,29 @@ hiddenimports = [
     'core.function_parser',
     'core.license_manager',
     'core.oauth2_manager',
+    'core.tesseract_pool',
+    'core.page_raster',
+    'core.zone_strategy',
+    'core.image_preprocessing',
+    'core.document_text',
+    'core.ocr_page_scope',
+    'core.word_index',
+    'core.ocr_language',
+    'core.pdfa_batch',
+    'core.ocrmypdf_runner',
+    'core.ocrmypdf_timing',
+    'core.pdfa_converter',
+    'core.document_splitter',
+    'gui.split_settings_dialog',
+    'core.export_renditions',
+    'core.smtp_pool',
+    'core.email_spool',
+    'core.mime_stream',
+    'core.email_digest',
+    'core.oauth2_refresher',
+    'core.filename_allocator',
+    'core.export_publisher',
+    'core.ftp_pool',
     
     # GUI Module
     'gui.main_window',
@@ -125,7 +148,7 @@ a_service = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[
-        'matplotlib', 'numpy', 'pandas', 'scipy', 'IPython', 'jupyter', 'notebook',
+        'matplotlib', 'pandas', 'scipy', 'IPython', 'jupyter', 'notebook',
         'tkinter', 'gui' # GUI-Module werden für den Dienst nicht benötigt
     ],
     win_no_prefer_redirects=False,
@@ -176,7 +199,7 @@ a_gui = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[
-        'matplotlib', 'numpy', 'pandas', 'scipy', 'IPython', 'jupyter', 'notebook',
+        'matplotlib', 'pandas', 'scipy', 'IPython', 'jupyter', 'notebook',
     ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
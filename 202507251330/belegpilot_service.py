@@ -8,6 +8,7 @@ import sys
 import os
 import threading
 import logging
+import multiprocessing
 
 # Füge das Hauptverzeichnis zum Python-Pfad hinzu
 if getattr(sys, 'frozen', False):
@@ -84,6 +85,8 @@ class BelegpilotService(win32serviceutil.ServiceFramework):
             servicemanager.LogErrorMsg(f"Fehler im Dienst: {str(e)}")
 
 if __name__ == '__main__':
+    # Notwendig für Worker-Prozesse (Tesseract-Engines) in der gebündelten EXE
+    multiprocessing.freeze_support()
     if len(sys.argv) == 1:
         servicemanager.Initialize()
         servicemanager.PrepareToHostSingle(BelegpilotService)
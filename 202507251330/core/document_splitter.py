@@ -0,0 +1,188 @@
+"""
+Aufteilen von Stapel-Scans in einzelne Dokumente (Aktion SPLIT)
+
+Trennstellen werden Seite für Seite erkannt:
+
+    - Leerseiten           Tinte auf einer Graustufen-Vorschau in niedriger
+                           Auflösung (NumPy); Seiten mit Textebene gelten nie
+                           als leer und werden nicht gerendert
+    - Seitenzahl           feste Anzahl Seiten je Dokument
+    - Trennblatt-Text      Seite enthält einen Marker in der Textebene
+                           (z.B. "TRENNBLATT"; Scans brauchen dafür eine
+                           Textebene vom Scanner)
+
+Einstellungen (action_params['split']):
+    split_blank         Leerseiten trennen (Standard an)
+    blank_threshold     Tintenanteil, bis zu dem eine Seite leer ist (Standard 0.002)
+    blank_dpi           Auflösung der Vorschau (Standard 30)
+    pages_per_document  Seiten je Dokument (0 = aus)
+    marker_text         Text eines Trennblatts (leer = aus)
+    marker_regex        marker_text als regulären Ausdruck auswerten
+    keep_separators     Trennseiten am Ende des vorherigen Dokuments behalten
+
+Die Teildokumente entstehen durch Kopieren der Seitenobjekte (PyMuPDF
+insert_pdf) ohne erneutes Rendern und werden geliefert, sobald ihre letzte
+Seite erkannt ist - die Verarbeitung des ersten Teils beginnt, bevor der Rest
+des Stapels untersucht ist.
+"""
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import fitz
+import numpy as np
+
+from core.ocrmypdf_runner import MIN_PAGE_TEXT_CHARS
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Grauwert, ab dem ein Pixel als Tinte zählt
+_INK_LEVEL = 160
+
+# Rand, der bei der Leerseitenprüfung ignoriert wird (Scannerkanten, Lochung)
+_MARGIN_RATIO = 0.05
+
+
+@dataclass(frozen=True)
+class SplitRules:
+    """Regeln für die Trennstellen"""
+    split_blank: bool = True
+    blank_threshold: float = 0.002
+    blank_dpi: int = 30
+    pages_per_document: int = 0
+    marker_text: str = ""
+    marker_regex: bool = False
+    keep_separators: bool = False
+
+    @classmethod
+    def from_params(cls, params: Optional[dict]) -> 'SplitRules':
+        params = params or {}
+        try:
+            pages = max(0, int(params.get('pages_per_document') or 0))
+        except (TypeError, ValueError):
+            pages = 0
+        try:
+            threshold = float(params.get('blank_threshold', 0.002))
+        except (TypeError, ValueError):
+            threshold = 0.002
+        try:
+            dpi = min(150, max(10, int(params.get('blank_dpi', 30))))
+        except (TypeError, ValueError):
+            dpi = 30
+        return cls(split_blank=bool(params.get('split_blank', True)),
+                   blank_threshold=threshold,
+                   blank_dpi=dpi,
+                   pages_per_document=pages,
+                   marker_text=str(params.get('marker_text') or '').strip(),
+                   marker_regex=bool(params.get('marker_regex', False)),
+                   keep_separators=bool(params.get('keep_separators', False)))
+
+    @property
+    def active(self) -> bool:
+        return self.split_blank or self.pages_per_document > 0 or bool(self.marker_text)
+
+
+@dataclass
+class SplitPart:
+    """Ein Teildokument (Seitennummern 1-basiert)"""
+    path: str
+    index: int
+    first_page: int
+    last_page: int
+
+    @property
+    def page_count(self) -> int:
+        return self.last_page - self.first_page + 1
+
+
+def ink_ratio(page: fitz.Page, dpi: int = 30) -> float:
+    """Anteil dunkler Pixel einer Seite (ohne Rand) auf einer Graustufen-Vorschau"""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    margin_y = int(pix.height * _MARGIN_RATIO)
+    margin_x = int(pix.width * _MARGIN_RATIO)
+    inner = pixels[margin_y:pix.height - margin_y, margin_x:pix.width - margin_x]
+    if inner.size == 0:
+        return 0.0
+    return float(np.count_nonzero(inner < _INK_LEVEL)) / inner.size
+
+
+class DocumentSplitter:
+    """Erkennt Trennstellen und schreibt die Teildokumente"""
+
+    def __init__(self, rules: SplitRules):
+        self.rules = rules
+        self._marker = None
+        if rules.marker_text:
+            pattern = rules.marker_text if rules.marker_regex else re.escape(rules.marker_text)
+            self._marker = re.compile(pattern, re.IGNORECASE)
+
+    def _is_separator(self, page: fitz.Page) -> bool:
+        """Leerseite oder Trennblatt"""
+        text = page.get_text()
+        if self._marker is not None and self._marker.search(text):
+            return True
+        if not self.rules.split_blank:
+            return False
+        if sum(1 for char in text if not char.isspace()) >= MIN_PAGE_TEXT_CHARS:
+            return False
+        return ink_ratio(page, self.rules.blank_dpi) <= self.rules.blank_threshold
+
+    def iter_parts(self, pdf_path: str, output_dir: str) -> Iterator[SplitPart]:
+        """
+        Liefert die Teildokumente nacheinander, sobald sie geschrieben sind.
+
+        Ohne Trennstelle wird nichts geschrieben: es folgt ein einziger Teil
+        mit dem Pfad des Originals.
+        """
+        base = os.path.splitext(os.path.basename(pdf_path))[0]
+        with fitz.open(pdf_path) as src:
+            page_count = src.page_count
+            start: Optional[int] = None      # erste Seite des laufenden Teils (0-basiert)
+            index = 0
+            split_found = False
+
+            for page_no in range(page_count):
+                separator = self._is_separator(src[page_no])
+                if separator:
+                    split_found = True
+                    if start is not None:
+                        end = page_no if self.rules.keep_separators else page_no - 1
+                        index += 1
+                        yield self._write_part(src, base, output_dir, index, start, end)
+                        start = None
+                    continue
+
+                if start is None:
+                    start = page_no
+                if (self.rules.pages_per_document
+                        and page_no - start + 1 >= self.rules.pages_per_document
+                        and page_no < page_count - 1):
+                    split_found = True
+                    index += 1
+                    yield self._write_part(src, base, output_dir, index, start, page_no)
+                    start = None
+
+            if start is not None:
+                if not split_found:
+                    yield SplitPart(path=pdf_path, index=1, first_page=1, last_page=page_count)
+                    return
+                index += 1
+                yield self._write_part(src, base, output_dir, index, start, page_count - 1)
+
+        logger.info(f"{os.path.basename(pdf_path)}: {page_count} Seiten in {index} Dokumente aufgeteilt")
+
+    @staticmethod
+    def _write_part(src: fitz.Document, base: str, output_dir: str,
+                    index: int, first: int, last: int) -> SplitPart:
+        """Kopiert die Seiten first..last (0-basiert) in ein neues PDF"""
+        path = os.path.join(output_dir, f"{base}_{index:03d}.pdf")
+        with fitz.open() as part:
+            part.insert_pdf(src, from_page=first, to_page=last)
+            part.save(path, garbage=3, deflate=True)
+        logger.debug(f"Teildokument {os.path.basename(path)}: Seiten {first + 1}-{last + 1}")
+        return SplitPart(path=path, index=index, first_page=first + 1, last_page=last + 1)
+
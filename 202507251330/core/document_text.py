@@ -0,0 +1,239 @@
+"""
+Gemeinsamer OCR-Durchlauf je Dokument
+
+Ein gescanntes Dokument mit OCR-Variablen und einem Export als durchsuchbares
+PDF/A wurde bisher zweimal erkannt: einmal für OCR_FullText und einmal von
+OCRmyPDF für die Textebene. Der DocumentTextCache hält je Dateistand und
+Sprache den Seitentext und - falls erzeugt - die PDF/A-Fassung mit Textebene.
+
+Ist für ein Dokument ein PDF/A-Export vorgemerkt, erzeugt bereits die erste
+Textanfrage die PDF/A-Fassung über OCRmyPDF und übernimmt den Text aus dessen
+Sidecar-Datei. Der Export verwendet die fertige Fassung weiter - und
+umgekehrt: läuft der Export zuerst, liefert er den Text für OCR_FullText.
+
+Einzelne Seiten (OCR_Page1, OCR_LastPage, ...) werden ebenfalls je Seite
+abgelegt, damit XML-Felder und Exporte dieselbe Seite nur einmal erkennen.
+"""
+import os
+import tempfile
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ocrmypdf
+
+from core.page_raster import file_signature
+from core.ocrmypdf_runner import OCRmyPDFOptions, run_ocrmypdf
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Seitentexte: Liste von (Seitennummer, Text)
+PageTexts = List[Tuple[int, str]]
+
+
+def run_searchable_pdfa(input_file: str, output_file: str, language: str = 'deu',
+                        options: Optional[OCRmyPDFOptions] = None,
+                        sidecar: Optional[str] = None):
+    """
+    Erzeugt mit OCRmyPDF ein durchsuchbares PDF/A eines gescannten Dokuments.
+
+    Returns:
+        ocrmypdf.ExitCode
+    """
+    return run_ocrmypdf(input_file, output_file, language, options, sidecar=sidecar)
+
+
+def read_sidecar(sidecar_path: str) -> PageTexts:
+    """Liest eine OCRmyPDF-Sidecar-Datei (Seiten durch Formfeed getrennt)"""
+    with open(sidecar_path, 'r', encoding='utf-8') as f:
+        pages = f.read().split('\f')
+    # Nach der letzten Seite folgt ggf. ein abschließender Formfeed
+    if len(pages) > 1 and not pages[-1].strip():
+        pages.pop()
+    return [(index + 1, text.strip()) for index, text in enumerate(pages)]
+
+
+@dataclass
+class _DocumentEntry:
+    """OCR-Ergebnisse eines Dateistands"""
+    language: str = 'deu'
+    page_texts: Optional[PageTexts] = None
+    partial: Dict[int, str] = field(default_factory=dict)
+    pdfa_path: Optional[str] = None
+    pdfa_planned: bool = False
+    pdfa_options: Optional[OCRmyPDFOptions] = None
+
+
+class DocumentTextCache:
+    """Cache für Seitentexte und PDF/A-Fassungen je Dateistand"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple, _DocumentEntry] = {}
+        self._lock = threading.Lock()
+        self._doc_locks: Dict[Tuple, threading.Lock] = {}
+
+    def _entry(self, signature: Tuple, language: str) -> Tuple[_DocumentEntry, threading.Lock]:
+        """
+        Liefert (bzw. erstellt) Eintrag und Dokumentsperre.
+
+        Jede Sprache hat einen eigenen Eintrag - parallele Exporte eines
+        Dokuments in verschiedenen Sprachen verdrängen sich nicht gegenseitig.
+        """
+        key = signature + (language,)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _DocumentEntry(language=language)
+                self._entries[key] = entry
+            return entry, self._doc_locks.setdefault(key, threading.Lock())
+
+    def plan_searchable_pdfa(self, pdf_path: str, language: str = 'deu',
+                             options: Optional[OCRmyPDFOptions] = None):
+        """
+        Merkt vor, dass dieses Dokument als durchsuchbares PDF/A exportiert wird.
+        Die erste Textanfrage erzeugt dann direkt die PDF/A-Fassung.
+        """
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        entry.pdfa_planned = True
+        entry.pdfa_options = options
+        logger.debug(f"PDF/A-Fassung vorgemerkt für {os.path.basename(pdf_path)} ({language})")
+
+    def is_pdfa_planned(self, pdf_path: str, language: str) -> bool:
+        """Prüft ob ein gemeinsamer PDF/A-Lauf vorgemerkt und noch offen ist"""
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        return entry.pdfa_planned and entry.page_texts is None
+
+    def has_searchable_pdfa(self, pdf_path: str, language: str) -> bool:
+        """Prüft ob die PDF/A-Fassung bereits erzeugt wurde"""
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        return bool(entry.pdfa_path and os.path.exists(entry.pdfa_path))
+
+    def known_pages(self, pdf_path: str, language: str) -> Dict[int, str]:
+        """Bereits erkannte Seiten (Seitennummer -> Text)"""
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        with self._lock:
+            if entry.page_texts is not None:
+                return dict(entry.page_texts)
+            return dict(entry.partial)
+
+    def store_page(self, pdf_path: str, language: str, page_no: int, text: str):
+        """Legt den Text einer einzeln erkannten Seite ab"""
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        with self._lock:
+            entry.partial[page_no] = text
+
+    def store_page_texts(self, pdf_path: str, language: str, page_texts: PageTexts):
+        """Legt die Texte aller Seiten ab (z.B. aus der OCR-Aktion des Hotfolders)"""
+        entry, _ = self._entry(file_signature(pdf_path), language)
+        with self._lock:
+            entry.page_texts = page_texts
+            entry.partial.clear()
+
+    def get_page_texts(self, pdf_path: str, language: str,
+                       producer: Callable[[Dict[int, str]], PageTexts]) -> PageTexts:
+        """
+        Liefert die Seitentexte eines Dokuments.
+
+        Args:
+            producer: Eigene OCR, falls weder Text noch vorgemerktes PDF/A
+                      vorliegt. Erhält die bereits einzeln erkannten Seiten.
+        """
+        entry, doc_lock = self._entry(file_signature(pdf_path), language)
+        with doc_lock:
+            if entry.page_texts is not None:
+                logger.debug(f"OCR-Text wiederverwendet: {os.path.basename(pdf_path)}")
+                return entry.page_texts
+
+            if entry.pdfa_planned and entry.pdfa_path is None:
+                try:
+                    self._create_pdfa_locked(pdf_path, entry)
+                    return entry.page_texts
+                except Exception as e:
+                    logger.warning(f"PDF/A-Fassung konnte nicht vorab erzeugt werden, "
+                                   f"verwende eigene OCR: {e}")
+                    entry.pdfa_planned = False
+
+            with self._lock:
+                known = dict(entry.partial)
+            entry.page_texts = producer(known)
+            return entry.page_texts
+
+    def get_searchable_pdfa(self, pdf_path: str, language: str = 'deu',
+                            options: Optional[OCRmyPDFOptions] = None) -> str:
+        """
+        Liefert die durchsuchbare PDF/A-Fassung (erzeugt sie bei Bedarf).
+        Die Datei gehört dem Cache - Aufrufer kopieren sie.
+
+        Raises:
+            Fehler von OCRmyPDF (InputFileError, MissingDependencyError, ...)
+        """
+        entry, doc_lock = self._entry(file_signature(pdf_path), language)
+        with doc_lock:
+            if entry.pdfa_path and os.path.exists(entry.pdfa_path):
+                logger.debug(f"PDF/A-Fassung wiederverwendet: {os.path.basename(pdf_path)}")
+                return entry.pdfa_path
+            entry.pdfa_options = options
+            self._create_pdfa_locked(pdf_path, entry)
+            return entry.pdfa_path
+
+    def _create_pdfa_locked(self, pdf_path: str, entry: _DocumentEntry):
+        """Ein OCRmyPDF-Lauf für PDF/A und Seitentext (Dokumentsperre gehalten)"""
+        fd, output_path = tempfile.mkstemp(suffix='.pdf', prefix='belegpilot_pdfa_')
+        os.close(fd)
+        sidecar_path = output_path[:-4] + '.txt'
+        try:
+            logger.info(f"Erzeuge durchsuchbares PDF/A mit Textebene: {os.path.basename(pdf_path)}")
+            result = run_searchable_pdfa(pdf_path, output_path, entry.language,
+                                         entry.pdfa_options, sidecar=sidecar_path)
+            if result != ocrmypdf.ExitCode.ok:
+                raise RuntimeError(f"OCRmyPDF fehlgeschlagen mit Code: {result}")
+
+            if entry.page_texts is None:
+                entry.page_texts = read_sidecar(sidecar_path)
+            entry.pdfa_path = output_path
+        except Exception:
+            self._remove_file(output_path)
+            raise
+        finally:
+            self._remove_file(sidecar_path)
+
+    @staticmethod
+    def _remove_file(path: Optional[str]):
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.debug(f"Temporäre Datei {path} konnte nicht gelöscht werden: {e}")
+
+    def drop(self, pdf_path: str):
+        """Entfernt alle Einträge einer Datei (alle Stände und Sprachen, inkl. PDF/A-Fassungen)"""
+        path_key = os.path.normcase(os.path.abspath(pdf_path))
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path_key]:
+                self._remove_file(self._entries.pop(key).pdfa_path)
+                self._doc_locks.pop(key, None)
+
+    def clear(self):
+        """Entfernt alle Einträge"""
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove_file(entry.pdfa_path)
+            self._entries.clear()
+            self._doc_locks.clear()
+
+
+# Globale Cache-Instanz
+_document_text_cache = None
+_document_text_cache_lock = threading.Lock()
+
+
+def get_document_text_cache() -> DocumentTextCache:
+    """Gibt die globale DocumentTextCache-Instanz zurück"""
+    global _document_text_cache
+    with _document_text_cache_lock:
+        if _document_text_cache is None:
+            _document_text_cache = DocumentTextCache()
+            logger.debug("Globale DocumentTextCache-Instanz erstellt")
+        return _document_text_cache
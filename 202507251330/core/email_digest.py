@@ -0,0 +1,214 @@
+"""
+Sammelversand von E-Mail-Exporten (Digest)
+
+Hotfolder mit vielen Einzeldokumenten senden sonst je Dokument eine E-Mail an
+dasselbe Postfach. Im Sammelversand werden Dokumente mit gleichem
+ausgewerteten Empfänger (inkl. CC/BCC), Absender und Gruppe (Standard: Betreff)
+gesammelt und als eine Nachricht mit mehreren Anhängen in den E-Mail-Spool
+gelegt, sobald
+
+    - das Zeitfenster seit dem ersten Dokument der Gruppe abgelaufen ist,
+    - die maximale Anzahl Anhänge erreicht ist oder
+    - ein weiterer Anhang die maximale Größe überschreiten würde.
+
+Wartende Gruppen liegen auf der Festplatte (Spool-Verzeichnis digest/) und
+überstehen einen Neustart; fällige Gruppen schickt der Versand-Thread des
+Spools ab. Eine Gruppe, deren Sammelnachricht nicht erzeugt werden kann (z.B.
+fehlender Anhang, volle Festplatte), wird nach digest_failed/ verschoben,
+damit sie die übrigen Gruppen und den Versand nicht blockiert.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+import logging
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from core.mime_stream import StreamingMessage
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+_GROUP_FILE = "group.json"
+
+
+@dataclass
+class DigestGroup:
+    """Gemeinsamer Umschlag der gesammelten Dokumente"""
+    key: str
+    from_header: str
+    to_header: str
+    cc_header: str
+    recipients: List[str]
+    subject: str
+    opened: float = 0.0
+    window: float = 900.0
+    max_attachments: int = 20
+    max_bytes: int = 20 * 1024 * 1024
+    items: List[dict] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return sum(item.get('size', 0) for item in self.items)
+
+    @property
+    def deadline(self) -> float:
+        return self.opened + self.window
+
+
+def digest_key(*parts: str) -> str:
+    """Schlüssel einer Gruppe (Empfänger, Absender, Gruppe, Grenzen)"""
+    return hashlib.sha1("\x1f".join(parts).encode('utf-8')).hexdigest()[:20]
+
+
+class DigestCollector:
+    """Sammelt Dokumente je Gruppe und übergibt fertige Sammelnachrichten"""
+
+    def __init__(self, digest_dir: str,
+                 enqueue: Callable[[StreamingMessage, List[str], str], object],
+                 failed_dir: Optional[str] = None):
+        self.digest_dir = digest_dir
+        self.failed_dir = failed_dir or f"{digest_dir}_failed"
+        self._enqueue = enqueue
+        self._lock = threading.Lock()
+        os.makedirs(digest_dir, exist_ok=True)
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+    def add(self, group: DigestGroup, attachment_path: str, filename: str,
+            body: str, document: str = "") -> str:
+        """
+        Legt ein Dokument in seine Gruppe (die Anhangdatei wird übernommen).
+
+        Returns:
+            Meldung für das Export-Ergebnis
+        """
+        size = os.path.getsize(attachment_path)
+        with self._lock:
+            current = self._load(group.key)
+            if current is not None and current.items and current.size + size > current.max_bytes:
+                self._flush(current, "Größe")
+                current = None
+            if current is None:
+                current = group
+                current.opened = time.time()
+                current.items = []
+                os.makedirs(self._group_dir(group.key), exist_ok=True)
+
+            stored_name = f"{len(current.items) + 1:04d}_{uuid.uuid4().hex[:8]}"
+            shutil.copy2(attachment_path, os.path.join(self._group_dir(group.key), stored_name))
+            current.items.append({'file': stored_name, 'filename': filename, 'body': body,
+                                  'document': document, 'size': size,
+                                  'added': datetime.now().isoformat(timespec='seconds')})
+            self._save(current)
+            count = len(current.items)
+
+            if count >= current.max_attachments:
+                self._flush(current, "Anzahl")
+                return f"Sammel-E-Mail mit {count} Anhängen in Warteschlange"
+
+        logger.debug(f"Sammelversand {group.key}: {count} Dokument(e) gesammelt")
+        return f"E-Mail für Sammelversand vorgemerkt ({count}/{group.max_attachments})"
+
+    def flush_due(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Schickt Gruppen mit abgelaufenem Zeitfenster ab.
+
+        Returns:
+            Zeitpunkt (time.time) der nächsten fälligen Gruppe oder None
+        """
+        now = time.time() if now is None else now
+        next_deadline = None
+        with self._lock:
+            for key in os.listdir(self.digest_dir):
+                group = self._load(key)
+                if group is None:
+                    continue
+                if not group.items:
+                    shutil.rmtree(self._group_dir(key), ignore_errors=True)
+                elif group.deadline <= now:
+                    try:
+                        self._flush(group, "Zeitfenster")
+                    except Exception as e:
+                        self._move_to_failed(key, e)
+                elif next_deadline is None or group.deadline < next_deadline:
+                    next_deadline = group.deadline
+        return next_deadline
+
+    def flush_all(self):
+        """Schickt alle wartenden Gruppen sofort ab"""
+        self.flush_due(now=float('inf'))
+
+    def pending(self) -> int:
+        """Anzahl gesammelter, noch nicht abgeschickter Dokumente"""
+        with self._lock:
+            return sum(len(group.items) for group in
+                       (self._load(key) for key in os.listdir(self.digest_dir)) if group)
+
+    def _flush(self, group: DigestGroup, reason: str):
+        """Erzeugt die Sammelnachricht, legt sie in den Spool und entfernt die Gruppe (Sperre gehalten)"""
+        group_dir = self._group_dir(group.key)
+        count = len(group.items)
+
+        msg = StreamingMessage()
+        msg['From'] = group.from_header
+        msg['To'] = group.to_header
+        if group.cc_header:
+            msg['Cc'] = group.cc_header
+        msg['Subject'] = group.subject if count == 1 else f"{group.subject} ({count} Dokumente)"
+        msg['Date'] = datetime.now().strftime('%a, %d %b %Y %H:%M:%S %z')
+
+        if count == 1:
+            msg.add_text(group.items[0]['body'])
+        else:
+            sections = [f"{item['filename']}\n{item['body']}".strip() for item in group.items]
+            msg.add_text(f"{count} Dokumente:\n\n" + "\n\n".join(sections))
+        for item in group.items:
+            msg.add_attachment(os.path.join(group_dir, item['file']), item['filename'])
+
+        self._enqueue(msg, group.recipients, ", ".join(item['document'] for item in group.items))
+        shutil.rmtree(group_dir, ignore_errors=True)
+        logger.info(f"Sammel-E-Mail an {group.to_header} mit {count} Anhängen abgeschickt ({reason})")
+
+    def failed(self) -> int:
+        """Anzahl nicht abschickbarer Gruppen in digest_failed/"""
+        try:
+            return len(os.listdir(self.failed_dir))
+        except OSError:
+            return 0
+
+    def _move_to_failed(self, key: str, error: Exception):
+        """Verschiebt eine nicht abschickbare Gruppe nach digest_failed/ (Sperre gehalten)"""
+        target = os.path.join(self.failed_dir, f"{key}_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+        try:
+            shutil.move(self._group_dir(key), target)
+            logger.error(f"Sammel-E-Mail {key} konnte nicht erzeugt werden, "
+                         f"Gruppe liegt in {target}: {error}")
+        except OSError as move_error:
+            logger.error(f"Sammel-E-Mail {key} konnte nicht erzeugt werden ({error}) "
+                         f"und nicht verschoben werden: {move_error}")
+
+    def _group_dir(self, key: str) -> str:
+        return os.path.join(self.digest_dir, key)
+
+    def _load(self, key: str) -> Optional[DigestGroup]:
+        path = os.path.join(self._group_dir(key), _GROUP_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return DigestGroup(**json.load(f))
+        except Exception as e:
+            logger.error(f"Sammelversand-Gruppe {key} nicht lesbar: {e}")
+            return None
+
+    def _save(self, group: DigestGroup):
+        path = os.path.join(self._group_dir(group.key), _GROUP_FILE)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(group), f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
@@ -0,0 +1,432 @@
+"""
+Warteschlange für ausgehende E-Mails
+
+E-Mail-Exporte werden nicht mehr während der Dokumentverarbeitung gesendet.
+Die fertige Nachricht wird einmal erzeugt und im Spool-Verzeichnis abgelegt;
+der Export gilt damit als erledigt. Ein Hintergrund-Thread sendet die
+Nachrichten über den SMTP-Pool. Ein langsamer oder nicht erreichbarer Server
+hält so die Verarbeitung nicht auf und führt nicht mehr zum Fehlerpfad.
+
+Aufbau des Spool-Verzeichnisses:
+
+    queue/<id>.eml     Nachricht (RFC 5322, CRLF)
+    queue/<id>.json    Umschlag und Zustellstatus
+    sent/<id>.json     zugestellte Nachrichten (Status, ohne Inhalt)
+    failed/<id>.*      endgültig fehlgeschlagene Nachrichten
+    digest/<gruppe>/   gesammelte Dokumente für den Sammelversand
+
+Vorübergehende Fehler (Verbindung, 4xx, Anmeldung) werden mit wachsendem
+Abstand wiederholt; dauerhafte Ablehnungen (5xx) und Nachrichten nach
+MAX_ATTEMPTS Versuchen landen in failed/ und können mit retry_failed()
+erneut eingereiht werden. Die SMTP-Einstellungen werden vor jedem Durchlauf
+neu geladen - eine korrigierte Konfiguration gilt sofort für alle wartenden
+Nachrichten.
+"""
+import os
+import json
+import time
+import uuid
+import smtplib
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from email.utils import parseaddr
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence
+
+from models.export_config import ExportSettings, AuthMethod
+from core.smtp_pool import get_smtp_pool
+from core.oauth2_refresher import get_oauth2_refresher
+from core.mime_stream import StreamingMessage
+from core.email_digest import DigestCollector, DigestGroup
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = "config/email_spool"
+SETTINGS_FILE = "config/settings.json"
+
+QUEUED = "queued"
+SENT = "sent"
+FAILED = "failed"
+DIGEST = "digest"  # für den Sammelversand gesammelt, noch keine Nachricht
+
+# Wiederholungen: 1, 2, 4, ... Minuten, höchstens eine Stunde Abstand
+RETRY_BASE = 60.0
+RETRY_MAX = 3600.0
+MAX_ATTEMPTS = 10
+
+# Zustellberichte in sent/ werden nach dieser Zeit entfernt
+SENT_RETENTION = 7 * 24 * 3600
+
+# Zeitlimit für shutdown() (laufende Zustellung abwarten)
+SHUTDOWN_TIMEOUT = 30
+
+
+@dataclass
+class SpooledEmail:
+    """Umschlag und Zustellstatus einer Nachricht im Spool"""
+    id: str
+    from_addr: str
+    recipients: List[str]
+    subject: str = ""
+    document: str = ""
+    created: str = ""
+    state: str = QUEUED
+    attempts: int = 0
+    next_attempt: float = 0.0
+    last_error: str = ""
+    sent_at: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SpooledEmail':
+        names = cls.__dataclass_fields__.keys()
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+def load_export_settings() -> ExportSettings:
+    """Liest die aktuellen Export-Einstellungen (SMTP)"""
+    try:
+        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+            return ExportSettings.from_dict(json.load(f))
+    except Exception as e:
+        logger.error(f"Einstellungen für den E-Mail-Versand nicht lesbar: {e}")
+        return ExportSettings()
+
+
+def retry_delay(attempts: int) -> float:
+    """Wartezeit nach dem n-ten fehlgeschlagenen Versuch"""
+    return min(RETRY_MAX, RETRY_BASE * (2 ** max(0, attempts - 1)))
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Dauerhafte Ablehnung durch den Server (5xx), außer Anmeldefehlern"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class EmailSpool:
+    """Dauerhafte Warteschlange mit Hintergrund-Versand"""
+
+    def __init__(self, spool_dir: str = DEFAULT_SPOOL_DIR,
+                 settings_loader: Callable[[], ExportSettings] = load_export_settings):
+        self.spool_dir = spool_dir
+        self.queue_dir = os.path.join(spool_dir, "queue")
+        self.sent_dir = os.path.join(spool_dir, "sent")
+        self.failed_dir = os.path.join(spool_dir, "failed")
+        for directory in (self.queue_dir, self.sent_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self._settings_loader = settings_loader
+        self.digests = DigestCollector(os.path.join(spool_dir, "digest"), self.enqueue,
+                                       os.path.join(spool_dir, "digest_failed"))
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._wakeup = False
+        self._last_purge = 0.0
+
+    def enqueue(self, msg: StreamingMessage, recipients: Sequence[str], document: str = "") -> SpooledEmail:
+        """
+        Legt eine Nachricht dauerhaft ab und weckt den Versand.
+
+        Returns:
+            SpooledEmail der abgelegten Nachricht
+        """
+        entry = SpooledEmail(
+            id=f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:12]}",
+            from_addr=parseaddr(str(msg['From'] or ''))[1],
+            recipients=[address.strip() for address in recipients if address and address.strip()],
+            subject=str(msg['Subject'] or ''),
+            document=document,
+            created=datetime.now().isoformat(timespec='seconds')
+        )
+        # Anhänge werden blockweise direkt in die Spool-Datei kodiert
+        self._write_atomic(self._path(self.queue_dir, entry.id, ".eml"), msg.write_to)
+        self._save(entry, self.queue_dir)
+
+        logger.info(f"E-Mail an {', '.join(entry.recipients)} in Warteschlange ({entry.id})")
+        self._wake()
+        return entry
+
+    def add_to_digest(self, group: DigestGroup, attachment_path: str, filename: str,
+                      body: str, document: str = "") -> str:
+        """
+        Sammelt ein Dokument für eine Sammel-E-Mail (siehe core.email_digest).
+
+        Returns:
+            Meldung für das Export-Ergebnis
+        """
+        message = self.digests.add(group, attachment_path, filename, body, document)
+        self._wake()
+        return message
+
+    def start(self):
+        """Startet den Versand (sendet auch Nachrichten aus früheren Läufen)"""
+        settings = self._settings_loader()
+        if settings.smtp_server and settings.smtp_auth_method == AuthMethod.OAUTH2:
+            # Tokens schon vor dem ersten Versand im Hintergrund aktuell halten
+            get_oauth2_refresher().register(settings)
+        with self._cond:
+            self._ensure_thread()
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Beendet den Versand nach der laufenden Nachricht; der Rest bleibt im Spool"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("E-Mail-Versand beim Beenden nicht abgeschlossen")
+
+    def _wake(self):
+        """Startet einen Versanddurchlauf"""
+        with self._cond:
+            self._wakeup = True
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def _ensure_thread(self):
+        """Startet den Versand-Thread bei Bedarf (Sperre gehalten)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="email_spool", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Sendet fällige Nachrichten, bis shutdown() aufgerufen wird"""
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                self._wakeup = False
+
+            # Fehler im Sammelversand dürfen den Versand der Warteschlange nicht aufhalten
+            try:
+                digest_due = self.digests.flush_due()
+            except Exception as e:
+                logger.exception(f"Unerwarteter Fehler im Sammelversand: {e}")
+                digest_due = time.time() + RETRY_BASE
+
+            try:
+                wait = self._drain()
+            except Exception as e:
+                logger.exception(f"Unerwarteter Fehler im E-Mail-Versand: {e}")
+                wait = RETRY_BASE
+
+            if digest_due is not None:
+                digest_wait = max(1.0, digest_due - time.time())
+                wait = digest_wait if wait is None else min(wait, digest_wait)
+
+            with self._cond:
+                # Während des Durchlaufs eingereihte Nachrichten sofort senden
+                if not self._stopped and not self._wakeup:
+                    self._cond.wait(wait)
+
+    def _drain(self) -> Optional[float]:
+        """
+        Sendet alle fälligen Nachrichten.
+
+        Returns:
+            Sekunden bis zur nächsten fälligen Nachricht (None = keine wartet)
+        """
+        self._purge_sent()
+        entries = self._load_queue()
+        if not entries:
+            return None
+
+        settings = self._settings_loader()
+        next_due = None
+        for entry in entries:
+            with self._cond:
+                if self._stopped:
+                    return None
+            now = time.time()
+            if entry.next_attempt > now:
+                next_due = min(next_due or entry.next_attempt, entry.next_attempt)
+                continue
+            if not self._deliver(entry, settings):
+                # Server nicht erreichbar - übrige Nachrichten nicht einzeln versuchen
+                return max(1.0, entry.next_attempt - time.time())
+
+        return None if next_due is None else max(1.0, next_due - time.time())
+
+    def _deliver(self, entry: SpooledEmail, settings: ExportSettings) -> bool:
+        """
+        Sendet eine Nachricht und hält das Ergebnis fest.
+
+        Returns:
+            False bei einem vorübergehenden Fehler (weitere Versuche später)
+        """
+        eml_path = self._path(self.queue_dir, entry.id, ".eml")
+        try:
+            if not settings.smtp_server:
+                raise smtplib.SMTPException("SMTP-Server nicht konfiguriert")
+            refused = get_smtp_pool(settings).send_file(entry.from_addr or settings.smtp_from_address,
+                                                         entry.recipients, eml_path)
+        except Exception as e:
+            entry.attempts += 1
+            entry.last_error = str(e)
+            if is_permanent_error(e) or entry.attempts >= MAX_ATTEMPTS:
+                entry.state = FAILED
+                self._move(entry, self.failed_dir)
+                logger.error(f"E-Mail {entry.id} an {', '.join(entry.recipients)} "
+                             f"endgültig fehlgeschlagen nach {entry.attempts} Versuchen: {e}")
+                return True
+
+            entry.next_attempt = time.time() + retry_delay(entry.attempts)
+            self._save(entry, self.queue_dir)
+            logger.warning(f"E-Mail {entry.id} an {', '.join(entry.recipients)} nicht gesendet "
+                           f"(Versuch {entry.attempts}): {e} - neuer Versuch in "
+                           f"{retry_delay(entry.attempts):.0f}s")
+            return False
+
+        entry.attempts += 1
+        entry.state = SENT
+        entry.sent_at = datetime.now().isoformat(timespec='seconds')
+        entry.last_error = "; ".join(f"{address}: {code}" for address, (code, _) in refused.items())
+        self._save(entry, self.sent_dir)
+        self._remove(eml_path)
+        self._remove(self._path(self.queue_dir, entry.id, ".json"))
+        logger.info(f"E-Mail {entry.id} gesendet an {', '.join(entry.recipients)}")
+        return True
+
+    def status(self) -> Dict[str, int]:
+        """Anzahl Nachrichten je Zustand (liest das Spool-Verzeichnis)"""
+        counts = {state: self._count(directory) for state, directory in
+                  ((QUEUED, self.queue_dir), (SENT, self.sent_dir), (FAILED, self.failed_dir))}
+        counts[DIGEST] = self.digests.pending()
+        # Nicht abschickbare Sammelgruppen zählen als fehlgeschlagen
+        counts[FAILED] += self.digests.failed()
+        return counts
+
+    def list_messages(self, state: str = QUEUED) -> List[SpooledEmail]:
+        """Nachrichten eines Zustands, älteste zuerst"""
+        directory = {QUEUED: self.queue_dir, SENT: self.sent_dir, FAILED: self.failed_dir}[state]
+        return self._load_dir(directory)
+
+    def retry_failed(self, message_id: Optional[str] = None) -> int:
+        """
+        Reiht fehlgeschlagene Nachrichten erneut ein.
+
+        Returns:
+            Anzahl erneut eingereihter Nachrichten
+        """
+        count = 0
+        for entry in self._load_dir(self.failed_dir):
+            if message_id and entry.id != message_id:
+                continue
+            entry.state = QUEUED
+            entry.attempts = 0
+            entry.next_attempt = 0.0
+            self._move(entry, self.queue_dir)
+            count += 1
+        if count:
+            self._wake()
+        return count
+
+    def _load_queue(self) -> List[SpooledEmail]:
+        """Wartende Nachrichten; Umschläge ohne Nachricht werden verworfen"""
+        entries = []
+        for entry in self._load_dir(self.queue_dir):
+            if os.path.exists(self._path(self.queue_dir, entry.id, ".eml")):
+                entries.append(entry)
+            else:
+                logger.warning(f"E-Mail {entry.id} ohne Nachrichtendatei - verworfen")
+                self._remove(self._path(self.queue_dir, entry.id, ".json"))
+        return entries
+
+    def _load_dir(self, directory: str) -> List[SpooledEmail]:
+        entries = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    entries.append(SpooledEmail.from_dict(json.load(f)))
+            except Exception as e:
+                logger.error(f"Spool-Eintrag {name} nicht lesbar: {e}")
+        return entries
+
+    def _purge_sent(self):
+        """Entfernt alte Zustellberichte (höchstens einmal pro Stunde)"""
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        for name in os.listdir(self.sent_dir):
+            path = os.path.join(self.sent_dir, name)
+            try:
+                if now - os.path.getmtime(path) > SENT_RETENTION:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    def _save(self, entry: SpooledEmail, directory: str):
+        data = json.dumps(asdict(entry), indent=2, ensure_ascii=False).encode('utf-8')
+        self._write_atomic(self._path(directory, entry.id, ".json"), lambda f: f.write(data))
+
+    def _move(self, entry: SpooledEmail, directory: str):
+        """Verschiebt Nachricht und Umschlag in ein anderes Unterverzeichnis"""
+        for source_dir in (self.queue_dir, self.failed_dir):
+            source = self._path(source_dir, entry.id, ".eml")
+            if source_dir != directory and os.path.exists(source):
+                os.replace(source, self._path(directory, entry.id, ".eml"))
+                self._remove(self._path(source_dir, entry.id, ".json"))
+        self._save(entry, directory)
+
+    @staticmethod
+    def _write_atomic(path: str, write: Callable[[BinaryIO], object]):
+        """Schreibt über eine temporäre Datei, damit kein halber Eintrag entsteht"""
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            EmailSpool._remove(temp_path)
+            raise
+
+    @staticmethod
+    def _count(directory: str) -> int:
+        try:
+            return sum(1 for name in os.listdir(directory) if name.endswith(".json"))
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _path(directory: str, message_id: str, suffix: str) -> str:
+        return os.path.join(directory, f"{message_id}{suffix}")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Spool-Datei {path} konnte nicht gelöscht werden: {e}")
+
+
+# Globale Instanz
+_email_spool = None
+_email_spool_lock = threading.Lock()
+
+
+def get_email_spool() -> EmailSpool:
+    """Gibt die globale EmailSpool-Instanz zurück"""
+    global _email_spool
+    with _email_spool_lock:
+        if _email_spool is None:
+            _email_spool = EmailSpool()
+            logger.debug("Globale EmailSpool-Instanz erstellt")
+        return _email_spool
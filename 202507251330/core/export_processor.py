@@ -5,19 +5,16 @@ import os
 import shutil
 import tempfile
 import json
-import smtplib
-import ssl
 import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from email.utils import parseaddr
 import sys
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import ocrmypdf
 import re
 import fitz
@@ -27,6 +24,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.export_config import ExportConfig, ExportFormat, ExportMethod, EmailConfig, ExportSettings, AuthMethod
 from core.function_parser import FunctionParser, VariableExtractor
 from core.ocr_processor import OCRProcessor
+from core.document_text import get_document_text_cache
+from core.pdfa_batch import get_pdfa_batcher, BATCH_WINDOW, BATCH_MAX_PAGES
+from core.ocrmypdf_runner import OCRmyPDFOptions, analyze_text_layer, run_ocrmypdf
+from core.pdfa_converter import convert_to_pdfa, is_pdfa
+from core.ocr_page_scope import collect_page_scope, LazyText
+from core.export_renditions import RenditionCache, rendition_key
+from core.filename_allocator import get_filename_allocator, discard_if_empty
+from core.export_publisher import get_export_publisher
+from core.ftp_pool import get_ftp_pool
+from core.smtp_pool import get_smtp_pool
+from core.email_spool import get_email_spool
+from core.mime_stream import StreamingMessage
+from core.email_digest import DigestGroup, digest_key
 from core.oauth2_manager import OAuth2Manager, get_token_storage
 
 logger = logging.getLogger(__name__)
@@ -35,14 +45,29 @@ logger = logging.getLogger(__name__)
 class ExportProcessor:
     """Vereinfachter Export-Prozessor mit nur 3 Formaten"""
 
+    # Exporte eines Dokuments laufen parallel (OCRmyPDF-Läufe bleiben nacheinander)
+    MAX_PARALLEL_EXPORTS = 4
+
     def __init__(self):
-        self.function_parser = FunctionParser()
+        self._parsers = threading.local()
         self.variable_extractor = VariableExtractor()
         self.ocr_processor = OCRProcessor()
         self._export_settings = None
-        self._ocr_cache = {}
+        # Angelegte Zieldateien des laufenden Exports (je Thread)
+        self._claimed = threading.local()
+        # Gemeinsame Fassungen je Dokument (Arbeitsdatei -> Cache) während process_exports
+        self._renditions: Dict[str, RenditionCache] = {}
         self._setup_dependencies()
 
+    @property
+    def function_parser(self) -> FunctionParser:
+        """Parser je Thread - FunctionParser hält während der Auswertung Zustand"""
+        parser = getattr(self._parsers, 'parser', None)
+        if parser is None:
+            parser = FunctionParser()
+            self._parsers.parser = parser
+        return parser
+
     def _setup_dependencies(self):
         """Konfiguriert alle Abhängigkeiten für OCRmyPDF"""
         settings = self._get_export_settings()
@@ -247,51 +272,59 @@ class ExportProcessor:
                 logger.debug(f"PATH erweitert mit: {', '.join(new_paths)}")
 
     def _get_unique_filename(self, filepath: str) -> str:
-        """Generiert eindeutigen Dateinamen mit Nummerierung (_1, _2, etc.)"""
-        if not os.path.exists(filepath):
-            return filepath
-
-        directory = os.path.dirname(filepath)
-        filename = os.path.basename(filepath)
-        name, ext = os.path.splitext(filename)
-
-        # Zähler für eindeutigen Dateinamen
-        counter = 1
-        while True:
-            new_filename = f"{name}_{counter}{ext}"
-            new_filepath = os.path.join(directory, new_filename)
-            
-            if not os.path.exists(new_filepath):
-                return new_filepath
-                
-            counter += 1
-            
-            # Sicherheitsgrenze
-            if counter > 9999:
-                # Fallback auf Zeitstempel wenn zu viele Dateien
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_filename = f"{name}_{timestamp}{ext}"
-                return os.path.join(directory, new_filename)
+        """
+        Generiert eindeutigen Dateinamen mit Nummerierung (_1, _2, etc.)
+
+        Die Datei wird dabei leer angelegt (siehe FilenameAllocator), damit
+        parallele Exporte und andere Prozesse nicht denselben Namen erhalten.
+        Bleibt sie leer, entfernt _run_single_export sie nach dem Export.
+        """
+        filepath = get_filename_allocator().allocate(filepath)
+        claimed = getattr(self._claimed, 'files', None)
+        if claimed is not None:
+            claimed.append(filepath)
+        return filepath
 
     def process_exports(self, pdf_path: str, xml_path: Optional[str],
                         export_configs: List[Dict], ocr_zones: List[Dict] = None,
                         xml_field_mappings: List[Dict] = None,
                         original_pdf_path: str = None,
                         input_path: str = None, 
-                        compression_enabled: bool = False) -> List[Tuple[bool, str]]:
+                        compression_enabled: bool = False,
+                        ocr_preprocessing: Any = None,
+                        ocr_language: str = "",
+                        document_variables: Optional[Dict[str, str]] = None) -> List[Tuple[bool, str]]:
         """
         Führt alle konfigurierten Exporte durch
-        """
-        results = []
 
+        Args:
+            document_variables: Zusätzliche Variablen des Dokuments (z.B. Split_Index)
+        """
         # Validiere PDF vor Export
         if not self._validate_pdf(pdf_path):
             return [(False, "PDF-Validierung fehlgeschlagen - Export abgebrochen")]
 
-        # Baue Kontext auf
-        context = self._build_context(pdf_path, xml_path, ocr_zones, 
-                                    xml_field_mappings, input_path)
-        
+        # Baue Kontext auf (OCR nur für die in den Exporten referenzierten Seiten)
+        ocr_streams = []
+        try:
+            context = self._build_context(pdf_path, xml_path, ocr_zones, 
+                                        xml_field_mappings, input_path,
+                                        ocr_preprocessing=ocr_preprocessing,
+                                        export_configs=export_configs,
+                                        ocr_streams=ocr_streams,
+                                        ocr_language=ocr_language)
+            context.update(document_variables or {})
+            return self._run_exports(pdf_path, xml_path, export_configs, context,
+                                     original_pdf_path, input_path, compression_enabled)
+        finally:
+            for stream in ocr_streams:
+                stream.close()
+
+    def _run_exports(self, pdf_path: str, xml_path: Optional[str],
+                     export_configs: List[Dict], context: Dict[str, Any],
+                     original_pdf_path: Optional[str], input_path: Optional[str],
+                     compression_enabled: bool) -> List[Tuple[bool, str]]:
+        """Führt die Exporte mit dem aufgebauten Kontext aus"""
         # Überschreibe mit Original-Pfad-Informationen wenn vorhanden
         if original_pdf_path and input_path:
             level_vars = self.variable_extractor.get_level_variables(original_pdf_path, input_path)
@@ -307,7 +340,8 @@ class ExportProcessor:
                 context['FileName'] = original_filename
                 context['FullFileName'] = original_fullname
 
-        # Verarbeite jeden Export
+        # Aktive Exporte in Konfigurationsreihenfolge (Fehler beim Laden an ihrer Stelle)
+        exports = []
         for export_dict in export_configs:
             try:
                 if isinstance(export_dict, ExportConfig):
@@ -315,28 +349,62 @@ class ExportProcessor:
                 else:
                     export = ExportConfig.from_dict(export_dict)
 
-                if not export.enabled:
-                    continue
-
-                # Log Export-Start
-                logger.info(f"Starte Export '{export.name}' ({export.export_format.value})")
-
-                success, message = self._process_single_export(
-                    pdf_path, xml_path, export, context, compression_enabled
-                )
-                results.append((success, message))
-
-                if success:
-                    logger.info(f"Export '{export.name}' erfolgreich: {message}")
-                else:
-                    logger.error(f"Export '{export.name}' fehlgeschlagen: {message}")
+                if export.enabled:
+                    exports.append(export)
 
             except Exception as e:
                 logger.exception(f"Kritischer Fehler bei Export '{export_dict.get('name', 'Unbekannt')}'")
-                results.append((False, f"Export-Fehler: {str(e)}"))
+                exports.append((False, f"Export-Fehler: {str(e)}"))
+
+        def run(export) -> Tuple[bool, str]:
+            if isinstance(export, tuple):
+                return export
+            return self._run_single_export(pdf_path, xml_path, export, context, compression_enabled)
+
+        # Unabhängige Exporte laufen parallel, Ergebnisse in Konfigurationsreihenfolge
+        self._renditions[pdf_path] = RenditionCache(os.path.dirname(pdf_path))
+        try:
+            pending = [export for export in exports if not isinstance(export, tuple)]
+            if len(pending) <= 1:
+                results = [run(export) for export in exports]
+            else:
+                workers = min(self.MAX_PARALLEL_EXPORTS, len(pending))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as executor:
+                    results = list(executor.map(run, exports))
+        finally:
+            self._renditions.pop(pdf_path).close()
 
         return results
 
+    def _run_single_export(self, pdf_path: str, xml_path: Optional[str],
+                           export: ExportConfig, context: Dict[str, Any],
+                           compression_enabled: bool) -> Tuple[bool, str]:
+        """Ein Export mit Protokollierung (läuft ggf. in einem Worker-Thread)"""
+        self._claimed.files = []
+        try:
+            # Log Export-Start
+            logger.info(f"Starte Export '{export.name}' ({export.export_format.value})")
+
+            success, message = self._process_single_export(
+                pdf_path, xml_path, export, context, compression_enabled
+            )
+
+            if success:
+                logger.info(f"Export '{export.name}' erfolgreich: {message}")
+            else:
+                logger.error(f"Export '{export.name}' fehlgeschlagen: {message}")
+            return success, message
+
+        except Exception as e:
+            logger.exception(f"Kritischer Fehler bei Export '{export.name}'")
+            return False, f"Export-Fehler: {str(e)}"
+
+        finally:
+            # Angelegte, aber nicht geschriebene Zieldateien (Fehler, Sammellauf)
+            for filepath in self._claimed.files:
+                discard_if_empty(filepath)
+            self._claimed.files = None
+
     def _validate_pdf(self, pdf_path: str) -> bool:
         """Validiert PDF vor Export"""
         try:
@@ -359,8 +427,19 @@ class ExportProcessor:
     def _build_context(self, pdf_path: str, xml_path: Optional[str],
                        ocr_zones: List[Dict] = None,
                        xml_field_mappings: List[Dict] = None,
-                       input_path: str = None) -> Dict[str, Any]:
-        """Baut erweiterten Kontext für Variablen auf"""
+                       input_path: str = None,
+                       ocr_preprocessing: Any = None,
+                       export_configs: List[Dict] = None,
+                       ocr_streams: Optional[List] = None,
+                       ocr_language: str = "") -> Dict[str, Any]:
+        """
+        Baut erweiterten Kontext für Variablen auf
+
+        Args:
+            export_configs: Exporte, deren Ausdrücke die benötigten OCR-Seiten bestimmen
+            ocr_streams: Nimmt gestartete Seiten-OCR auf; der Aufrufer schließt sie
+            ocr_language: OCR-Sprache des Hotfolders (leer = Einstellungen, 'auto')
+        """
         context = {}
 
         # Basis-Dateiinformationen
@@ -403,16 +482,24 @@ class ExportProcessor:
             for i in range(6):
                 context[f'level{i}'] = ""
 
-        # OCR-Volltext
-        if ocr_zones:
-            if pdf_path not in self._ocr_cache:
-                full_text = self.ocr_processor.extract_text_from_pdf(pdf_path)
-                self._ocr_cache[pdf_path] = full_text
-            else:
-                full_text = self._ocr_cache[pdf_path]
-
-            context['OCR_FullText'] = full_text
+        # Wirksame OCR-Sprache (bei "auto" erst bei Verwendung erkannt)
+        context['OCR_Language'] = LazyText(
+            lambda: self.ocr_processor.resolve_language(pdf_path, ocr_language))
+
+        # OCR-Text: nur referenzierte Seiten, im Hintergrund erkannt
+        scope = collect_page_scope(export_configs or [])
+        if scope.needed:
+            variables, stream = self.ocr_processor.page_scope_variables(
+                pdf_path, scope, language=ocr_language or None, preprocessing=ocr_preprocessing)
+            if stream is not None:
+                if ocr_streams is not None:
+                    ocr_streams.append(stream)
+                else:
+                    variables = {name: str(value) for name, value in variables.items()}
+                    stream.close()
+            context.update(variables)
 
+        if ocr_zones:
             # OCR-Zonen
             for zone_dict in ocr_zones:
                 zone_name = zone_dict.get('name', 'Unnamed')
@@ -429,7 +516,11 @@ class ExportProcessor:
                     )
 
                 zone_text = self.ocr_processor.extract_text_from_zone(
-                    pdf_path, page_num, zone_coords
+                    pdf_path, page_num, zone_coords,
+                    language=zone_dict.get('language') or ocr_language or None,
+                    validation_regex=zone_dict.get('validation_regex', ''),
+                    strategy_key=zone_dict.get('strategy_key'),
+                    preprocessing=zone_dict.get('preprocessing')
                 )
                 
                 context[zone_name] = zone_text
@@ -464,6 +555,8 @@ class ExportProcessor:
                 return self._export_to_file(pdf_path, xml_path, export, context, compression_enabled)
             elif export.export_method == ExportMethod.EMAIL:
                 return self._export_to_email(pdf_path, xml_path, export, context, compression_enabled)
+            elif export.export_method == ExportMethod.FTP:
+                return self._export_to_ftp(pdf_path, xml_path, export, context, compression_enabled)
             else:
                 return False, f"Export-Methode {export.export_method} nicht unterstützt"
 
@@ -474,7 +567,13 @@ class ExportProcessor:
     def _export_to_file(self, pdf_path: str, xml_path: Optional[str],
                         export: ExportConfig, context: Dict[str, Any],
                         compression_enabled: bool = False) -> Tuple[bool, str]:
-        """Datei-Export mit nur 3 Formaten"""
+        """
+        Datei-Export mit nur 3 Formaten
+
+        Die Datei wird lokal erzeugt und über den ExportPublisher atomar
+        (temporärer Name, dann Umbenennen) in den Exportordner übertragen -
+        mit export_write_behind im Hintergrund.
+        """
         # Evaluiere Pfad und Dateiname
         export_path = self.function_parser.parse_and_evaluate(
             export.export_path_expression, context
@@ -488,22 +587,166 @@ class ExportProcessor:
         )
         export_filename = self.sanitize_filename(export_filename)
 
-        # Erstelle Export-Pfad
-        os.makedirs(export_path, exist_ok=True)
+        if (export.export_format == ExportFormat.SEARCHABLE_PDF_A
+                and self._is_pdf_a_batched(pdf_path, export.format_params,
+                                           str(context.get('OCR_Language', '')))):
+            # Sammellauf schreibt die Datei zeitversetzt selbst (temporär, dann umbenannt)
+            return self._export_pdf_a(pdf_path, export_path, export_filename, export.format_params,
+                                      language=str(context.get('OCR_Language', '')), allow_batch=True)
+
+        work_dir = get_export_publisher().work_area()
+        try:
+            success, message, local_path = self._create_export_file(
+                pdf_path, xml_path, export, context, compression_enabled, work_dir, export_filename)
+            if not success:
+                return False, message
+
+            return self._publish_file(local_path, export_path, message,
+                                      str(context.get('FileName', '')))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
+    def _is_pdf_a_batched(self, pdf_path: str, params: Dict[str, Any], language: str = "") -> bool:
+        """
+        Prüft ob ein PDF/A-Export in den Sammellauf geht: nur vollständig
+        gescannte Dokumente ohne bereits erzeugte PDF/A-Fassung. Alle anderen
+        werden lokal erzeugt und veröffentlicht.
+        """
+        if not params.get('batch'):
+            return False
+        if not analyze_text_layer(pdf_path).fully_scanned:
+            return False
+        ocr_language = self.ocr_processor.resolve_language(pdf_path, params.get('language'), language)
+        return not get_document_text_cache().has_searchable_pdfa(pdf_path, ocr_language)
+
+    def _create_export_file(self, pdf_path: str, xml_path: Optional[str],
+                            export: ExportConfig, context: Dict[str, Any],
+                            compression_enabled: bool, work_dir: str,
+                            export_filename: str) -> Tuple[bool, str, Optional[str]]:
+        """Erzeugt die Exportdatei im lokalen Arbeitsordner: (Erfolg, Meldung, Pfad)"""
         # Format-spezifische Verarbeitung
         if export.export_format == ExportFormat.PDF:
-            return self._export_pdf(pdf_path, export_path, export_filename, 
-                                   export.format_params, compression_enabled)
-            
+            success, message = self._export_pdf_rendition(pdf_path, work_dir, export_filename,
+                                                          export.format_params, compression_enabled)
         elif export.export_format == ExportFormat.SEARCHABLE_PDF_A:
-            return self._export_pdf_a(pdf_path, export_path, export_filename, export.format_params)
-            
+            success, message = self._export_pdf_a_rendition(
+                pdf_path, work_dir, export_filename, export.format_params,
+                compression_enabled, str(context.get('OCR_Language', '')))
         elif export.export_format == ExportFormat.XML:
-            return self._export_xml(xml_path, export_path, export_filename)
-            
+            success, message = self._export_xml(xml_path, work_dir, export_filename)
         else:
-            return False, f"Format {export.export_format} nicht implementiert"
+            return False, f"Format {export.export_format} nicht implementiert", None
+
+        if not success:
+            return False, message, None
+
+        files = [name for name in os.listdir(work_dir) if os.path.getsize(os.path.join(work_dir, name))]
+        if not files:
+            return False, "Exportdatei konnte nicht erstellt werden", None
+        return True, message, os.path.join(work_dir, files[0])
+
+    def _export_to_ftp(self, pdf_path: str, xml_path: Optional[str],
+                       export: ExportConfig, context: Dict[str, Any],
+                       compression_enabled: bool = False) -> Tuple[bool, str]:
+        """
+        FTP(S)-/SFTP-Export: Datei lokal erzeugen und über den Verbindungspool
+        des Servers hochladen (temporärer Name, dann Umbenennen - siehe core.ftp_pool)
+        """
+        ftp_config = export.ftp_config
+        if not ftp_config or not ftp_config.host.strip():
+            return False, "Keine FTP-Konfiguration vorhanden"
+
+        remote_dir = self.function_parser.parse_and_evaluate(
+            export.export_path_expression, context
+        ) if export.export_path_expression else ""
+
+        export_filename = self.function_parser.parse_and_evaluate(
+            export.export_filename_expression, context
+        )
+        export_filename = self.sanitize_filename(export_filename)
+
+        work_dir = get_export_publisher().work_area()
+        try:
+            success, message, local_path = self._create_export_file(
+                pdf_path, xml_path, export, context, compression_enabled, work_dir, export_filename)
+            if not success:
+                return False, message
+
+            try:
+                pool = get_ftp_pool(ftp_config)
+                remote_path = pool.upload(local_path, remote_dir, os.path.basename(local_path),
+                                          resume_bytes=max(0, ftp_config.resume_mb) * 1024 * 1024)
+            except Exception as e:
+                logger.error(f"FTP-Upload nach {ftp_config.host} fehlgeschlagen: {e}")
+                return False, f"FTP-Upload fehlgeschlagen: {str(e)}"
+
+            description = message.rsplit(': ', 1)[0]
+            return True, f"{description} (FTP {pool.name}): {remote_path}"
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _publish_file(self, local_path: str, export_path: str, message: str,
+                      document: str) -> Tuple[bool, str]:
+        """Überträgt eine lokal erzeugte Exportdatei in den Exportordner"""
+        settings = self._get_export_settings()
+        publisher = get_export_publisher()
+        filename = os.path.basename(local_path)
+        description = message.rsplit(': ', 1)[0]
+
+        entry = publisher.stage(local_path, export_path, filename, document=document)
+        if settings.export_write_behind:
+            publisher.submit(entry, settings.export_queue_per_target)
+            return True, f"{description}: {filename} (Übertragung nach {export_path} eingereiht)"
+
+        try:
+            final_path = publisher.publish(entry)
+        except OSError as e:
+            logger.error(f"Übertragung nach {export_path} fehlgeschlagen: {e}")
+            return False, f"Übertragung nach {export_path} fehlgeschlagen: {str(e)}"
+        return True, f"{description}: {os.path.basename(final_path)}"
+
+    def _export_pdf_rendition(self, pdf_path: str, export_path: str, filename: str,
+                              params: Dict[str, Any], compression_enabled: bool) -> Tuple[bool, str]:
+        """PDF-Export; mit Metadaten-Aktualisierung über den Fassungs-Cache"""
+        if not params.get('update_metadata', False):
+            # Reine Kopie - ein Cache würde nur eine weitere Kopie erzeugen
+            return self._export_pdf(pdf_path, export_path, filename, params, compression_enabled)
+        return self._export_rendition(
+            pdf_path, rendition_key(ExportFormat.PDF, params, compression_enabled),
+            export_path, filename,
+            lambda target_dir, name: self._export_pdf(pdf_path, target_dir, name, params, compression_enabled))
+
+    def _export_pdf_a_rendition(self, pdf_path: str, export_path: str, filename: str,
+                                params: Dict[str, Any], compression_enabled: bool,
+                                language: str) -> Tuple[bool, str]:
+        """Durchsuchbares PDF/A über den Fassungs-Cache (einmal je Dokument und Parametern)"""
+        return self._export_rendition(
+            pdf_path, rendition_key(ExportFormat.SEARCHABLE_PDF_A, params, compression_enabled, language),
+            export_path, filename,
+            lambda target_dir, name: self._export_pdf_a(pdf_path, target_dir, name, params,
+                                                        language=language))
+
+    def _export_rendition(self, pdf_path: str, key: Tuple, export_path: str, filename: str,
+                          producer) -> Tuple[bool, str]:
+        """
+        Holt die Fassung aus dem Cache des Dokuments (erzeugt sie beim ersten
+        Export) und kopiert sie nach export_path/filename. Außerhalb von
+        process_exports wird direkt erzeugt.
+        """
+        renditions = self._renditions.get(pdf_path)
+        if renditions is None:
+            return producer(export_path, filename)
+
+        success, message, rendition_path = renditions.get(key, producer)
+        if not success:
+            return False, message
+
+        ext = os.path.splitext(rendition_path)[1]
+        output_file = self._get_unique_filename(os.path.join(export_path, f"{filename}{ext}"))
+        shutil.copy2(rendition_path, output_file)
+        # Meldung der Erzeugung, aber mit dem Namen dieses Exports
+        description = message.rsplit(': ', 1)[0]
+        return True, f"{description}: {os.path.basename(output_file)}"
 
     def _export_pdf(self, pdf_path: str, export_path: str, filename: str, 
                     params: Dict[str, Any], compression_enabled: bool = False) -> Tuple[bool, str]:
@@ -543,14 +786,53 @@ class ExportProcessor:
             return False, f"PDF-Export-Fehler: {str(e)}"
 
     def _export_pdf_a(self, pdf_path: str, export_path: str, filename: str,
-                      params: Dict[str, Any]) -> Tuple[bool, str]:
-        """Exportiert als durchsuchbares PDF/A"""
+                      params: Dict[str, Any], language: str = "",
+                      allow_batch: bool = False) -> Tuple[bool, str]:
+        """
+        Exportiert als durchsuchbares PDF/A
+
+        Die Sprache aus den Format-Parametern hat Vorrang vor der des Hotfolders
+        (language) und der Standardsprache aus den Einstellungen.
+
+        Mit params['batch'] werden Scans gesammelt und gemeinsam erkannt
+        (siehe PDFABatcher); die Datei erscheint dann zeitversetzt. Nur für
+        Datei-Exporte (allow_batch) - E-Mail-Anhänge werden sofort gebraucht.
+        Optional: 'batch_window' (Sekunden), 'batch_pages' (Seiten je Lauf).
+
+        Vorhandener Text wird je Seite erkannt; OCR läuft nur für Seiten ohne
+        Text (weitere Schalter siehe core.ocrmypdf_runner). Haben alle Seiten
+        Text, wird ohne OCRmyPDF konvertiert (core.pdfa_converter; abschaltbar
+        mit params['fast_pdfa'] = False). Ist die Datei bereits PDF/A mit
+        Textebene (PDF/A-Aktion des Hotfolders), wird sie nur kopiert.
+        """
         try:
             output_file = os.path.join(export_path, f"{filename}.pdf")
             output_file = self._get_unique_filename(output_file)
             
             logger.info(f"Starte PDF/A-Export (durchsuchbar)")
             
+            # Prüfe zuerst je Seite, ob die PDF bereits Text hat
+            layer = analyze_text_layer(pdf_path)
+            logger.info(f"Textprüfung: {layer.describe()}")
+            ocr_options = OCRmyPDFOptions.from_params(params)
+            
+            # Bereits in der Vorverarbeitung erzeugt: von allen Exporten übernommen
+            if (layer.page_count and not layer.needs_ocr
+                    and ocr_options.ocr_mode in ('auto', 'skip_text') and is_pdfa(pdf_path)):
+                shutil.copy2(pdf_path, output_file)
+                return True, f"PDF/A exportiert (aus Vorverarbeitung): {os.path.basename(output_file)}"
+            
+            # Digital erzeugte PDFs (Text auf allen Seiten): ohne OCRmyPDF
+            if (params.get('fast_pdfa', True) and layer.page_count and not layer.needs_ocr
+                    and ocr_options.ocr_mode in ('auto', 'skip_text')):
+                self._setup_dependencies()
+                conversion = convert_to_pdfa(pdf_path, output_file)
+                if conversion.success:
+                    via = " über Ghostscript" if conversion.used_ghostscript else ""
+                    return True, f"PDF/A exportiert (ohne OCR{via}): {os.path.basename(output_file)}"
+                logger.info(f"Schnelle PDF/A-Konvertierung nicht möglich ({conversion.describe()}), "
+                            f"verwende OCRmyPDF")
+            
             # Prüfe ob Tesseract verfügbar ist
             tesseract_available = self._check_tesseract()
             if not tesseract_available:
@@ -564,63 +846,51 @@ class ExportProcessor:
             # Stelle sicher, dass PATH aktuell ist
             self._setup_dependencies()
             
-            # Prüfe zuerst, ob die PDF bereits Text hat
-            has_text = self._check_pdf_has_text(pdf_path)
-            logger.info(f"PDF hat {'bereits' if has_text else 'keinen'} Text")
+            ocr_language = self.ocr_processor.resolve_language(
+                pdf_path, params.get('language'), language)
             
             try:
-                # Erstelle temporäre Datei für die Ausgabe
-                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_output:
-                    temp_output_path = temp_output.name
-                
-                if not has_text:
-                    # OCR ist erforderlich
+                if layer.fully_scanned:
+                    # OCR ist erforderlich - ein gemeinsamer OCRmyPDF-Lauf liefert
+                    # PDF/A und OCR_FullText (siehe DocumentTextCache)
                     logger.debug("Führe OCR mit OCRmyPDF aus")
                     
-                    # OCRmyPDF mit minimalen Optionen aufrufen
-                    result = ocrmypdf.ocr(
-                        input_file=pdf_path,
-                        output_file=temp_output_path,
-                        output_type='pdfa',
-                        language=params.get('language', 'deu'),
-                        force_ocr=True,
-                        skip_text=False,
-                        clean=False,
-                        deskew=False,
-                        rotate_pages=True,
-                        optimize=0,
-                        jpg_quality=0,  # Keine JPEG-Komprimierung
-                        png_quality=0,  # Keine PNG-Komprimierung
-                        jbig2_lossy=False,
-                        progress_bar=False,
-                        tesseract_timeout=params.get('timeout', 600)
+                    if (allow_batch and params.get('batch')
+                            and not get_document_text_cache().has_searchable_pdfa(pdf_path, ocr_language)):
+                        # Der Sammellauf vergibt den Namen erst beim Schreiben
+                        discard_if_empty(output_file)
+                        job = get_pdfa_batcher().submit(
+                            pdf_path, os.path.join(export_path, f"{filename}.pdf"),
+                            language=ocr_language,
+                            options=ocr_options,
+                            window=params.get('batch_window', BATCH_WINDOW),
+                            max_pages=params.get('batch_pages', BATCH_MAX_PAGES)
+                        )
+                        return True, f"PDF/A (Durchsuchbar) für Sammellauf eingereiht: {job.name}"
+                    
+                    pdfa_path = get_document_text_cache().get_searchable_pdfa(
+                        pdf_path,
+                        language=ocr_language,
+                        options=ocr_options
                     )
                     
-                    if result == ocrmypdf.ExitCode.ok:
-                        # Verschiebe temporäre Datei zum finalen Ziel
-                        shutil.move(temp_output_path, output_file)
-                        return True, f"PDF/A (Durchsuchbar) exportiert: {os.path.basename(output_file)}"
-                    else:
-                        # Lösche temporäre Datei bei Fehler
-                        if os.path.exists(temp_output_path):
-                            os.unlink(temp_output_path)
-                        logger.error(f"OCRmyPDF fehlgeschlagen mit Code: {result}")
-                        return False, f"PDF/A-Konvertierung fehlgeschlagen (Code: {result})"
+                    # Fassung gehört dem Cache (ggf. für weitere Exporte) - kopieren
+                    shutil.copy2(pdfa_path, output_file)
+                    return True, f"PDF/A (Durchsuchbar) exportiert: {os.path.basename(output_file)}"
                         
                 else:
-                    # Hat bereits Text - nur PDF/A-Konvertierung
-                    logger.debug("Konvertiere zu PDF/A ohne OCR")
+                    # Hat bereits Text - PDF/A-Konvertierung, OCR nur für Seiten ohne Text
+                    if layer.needs_ocr:
+                        logger.debug(f"Konvertiere zu PDF/A, OCR für Seiten {sorted(layer.scanned_pages)}")
+                    else:
+                        logger.debug("Konvertiere zu PDF/A ohne OCR")
                     
-                    result = ocrmypdf.ocr(
-                        input_file=pdf_path,
-                        output_file=temp_output_path,
-                        output_type='pdfa',
-                        skip_text=True,
-                        force_ocr=False,
-                        optimize=0,
-                        progress_bar=False,
-                        tesseract_timeout=0
-                    )
+                    # Erstelle temporäre Datei für die Ausgabe
+                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_output:
+                        temp_output_path = temp_output.name
+                    
+                    result = run_ocrmypdf(pdf_path, temp_output_path, ocr_language,
+                                          ocr_options, layer=layer)
                     
                     if result == ocrmypdf.ExitCode.ok:
                         # Verschiebe temporäre Datei zum finalen Ziel
@@ -696,29 +966,6 @@ class ExportProcessor:
         except:
             return False
 
-    def _check_pdf_has_text(self, pdf_path: str) -> bool:
-        """Prüft ob eine PDF bereits Text enthält"""
-        try:
-            doc = fitz.open(pdf_path)
-            
-            # Prüfe die ersten paar Seiten
-            pages_to_check = min(3, doc.page_count)
-            total_text = ""
-            
-            for i in range(pages_to_check):
-                page = doc[i]
-                text = page.get_text()
-                total_text += text
-            
-            doc.close()
-            
-            # Wenn mehr als 50 Zeichen Text gefunden wurden, hat die PDF Text
-            return len(total_text.strip()) > 50
-            
-        except Exception as e:
-            logger.error(f"Fehler beim Prüfen auf Text: {e}")
-            return False
-
     def _export_xml(self, xml_path: Optional[str], export_path: str, 
                     filename: str) -> Tuple[bool, str]:
         """Exportiert XML-Datei"""
@@ -753,12 +1000,13 @@ class ExportProcessor:
                 # Erstelle Anhang im gewünschten Format
                 if export.export_format == ExportFormat.PDF:
                     attachment_path = os.path.join(temp_dir, f"{export_filename}.pdf")
-                    success, message = self._export_pdf(pdf_path, temp_dir, export_filename, 
-                                                       export.format_params, compression_enabled)
+                    success, message = self._export_pdf_rendition(pdf_path, temp_dir, export_filename,
+                                                                  export.format_params, compression_enabled)
                 elif export.export_format == ExportFormat.SEARCHABLE_PDF_A:
                     attachment_path = os.path.join(temp_dir, f"{export_filename}.pdf")
-                    success, message = self._export_pdf_a(pdf_path, temp_dir, export_filename, 
-                                                         export.format_params)
+                    success, message = self._export_pdf_a_rendition(
+                        pdf_path, temp_dir, export_filename, export.format_params,
+                        compression_enabled, str(context.get('OCR_Language', '')))
                 elif export.export_format == ExportFormat.XML:
                     attachment_path = os.path.join(temp_dir, f"{export_filename}.xml")
                     success, message = self._export_xml(xml_path, temp_dir, export_filename)
@@ -787,8 +1035,8 @@ class ExportProcessor:
                    settings: ExportSettings) -> Tuple[bool, str]:
         """Sendet E-Mail"""
         try:
-            # Erstelle Nachricht
-            msg = MIMEMultipart('mixed')
+            # Erstelle Nachricht (Anhang wird erst beim Schreiben blockweise kodiert)
+            msg = StreamingMessage()
 
             # Evaluiere E-Mail-Felder
             recipient = self.function_parser.parse_and_evaluate(
@@ -809,6 +1057,7 @@ class ExportProcessor:
 
             # CC/BCC
             recipients = [recipient]
+            cc = ""
             if email_config.cc:
                 cc = self.function_parser.parse_and_evaluate(email_config.cc, context)
                 if cc:
@@ -820,45 +1069,51 @@ class ExportProcessor:
                 if bcc:
                     recipients.extend(bcc.split(','))
 
-            # Body
-            msg_body = MIMEMultipart('alternative')
-            msg_body.attach(MIMEText(body, 'plain', 'utf-8'))
-            msg.attach(msg_body)
-
-            # Anhang
-            with open(attachment_path, 'rb') as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-
-                # Content-Disposition mit korrektem Dateinamen
-                ext = Path(attachment_path).suffix
-                part.add_header(
-                    'Content-Disposition',
-                    'attachment',
-                    filename=f"{attachment_name}{ext}"
+            ext = Path(attachment_path).suffix
+
+            # Sammelversand: Dokument wird gesammelt, die Nachricht entsteht später
+            if email_config.digest_enabled:
+                group = subject
+                if email_config.digest_group_expression:
+                    group = self.function_parser.parse_and_evaluate(
+                        email_config.digest_group_expression, context
+                    )
+                limits = (max(1, int(email_config.digest_window_minutes)) * 60,
+                          max(1, int(email_config.digest_max_attachments)),
+                          max(1, int(email_config.digest_max_mb)) * 1024 * 1024)
+                recipients = [address.strip() for address in recipients if address.strip()]
+                digest = DigestGroup(
+                    key=digest_key(settings.smtp_from_address, recipient, cc, ",".join(recipients),
+                                   str(group), *map(str, limits)),
+                    from_header=settings.smtp_from_address, to_header=recipient, cc_header=cc,
+                    recipients=recipients, subject=subject,
+                    window=limits[0], max_attachments=limits[1], max_bytes=limits[2]
                 )
-                msg.attach(part)
+                message = get_email_spool().add_to_digest(digest, attachment_path,
+                                                          f"{attachment_name}{ext}", body,
+                                                          document=attachment_name)
+                return True, f"{message}: {recipient}"
 
-            # SMTP-Verbindung
-            if settings.smtp_use_ssl and settings.smtp_port == 465:
-                context_ssl = ssl.create_default_context()
-                server = smtplib.SMTP_SSL(settings.smtp_server, settings.smtp_port, context=context_ssl)
-            else:
-                server = smtplib.SMTP(settings.smtp_server, settings.smtp_port)
-                server.ehlo()
-                if settings.smtp_use_tls:
-                    context_ssl = ssl.create_default_context()
-                    server.starttls(context=context_ssl)
-                    server.ehlo()
-
-            # Authentifizierung
-            if settings.smtp_username and settings.smtp_password:
-                server.login(settings.smtp_username, settings.smtp_password)
-
-            # Sende E-Mail
-            server.send_message(msg, to_addrs=recipients)
-            server.quit()
+            # Body
+            msg.add_text(body)
+
+            # Anhang mit korrektem Dateinamen
+            msg.add_attachment(attachment_path, f"{attachment_name}{ext}")
+
+            # Im Hintergrund senden: Export gilt mit dem Ablegen im Spool als erledigt
+            if settings.smtp_use_spool:
+                entry = get_email_spool().enqueue(msg, recipients, document=attachment_name)
+                return True, f"E-Mail an {recipient} in Warteschlange ({entry.id})"
+
+            # Sende E-Mail über eine Verbindung aus dem Pool (aus einer Datei, nicht im Speicher)
+            fd, message_file = tempfile.mkstemp(suffix='.eml', dir=os.path.dirname(attachment_path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    msg.write_to(f)
+                get_smtp_pool(settings).send_file(parseaddr(settings.smtp_from_address)[1],
+                                                  recipients, message_file)
+            finally:
+                os.unlink(message_file)
 
             logger.info(f"E-Mail erfolgreich gesendet an {recipient}")
             return True, f"E-Mail gesendet an {recipient}"
@@ -0,0 +1,478 @@
+"""
+Atomare Übertragung von Datei-Exporten in die Exportordner (Write-Behind)
+
+Bisher wurden Exporte direkt in den Exportordner kopiert. Nachgelagerte
+Systeme (ERP, DMS) konnten dabei halb geschriebene Dateien lesen, und ein
+langsames Netzlaufwerk hielt den Export-Worker auf.
+
+Datei-Exporte werden jetzt lokal im Staging-Verzeichnis erzeugt und dann
+veröffentlicht: die Datei wird unter einem temporären Namen (.name.id.part)
+in den Zielordner kopiert und erst vollständig auf ihren endgültigen,
+eindeutigen Namen umbenannt (siehe FilenameAllocator.publish).
+
+Mit Write-Behind übernimmt das ein Hintergrund-Pool: je Ziel (Laufwerk bzw.
+Freigabe) eine begrenzte Warteschlange mit eigenen Workern, damit ein
+langsames Ziel die übrigen nicht aufhält. Ist die Warteschlange voll, wartet
+der Export (Gegendruck). Vorübergehende Fehler werden mit wachsendem Abstand
+wiederholt; nach MAX_ATTEMPTS Versuchen bleibt die Datei in failed/. Noch
+nicht übertragene Dateien liegen mit ihrem Ziel in pending/ und werden nach
+einem Neustart übertragen.
+
+Je Ziel werden Durchsatz und Latenz (Staging bis Veröffentlichung) erfasst
+und mit report_stats() protokolliert.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import tempfile
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from core.filename_allocator import get_filename_allocator
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGING_DIR = "config/export_staging"
+
+# Warteschlange und Worker je Ziel
+MAX_QUEUED = 32
+WORKERS_PER_TARGET = 2
+
+# Wiederholungen: 5, 10, 20, ... Sekunden, höchstens fünf Minuten Abstand
+RETRY_BASE = 5.0
+RETRY_MAX = 300.0
+MAX_ATTEMPTS = 8
+
+# Zeitlimit für shutdown() (laufende Übertragungen abwarten)
+SHUTDOWN_TIMEOUT = 30
+
+# Gemerkte Ordner (angelegt bzw. Ziel bekannt); darüber wird neu begonnen
+MAX_CACHED_DIRS = 4096
+
+_COPY_CHUNK = 1024 * 1024
+_TEMP_SUFFIX = ".part"
+
+
+@dataclass
+class StagedFile:
+    """Lokal erzeugte Exportdatei und ihr Ziel"""
+    id: str
+    target_dir: str
+    filename: str
+    document: str = ""
+    size: int = 0
+    staged_at: float = 0.0
+    attempts: int = 0
+    last_error: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StagedFile':
+        names = cls.__dataclass_fields__.keys()
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+@dataclass
+class TargetStats:
+    """Durchsatz und Latenz der Übertragungen zu einem Ziel"""
+    target: str
+    files: int = 0
+    bytes: int = 0
+    failures: int = 0
+    transfer_time: float = 0.0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    queued: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes je Sekunde Übertragungszeit"""
+        return self.bytes / self.transfer_time if self.transfer_time > 0 else 0.0
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.files if self.files else 0.0
+
+    def describe(self) -> str:
+        return (f"{self.target}: {self.files} Datei(en), {self.bytes / 1048576:.1f} MB, "
+                f"{self.throughput / 1048576:.2f} MB/s, Latenz Ø {self.latency_avg:.2f}s "
+                f"(max {self.latency_max:.2f}s), {self.queued} wartend, {self.failures} Fehler")
+
+
+def retry_delay(attempts: int) -> float:
+    """Wartezeit nach dem n-ten fehlgeschlagenen Versuch"""
+    return min(RETRY_MAX, RETRY_BASE * (2 ** max(0, attempts - 1)))
+
+
+def target_of(directory: str) -> str:
+    """Ziel eines Ordners: Laufwerk/Freigabe bzw. Einhängepunkt"""
+    path = os.path.abspath(directory)
+    drive = os.path.splitdrive(path)[0]
+    if drive:
+        return os.path.normcase(drive)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class _Target:
+    """Warteschlange, Worker und Statistik eines Ziels"""
+
+    def __init__(self, name: str, max_queued: int):
+        self.queue: "queue.Queue[StagedFile]" = queue.Queue(max_queued)
+        self.stats = TargetStats(name)
+        self.threads: List[threading.Thread] = []
+        self.active = 0
+
+
+class ExportPublisher:
+    """Veröffentlicht lokal erzeugte Exporte atomar im Exportordner"""
+
+    def __init__(self, staging_dir: str = DEFAULT_STAGING_DIR,
+                 workers_per_target: int = WORKERS_PER_TARGET):
+        self.staging_dir = staging_dir
+        self.work_dir = os.path.join(staging_dir, "work")
+        self.pending_dir = os.path.join(staging_dir, "pending")
+        self.failed_dir = os.path.join(staging_dir, "failed")
+        for directory in (self.work_dir, self.pending_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.workers_per_target = workers_per_target
+        self._targets: Dict[str, _Target] = {}
+        self._target_names: Dict[str, str] = {}
+        self._created_dirs: Set[str] = set()
+        # In diesem Lauf übernommene, noch nicht abgeschlossene Dateien
+        self._active_ids: Set[str] = set()
+        self._recovered = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def work_area(self) -> str:
+        """Lokaler Arbeitsordner für einen Export (Aufrufer entfernt ihn)"""
+        return tempfile.mkdtemp(prefix="export_", dir=self.work_dir)
+
+    def make_dirs(self, directory: str):
+        """os.makedirs mit Merkliste bereits vorhandener/angelegter Ordner"""
+        key = os.path.normcase(os.path.abspath(directory))
+        with self._lock:
+            if key in self._created_dirs:
+                return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            if len(self._created_dirs) >= MAX_CACHED_DIRS:
+                self._created_dirs.clear()
+            self._created_dirs.add(key)
+
+    def stage(self, source: str, target_dir: str, filename: str, document: str = "") -> StagedFile:
+        """
+        Übernimmt eine lokal erzeugte Datei (wird verschoben) samt Ziel in pending/.
+
+        Returns:
+            StagedFile für publish() oder submit()
+        """
+        entry = StagedFile(
+            id=f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:12]}",
+            target_dir=os.path.abspath(target_dir),
+            filename=filename,
+            document=document,
+            size=os.path.getsize(source),
+            staged_at=time.time()
+        )
+        with self._lock:
+            self._active_ids.add(entry.id)
+        shutil.move(source, self._data_path(self.pending_dir, entry.id))
+        self._save(entry)
+        return entry
+
+    def publish(self, entry: StagedFile) -> str:
+        """
+        Überträgt eine Datei sofort (im aufrufenden Thread).
+
+        Returns:
+            Endgültiger Pfad
+
+        Raises:
+            OSError: Übertragung fehlgeschlagen (der Export gilt als fehlgeschlagen,
+                die lokale Datei wird verworfen)
+        """
+        target = self._target(entry.target_dir)
+        with self._lock:
+            target.active += 1
+        try:
+            return self._transfer(target, entry)
+        except OSError:
+            self._remove(self._data_path(self.pending_dir, entry.id))
+            self._remove(self._json_path(self.pending_dir, entry.id))
+            with self._lock:
+                target.stats.failures += 1
+            raise
+        finally:
+            with self._lock:
+                target.active -= 1
+                self._active_ids.discard(entry.id)
+
+    def submit(self, entry: StagedFile, max_queued: int = MAX_QUEUED):
+        """
+        Reiht eine Datei zur Übertragung ein (wartet, solange das Ziel voll ist).
+        Nach shutdown() bleibt sie in pending/ und wird beim nächsten Start übertragen.
+        """
+        target = self._target(entry.target_dir)
+        with self._lock:
+            target.queue.maxsize = max(1, max_queued)
+            self._active_ids.add(entry.id)
+            self._ensure_workers(target)
+        while not self._stop_event.is_set():
+            try:
+                target.queue.put(entry, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+        # Nicht eingereiht - start() soll die Datei aus pending/ wieder aufnehmen
+        with self._lock:
+            self._active_ids.discard(entry.id)
+
+    def start(self):
+        """Startet die Übertragung und reiht Dateien aus früheren Läufen ein"""
+        with self._lock:
+            self._stop_event.clear()
+            if self._recovered:
+                return
+            self._recovered = True
+        threading.Thread(target=self._recover, name="export_recover", daemon=True).start()
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Beendet die Übertragung nach den laufenden Dateien; der Rest bleibt in pending/"""
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            threads = [thread for target in self._targets.values() for thread in target.threads]
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logger.warning("Export-Übertragung beim Beenden nicht abgeschlossen")
+                break
+
+        # Wartende Dateien bleiben in pending/ und werden beim nächsten Start eingereiht
+        with self._lock:
+            for target in self._targets.values():
+                while True:
+                    try:
+                        self._active_ids.discard(target.queue.get_nowait().id)
+                    except queue.Empty:
+                        break
+            self._recovered = False
+        self.report_stats()
+
+    def pending(self) -> int:
+        """Anzahl wartender oder laufender Übertragungen"""
+        with self._lock:
+            return sum(target.queue.qsize() + target.active for target in self._targets.values())
+
+    def failed(self) -> int:
+        """Anzahl endgültig fehlgeschlagener Übertragungen in failed/"""
+        return len([name for name in os.listdir(self.failed_dir) if name.endswith('.json')])
+
+    def stats(self) -> List[TargetStats]:
+        """Momentaufnahme der Statistik je Ziel"""
+        with self._lock:
+            result = []
+            for target in self._targets.values():
+                snapshot = TargetStats(**asdict(target.stats))
+                snapshot.queued = target.queue.qsize() + target.active
+                result.append(snapshot)
+            return result
+
+    def report_stats(self):
+        """Protokolliert Durchsatz und Latenz je Ziel"""
+        for stats in self.stats():
+            if stats.files or stats.failures or stats.queued:
+                logger.info(f"Export-Übertragung {stats.describe()}")
+
+    def _target(self, directory: str) -> _Target:
+        """Ziel eines Ordners (Einhängepunkte werden gemerkt)"""
+        key = os.path.normcase(directory)
+        with self._lock:
+            name = self._target_names.get(key)
+        if name is None:
+            name = target_of(directory)
+        with self._lock:
+            if len(self._target_names) >= MAX_CACHED_DIRS:
+                self._target_names.clear()
+            self._target_names[key] = name
+            target = self._targets.get(name)
+            if target is None:
+                target = self._targets[name] = _Target(name, MAX_QUEUED)
+            return target
+
+    def _ensure_workers(self, target: _Target):
+        """Startet die Worker eines Ziels bei Bedarf (Sperre gehalten)"""
+        target.threads = [thread for thread in target.threads if thread.is_alive()]
+        while len(target.threads) < self.workers_per_target:
+            thread = threading.Thread(target=self._worker, args=(target,),
+                                      name=f"export_publish_{len(target.threads)}", daemon=True)
+            target.threads.append(thread)
+            thread.start()
+
+    def _worker(self, target: _Target):
+        """Überträgt die Dateien eines Ziels"""
+        while not self._stop_event.is_set():
+            try:
+                entry = target.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            with self._lock:
+                target.active += 1
+            try:
+                self._publish_with_retry(target, entry)
+            except Exception as e:
+                logger.exception(f"Unerwarteter Fehler bei der Export-Übertragung: {e}")
+            finally:
+                with self._lock:
+                    target.active -= 1
+                    self._active_ids.discard(entry.id)
+
+    def _publish_with_retry(self, target: _Target, entry: StagedFile):
+        """Überträgt eine Datei; wiederholt vorübergehende Fehler"""
+        while True:
+            try:
+                self._transfer(target, entry)
+                return
+            except OSError as e:
+                entry.attempts += 1
+                entry.last_error = str(e)
+                with self._lock:
+                    target.stats.failures += 1
+
+            if entry.attempts >= MAX_ATTEMPTS:
+                self._fail(entry)
+                return
+            self._save(entry)
+            delay = retry_delay(entry.attempts)
+            logger.warning(f"Übertragung von {entry.filename} nach {entry.target_dir} fehlgeschlagen "
+                           f"(Versuch {entry.attempts}, erneut in {delay:.0f}s): {entry.last_error}")
+            if self._stop_event.wait(delay):
+                return
+
+    def _transfer(self, target: _Target, entry: StagedFile) -> str:
+        """Kopiert unter temporärem Namen in den Zielordner und benennt atomar um"""
+        data_path = self._data_path(self.pending_dir, entry.id)
+        temp_path = os.path.join(entry.target_dir, f".{entry.filename}.{entry.id[-12:]}{_TEMP_SUFFIX}")
+        started = time.monotonic()
+        try:
+            self.make_dirs(entry.target_dir)
+            with open(data_path, 'rb') as src, open(temp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copystat(data_path, temp_path)
+            final_path = get_filename_allocator().publish(temp_path, os.path.join(entry.target_dir, entry.filename))
+        except OSError:
+            self._remove(temp_path)
+            # Ordner könnte inzwischen entfernt worden sein
+            with self._lock:
+                self._created_dirs.discard(os.path.normcase(os.path.abspath(entry.target_dir)))
+            raise
+        elapsed = time.monotonic() - started
+
+        self._remove(data_path)
+        self._remove(self._json_path(self.pending_dir, entry.id))
+
+        latency = max(0.0, time.time() - entry.staged_at)
+        with self._lock:
+            stats = target.stats
+            stats.files += 1
+            stats.bytes += entry.size
+            stats.transfer_time += elapsed
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+        logger.debug(f"{os.path.basename(final_path)} nach {entry.target_dir} übertragen "
+                     f"({entry.size / 1048576:.1f} MB in {elapsed:.2f}s, Latenz {latency:.2f}s)")
+        return final_path
+
+    def _fail(self, entry: StagedFile):
+        """Legt eine endgültig fehlgeschlagene Datei in failed/ ab"""
+        for path_of in (self._data_path, self._json_path):
+            source = path_of(self.pending_dir, entry.id)
+            if os.path.exists(source):
+                os.replace(source, path_of(self.failed_dir, entry.id))
+        self._save(entry, self.failed_dir)
+        logger.error(f"Übertragung von {entry.filename} nach {entry.target_dir} nach "
+                     f"{entry.attempts} Versuchen abgebrochen (liegt in {self.failed_dir}): "
+                     f"{entry.last_error}")
+
+    def _recover(self):
+        """Reiht nicht übertragene Dateien früherer Läufe ein"""
+        try:
+            names = sorted(name for name in os.listdir(self.pending_dir) if name.endswith('.json'))
+        except OSError as e:
+            logger.error(f"Staging-Verzeichnis nicht lesbar: {e}")
+            return
+        recovered = 0
+        for name in names:
+            entry = self._load(os.path.join(self.pending_dir, name))
+            if entry is None or not os.path.exists(self._data_path(self.pending_dir, entry.id)):
+                continue
+            with self._lock:
+                if entry.id in self._active_ids:
+                    continue
+            if self._stop_event.is_set():
+                return
+            self.submit(entry)
+            recovered += 1
+        if recovered:
+            logger.info(f"{recovered} Export-Datei(en) aus früheren Läufen zur Übertragung eingereiht")
+
+    def _save(self, entry: StagedFile, directory: Optional[str] = None):
+        path = self._json_path(directory or self.pending_dir, entry.id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(entry), f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _load(path: str) -> Optional[StagedFile]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return StagedFile.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Staging-Eintrag {os.path.basename(path)} nicht lesbar: {e}")
+            return None
+
+    @staticmethod
+    def _data_path(directory: str, entry_id: str) -> str:
+        return os.path.join(directory, f"{entry_id}.data")
+
+    @staticmethod
+    def _json_path(directory: str, entry_id: str) -> str:
+        return os.path.join(directory, f"{entry_id}.json")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Globale Instanz
+_export_publisher = None
+_export_publisher_lock = threading.Lock()
+
+
+def get_export_publisher() -> ExportPublisher:
+    """Gibt die globale ExportPublisher-Instanz zurück"""
+    global _export_publisher
+    with _export_publisher_lock:
+        if _export_publisher is None:
+            _export_publisher = ExportPublisher()
+            logger.debug("Globale ExportPublisher-Instanz erstellt")
+        return _export_publisher
@@ -0,0 +1,94 @@
+"""
+Gemeinsame Export-Fassungen eines Dokuments
+
+Fordern mehrere Exporte dieselbe Fassung an (z.B. durchsuchbares PDF/A ins
+Archiv und als E-Mail-Anhang), wird sie nur einmal im Arbeitsordner erzeugt;
+jeder Export kopiert anschließend das Ergebnis. Schlüssel ist das Format mit
+seinen Parametern und dem Komprimierungsstand.
+
+Ein Cache gilt für die Exporte eines Dokuments und wird danach verworfen.
+Parallele Exporte mit demselben Schlüssel warten auf die erste Erzeugung.
+"""
+import os
+import json
+import shutil
+import tempfile
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Erzeugt die Fassung im übergebenen Ordner unter dem übergebenen Namen
+# (ohne Endung) und liefert (Erfolg, Meldung) wie die _export_*-Methoden
+Producer = Callable[[str, str], Tuple[bool, str]]
+
+_RENDITION_NAME = "rendition"
+
+
+def rendition_key(export_format: Any, params: Optional[Dict[str, Any]],
+                  compression_enabled: bool, *extra: Any) -> Tuple:
+    """Schlüssel einer Fassung (Parameter unabhängig von der Reihenfolge)"""
+    value = getattr(export_format, 'value', export_format)
+    params_key = json.dumps(params or {}, sort_keys=True, default=str)
+    return (value, params_key, bool(compression_enabled)) + tuple(extra)
+
+
+@dataclass
+class _Rendition:
+    index: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    done: bool = False
+    success: bool = False
+    message: str = ""
+    path: Optional[str] = None
+
+
+class RenditionCache:
+    """Einmal erzeugte Fassungen der Exporte eines Dokuments"""
+
+    def __init__(self, work_dir: str):
+        self.work_dir = tempfile.mkdtemp(prefix="renditions_", dir=work_dir)
+        self._entries: Dict[Tuple, _Rendition] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple, producer: Producer) -> Tuple[bool, str, Optional[str]]:
+        """
+        Liefert (Erfolg, Meldung, Pfad) der Fassung; erzeugt sie beim ersten Aufruf.
+        Ein Fehlschlag wird ebenfalls gemerkt und nicht wiederholt.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Rendition(index=len(self._entries) + 1)
+                self._entries[key] = entry
+
+        with entry.lock:
+            if entry.done:
+                logger.debug(f"Export-Fassung wiederverwendet: {key[0]}")
+                return entry.success, entry.message, entry.path
+
+            target_dir = os.path.join(self.work_dir, str(entry.index))
+            os.makedirs(target_dir, exist_ok=True)
+            try:
+                entry.success, entry.message = producer(target_dir, _RENDITION_NAME)
+            except Exception as e:
+                logger.exception("Export-Fassung konnte nicht erzeugt werden")
+                entry.success, entry.message = False, f"Fehler: {e}"
+
+            if entry.success:
+                files = [name for name in os.listdir(target_dir)
+                         if os.path.splitext(name)[0] == _RENDITION_NAME]
+                if files:
+                    entry.path = os.path.join(target_dir, files[0])
+                else:
+                    entry.success = False
+                    entry.message = "Export-Fassung wurde nicht erstellt"
+            entry.done = True
+            return entry.success, entry.message, entry.path
+
+    def close(self):
+        """Entfernt alle Fassungen"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
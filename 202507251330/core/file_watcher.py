@@ -14,6 +14,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.hotfolder_config import HotfolderConfig, DocumentPair
 from core.pdf_processor import PDFProcessor
+from core.tesseract_pool import shutdown_tesseract_pool
+from core.page_raster import get_page_raster_cache
+from core.document_text import get_document_text_cache
+from core.word_index import get_word_index_cache
+from core.ocr_language import get_ocr_language_resolver, split_languages, AUTO_LANGUAGE
+from core.pdfa_batch import get_pdfa_batcher
+from core.smtp_pool import close_idle_smtp_connections, shutdown_smtp_pools
+from core.email_spool import get_email_spool
+from core.export_publisher import get_export_publisher
+from core.ftp_pool import close_idle_ftp_connections, shutdown_ftp_pools
+from core.oauth2_refresher import shutdown_oauth2_refresher
 
 # Logger für dieses Modul
 logger = logging.getLogger(__name__)
@@ -265,11 +276,33 @@ class FileWatcher:
             # Speichere Referenzen
             self.observers[hotfolder.id] = observer
             self.handlers[hotfolder.id] = handler
+
+            # Sprachmodelle des Hotfolders und seiner Zonen vorladen
+            self._preload_languages(hotfolder)
+            
+            # E-Mails aus der Warteschlange (auch aus früheren Läufen) senden
+            get_email_spool().start()
+            
+            # Nicht übertragene Datei-Exporte früherer Läufe übertragen
+            get_export_publisher().start()
+            
+            # Nicht mehr konvertierte PDF/A-Exporte früherer Läufe einreihen
+            get_pdfa_batcher().start()
             
             logger.info(f"Überwachung gestartet für: {hotfolder.name} (rekursiv)")
         except Exception as e:
             logger.exception(f"Fehler beim Starten der Überwachung für {hotfolder.name}")
     
+    def _preload_languages(self, hotfolder: HotfolderConfig):
+        """Meldet die OCR-Sprachen eines Hotfolders zum Vorladen an"""
+        languages = split_languages(self.processor._ocr_language(hotfolder))
+        for zone in hotfolder.ocr_zones:
+            zone_language = zone.get('language', '') if isinstance(zone, dict) else zone.language
+            languages.extend(split_languages(zone_language))
+        languages = [lang for lang in languages if lang != AUTO_LANGUAGE]
+        if languages:
+            self.processor.ocr_processor.engine_pool.add_preload_languages(languages)
+
     def stop_watching(self, hotfolder_id: str):
         """Stoppt die Überwachung eines Hotfolders"""
         if hotfolder_id in self.observers:
@@ -290,6 +323,25 @@ class FileWatcher:
         
         # Führe finales Cleanup durch
         self.processor.cleanup_temp_dir()
+        
+        # Gesammelte PDF/A-Exporte noch schreiben
+        get_pdfa_batcher().shutdown()
+        
+        # Laufende Übertragungen abschließen (Wartendes bleibt im Staging)
+        get_export_publisher().shutdown()
+        
+        # E-Mail-Versand anhalten (Wartendes bleibt im Spool) und Verbindungen schließen
+        get_email_spool().shutdown()
+        shutdown_smtp_pools()
+        shutdown_oauth2_refresher()
+        shutdown_ftp_pools()
+        
+        # Beende persistente Tesseract-Engines und gib gerenderte Seiten frei
+        shutdown_tesseract_pool()
+        get_page_raster_cache().clear()
+        get_document_text_cache().clear()
+        get_word_index_cache().clear()
+        get_ocr_language_resolver().clear()
         logger.info("Alle Überwachungen gestoppt")
     
     def process_pending_files(self):
@@ -298,12 +350,19 @@ class FileWatcher:
             for handler in self.handlers.values():
                 handler.process_pending_files()
             
+            # Unbenutzte SMTP- und FTP-Verbindungen schließen
+            close_idle_smtp_connections()
+            close_idle_ftp_connections()
+            
             # Prüfe ob Cleanup notwendig ist
             current_time = time.time()
             if current_time - self._last_cleanup > self._cleanup_interval:
                 self.processor.cleanup_temp_dir()
                 self._last_cleanup = current_time
                 logger.debug("Cleanup durchgeführt")
+                
+                # Durchsatz und Latenz der Übertragungen je Ziel
+                get_export_publisher().report_stats()
         except Exception as e:
             logger.exception("Fehler beim Verarbeiten ausstehender Dateien")
     
@@ -0,0 +1,166 @@
+"""
+Vergabe eindeutiger Export-Dateinamen (name.pdf, name_1.pdf, name_2.pdf, ...)
+
+Bisher wurde für jeden Export os.path.exists für name_1, name_2, ... bis zum
+ersten freien Namen geprüft. In Exportordnern mit tausenden gleichnamigen
+Dokumenten (und auf Netzlaufwerken) kostete das je Export tausende Zugriffe;
+zwischen Prüfung und Kopieren konnte außerdem ein anderer Export denselben
+Namen erhalten.
+
+Der FilenameAllocator legt die Zieldatei atomar mit O_CREAT|O_EXCL an - der
+Name gehört damit dem Aufrufer, der die leere Datei anschließend überschreibt.
+Je Ordner, Name und Endung wird die nächste freie Nummer gemerkt; sie wird
+einmalig aus dem Verzeichnisinhalt bestimmt und nach wiederholten Treffern
+(andere Prozesse schreiben in denselben Ordner) neu eingelesen. Eine Kollision
+kostet so unabhängig von der Anzahl vorhandener Dateien nur wenige Zugriffe.
+
+Fertig geschriebene Dateien (z.B. temporäre Dateien im Zielordner) erhalten
+mit publish() ihren eindeutigen Namen ohne leere Zwischendatei.
+"""
+import os
+import re
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Anzahl gemerkter Ordner/Namen (älteste werden verworfen)
+MAX_CACHED_NAMES = 1024
+
+# Nach so vielen belegten Nummern in Folge wird der Ordner neu eingelesen
+MAX_MISSES = 3
+
+_CREATE_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+
+def _create_exclusive(path: str) -> bool:
+    """Legt die Datei leer an; False wenn sie bereits existiert"""
+    try:
+        fd = os.open(path, _CREATE_FLAGS, 0o666)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _move_exclusive(source: str, path: str) -> bool:
+    """Gibt source den Namen path, falls dieser frei ist; False wenn belegt"""
+    try:
+        os.link(source, path)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Ziel ohne Hardlinks (z.B. manche Netzlaufwerke): Namen belegen, dann ersetzen
+        if not _create_exclusive(path):
+            return False
+        os.replace(source, path)
+        return True
+    os.remove(source)
+    return True
+
+
+def highest_suffix(directory: str, name: str, ext: str) -> int:
+    """Höchste vorhandene Nummer für name_N.ext im Ordner (0 wenn keine)"""
+    flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+    pattern = re.compile(rf"{re.escape(name)}_(\d+){re.escape(ext)}", flags)
+    highest = 0
+    with os.scandir(directory or '.') as entries:
+        for entry in entries:
+            match = pattern.fullmatch(entry.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest
+
+
+class FilenameAllocator:
+    """Vergibt eindeutige Dateinamen durch exklusives Anlegen der Datei"""
+
+    def __init__(self, max_cached: int = MAX_CACHED_NAMES):
+        self.max_cached = max_cached
+        # (Ordner, Name, Endung) -> nächste zu versuchende Nummer
+        self._next: Dict[Tuple[str, str, str], int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allocate(self, filepath: str) -> str:
+        """
+        Legt filepath oder - falls vorhanden - name_N.ext leer an.
+
+        Returns:
+            Pfad der angelegten Datei (gehört dem Aufrufer)
+
+        Raises:
+            OSError: Datei kann nicht angelegt werden (z.B. fehlende Rechte)
+        """
+        return self._claim(filepath, _create_exclusive)
+
+    def publish(self, source: str, filepath: str) -> str:
+        """
+        Benennt die fertige Datei source (im Zielordner) atomar in filepath
+        oder - falls vorhanden - name_N.ext um.
+
+        Returns:
+            Endgültiger Pfad
+        """
+        return self._claim(filepath, lambda path: _move_exclusive(source, path))
+
+    def _claim(self, filepath: str, create: Callable[[str], bool]) -> str:
+        """Erster Name, für den create() gelingt (Datei angelegt)"""
+        if create(filepath):
+            return filepath
+
+        directory = os.path.dirname(filepath)
+        name, ext = os.path.splitext(os.path.basename(filepath))
+        key = (os.path.normcase(os.path.abspath(directory)), os.path.normcase(name),
+               os.path.normcase(ext))
+
+        misses = 0
+        while True:
+            rescan = misses >= MAX_MISSES
+            with self._lock:
+                counter = self._next.get(key)
+            if counter is None or rescan:
+                # Ordner lesen (außerhalb der Sperre - kann auf Netzlaufwerken dauern)
+                scanned = highest_suffix(directory, name, ext) + 1
+                counter = scanned if counter is None else max(counter, scanned)
+                misses = 0
+                logger.debug(f"Nächste freie Nummer für {name}{ext} in {directory}: {counter}")
+
+            # Nummer vergeben, bevor die Datei angelegt wird - parallele Aufrufe
+            # im Prozess erhalten so verschiedene Nummern
+            with self._lock:
+                counter = max(counter, self._next.pop(key, 0))
+                self._next[key] = counter + 1
+                while len(self._next) > self.max_cached:
+                    self._next.popitem(last=False)
+
+            new_filepath = os.path.join(directory, f"{name}_{counter}{ext}")
+            if create(new_filepath):
+                return new_filepath
+            misses += 1
+
+
+def discard_if_empty(filepath: str):
+    """Entfernt eine angelegte, aber nicht beschriebene Zieldatei"""
+    try:
+        if os.path.getsize(filepath) == 0:
+            os.remove(filepath)
+    except OSError:
+        pass
+
+
+# Globale Instanz
+_filename_allocator = None
+_filename_allocator_lock = threading.Lock()
+
+
+def get_filename_allocator() -> FilenameAllocator:
+    """Gibt die globale FilenameAllocator-Instanz zurück"""
+    global _filename_allocator
+    with _filename_allocator_lock:
+        if _filename_allocator is None:
+            _filename_allocator = FilenameAllocator()
+            logger.debug("Globale FilenameAllocator-Instanz erstellt")
+        return _filename_allocator
@@ -0,0 +1,553 @@
+"""
+FTP(S)-/SFTP-Export mit wiederverwendeten Verbindungen
+
+Je Serverkonfiguration (Protokoll, Server, Port, Anmeldung) hält ein Pool die
+Steuerverbindungen offen, wie der SMTP-Pool (core.smtp_pool):
+
+    - Verbindungen, die länger unbenutzt waren, werden vor dem Upload mit
+      NOOP (SFTP: stat) geprüft und bei Bedarf neu aufgebaut
+    - höchstens max_parallel gleichzeitige Uploads (= Verbindungen) je Server
+    - unbenutzte Verbindungen werden nach idle_timeout geschlossen
+
+Ein Upload schreibt zuerst unter einem temporären Namen (.name.id.part) in
+den Zielordner und benennt die vollständige Datei dann auf ihren eindeutigen
+Namen um (name.pdf, name_1.pdf, ...) - Abholprozesse sehen keine halben
+Dateien. Bricht die Verbindung ab, wird über eine neue Verbindung erneut
+hochgeladen; Dateien ab resume_bytes werden dabei ab der bereits übertragenen
+Größe fortgesetzt (FTP: REST, SFTP: Schreiben ab Position).
+
+FTP verwendet passive Datenkanäle (abschaltbar), FTPS explizites TLS mit
+verschlüsseltem Datenkanal. SFTP benötigt paramiko (optional); Hostschlüssel
+werden beim ersten Kontakt in SFTP_KNOWN_HOSTS gespeichert und danach geprüft.
+
+Der Verbindungsaufbau ist austauschbar (connect), damit der Pool auch gegen
+einen lokalen Test-Server (z.B. pyftpdlib) läuft.
+"""
+import os
+import re
+import ssl
+import time
+import uuid
+import ftplib
+import hashlib
+import posixpath
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.export_config import FtpConfig, FtpProtocol
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+# Unbenutzt länger als diese Zeit: vor dem Upload prüfen
+HEALTH_CHECK_AFTER = 5.0
+
+CONNECT_TIMEOUT = 30
+
+# Verbindungsabbrüche je Upload, nach denen aufgegeben wird
+MAX_RECONNECTS = 3
+
+# Nach so vielen belegten Nummern in Folge wird der Zielordner neu gelesen
+MAX_NAME_MISSES = 3
+
+SFTP_KNOWN_HOSTS = "config/sftp_known_hosts"
+
+_BLOCK_SIZE = 64 * 1024
+_TEMP_SUFFIX = ".part"
+
+# Gemerkte nächste Nummern für name_N (je Pool)
+_MAX_CACHED_NAMES = 1024
+
+
+class FTPExportError(Exception):
+    """Upload nicht möglich (Konfiguration, Server lehnt ab)"""
+
+
+@dataclass(frozen=True)
+class FTPServerKey:
+    """Schlüssel eines Pools: Serverkonfiguration einschließlich Anmeldung"""
+    protocol: str
+    host: str
+    port: int
+    username: str = ""
+    credential: str = ""  # Prüfsumme des Passworts - Änderung ergibt neuen Pool
+    passive: bool = True
+    max_parallel: int = 2
+
+    def describe(self) -> str:
+        return f"{self.protocol}://{self.host}:{self.port}"
+
+
+class FTPSession:
+    """Steuerverbindung zu einem FTP(S)-Server (ftplib)"""
+
+    def __init__(self, ftp: ftplib.FTP):
+        self.ftp = ftp
+        self.home = ftp.pwd()
+
+    def noop(self):
+        self.ftp.voidcmd('NOOP')
+
+    def size(self, path: str) -> Optional[int]:
+        """Größe einer Datei; None wenn sie nicht existiert"""
+        try:
+            return self.ftp.size(path)
+        except ftplib.error_perm:
+            return None
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.ftp.size(path)
+            return True
+        except ftplib.error_perm as e:
+            if str(e)[:3] not in ('500', '502', '504'):
+                return False
+        # Server ohne SIZE: im Ordnerinhalt nachsehen
+        return posixpath.basename(path) in self.listdir(posixpath.dirname(path))
+
+    def listdir(self, directory: str) -> List[str]:
+        try:
+            return [posixpath.basename(name) for name in self.ftp.nlst(directory)]
+        except ftplib.error_perm:
+            # Manche Server melden einen leeren Ordner als Fehler
+            return []
+        finally:
+            # NLST schaltet auf ASCII um; SIZE ist nur im Binärmodus zuverlässig
+            self.ftp.voidcmd('TYPE I')
+
+    def makedirs(self, directory: str):
+        try:
+            self.ftp.voidcmd(f'CWD {directory}')
+            return
+        except ftplib.error_perm:
+            pass
+        path = '/' if directory.startswith('/') else ''
+        for part in [part for part in directory.split('/') if part]:
+            path = posixpath.join(path, part)
+            try:
+                self.ftp.mkd(path)
+            except ftplib.error_perm:
+                pass  # vorhanden
+
+    def store(self, local_path: str, remote_path: str, offset: int = 0):
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            self.ftp.storbinary(f'STOR {remote_path}', f, _BLOCK_SIZE, rest=offset or None)
+
+    def rename(self, source: str, target: str):
+        self.ftp.rename(source, target)
+
+    def delete(self, path: str):
+        self.ftp.delete(path)
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except Exception:
+            self.ftp.close()
+
+
+class SFTPSession:
+    """SFTP-Sitzung (paramiko)"""
+
+    def __init__(self, client, sftp):
+        self.client = client
+        self.sftp = sftp
+        self.home = sftp.normalize('.')
+
+    def noop(self):
+        self.sftp.stat('.')
+
+    def size(self, path: str) -> Optional[int]:
+        try:
+            return self.sftp.stat(path).st_size
+        except IOError:
+            return None
+
+    def exists(self, path: str) -> bool:
+        return self.size(path) is not None
+
+    def listdir(self, directory: str) -> List[str]:
+        return self.sftp.listdir(directory)
+
+    def makedirs(self, directory: str):
+        try:
+            self.sftp.stat(directory)
+            return
+        except IOError:
+            pass
+        path = '/' if directory.startswith('/') else ''
+        for part in [part for part in directory.split('/') if part]:
+            path = posixpath.join(path, part)
+            try:
+                self.sftp.mkdir(path)
+            except IOError:
+                pass  # vorhanden
+
+    def store(self, local_path: str, remote_path: str, offset: int = 0):
+        with open(local_path, 'rb') as src, self.sftp.open(remote_path, 'r+b' if offset else 'wb') as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            dst.set_pipelined(True)
+            while True:
+                block = src.read(_BLOCK_SIZE)
+                if not block:
+                    break
+                dst.write(block)
+
+    def rename(self, source: str, target: str):
+        # SFTP-Umbenennen überschreibt keine vorhandene Datei
+        self.sftp.rename(source, target)
+
+    def delete(self, path: str):
+        self.sftp.remove(path)
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+@dataclass
+class _PooledSession:
+    session: object
+    last_used: float
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Fehler, nach denen die Verbindung nicht mehr verwendbar ist"""
+    if isinstance(error, (ConnectionError, TimeoutError, EOFError, ssl.SSLError,
+                          ftplib.error_temp, ftplib.error_reply)):
+        return True
+    # Übrige Fehler (z.B. fehlende Rechte, 5xx) betreffen die Datei
+    return paramiko is not None and isinstance(error, paramiko.SSHException)
+
+
+class FTPConnectionPool:
+    """Wiederverwendbare Verbindungen zu einem FTP(S)-/SFTP-Server"""
+
+    def __init__(self, name: str, connect: Callable[[], object],
+                 max_parallel: int = 2, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.name = name
+        self.max_parallel = max(1, int(max_parallel))
+        self.idle_timeout = idle_timeout
+        self._connect = connect
+        self._slots = threading.BoundedSemaphore(self.max_parallel)
+        self._idle: List[_PooledSession] = []
+        self._next_suffix: Dict[Tuple[str, str, str], int] = {}
+        self._created_dirs = set()
+        # Namen ohne Nummer, in die gerade umbenannt wird
+        self._renaming = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def upload(self, local_path: str, remote_dir: str, filename: str,
+               resume_bytes: int = 0) -> str:
+        """
+        Lädt eine Datei hoch und veröffentlicht sie unter eindeutigem Namen.
+
+        Args:
+            resume_bytes: ab dieser Größe wird ein abgebrochener Upload fortgesetzt
+                (0 = immer von vorn)
+
+        Returns:
+            Pfad der Datei auf dem Server
+        """
+        size = os.path.getsize(local_path)
+        resumable = bool(resume_bytes) and size >= resume_bytes
+
+        with self._slots:
+            conn = self._checkout()
+            # Relative Ordner beziehen sich auf das Startverzeichnis der Anmeldung
+            remote_dir = posixpath.join(conn.session.home, remote_directory(remote_dir))
+            temp_path = posixpath.join(remote_dir, f".{filename}.{uuid.uuid4().hex[:12]}{_TEMP_SUFFIX}")
+            reconnects = 0
+            offset = 0
+            while True:
+                try:
+                    if offset:
+                        logger.info(f"Setze Upload von {filename} nach {self.name} bei "
+                                    f"{offset / 1048576:.1f} MB fort")
+                    self._transfer(conn, local_path, remote_dir, temp_path, offset)
+                    target = self._publish(conn, temp_path, remote_dir, filename)
+                    break
+                except Exception as e:
+                    if not _is_connection_error(e) or reconnects >= MAX_RECONNECTS:
+                        self._discard_temp(conn, temp_path)
+                        self._close(conn)
+                        raise
+                    self._close(conn)
+                    reconnects += 1
+                    logger.info(f"Verbindung zu {self.name} abgebrochen ({e}), baue neu auf")
+                    conn = self._open()
+                    offset = self._resume_offset(conn, temp_path, size) if resumable else 0
+            self._checkin(conn)
+
+        logger.debug(f"{filename} nach {self.name}{remote_dir} hochgeladen ({size / 1048576:.1f} MB)")
+        return target
+
+    def close_idle(self, max_idle: Optional[float] = None):
+        """Schließt Verbindungen, die länger als max_idle (Standard idle_timeout) unbenutzt sind"""
+        limit = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._lock:
+            expired = [conn for conn in self._idle if now - conn.last_used >= limit]
+            self._idle = [conn for conn in self._idle if now - conn.last_used < limit]
+        for conn in expired:
+            self._close(conn)
+
+    def shutdown(self):
+        """Schließt alle Verbindungen; spätere Uploads bauen neue auf"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+    def _transfer(self, conn: _PooledSession, local_path: str, remote_dir: str,
+                  temp_path: str, offset: int):
+        """Überträgt die Datei (ab offset) unter dem temporären Namen"""
+        session = conn.session
+        with self._lock:
+            known = remote_dir in self._created_dirs
+        if not known:
+            session.makedirs(remote_dir)
+            with self._lock:
+                if len(self._created_dirs) >= _MAX_CACHED_NAMES:
+                    self._created_dirs.clear()
+                self._created_dirs.add(remote_dir)
+        session.store(local_path, temp_path, offset)
+        size = os.path.getsize(local_path)
+        uploaded = session.size(temp_path)
+        if uploaded is not None and uploaded != size:
+            raise FTPExportError(f"Upload unvollständig ({uploaded} von {size} Bytes)")
+
+    def _publish(self, conn: _PooledSession, temp_path: str, remote_dir: str, filename: str) -> str:
+        """Benennt die hochgeladene Datei auf den ersten freien Namen um"""
+        session = conn.session
+        target = posixpath.join(remote_dir, filename)
+        with self._lock:
+            reserved = target not in self._renaming
+            if reserved:
+                self._renaming.add(target)
+        if reserved:
+            try:
+                if not session.exists(target) and self._rename(session, temp_path, target):
+                    return target
+            finally:
+                with self._lock:
+                    self._renaming.discard(target)
+
+        # Nächste Nummer je Ordner und Name; parallele Uploads im Prozess
+        # erhalten verschiedene Nummern, Treffer fremder Dateien lösen ein
+        # erneutes Lesen des Ordners aus
+        name, ext = posixpath.splitext(filename)
+        key = (remote_dir, name, ext)
+        misses = 0
+        for _ in range(3 * MAX_NAME_MISSES):
+            with self._lock:
+                counter = self._next_suffix.get(key)
+            if counter is None or misses >= MAX_NAME_MISSES:
+                scanned = _highest_suffix(session.listdir(remote_dir), name, ext) + 1
+                counter = scanned if counter is None else max(counter, scanned)
+                misses = 0
+            with self._lock:
+                counter = max(counter, self._next_suffix.get(key, 0))
+                if key not in self._next_suffix and len(self._next_suffix) >= _MAX_CACHED_NAMES:
+                    self._next_suffix.clear()
+                self._next_suffix[key] = counter + 1
+
+            target = posixpath.join(remote_dir, f"{name}_{counter}{ext}")
+            if not session.exists(target) and self._rename(session, temp_path, target):
+                return target
+            misses += 1
+
+        raise FTPExportError(f"Kein freier Dateiname für {filename} in {remote_dir}")
+
+    @staticmethod
+    def _rename(session, temp_path: str, target: str) -> bool:
+        """Umbenennen; False wenn der Server ablehnt (z.B. Ziel inzwischen vorhanden)"""
+        try:
+            session.rename(temp_path, target)
+            return True
+        except (ftplib.error_perm, IOError) as e:
+            if _is_connection_error(e):
+                raise
+            logger.debug(f"Umbenennen in {target} abgelehnt: {e}")
+            return False
+
+    @staticmethod
+    def _resume_offset(conn: _PooledSession, temp_path: str, size: int) -> int:
+        """Bereits übertragene Bytes der temporären Datei (0 = von vorn)"""
+        try:
+            uploaded = conn.session.size(temp_path)
+        except Exception:
+            return 0
+        return uploaded if uploaded and uploaded <= size else 0
+
+    @staticmethod
+    def _discard_temp(conn: _PooledSession, temp_path: str):
+        try:
+            conn.session.delete(temp_path)
+        except Exception:
+            pass
+
+    def _checkout(self) -> _PooledSession:
+        self.close_idle()
+        with self._lock:
+            self._closed = False
+            conn = self._idle.pop() if self._idle else None
+
+        if conn is not None and time.monotonic() - conn.last_used > HEALTH_CHECK_AFTER:
+            try:
+                conn.session.noop()
+            except Exception:
+                logger.debug(f"Verbindung zu {self.name} nicht mehr aktiv, baue neu auf")
+                self._close(conn)
+                conn = None
+
+        return conn if conn is not None else self._open()
+
+    def _checkin(self, conn: _PooledSession):
+        conn.last_used = time.monotonic()
+        with self._lock:
+            if not self._closed:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    def _open(self) -> _PooledSession:
+        started = time.perf_counter()
+        session = self._connect()
+        logger.debug(f"Verbindung zu {self.name} aufgebaut ({time.perf_counter() - started:.2f}s)")
+        return _PooledSession(session=session, last_used=time.monotonic())
+
+    @staticmethod
+    def _close(conn: _PooledSession):
+        try:
+            conn.session.close()
+        except Exception:
+            pass
+
+
+def _highest_suffix(names: List[str], name: str, ext: str) -> int:
+    """Höchste vorhandene Nummer für name_N.ext (0 wenn keine)"""
+    pattern = re.compile(rf"{re.escape(name)}_(\d+){re.escape(ext)}")
+    highest = 0
+    for entry in names:
+        match = pattern.fullmatch(entry)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def remote_directory(path: str) -> str:
+    """Zielordner auf dem Server (Schrägstriche, ohne abschließenden)"""
+    path = (path or '').replace('\\', '/').strip()
+    return posixpath.normpath(path) if path else '.'
+
+
+def default_port(config: FtpConfig) -> int:
+    return config.port or (22 if config.protocol == FtpProtocol.SFTP else 21)
+
+
+def ftp_server_key(config: FtpConfig) -> FTPServerKey:
+    """Schlüssel des Pools für eine FTP-Konfiguration"""
+    return FTPServerKey(
+        protocol=config.protocol.value,
+        host=config.host.strip(),
+        port=default_port(config),
+        username=config.username,
+        credential=hashlib.sha256((config.password or '').encode('utf-8')).hexdigest(),
+        passive=bool(config.passive),
+        max_parallel=max(1, int(config.max_parallel or 1))
+    )
+
+
+def ftp_connector(config: FtpConfig) -> Callable[[], object]:
+    """Verbindungsaufbau (einschließlich Anmeldung) für eine FTP-Konfiguration"""
+    host = config.host.strip()
+    port = default_port(config)
+
+    if config.protocol == FtpProtocol.SFTP:
+        if paramiko is None:
+            raise FTPExportError("SFTP nicht verfügbar - paramiko ist nicht installiert")
+
+        def connect_sftp() -> SFTPSession:
+            client = paramiko.SSHClient()
+            if not os.path.exists(SFTP_KNOWN_HOSTS):
+                os.makedirs(os.path.dirname(SFTP_KNOWN_HOSTS), exist_ok=True)
+                open(SFTP_KNOWN_HOSTS, 'a').close()
+            client.load_host_keys(SFTP_KNOWN_HOSTS)
+            # Erster Kontakt: Schlüssel merken; geänderte Schlüssel werden abgelehnt
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(host, port=port, username=config.username, password=config.password,
+                           timeout=CONNECT_TIMEOUT, allow_agent=False, look_for_keys=False)
+            sftp = client.open_sftp()
+            sftp.get_channel().settimeout(CONNECT_TIMEOUT)
+            return SFTPSession(client, sftp)
+
+        return connect_sftp
+
+    def connect_ftp() -> FTPSession:
+        # FTPS prüft Zertifikat und Hostnamen des Servers
+        ftp = ftplib.FTP_TLS(context=ssl.create_default_context(), timeout=CONNECT_TIMEOUT) \
+            if config.protocol == FtpProtocol.FTPS else ftplib.FTP(timeout=CONNECT_TIMEOUT)
+        try:
+            ftp.connect(host, port)
+            ftp.login(config.username or 'anonymous', config.password or '')
+            if config.protocol == FtpProtocol.FTPS:
+                ftp.prot_p()
+            ftp.set_pasv(config.passive)
+            ftp.voidcmd('TYPE I')
+        except Exception:
+            ftp.close()
+            raise
+        return FTPSession(ftp)
+
+    return connect_ftp
+
+
+# Globale Pools je Serverkonfiguration
+_ftp_pools: Dict[FTPServerKey, FTPConnectionPool] = {}
+_ftp_pools_lock = threading.Lock()
+
+
+def get_ftp_pool(config: FtpConfig) -> FTPConnectionPool:
+    """Gibt den Pool für die FTP-Konfiguration zurück (legt ihn bei Bedarf an)"""
+    key = ftp_server_key(config)
+    with _ftp_pools_lock:
+        pool = _ftp_pools.get(key)
+        if pool is None:
+            pool = FTPConnectionPool(key.describe(), ftp_connector(config),
+                                     max_parallel=key.max_parallel)
+            _ftp_pools[key] = pool
+            logger.debug(f"FTP-Pool für {key.describe()} erstellt")
+        return pool
+
+
+def close_idle_ftp_connections():
+    """Schließt unbenutzte Verbindungen aller Pools (regelmäßig aufgerufen)"""
+    with _ftp_pools_lock:
+        pools = list(_ftp_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
+
+def shutdown_ftp_pools():
+    """Schließt alle Verbindungen und verwirft die Pools"""
+    with _ftp_pools_lock:
+        pools = list(_ftp_pools.values())
+        _ftp_pools.clear()
+    for pool in pools:
+        pool.shutdown()
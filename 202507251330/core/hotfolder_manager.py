@@ -263,7 +263,10 @@ class HotfolderManager:
                     ocr_zone = OCRZone(
                         name=zone_name,
                         zone=tuple(zone_dict['zone']),
-                        page_num=zone_dict['page_num']
+                        page_num=zone_dict['page_num'],
+                        validation_regex=zone_dict.get('validation_regex', ''),
+                        preprocessing=zone_dict.get('preprocessing'),
+                        language=zone_dict.get('language', '')
                     )
                     ocr_zone_objects.append(ocr_zone)
             
@@ -363,7 +366,10 @@ class HotfolderManager:
                             ocr_zone = OCRZone(
                                 name=zone_name,
                                 zone=tuple(zone_dict['zone']),
-                                page_num=zone_dict['page_num']
+                                page_num=zone_dict['page_num'],
+                                validation_regex=zone_dict.get('validation_regex', ''),
+                                preprocessing=zone_dict.get('preprocessing'),
+                                language=zone_dict.get('language', '')
                             )
                             ocr_zone_objects.append(ocr_zone)
                         setattr(hotfolder, key, ocr_zone_objects)
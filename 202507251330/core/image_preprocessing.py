@@ -0,0 +1,394 @@
+"""
+Bildvorverarbeitung für die OCR
+
+Vektorisiert auf NumPy-Arrays (Graustufen, uint8):
+- Randbereinigung: schwarze Scannerränder und leere Ränder abschneiden
+- Schräglagenkorrektur: Winkel aus Projektionsprofilen schätzen
+- Entflecken: Median (Graustufen) bzw. isolierte Pixel (binär) entfernen
+- Binarisierung: global nach Otsu oder lokal adaptiv nach Sauvola
+
+Konfigurierbar je Hotfolder (action_params['ocr']['preprocessing']) und je
+OCR-Zone (OCRZone.preprocessing). Ohne Konfiguration bleibt es bei der reinen
+Graustufen-Verarbeitung.
+
+Benchmark gegen die Graustufen-Basis:
+    python -m core.image_preprocessing <pdf|bild> [...] [--truth text.txt]
+"""
+import math
+import logging
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, Optional, Union
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Binarisierungsverfahren
+BINARIZE_NONE = "none"
+BINARIZE_OTSU = "otsu"
+BINARIZE_SAUVOLA = "sauvola"
+
+# Referenzauflösung für Fenstergrößen und Ränder
+REFERENCE_DPI = 300
+
+
+@dataclass
+class PreprocessOptions:
+    """Einstellungen der Vorverarbeitung"""
+    binarize: str = BINARIZE_NONE
+    sauvola_window: int = 25  # Fenstergröße bei 300 DPI (wird mitskaliert)
+    sauvola_k: float = 0.2
+    deskew: bool = False
+    max_skew_angle: float = 5.0
+    despeckle: bool = False
+    crop_borders: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return (self.binarize != BINARIZE_NONE or self.deskew
+                or self.despeckle or self.crop_borders)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PreprocessOptions':
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    @classmethod
+    def from_value(cls, value: Union[None, str, Dict[str, Any], 'PreprocessOptions']) -> 'PreprocessOptions':
+        """Erstellt Optionen aus einem Preset-Namen, einem Dictionary oder None"""
+        if isinstance(value, PreprocessOptions):
+            return value
+        if not value:
+            return cls()
+        if isinstance(value, str):
+            if value not in PRESETS:
+                logger.warning(f"Unbekanntes Vorverarbeitungs-Preset '{value}', verwende 'off'")
+                return cls()
+            return cls.from_dict(PRESETS[value])
+        if isinstance(value, dict):
+            # {"preset": "sauvola", "deskew": false} - Preset mit Überschreibungen
+            base = dict(PRESETS.get(value.get("preset", ""), {}))
+            base.update({k: v for k, v in value.items() if k != "preset"})
+            return cls.from_dict(base)
+        return cls()
+
+
+# Vordefinierte Einstellungen (Name -> Optionen)
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "off": {},
+    "otsu": {"binarize": BINARIZE_OTSU, "despeckle": True},
+    "sauvola": {"binarize": BINARIZE_SAUVOLA, "despeckle": True},
+    "full": {"binarize": BINARIZE_SAUVOLA, "deskew": True, "despeckle": True, "crop_borders": True},
+}
+
+# Anzeigenamen für die Oberfläche
+PRESET_LABELS: Dict[str, str] = {
+    "off": "Keine (nur Graustufen)",
+    "otsu": "Global (Otsu) + Entflecken",
+    "sauvola": "Adaptiv (Sauvola) + Entflecken",
+    "full": "Vollständig (Sauvola, Schräglage, Entflecken, Ränder)",
+}
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Globaler Schwellwert nach Otsu (maximiert die Varianz zwischen den Klassen)"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    omega = np.cumsum(hist) / total
+    mu = np.cumsum(hist * np.arange(256)) / total
+    mu_t = mu[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_b = (mu_t * omega - mu) ** 2 / (omega * (1.0 - omega))
+    sigma_b[~np.isfinite(sigma_b)] = 0.0
+    return int(np.argmax(sigma_b))
+
+
+def otsu_binarize(gray: np.ndarray) -> np.ndarray:
+    """Binarisiert mit dem globalen Otsu-Schwellwert (0 = Schrift, 255 = Hintergrund)"""
+    threshold = otsu_threshold(gray)
+    return np.where(gray > threshold, 255, 0).astype(np.uint8)
+
+
+def _box_sum(integral: np.ndarray, window: int) -> np.ndarray:
+    """Fenstersumme aus einem Integralbild (mit führender Null-Zeile/-Spalte)"""
+    return (integral[window:, window:] - integral[:-window, window:]
+            - integral[window:, :-window] + integral[:-window, :-window])
+
+
+def sauvola_binarize(gray: np.ndarray, window: int = 25, k: float = 0.2,
+                     dynamic_range: float = 128.0, strip_rows: int = 512) -> np.ndarray:
+    """
+    Lokal adaptive Binarisierung nach Sauvola.
+
+    Mittelwert und Standardabweichung je Fenster kommen aus Integralbildern;
+    gerechnet wird in Streifen, damit der Speicherbedarf auch bei großen
+    Seiten begrenzt bleibt.
+    """
+    window = max(3, int(window) | 1)
+    pad = window // 2
+    height, width = gray.shape
+    padded = np.pad(gray, pad, mode='reflect')
+    area = float(window * window)
+    out = np.empty_like(gray)
+
+    for top in range(0, height, strip_rows):
+        bottom = min(height, top + strip_rows)
+        block = padded[top:bottom + 2 * pad].astype(np.float64)
+
+        integral = np.zeros((block.shape[0] + 1, block.shape[1] + 1))
+        np.cumsum(np.cumsum(block, axis=0), axis=1, out=integral[1:, 1:])
+        integral_sq = np.zeros_like(integral)
+        np.cumsum(np.cumsum(block * block, axis=0), axis=1, out=integral_sq[1:, 1:])
+
+        mean = _box_sum(integral, window) / area
+        var = _box_sum(integral_sq, window) / area - mean * mean
+        std = np.sqrt(np.maximum(var, 0.0))
+        threshold = mean * (1.0 + k * (std / dynamic_range - 1.0))
+
+        out[top:bottom] = np.where(gray[top:bottom] > threshold, 255, 0)
+
+    return out
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 5.0, coarse_step: float = 0.5,
+                  fine_step: float = 0.1, max_points: int = 200_000) -> float:
+    """
+    Schätzt die Schräglage über Projektionsprofile.
+
+    Die dunklen Pixel werden für jeden Kandidatenwinkel auf die y-Achse
+    geschert und zeilenweise gezählt. Bei korrektem Winkel liegen die
+    Textzeilen übereinander und das Profil ist maximal "scharf" (größte
+    Summe quadrierter Differenzen). Grob-fein-Suche.
+
+    Returns:
+        Winkel in Grad (positiv = Zeilen fallen nach rechts ab)
+    """
+    # Wie otsu_binarize: dunkel = <= Schwellwert (bei reinen 0/255-Scans ist er 0)
+    threshold = otsu_threshold(gray)
+    ys, xs = np.nonzero(gray <= threshold)
+    if ys.size < 100:
+        return 0.0
+    if ys.size > max_points:
+        idx = np.random.default_rng(0).choice(ys.size, max_points, replace=False)
+        ys, xs = ys[idx], xs[idx]
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64) - gray.shape[1] / 2.0
+
+    def sharpness(angle: float) -> float:
+        rows = np.round(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+        profile = np.bincount(rows - rows.min()).astype(np.float64)
+        return float(np.sum(np.diff(profile) ** 2))
+
+    coarse = np.arange(-max_angle, max_angle + 1e-9, coarse_step)
+    best = max(coarse, key=sharpness)
+    fine = np.arange(best - coarse_step, best + coarse_step + 1e-9, fine_step)
+    return float(max(fine, key=sharpness))
+
+
+def deskew(gray: np.ndarray, angle: float) -> np.ndarray:
+    """Dreht das Bild um den geschätzten Winkel zurück (Hintergrund weiß)"""
+    if abs(angle) < 0.05:
+        return gray
+    image = Image.fromarray(gray)
+    rotated = image.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+    return np.asarray(rotated)
+
+
+def despeckle_binary(binary: np.ndarray, max_neighbors: int = 1) -> np.ndarray:
+    """Entfernt schwarze Pixel mit höchstens `max_neighbors` schwarzen Nachbarn"""
+    dark = (binary == 0).astype(np.uint8)
+    padded = np.pad(dark, 1)
+    height, width = dark.shape
+    neighbors = np.zeros((height, width), dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy == 1 and dx == 1:
+                continue
+            neighbors += padded[dy:dy + height, dx:dx + width]
+    cleaned = binary.copy()
+    cleaned[(dark == 1) & (neighbors <= max_neighbors)] = 255
+    return cleaned
+
+
+def despeckle_gray(gray: np.ndarray) -> np.ndarray:
+    """3x3-Medianfilter für Graustufenbilder"""
+    image = Image.fromarray(gray).filter(ImageFilter.MedianFilter(3))
+    return np.asarray(image)
+
+
+def crop_borders(gray: np.ndarray, dark_fraction: float = 0.5, max_border: float = 0.1,
+                 margin: int = 10) -> np.ndarray:
+    """
+    Schneidet schwarze Scannerränder und leere Ränder ab.
+
+    Ränder gelten als schwarz, solange eine Zeile/Spalte überwiegend dunkel ist
+    (höchstens `max_border` der Bildgröße je Seite). Danach wird auf den
+    Inhaltsbereich plus `margin` Pixel beschnitten.
+    """
+    height, width = gray.shape
+    dark = gray <= otsu_threshold(gray)
+    row_dark = dark.mean(axis=1)
+    col_dark = dark.mean(axis=0)
+
+    def border(profile: np.ndarray, limit: int) -> int:
+        count = 0
+        while count < limit and profile[count] > dark_fraction:
+            count += 1
+        return count
+
+    top = border(row_dark, int(height * max_border))
+    bottom = height - border(row_dark[::-1], int(height * max_border))
+    left = border(col_dark, int(width * max_border))
+    right = width - border(col_dark[::-1], int(width * max_border))
+    if bottom <= top or right <= left:
+        return gray
+
+    # Inhaltsbereich innerhalb der schwarzen Ränder
+    inner = dark[top:bottom, left:right]
+    rows = np.flatnonzero(inner.any(axis=1))
+    cols = np.flatnonzero(inner.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return gray[top:bottom, left:right]
+
+    y0 = max(0, top + rows[0] - margin)
+    y1 = min(bottom, top + rows[-1] + 1 + margin)
+    x0 = max(0, left + cols[0] - margin)
+    x1 = min(right, left + cols[-1] + 1 + margin)
+    return gray[y0:y1, x0:x1]
+
+
+def preprocess_array(gray: np.ndarray, options: PreprocessOptions,
+                     dpi: int = REFERENCE_DPI) -> np.ndarray:
+    """Wendet die Vorverarbeitung auf ein Graustufen-Array an"""
+    if options.crop_borders:
+        gray = crop_borders(gray, margin=max(2, round(10 * dpi / REFERENCE_DPI)))
+
+    if options.deskew:
+        angle = estimate_skew(gray, max_angle=options.max_skew_angle)
+        if angle:
+            logger.debug(f"Schräglage {angle:.2f}° korrigiert")
+        gray = deskew(gray, angle)
+
+    binarized = options.binarize in (BINARIZE_OTSU, BINARIZE_SAUVOLA)
+    if options.despeckle and not binarized:
+        gray = despeckle_gray(gray)
+
+    if options.binarize == BINARIZE_OTSU:
+        gray = otsu_binarize(gray)
+    elif options.binarize == BINARIZE_SAUVOLA:
+        window = max(3, round(options.sauvola_window * dpi / REFERENCE_DPI))
+        gray = sauvola_binarize(gray, window=window, k=options.sauvola_k)
+
+    if options.despeckle and binarized:
+        gray = despeckle_binary(gray)
+
+    return gray
+
+
+def preprocess_image(image: Image.Image, options: PreprocessOptions,
+                     dpi: Optional[int] = None) -> Image.Image:
+    """
+    Wendet die Vorverarbeitung auf ein PIL-Bild an.
+
+    Returns:
+        Neues Graustufenbild (Modus 'L'); unverändert, wenn nichts aktiv ist
+    """
+    if not options.enabled:
+        return image
+    if dpi is None:
+        dpi = int(image.info.get('dpi', (REFERENCE_DPI, REFERENCE_DPI))[0]) or REFERENCE_DPI
+    gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+    result = Image.fromarray(np.ascontiguousarray(preprocess_array(gray, options, dpi)))
+    result.info['dpi'] = (dpi, dpi)
+    return result
+
+
+def _benchmark(argv=None) -> int:
+    """Vergleicht Durchsatz und Genauigkeit der Presets mit der Graustufen-Basis"""
+    import argparse
+    import difflib
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark der OCR-Vorverarbeitung")
+    parser.add_argument("inputs", nargs="+", help="PDF-Dateien oder Bilder")
+    parser.add_argument("--truth", help="Referenztext (eine Datei für alle Seiten, Seiten durch Formfeed getrennt)")
+    parser.add_argument("--dpi", type=int, default=REFERENCE_DPI)
+    parser.add_argument("--lang", default="deu")
+    parser.add_argument("--presets", default=",".join(PRESETS.keys()))
+    parser.add_argument("--no-ocr", action="store_true", help="Nur Vorverarbeitung messen")
+    args = parser.parse_args(argv)
+
+    # Seiten laden
+    pages = []
+    for path in args.inputs:
+        if path.lower().endswith('.pdf'):
+            import fitz
+            with fitz.open(path) as doc:
+                for page in doc:
+                    pix = page.get_pixmap(dpi=args.dpi, colorspace=fitz.csGRAY, alpha=False)
+                    pages.append(Image.frombytes('L', (pix.width, pix.height), pix.samples))
+        else:
+            pages.append(Image.open(path).convert('L'))
+    for page in pages:
+        page.info['dpi'] = (args.dpi, args.dpi)
+
+    truth = None
+    if args.truth:
+        with open(args.truth, 'r', encoding='utf-8') as f:
+            truth = f.read().split('\f')
+
+    engine = None
+    if not args.no_ocr:
+        from core.tesseract_pool import get_tesseract_pool
+        engine = get_tesseract_pool()
+
+    print(f"{len(pages)} Seite(n) bei {args.dpi} DPI")
+    print(f"{'Preset':<10} {'Vorv. ms/S':>11} {'OCR ms/S':>9} {'Seiten/s':>9} {'Konfidenz':>10} {'Genauigkeit':>12}")
+
+    try:
+        for name in args.presets.split(","):
+            options = PreprocessOptions.from_value(name.strip())
+            prep_time = ocr_time = 0.0
+            confidences, scores = [], []
+            for index, page in enumerate(pages):
+                start = time.perf_counter()
+                processed = preprocess_image(page, options, dpi=args.dpi)
+                prep_time += time.perf_counter() - start
+
+                if engine is None:
+                    continue
+                start = time.perf_counter()
+                if engine.available:
+                    text, conf = engine.recognize(processed, lang=args.lang, config='--oem 3 --psm 3')
+                else:
+                    text, conf = engine.image_to_string(processed, lang=args.lang), -1
+                ocr_time += time.perf_counter() - start
+                if conf >= 0:
+                    confidences.append(conf)
+                if truth and index < len(truth):
+                    scores.append(difflib.SequenceMatcher(
+                        None, " ".join(truth[index].split()), " ".join(text.split())).ratio())
+
+            count = max(1, len(pages))
+            total = prep_time + ocr_time
+            conf_text = f"{sum(confidences) / len(confidences):.1f}" if confidences else "-"
+            score_text = f"{100 * sum(scores) / len(scores):.1f}%" if scores else "-"
+            print(f"{name:<10} {1000 * prep_time / count:>11.1f} {1000 * ocr_time / count:>9.1f} "
+                  f"{count / total if total else 0:>9.2f} {conf_text:>10} {score_text:>12}")
+    finally:
+        if engine is not None:
+            from core.tesseract_pool import shutdown_tesseract_pool
+            shutdown_tesseract_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(_benchmark())
@@ -0,0 +1,116 @@
+"""
+Streamende Erzeugung von E-Mails mit großen Anhängen
+
+Bisher wurde der Anhang vollständig gelesen, im Speicher base64-kodiert und
+die ganze MIMEMultipart-Nachricht anschließend noch einmal serialisiert - ein
+60-MB-Scan lag dabei mehrfach im Arbeitsspeicher.
+
+StreamingMessage schreibt Kopfzeilen und Textteil wie bisher über den
+E-Mail-Generator, die Anhänge dagegen blockweise: die Datei wird in Stücken
+gelesen und direkt in die Ausgabe (Spool-Datei) kodiert. Der Speicherbedarf
+ist unabhängig von der Größe der Anhänge. Die Nachricht hat denselben Aufbau
+wie zuvor (multipart/mixed mit Text als multipart/alternative und Anhängen
+als application/octet-stream) und verwendet CRLF als Zeilenende, damit sie
+unverändert per SMTP gesendet werden kann (siehe SMTPConnectionPool.send_file).
+"""
+import uuid
+import base64
+from dataclasses import dataclass
+from email.generator import BytesGenerator
+from email.message import Message
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.policy import compat32
+from typing import BinaryIO, List, Optional
+
+# Wie smtplib.send_message: bisherige Richtlinie, Zeilenenden CRLF
+_POLICY = compat32.clone(linesep='\r\n')
+
+# 57 Byte ergeben eine base64-Zeile mit 76 Zeichen; je Block 1024 Zeilen
+_BASE64_LINE_BYTES = 57
+_CHUNK_SIZE = _BASE64_LINE_BYTES * 1024
+
+
+@dataclass
+class _Attachment:
+    path: str
+    filename: str
+    maintype: str = 'application'
+    subtype: str = 'octet-stream'
+
+
+class StreamingMessage:
+    """multipart/mixed-Nachricht, deren Anhänge erst beim Schreiben gelesen werden"""
+
+    def __init__(self):
+        self._headers = Message()
+        self._texts: List[MIMEText] = []
+        self._attachments: List[_Attachment] = []
+
+    def __setitem__(self, name: str, value: str):
+        self._headers[name] = value
+
+    def __getitem__(self, name: str) -> Optional[str]:
+        return self._headers[name]
+
+    def add_text(self, text: str, subtype: str = 'plain', charset: str = 'utf-8'):
+        """Fügt eine Fassung des Nachrichtentexts hinzu (multipart/alternative)"""
+        self._texts.append(MIMEText(text, subtype, charset))
+
+    def add_attachment(self, path: str, filename: str,
+                       maintype: str = 'application', subtype: str = 'octet-stream'):
+        """Hängt eine Datei an; gelesen wird sie erst in write_to()"""
+        self._attachments.append(_Attachment(path, filename, maintype, subtype))
+
+    def write_to(self, fp: BinaryIO):
+        """Schreibt die vollständige Nachricht in eine binär geöffnete Datei"""
+        boundary = f"==============={uuid.uuid4().hex}=="
+
+        top = Message()
+        for name, value in self._headers.items():
+            top[name] = value
+        top['MIME-Version'] = '1.0'
+        top['Content-Type'] = 'multipart/mixed'
+        top.set_param('boundary', boundary)
+        top.set_payload('')  # nur Kopfzeilen; die Teile folgen einzeln
+        self._write_part(fp, top)
+
+        if self._texts:
+            body = MIMEMultipart('alternative')
+            for text in self._texts:
+                body.attach(text)
+            fp.write(f"--{boundary}\r\n".encode('ascii'))
+            self._write_part(fp, body)
+            fp.write(b"\r\n")
+
+        for attachment in self._attachments:
+            part = MIMEBase(attachment.maintype, attachment.subtype)
+            part['Content-Transfer-Encoding'] = 'base64'
+            part.add_header('Content-Disposition', 'attachment', filename=attachment.filename)
+            fp.write(f"--{boundary}\r\n".encode('ascii'))
+            self._write_part(fp, part)
+            self._write_base64(fp, attachment.path)
+
+        fp.write(f"--{boundary}--\r\n".encode('ascii'))
+
+    def save(self, path: str):
+        """Schreibt die Nachricht in eine Datei"""
+        with open(path, 'wb') as f:
+            self.write_to(f)
+
+    @staticmethod
+    def _write_part(fp: BinaryIO, part: Message):
+        """Kopfzeilen, Leerzeile und vorhandenen Inhalt eines Teils über den E-Mail-Generator"""
+        BytesGenerator(fp, mangle_from_=False, policy=_POLICY).flatten(part)
+
+    @staticmethod
+    def _write_base64(fp: BinaryIO, path: str):
+        """Kodiert eine Datei blockweise (76 Zeichen je Zeile, CRLF)"""
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                fp.write(base64.encodebytes(chunk).replace(b"\n", b"\r\n"))
+
@@ -3,6 +3,7 @@ OAuth2-Manager für E-Mail-Authentifizierung
 """
 import os
 import json
+import shutil
 import base64
 import hashlib
 import secrets
@@ -22,6 +23,9 @@ import logging
 # Logger für dieses Modul
 logger = logging.getLogger(__name__)
 
+# Zeitlimit für Anfragen an den Token-Endpunkt
+TOKEN_REQUEST_TIMEOUT = 30
+
 
 class OAuth2Config:
     """OAuth2-Konfiguration für verschiedene Anbieter"""
@@ -106,7 +110,7 @@ class OAuth2CallbackHandler(BaseHTTPRequestHandler):
 class OAuth2Manager:
     """Verwaltet OAuth2-Authentifizierung für E-Mail-Versand"""
     
-    def __init__(self, provider: str):
+    def __init__(self, provider: str, token_url: Optional[str] = None):
         self.provider = provider.lower()
         
         # Office365 ist ein Alias für Outlook
@@ -117,6 +121,9 @@ class OAuth2Manager:
             raise ValueError(f"Unbekannter OAuth2-Provider: {provider}")
         
         self.config = OAuth2Config.PROVIDERS[self.provider].copy()
+        if token_url:
+            # Abweichender Token-Endpunkt (z.B. lokaler Test-Server)
+            self.config['token_url'] = token_url
         self.server = None
         self.server_thread = None
     
@@ -272,7 +279,8 @@ class OAuth2Manager:
         
         try:
             logger.debug("Erneuere OAuth2-Access-Token")
-            response = requests.post(self.config['token_url'], data=token_data)
+            response = requests.post(self.config['token_url'], data=token_data,
+                                     timeout=TOKEN_REQUEST_TIMEOUT)
             response.raise_for_status()
             
             tokens = response.json()
@@ -326,6 +334,7 @@ class OAuth2TokenStorage:
     def __init__(self, storage_file: str = "oauth2_tokens.enc"):
         self.storage_file = storage_file
         self._tokens = {}
+        self._lock = threading.RLock()
         self._cipher = self._get_cipher()
         self.load_tokens()
     
@@ -375,6 +384,36 @@ class OAuth2TokenStorage:
                 logger.info(f"Token-Backup erstellt: {backup_file}")
             self._tokens = {}
     
+    @staticmethod
+    def _account_key(provider: str, account: str) -> str:
+        provider = provider.lower()
+        if provider == "office365":
+            provider = "outlook"
+        return f"{provider}:{(account or '').strip().lower()}"
+    
+    def get_tokens(self, provider: str, account: str) -> Optional[Dict[str, str]]:
+        """Gibt die (entschlüsselt im Speicher gehaltenen) Tokens eines Kontos zurück"""
+        with self._lock:
+            tokens = self._tokens.get(self._account_key(provider, account))
+            return dict(tokens) if tokens else None
+    
+    def set_tokens(self, provider: str, account: str, tokens: Dict[str, str]):
+        """Speichert die Tokens eines Kontos (Speicher und verschlüsselte Datei)"""
+        with self._lock:
+            self._tokens[self._account_key(provider, account)] = {
+                'access_token': tokens.get('access_token', ''),
+                'refresh_token': tokens.get('refresh_token', ''),
+                'token_expiry': tokens.get('token_expiry', ''),
+                'token_type': tokens.get('token_type', 'Bearer')
+            }
+            self.save_tokens()
+    
+    def remove_tokens(self, provider: str, account: str):
+        """Entfernt die Tokens eines Kontos"""
+        with self._lock:
+            if self._tokens.pop(self._account_key(provider, account), None) is not None:
+                self.save_tokens()
+    
     def save_tokens(self):
         """Verschlüsselt und speichert Tokens"""
         try:
@@ -411,11 +450,13 @@ class OAuth2TokenStorage:
 
 # Globale Token-Storage Instanz
 _token_storage = None
+_token_storage_lock = threading.Lock()
 
 def get_token_storage() -> OAuth2TokenStorage:
     """Gibt die globale Token-Storage Instanz zurück"""
     global _token_storage
-    if _token_storage is None:
-        _token_storage = OAuth2TokenStorage()
-        logger.debug("Globale OAuth2-Token-Storage Instanz erstellt")
+    with _token_storage_lock:
+        if _token_storage is None:
+            _token_storage = OAuth2TokenStorage()
+            logger.debug("Globale OAuth2-Token-Storage Instanz erstellt")
     return _token_storage
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+Vorausschauende Erneuerung von OAuth2-Tokens für den SMTP-Versand (XOAUTH2)
+
+Der SMTP-Pool meldet sich bei OAuth2-Konten mit XOAUTH2 an. Der Access Token
+kommt dabei aus dem Speicher dieses Moduls - ein Versand wartet nie auf eine
+Anfrage an den Token-Endpunkt. Ein Hintergrund-Thread erneuert die Tokens
+REFRESH_AHEAD vor ihrem Ablauf und schreibt sie in den verschlüsselten
+Token-Speicher (OAuth2TokenStorage).
+
+Nur wenn ein Token bereits abgelaufen ist (z.B. nach dem Ruhezustand),
+wartet access_token() höchstens EXPIRED_WAIT Sekunden auf die Erneuerung;
+schlägt sie fehl, wird der Versand später aus dem Spool wiederholt.
+
+Der Token-Endpunkt kann für Tests überschrieben werden (token_url).
+"""
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from core.oauth2_manager import OAuth2Manager, get_token_storage
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Tokens werden so lange vor ihrem Ablauf erneuert
+REFRESH_AHEAD = timedelta(minutes=10)
+
+# Wartezeit nach einer fehlgeschlagenen Erneuerung
+RETRY_DELAY = 60.0
+
+# Höchstens so lange wartet ein Versand auf die Erneuerung eines abgelaufenen Tokens
+EXPIRED_WAIT = 30.0
+
+
+class OAuth2TokenError(Exception):
+    """Kein gültiger Access Token verfügbar"""
+
+
+@dataclass
+class _Account:
+    provider: str
+    account: str
+    client_id: str
+    client_secret: str
+    access_token: str = ""
+    refresh_token: str = ""
+    expiry: Optional[datetime] = None
+    next_try: float = 0.0
+    last_error: str = ""
+    # Zuletzt aus den Einstellungen übernommener Refresh Token (erkennt eine neue Einrichtung)
+    settings_refresh_token: str = ""
+
+    @property
+    def valid(self) -> bool:
+        return bool(self.access_token) and self.expiry is not None and datetime.now() < self.expiry
+
+    def refresh_at(self) -> float:
+        """Zeitpunkt (time.time) der nächsten Erneuerung"""
+        if self.expiry is None:
+            due = time.time()
+        else:
+            due = (self.expiry - REFRESH_AHEAD).timestamp()
+        return max(due, self.next_try)
+
+
+def _parse_expiry(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def oauth2_account(settings) -> str:
+    """Konto (E-Mail-Adresse) für die XOAUTH2-Anmeldung"""
+    return settings.smtp_username or settings.smtp_from_address
+
+
+class OAuth2TokenRefresher:
+    """Hält Access Tokens im Speicher und erneuert sie im Hintergrund"""
+
+    def __init__(self, token_url: Optional[str] = None):
+        self.token_url = token_url
+        self._accounts: Dict[Tuple[str, str], _Account] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def register(self, settings) -> Tuple[str, str]:
+        """
+        Meldet das OAuth2-Konto der Einstellungen an (idempotent).
+
+        Die Tokens stammen aus dem Token-Speicher oder, falls dort keine
+        neueren liegen, aus den Einstellungen. Ein in den Einstellungen neu
+        eingetragener Refresh Token (erneute OAuth2-Einrichtung) ersetzt den
+        zwischengespeicherten.
+        """
+        provider = (settings.oauth2_provider or "").lower()
+        account = oauth2_account(settings)
+        key = (provider, account.lower())
+
+        settings_tokens = {'access_token': settings.oauth2_access_token,
+                           'refresh_token': settings.oauth2_refresh_token,
+                           'token_expiry': settings.oauth2_token_expiry}
+        stored_tokens = get_token_storage().get_tokens(provider, account) or {}
+
+        with self._cond:
+            entry = self._accounts.get(key)
+            if entry is None:
+                entry = _Account(provider=provider, account=account,
+                                 client_id=settings.oauth2_client_id,
+                                 client_secret=settings.oauth2_client_secret,
+                                 settings_refresh_token=settings.oauth2_refresh_token or "")
+                self._seed(entry, settings_tokens)
+                self._seed(entry, stored_tokens)
+                self._accounts[key] = entry
+                logger.debug(f"OAuth2-Konto {account} ({provider}) angemeldet")
+            else:
+                entry.client_id = settings.oauth2_client_id
+                entry.client_secret = settings.oauth2_client_secret
+                if (settings.oauth2_refresh_token
+                        and settings.oauth2_refresh_token != entry.settings_refresh_token):
+                    # OAuth2 in den Einstellungen neu eingerichtet - alten Token verwerfen
+                    entry.settings_refresh_token = settings.oauth2_refresh_token
+                    entry.refresh_token = settings.oauth2_refresh_token
+                    entry.access_token = ""
+                    entry.expiry = None
+                    entry.next_try = 0.0
+                    entry.last_error = ""
+                    logger.info(f"Neuer OAuth2-Refresh-Token für {account} ({provider}) übernommen")
+                self._seed(entry, settings_tokens)
+                self._seed(entry, stored_tokens)
+            self._ensure_thread()
+            self._cond.notify_all()
+        return key
+
+    def access_token(self, settings) -> str:
+        """
+        Gültiger Access Token für das Konto der Einstellungen (ohne HTTP-Anfrage,
+        solange der Token nicht bereits abgelaufen ist).
+
+        Raises:
+            OAuth2TokenError: kein gültiger Token verfügbar
+        """
+        key = self.register(settings)
+        deadline = time.monotonic() + EXPIRED_WAIT
+        with self._cond:
+            entry = self._accounts[key]
+            if not entry.valid:
+                logger.info(f"OAuth2-Token für {entry.account} abgelaufen, warte auf Erneuerung")
+                entry.next_try = 0.0
+                self._cond.notify_all()
+            while not entry.valid:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopped:
+                    raise OAuth2TokenError(f"Kein gültiger OAuth2-Token für {entry.account}"
+                                           + (f": {entry.last_error}" if entry.last_error else ""))
+                self._cond.wait(remaining)
+            return entry.access_token
+
+    def shutdown(self):
+        """Beendet die Erneuerung"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _ensure_thread(self):
+        """Startet den Erneuerungs-Thread bei Bedarf (Sperre gehalten)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="oauth2_refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Erneuert fällige Tokens"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    now = time.time()
+                    due = [entry for entry in self._accounts.values() if entry.refresh_at() <= now]
+                    if due:
+                        break
+                    waits = [entry.refresh_at() - now for entry in self._accounts.values()]
+                    self._cond.wait(min(waits) if waits else None)
+
+            for entry in due:
+                self._refresh(entry)
+
+    def _refresh(self, entry: _Account):
+        """Erneuert die Tokens eines Kontos (ohne gehaltene Sperre)"""
+        if not entry.refresh_token:
+            with self._cond:
+                entry.last_error = "Kein Refresh Token - OAuth2 neu einrichten"
+                entry.next_try = time.time() + RETRY_DELAY
+                self._cond.notify_all()
+            logger.error(f"OAuth2-Konto {entry.account}: {entry.last_error}")
+            return
+
+        try:
+            manager = OAuth2Manager(entry.provider, token_url=self.token_url)
+            manager.set_client_credentials(entry.client_id, entry.client_secret)
+            success, tokens = manager.refresh_access_token(entry.refresh_token)
+        except Exception as e:
+            success, tokens = False, {'error': str(e)}
+
+        with self._cond:
+            if success:
+                self._seed(entry, tokens)
+                entry.next_try = 0.0
+                entry.last_error = ""
+            else:
+                entry.last_error = tokens.get('error', 'Unbekannter Fehler')
+                entry.next_try = time.time() + RETRY_DELAY
+            self._cond.notify_all()
+
+        if success:
+            get_token_storage().set_tokens(entry.provider, entry.account, tokens)
+            logger.info(f"OAuth2-Token für {entry.account} erneuert (gültig bis {entry.expiry:%H:%M})")
+        else:
+            logger.error(f"OAuth2-Token für {entry.account} nicht erneuert: {entry.last_error}")
+
+    @staticmethod
+    def _seed(entry: _Account, tokens: Dict[str, str]):
+        """Übernimmt Tokens, wenn sie länger gültig sind als die vorhandenen"""
+        expiry = _parse_expiry(tokens.get('token_expiry', ''))
+        if tokens.get('refresh_token') and not entry.refresh_token:
+            entry.refresh_token = tokens['refresh_token']
+        if not tokens.get('access_token') or expiry is None:
+            return
+        if entry.expiry is None or expiry >= entry.expiry:
+            entry.access_token = tokens['access_token']
+            entry.expiry = expiry
+            if tokens.get('refresh_token'):
+                entry.refresh_token = tokens['refresh_token']
+
+
+# Globale Instanz
+_oauth2_refresher = None
+_oauth2_refresher_lock = threading.Lock()
+
+
+def get_oauth2_refresher() -> OAuth2TokenRefresher:
+    """Gibt die globale OAuth2TokenRefresher-Instanz zurück"""
+    global _oauth2_refresher
+    with _oauth2_refresher_lock:
+        if _oauth2_refresher is None:
+            _oauth2_refresher = OAuth2TokenRefresher()
+            logger.debug("Globale OAuth2TokenRefresher-Instanz erstellt")
+        return _oauth2_refresher
+
+
+def shutdown_oauth2_refresher():
+    """Beendet die Token-Erneuerung (falls gestartet)"""
+    with _oauth2_refresher_lock:
+        refresher = _oauth2_refresher
+    if refresher is not None:
+        refresher.shutdown()
@@ -0,0 +1,229 @@
+"""
+OCR-Sprachauswahl
+
+Die Sprache wird je Zone, Hotfolder und global (Einstellungen) festgelegt;
+der speziellste gesetzte Wert gilt. "auto" wählt je Dokument die kleinste
+passende Modellkombination aus den konfigurierten Sprachen: Schrift und
+häufige Funktionswörter einer Textprobe (Textebene oder eine OCR-Probe der
+ersten Seite in niedriger Auflösung) entscheiden. Jede zusätzliche Sprache
+im Modell (deu+eng) verlangsamt die Erkennung deutlich.
+"""
+import os
+import re
+import json
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.page_raster import file_signature
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+AUTO_LANGUAGE = "auto"
+DEFAULT_LANGUAGE = "deu"
+
+SETTINGS_FILE = "config/settings.json"
+
+# Eine zweite Sprache wird nur aufgenommen, wenn sie mindestens diesen Anteil
+# der Treffer der besten Sprache erreicht (gemischtsprachige Dokumente)
+SECONDARY_LANGUAGE_RATIO = 0.5
+
+# Mindestanzahl Funktionswörter für eine Entscheidung
+MIN_STOPWORD_HITS = 3
+
+# Häufige Funktionswörter je Tesseract-Sprache (lateinische Schrift)
+STOPWORDS: Dict[str, frozenset] = {
+    "deu": frozenset("der die das und ist nicht mit für von den dem des ein eine einer auf zu im bei "
+                     "sie wir ihre ihr bitte rechnung betrag datum".split()),
+    "eng": frozenset("the and of to is for with on in this that are be your our please invoice "
+                     "amount date from by".split()),
+    "fra": frozenset("le la les et est pour avec des du une un dans sur vous nous facture montant "
+                     "date au aux".split()),
+    "ita": frozenset("il lo la gli le e di per con del della un una che sono fattura importo data "
+                     "dal nel".split()),
+    "spa": frozenset("el la los las y de para con del una un que por factura importe fecha en su "
+                     "sus".split()),
+    "nld": frozenset("de het een en van voor met is niet op te bij uw wij factuur bedrag datum "
+                     "aan".split()),
+    "por": frozenset("o a os as e de para com do da um uma que por fatura valor data em no "
+                     "na".split()),
+    "pol": frozenset("i w na z do nie jest się że od dla oraz faktura kwota data przez".split()),
+}
+
+# Schriften außerhalb des lateinischen Alphabets -> Sprachen
+_SCRIPT_RANGES: Tuple[Tuple[str, Tuple[str, ...], int, int], ...] = (
+    ("Kyrillisch", ("rus", "ukr", "bul", "srp"), 0x0400, 0x04FF),
+    ("Griechisch", ("ell",), 0x0370, 0x03FF),
+    ("Arabisch", ("ara", "fas"), 0x0600, 0x06FF),
+    ("Hebräisch", ("heb",), 0x0590, 0x05FF),
+    ("CJK", ("chi_sim", "chi_tra", "jpn"), 0x4E00, 0x9FFF),
+)
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def split_languages(language: str) -> List[str]:
+    """'deu+eng' -> ['deu', 'eng']"""
+    return [part.strip() for part in (language or "").split('+') if part.strip()]
+
+
+def detect_language(text: str, candidates: Sequence[str],
+                    fallback: str = DEFAULT_LANGUAGE) -> str:
+    """
+    Wählt die kleinste passende Sprachkombination für einen Text.
+
+    Args:
+        text: Textprobe
+        candidates: Erlaubte Tesseract-Sprachen
+        fallback: Ergebnis ohne eindeutige Erkennung
+
+    Returns:
+        Tesseract-Sprachangabe (z.B. 'deu' oder 'deu+eng')
+    """
+    candidates = [c for c in candidates if c]
+    if not candidates:
+        return fallback
+
+    # Schrift: nicht-lateinische Zeichen überwiegen?
+    letters = [ch for ch in text if ch.isalpha()]
+    if letters:
+        for _, languages, low, high in _SCRIPT_RANGES:
+            share = sum(1 for ch in letters if low <= ord(ch) <= high) / len(letters)
+            if share >= 0.3:
+                matching = [c for c in candidates if c in languages]
+                if matching:
+                    return matching[0]
+
+    # Funktionswörter zählen
+    words = [w.casefold() for w in _WORD_PATTERN.findall(text)]
+    scores = {c: sum(1 for w in words if w in STOPWORDS[c]) for c in candidates if c in STOPWORDS}
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if not ranked or ranked[0][1] < MIN_STOPWORD_HITS:
+        return fallback
+
+    best, best_score = ranked[0]
+    chosen = [best]
+    for language, score in ranked[1:]:
+        if score >= SECONDARY_LANGUAGE_RATIO * best_score:
+            chosen.append(language)
+    return "+".join(chosen)
+
+
+class OCRLanguageResolver:
+    """Ermittelt die OCR-Sprache aus Zone, Hotfolder und Einstellungen"""
+
+    def __init__(self, settings_file: str = SETTINGS_FILE):
+        self.settings_file = settings_file
+        self.default_language = DEFAULT_LANGUAGE
+        self.additional_languages: List[str] = []
+        self._settings_mtime = None
+        self._detected: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def _refresh_settings(self):
+        """Liest die Einstellungen neu, wenn sich die Datei geändert hat"""
+        try:
+            mtime = os.stat(self.settings_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._settings_mtime:
+            return
+        self._settings_mtime = mtime
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.default_language = data.get('ocr_default_language') or DEFAULT_LANGUAGE
+            self.additional_languages = [
+                lang for lang in data.get('ocr_additional_languages', []) if lang
+            ]
+        except Exception as e:
+            logger.error(f"Fehler beim Laden der OCR-Spracheinstellungen: {e}")
+
+    def configured_languages(self) -> List[str]:
+        """
+        Standardsprache und zusätzliche Sprachen (einzeln, ohne Duplikate).
+        "auto" ist keine Tesseract-Sprache und wird übergangen; bleibt keine
+        Sprache übrig, gilt DEFAULT_LANGUAGE.
+        """
+        with self._lock:
+            self._refresh_settings()
+            languages = split_languages(self.default_language)
+            for language in self.additional_languages:
+                languages.extend(split_languages(language))
+        languages = [language for language in languages if language != AUTO_LANGUAGE]
+        return list(dict.fromkeys(languages)) or [DEFAULT_LANGUAGE]
+
+    def default(self) -> str:
+        """Globale Standardsprache"""
+        with self._lock:
+            self._refresh_settings()
+            return self.default_language
+
+    def resolve(self, pdf_path: str, *choices: Optional[str],
+                sampler: Optional[Callable[[], str]] = None) -> str:
+        """
+        Konkrete Tesseract-Sprache für ein Dokument.
+
+        Args:
+            choices: Werte vom speziellsten zum allgemeinsten (Zone, Hotfolder,
+                     Export); leere Werte werden übersprungen, danach gilt die
+                     Standardsprache
+            sampler: Liefert eine Textprobe für "auto" (nur beim ersten Mal)
+        """
+        language = next((c for c in choices if c), None) or self.default()
+        if language != AUTO_LANGUAGE:
+            return language
+
+        key = file_signature(pdf_path)
+        with self._lock:
+            detected = self._detected.get(key)
+        if detected:
+            return detected
+
+        candidates = self.configured_languages()
+        fallback = candidates[0] if candidates else DEFAULT_LANGUAGE
+        try:
+            sample = sampler() if sampler else ""
+            detected = detect_language(sample, candidates, fallback)
+        except Exception as e:
+            logger.warning(f"Spracherkennung fehlgeschlagen, verwende '{fallback}': {e}")
+            detected = fallback
+
+        logger.info(f"OCR-Sprache für {os.path.basename(pdf_path)} erkannt: {detected}")
+        with self._lock:
+            self._detected[key] = detected
+        return detected
+
+    def drop(self, pdf_path: str):
+        """Vergisst die erkannte Sprache einer Datei"""
+        path_key = os.path.normcase(os.path.abspath(pdf_path))
+        with self._lock:
+            for key in [k for k in self._detected if k[0] == path_key]:
+                del self._detected[key]
+
+    def clear(self):
+        with self._lock:
+            self._detected.clear()
+
+
+def available_languages(tessdata_dir: Optional[str]) -> List[str]:
+    """Installierte Sprachmodelle (*.traineddata) im tessdata-Verzeichnis"""
+    if not tessdata_dir or not os.path.isdir(tessdata_dir):
+        return []
+    return sorted(name[:-len('.traineddata')] for name in os.listdir(tessdata_dir)
+                  if name.endswith('.traineddata') and name != 'osd.traineddata')
+
+
+# Globale Instanz
+_ocr_language_resolver = None
+_ocr_language_resolver_lock = threading.Lock()
+
+
+def get_ocr_language_resolver() -> OCRLanguageResolver:
+    """Gibt die globale OCRLanguageResolver-Instanz zurück"""
+    global _ocr_language_resolver
+    with _ocr_language_resolver_lock:
+        if _ocr_language_resolver is None:
+            _ocr_language_resolver = OCRLanguageResolver()
+        return _ocr_language_resolver
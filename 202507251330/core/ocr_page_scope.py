@@ -0,0 +1,150 @@
+"""
+Seitenbereiche für die OCR
+
+Ausdrücke können statt des ganzen Dokuments einzelne Seiten verwenden:
+
+    <OCR_Page1>           Text von Seite 1
+    <OCR_FirstPages(2)>   Text der ersten beiden Seiten
+    <OCR_LastPages(2)>    Text der letzten beiden Seiten
+    <OCR_LastPage>        Text der letzten Seite
+    <OCR_FullText>        Text aller Seiten
+
+Aus den konfigurierten Ausdrücken wird ermittelt, welche Seiten tatsächlich
+gebraucht werden; nur diese werden erkannt. Die Variablen sind LazyText-Werte,
+die erst beim Einsetzen (str) auf ihre Seiten warten.
+"""
+import re
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+FULL_TEXT_VARIABLE = 'OCR_FullText'
+
+_PAGE_VARIABLE_PATTERN = re.compile(
+    r'<(OCR_FullText|OCR_LastPage|OCR_Page(\d+)|OCR_FirstPages\((\d+)\)|OCR_LastPages\((\d+)\))>'
+)
+
+
+@dataclass
+class PageScope:
+    """Von Ausdrücken referenzierte Seiten"""
+    full_text: bool = False
+    pages: Set[int] = field(default_factory=set)        # 1-basiert
+    last_pages: int = 0                                 # Anzahl Seiten vom Ende
+    variables: Set[str] = field(default_factory=set)    # Variablennamen ohne <>
+
+    @property
+    def needed(self) -> bool:
+        return bool(self.full_text or self.pages or self.last_pages)
+
+    def resolve(self, page_count: int) -> List[int]:
+        """Konkrete Seitennummern für ein Dokument mit page_count Seiten"""
+        if self.full_text:
+            return list(range(1, page_count + 1))
+        result = {p for p in self.pages if 1 <= p <= page_count}
+        result.update(range(max(1, page_count - self.last_pages + 1), page_count + 1))
+        return sorted(result)
+
+
+def collect_page_scope(expressions: Iterable[Any]) -> PageScope:
+    """
+    Ermittelt die Seiten-Variablen aus Ausdrücken.
+    Verschachtelte Listen und Dictionaries (z.B. Export-Konfigurationen)
+    werden durchsucht.
+    """
+    scope = PageScope()
+
+    def visit(value: Any):
+        if isinstance(value, str):
+            for match in _PAGE_VARIABLE_PATTERN.finditer(value):
+                name, page, first, last = match.groups()
+                scope.variables.add(name)
+                if name == FULL_TEXT_VARIABLE:
+                    scope.full_text = True
+                elif name == 'OCR_LastPage':
+                    scope.last_pages = max(scope.last_pages, 1)
+                elif page:
+                    scope.pages.add(int(page))
+                elif first:
+                    scope.pages.update(range(1, int(first) + 1))
+                elif last:
+                    scope.last_pages = max(scope.last_pages, int(last))
+        elif isinstance(value, dict):
+            for item in value.values():
+                visit(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                visit(item)
+        elif hasattr(value, 'to_dict'):
+            visit(value.to_dict())
+
+    for expression in expressions:
+        visit(expression)
+    return scope
+
+
+class LazyText:
+    """Text, der erst bei der ersten Verwendung ermittelt wird"""
+
+    def __init__(self, resolver: Callable[[], str]):
+        self._resolver = resolver
+        self._value: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        with self._lock:
+            if self._value is None:
+                try:
+                    self._value = self._resolver() or ""
+                except Exception as e:
+                    logger.error(f"OCR-Text konnte nicht ermittelt werden: {e}")
+                    self._value = ""
+            return self._value
+
+    def __len__(self) -> int:
+        return len(str(self))
+
+    def __getitem__(self, item):
+        return str(self)[item]
+
+    def __eq__(self, other) -> bool:
+        return str(self) == (str(other) if isinstance(other, LazyText) else other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+def build_page_variables(scope: PageScope, stream) -> Dict[str, LazyText]:
+    """
+    Kontext-Variablen für einen OCRPageStream.
+
+    Eine einzelne Seite liefert ihren reinen Text, mehrere Seiten das Format
+    von OCR_FullText (mit "--- Seite N ---").
+    """
+    page_count = stream.page_count
+    variables: Dict[str, LazyText] = {}
+
+    for name in scope.variables:
+        if name == FULL_TEXT_VARIABLE:
+            continue
+        match = _PAGE_VARIABLE_PATTERN.fullmatch(f"<{name}>")
+        _, page, first, last = match.groups()
+        if name == 'OCR_LastPage':
+            pages = [page_count]
+        elif page:
+            pages = [int(page)]
+        elif first:
+            pages = list(range(1, min(int(first), page_count) + 1))
+        else:
+            pages = list(range(max(1, page_count - int(last) + 1), page_count + 1))
+
+        if len(pages) == 1:
+            variables[name] = LazyText(lambda p=pages[0]: stream.page_text(p))
+        else:
+            variables[name] = LazyText(lambda ps=pages: stream.text(ps))
+
+    return variables
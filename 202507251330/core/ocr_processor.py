@@ -3,30 +3,119 @@ OCR-Verarbeitung für PDFs
 """
 import os
 import re
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+from dataclasses import replace
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Iterator
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import tempfile
+import fitz
 import logging
 import time
 import json
 
+from core.tesseract_pool import get_tesseract_pool
+from core.page_raster import SharedFrame, get_page_raster_cache
+from core.document_text import get_document_text_cache
+from core.image_preprocessing import PreprocessOptions, preprocess_image
+from core.ocr_page_scope import PageScope, LazyText, build_page_variables, FULL_TEXT_VARIABLE
+from core.ocr_language import get_ocr_language_resolver
+from core.word_index import (
+    AnchorRule, PageWordIndex, extract_with_rule, get_word_index_cache,
+    words_from_text_layer, words_from_tsv
+)
+from core.zone_strategy import (
+    ZONE_OCR_LADDER, DEFAULT_MIN_CONFIDENCE, is_zone_result_acceptable, get_zone_strategy_store
+)
+
 # Logger für dieses Modul
 logger = logging.getLogger(__name__)
 
 
+def format_page_texts(page_texts: Iterable[Tuple[int, str]]) -> str:
+    """Fügt Seitentexte im Format von OCR_FullText zusammen"""
+    return "\n\n".join(f"--- Seite {page_no} ---\n{text}" for page_no, text in page_texts)
+
+
+class OCRPageStream:
+    """
+    Seitentexte, die im Hintergrund erkannt werden.
+
+    Jede Seite ist einzeln abrufbar, sobald sie fertig ist - die Auswertung
+    von Ausdrücken kann mit Seite 1 beginnen, während spätere Seiten noch
+    erkannt werden.
+    """
+
+    def __init__(self, pdf_path: str, page_count: int, pages: Iterable[int]):
+        self.pdf_path = pdf_path
+        self.page_count = page_count
+        self._futures: Dict[int, Future] = {p: Future() for p in pages}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pages(self) -> List[int]:
+        return sorted(self._futures)
+
+    def page_text(self, page_no: int, timeout: Optional[float] = None) -> str:
+        """Text einer Seite (wartet bis sie erkannt ist); "" bei Fehlern"""
+        future = self._futures.get(page_no)
+        if future is None:
+            return ""
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            logger.error(f"OCR für Seite {page_no} von {os.path.basename(self.pdf_path)} fehlgeschlagen: {e}")
+            return ""
+
+    def text(self, pages: Iterable[int]) -> str:
+        """Mehrere Seiten im Format von OCR_FullText"""
+        return format_page_texts((p, self.page_text(p)) for p in pages)
+
+    def _set_page(self, page_no: int, text: str):
+        future = self._futures.get(page_no)
+        if future is not None and not future.done():
+            future.set_result(text)
+
+    def _fail_open(self, error: BaseException):
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        """Plant keine weiteren Seiten ein und wartet auf den Hintergrund-Thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._fail_open(RuntimeError("OCR-Stream geschlossen"))
+
+
 class OCRProcessor:
     """Führt OCR auf PDF-Dateien aus und extrahiert Text"""
 
-    def __init__(self):
+    # Auflösung für Volltext-OCR
+    FULLTEXT_DPI = 300
+
+    def __init__(self, ocr_window: Optional[int] = None):
         # Versuche Tesseract zu finden
         self._setup_tesseract()
         
         # Setze Poppler-Pfad
         self._setup_poppler()
 
+        # Persistente Tesseract-Engines (Fallback: pytesseract) mit den
+        # konfigurierten Sprachmodellen vorgeladen
+        self.engine_pool = get_tesseract_pool()
+        self.language_resolver = get_ocr_language_resolver()
+        self.engine_pool.add_preload_languages(self.language_resolver.configured_languages())
+
+        # Maximale Anzahl gleichzeitig gerenderter Seiten (None = 2x Worker)
+        self.ocr_window = ocr_window
+
+        # Gemeinsamer Cache gerenderter Seiten (Shared Memory, Graustufen)
+        self.raster_cache = get_page_raster_cache()
+
     def _setup_tesseract(self):
         """Konfiguriert Tesseract OCR"""
         # Windows-spezifische Einstellungen für versteckte Konsolen
@@ -129,14 +218,15 @@ class OCRProcessor:
         """Gibt den Poppler-Pfad zurück oder None"""
         return self.poppler_path
 
-    def _preprocess_image_for_ocr(self, image: Image.Image) -> Image.Image:
-        """Bereitet ein Bild für eine bessere OCR-Erkennung vor."""
-        # Konvertiere zu Graustufen für bessere Kontraste
-        return image.convert('L')
-
-    def extract_text_from_pdf(self, pdf_path: str, language: str = 'deu') -> str:
+    def extract_text_from_pdf(self, pdf_path: str, language: Optional[str] = None,
+                              preprocessing: Any = None) -> str:
         """
         Extrahiert Text aus einer PDF-Datei mittels OCR mit Vorverarbeitung
+
+        Args:
+            language: Tesseract-Sprache ('deu', 'deu+eng', 'auto'), None = Standard
+            preprocessing: Preset-Name oder Dictionary (siehe PreprocessOptions),
+                           None = nur Graustufen
         """
         try:
             # WICHTIG: Normalisiere den Pfad für Windows
@@ -167,47 +257,364 @@ class OCRProcessor:
                         logger.error(f"Datei konnte nicht geöffnet werden: {e}")
                         return ""
             
-            logger.debug(f"Starte OCR für: {pdf_path}")
-
-            # Konvertiere PDF zu Bildern
-            with tempfile.TemporaryDirectory() as temp_dir:
-                poppler_path = self._get_poppler_path()
-                
-                # Prüfe ob Poppler existiert
-                if not poppler_path or not os.path.exists(poppler_path):
-                    logger.error(f"Poppler nicht gefunden. Bitte im dependencies Ordner platzieren.")
-                    return ""
-                
-                # Konvertiere mit explizitem poppler_path Parameter
-                images = convert_from_path(
-                    pdf_path, 
-                    dpi=300, 
-                    poppler_path=poppler_path,
-                    output_folder=temp_dir
-                )
-
-                all_text = []
-                for i, image in enumerate(images):
-                    logger.debug(f"OCR auf Seite {i+1}/{len(images)}")
-                    # Wende Bildvorverarbeitung an
-                    preprocessed_image = self._preprocess_image_for_ocr(image)
-                    # OCR auf jeder Seite
-                    text = pytesseract.image_to_string(preprocessed_image, lang=language)
-                    all_text.append(f"--- Seite {i+1} ---\n{text}")
-
-                result_text = "\n\n".join(all_text)
-                logger.info(f"OCR abgeschlossen für {os.path.basename(pdf_path)}: {len(result_text)} Zeichen extrahiert")
-                return result_text
+            language = self.resolve_language(pdf_path, language)
+            logger.debug(f"Starte OCR für: {pdf_path} ({language})")
+
+            # Einmal je Dateistand: Text ggf. aus einem vorgemerkten PDF/A-Lauf
+            page_texts = get_document_text_cache().get_page_texts(
+                pdf_path, language,
+                lambda known: self._ocr_remaining_pages(pdf_path, language, known, preprocessing)
+            )
+
+            result_text = format_page_texts(page_texts)
+            logger.info(f"OCR abgeschlossen für {os.path.basename(pdf_path)}: {len(result_text)} Zeichen extrahiert")
+            return result_text
 
         except Exception as e:
             logger.error(f"Fehler bei OCR für {pdf_path}: {e}", exc_info=True)
             return ""
 
+    # Auflösung der Textprobe für die Spracherkennung
+    LANGUAGE_SAMPLE_DPI = 150
+
+    def resolve_language(self, pdf_path: str, *choices: Optional[str]) -> str:
+        """
+        Konkrete Tesseract-Sprache: erster gesetzter Wert aus `choices`
+        (Zone, Hotfolder, ...), sonst die Standardsprache der Einstellungen.
+        "auto" wird einmal je Dokument erkannt.
+        """
+        return self.language_resolver.resolve(
+            pdf_path, *choices, sampler=lambda: self._language_sample(pdf_path))
+
+    def _language_sample(self, pdf_path: str) -> str:
+        """Textprobe für die Spracherkennung: Textebene, sonst OCR-Probe der ersten Seite"""
+        doc = fitz.open(pdf_path)
+        try:
+            sample = " ".join(doc[i].get_text() for i in range(min(2, doc.page_count)))
+        finally:
+            doc.close()
+        if sum(ch.isalpha() for ch in sample) >= 100:
+            return sample
+
+        # Probe mit einem einzelnen Modell in niedriger Auflösung - lateinische
+        # Funktionswörter werden auch vom "falschen" Modell erkannt
+        candidates = self.language_resolver.configured_languages()
+        frame = self.raster_cache.acquire(pdf_path, 1, self.LANGUAGE_SAMPLE_DPI)
+        try:
+            text, _ = self._recognize(frame, candidates[0] if candidates else 'deu')
+        finally:
+            self.raster_cache.release(frame)
+        return text
+
+    def _page_count(self, pdf_path: str) -> int:
+        """Gibt die Seitenanzahl einer PDF zurück"""
+        doc = fitz.open(pdf_path)
+        try:
+            return doc.page_count
+        finally:
+            doc.close()
+
+    def _recognize(self, frame: SharedFrame, language: str, config: str = '',
+                   rect: Optional[Tuple[int, int, int, int]] = None,
+                   options: Optional[PreprocessOptions] = None,
+                   output: str = 'text', with_confidence: bool = False) -> Tuple[str, int]:
+        """
+        OCR auf einem Frame bzw. einem Rechteck daraus.
+
+        Ohne Vorverarbeitung erhält der Worker nur den Deskriptor. Mit
+        Vorverarbeitung wird der Ausschnitt hier (NumPy, gibt den GIL weitgehend
+        frei) aufbereitet und als eigener temporärer Frame übergeben.
+        """
+        if options is None or not options.enabled:
+            return self.engine_pool.recognize_frame(frame.descriptor, lang=language,
+                                                    config=config, rect=rect, output=output,
+                                                    with_confidence=with_confidence)
+
+        image = frame.to_image()
+        if rect is not None:
+            x, y, w, h = rect
+            x0, y0 = max(0, x), max(0, y)
+            x1, y1 = min(frame.width, x + w), min(frame.height, y + h)
+            if x1 <= x0 or y1 <= y0:
+                return "", -1
+            image = image.crop((x0, y0, x1, y1))
+        processed = preprocess_image(image, options, dpi=frame.dpi)
+        image = None
+
+        temp = SharedFrame.from_image(processed, dpi=frame.dpi)
+        try:
+            return self.engine_pool.recognize_frame(temp.descriptor, lang=language,
+                                                    config=config, output=output,
+                                                    with_confidence=with_confidence)
+        finally:
+            temp.release()
+
+    def _ocr_frame(self, frame: SharedFrame, language: str,
+                   options: Optional[PreprocessOptions] = None) -> str:
+        """OCR für einen Seiten-Frame (läuft in einem Dispatcher-Thread)"""
+        text, _ = self._recognize(frame, language, options=options)
+        return text
+
+    def _ocr_remaining_pages(self, pdf_path: str, language: str, known: Dict[int, str],
+                             preprocessing: Any = None) -> List[Tuple[int, str]]:
+        """Alle Seiten; bereits einzeln erkannte Seiten werden übernommen"""
+        page_count = self._page_count(pdf_path)
+        missing = [p for p in range(1, page_count + 1) if p not in known]
+        texts = dict(known)
+        texts.update(self.ocr_pages(pdf_path, language, pages=missing, preprocessing=preprocessing))
+        return [(p, texts.get(p, "")) for p in range(1, page_count + 1)]
+
+    def ocr_pages(self, pdf_path: str, language: Optional[str] = None,
+                  pages: Optional[Iterable[int]] = None,
+                  preprocessing: Any = None) -> List[Tuple[int, str]]:
+        """
+        Führt seitenparallele OCR mit begrenztem Speicherbedarf aus.
+
+        Returns:
+            Liste von (Seitennummer, Text) in Seitenreihenfolge
+        """
+        return list(self.iter_ocr_pages(pdf_path, language, pages, preprocessing))
+
+    def iter_ocr_pages(self, pdf_path: str, language: Optional[str] = None,
+                       pages: Optional[Iterable[int]] = None,
+                       preprocessing: Any = None,
+                       stop_event: Optional[threading.Event] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Seitenparallele OCR, deren Ergebnisse einzeln geliefert werden.
+
+        Seiten werden nacheinander in Shared-Memory-Frames gerendert und als
+        Deskriptor an die Tesseract-Engines verteilt. Höchstens `ocr_window`
+        Seiten sind gleichzeitig in Arbeit; jede Seite wird geliefert, sobald
+        sie und alle vorherigen fertig sind (Seitenreihenfolge).
+
+        Args:
+            stop_event: Bricht das Einplanen weiterer Seiten ab, wenn gesetzt
+
+        Yields:
+            (Seitennummer, Text)
+        """
+        language = self.resolve_language(pdf_path, language)
+        page_count = self._page_count(pdf_path)
+        page_numbers = [p for p in (pages if pages is not None else range(1, page_count + 1))
+                        if 1 <= p <= page_count]
+
+        options = PreprocessOptions.from_value(preprocessing)
+        workers = self.engine_pool.size if self.engine_pool.available else (os.cpu_count() or 1)
+        window = self.ocr_window or max(2, workers * 2)
+
+        in_flight = deque()
+
+        def collect_oldest() -> Tuple[int, str]:
+            done_page, frame, future = in_flight.popleft()
+            try:
+                return done_page, future.result()
+            finally:
+                self.raster_cache.release(frame)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr_page") as executor:
+            try:
+                for page_no in page_numbers:
+                    if stop_event is not None and stop_event.is_set():
+                        break
+
+                    # Fenster voll: auf die älteste Seite warten (hält die Reihenfolge)
+                    while len(in_flight) >= window:
+                        yield collect_oldest()
+
+                    frame = self.raster_cache.acquire(pdf_path, page_no, self.FULLTEXT_DPI)
+                    logger.debug(f"OCR auf Seite {page_no} eingeplant")
+                    in_flight.append((page_no, frame,
+                                      executor.submit(self._ocr_frame, frame, language, options)))
+
+                    # Fertige Seiten sofort weitergeben
+                    while in_flight and in_flight[0][2].done():
+                        yield collect_oldest()
+
+                while in_flight:
+                    yield collect_oldest()
+            finally:
+                # Bei Fehlern oder Abbruch restliche Frames freigeben - laufende
+                # Seiten lesen noch aus dem Shared Memory und werden abgewartet
+                for _, _, future in in_flight:
+                    future.cancel()
+                wait([future for _, _, future in in_flight])
+                for _, frame, _ in in_flight:
+                    self.raster_cache.release(frame)
+                in_flight.clear()
+
+    def stream_pages(self, pdf_path: str, pages: Iterable[int], language: Optional[str] = None,
+                     preprocessing: Any = None) -> OCRPageStream:
+        """
+        Startet die OCR der angegebenen Seiten im Hintergrund.
+
+        Bereits erkannte Seiten kommen aus dem DocumentTextCache. Ist für das
+        Dokument ein gemeinsamer PDF/A-Lauf vorgemerkt, liefert dieser alle
+        Seiten auf einmal (OCRmyPDF erkennt ohnehin das ganze Dokument).
+        """
+        pdf_path = os.path.normpath(pdf_path)
+        language = self.resolve_language(pdf_path, language)
+        page_count = self._page_count(pdf_path)
+        stream = OCRPageStream(pdf_path, page_count,
+                               [p for p in pages if 1 <= p <= page_count])
+
+        cache = get_document_text_cache()
+        known = cache.known_pages(pdf_path, language)
+        for page_no in stream.pages:
+            if page_no in known:
+                stream._set_page(page_no, known[page_no])
+        missing = [p for p in stream.pages if p not in known]
+        if not missing:
+            return stream
+
+        def run():
+            try:
+                if cache.is_pdfa_planned(pdf_path, language):
+                    texts = dict(cache.get_page_texts(
+                        pdf_path, language,
+                        lambda done: self._ocr_remaining_pages(pdf_path, language, done, preprocessing)
+                    ))
+                    for page_no in missing:
+                        stream._set_page(page_no, texts.get(page_no, ""))
+                    return
+
+                for page_no, text in self.iter_ocr_pages(pdf_path, language, missing,
+                                                         preprocessing, stream._stop):
+                    cache.store_page(pdf_path, language, page_no, text)
+                    stream._set_page(page_no, text)
+            except Exception as e:
+                stream._fail_open(e)
+            finally:
+                stream._fail_open(RuntimeError("Seite nicht erkannt"))
+
+        logger.debug(f"OCR-Stream für {os.path.basename(pdf_path)}: Seiten {missing}")
+        stream._thread = threading.Thread(target=run, name="ocr_stream", daemon=True)
+        stream._thread.start()
+        return stream
+
+    def page_scope_variables(self, pdf_path: str, scope: PageScope, language: Optional[str] = None,
+                             preprocessing: Any = None) -> Tuple[Dict[str, Any], Optional[OCRPageStream]]:
+        """
+        Kontext-Variablen für die referenzierten Seiten (OCR_FullText,
+        OCR_Page1, OCR_LastPage, ...).
+
+        Die OCR der benötigten Seiten startet sofort im Hintergrund; die
+        Variablen warten erst beim Einsetzen auf ihre Seiten. Der Aufrufer
+        schließt den Stream nach der Auswertung.
+
+        Returns:
+            (Variablen, Stream oder None)
+        """
+        if not scope.needed:
+            return {}, None
+        try:
+            pdf_path = os.path.normpath(pdf_path)
+            page_count = self._page_count(pdf_path)
+            stream = self.stream_pages(pdf_path, scope.resolve(page_count), language, preprocessing)
+        except Exception as e:
+            logger.error(f"Fehler bei OCR für {pdf_path}: {e}")
+            return {name: "" for name in scope.variables}, None
+
+        variables: Dict[str, Any] = build_page_variables(scope, stream)
+        if scope.full_text:
+            variables[FULL_TEXT_VARIABLE] = LazyText(
+                lambda: stream.text(range(1, page_count + 1)))
+        return variables, stream
+
+    def get_word_index(self, pdf_path: str, page_num: int, language: Optional[str] = None,
+                       preprocessing: Any = None) -> PageWordIndex:
+        """
+        Wortindex einer Seite (einmal je Dateistand).
+
+        Enthält die Seite eine Textebene, werden deren Wörter verwendet - ohne
+        Rasterung. Sonst wird die Seite einmal mit TSV-Ausgabe erkannt.
+        """
+        pdf_path = os.path.normpath(pdf_path)
+        language = self.resolve_language(pdf_path, language)
+
+        def build() -> PageWordIndex:
+            doc = fitz.open(pdf_path)
+            try:
+                raw_words = doc[page_num - 1].get_text("words")
+            finally:
+                doc.close()
+            if raw_words:
+                logger.debug(f"Wortindex aus Textebene: {os.path.basename(pdf_path)}, Seite {page_num}")
+                return PageWordIndex(words_from_text_layer(raw_words), source="text")
+
+            # Randbeschnitt und Begradigung (Drehung mit Vergrößerung) würden die
+            # Wortboxen aus dem Seitenkoordinatensystem verschieben
+            options = replace(PreprocessOptions.from_value(preprocessing),
+                              crop_borders=False, deskew=False)
+            frame = self.raster_cache.acquire(pdf_path, page_num, 300)
+            try:
+                tsv, _ = self._recognize(frame, language, config='--oem 3 --psm 3',
+                                         options=options, output='tsv')
+                words = words_from_tsv(tsv, frame.scale, frame.origin)
+            finally:
+                self.raster_cache.release(frame)
+            logger.debug(f"Wortindex aus OCR: {os.path.basename(pdf_path)}, Seite {page_num} "
+                         f"({len(words)} Wörter)")
+            return PageWordIndex(words, source="ocr")
+
+        return get_word_index_cache().get(pdf_path, page_num, language, build)
+
+    def extract_with_anchor(self, pdf_path: str, rule: Any, language: Optional[str] = None,
+                            preprocessing: Any = None) -> str:
+        """
+        Extrahiert einen Wert relativ zu einem Ankertext (siehe AnchorRule).
+
+        Args:
+            rule: AnchorRule oder Dictionary
+        """
+        try:
+            if not isinstance(rule, AnchorRule):
+                rule = AnchorRule.from_dict(rule)
+            pdf_path = os.path.normpath(pdf_path)
+            language = self.resolve_language(pdf_path, language)
+            page_count = self._page_count(pdf_path)
+
+            if rule.page == 0:
+                pages = range(1, page_count + 1)
+            else:
+                page = page_count + 1 + rule.page if rule.page < 0 else rule.page
+                pages = [page] if 1 <= page <= page_count else []
+
+            # Seiten nacheinander indizieren - bei einem Treffer auf Seite 1
+            # werden spätere Seiten nicht erkannt
+            indexes = (self.get_word_index(pdf_path, p, language, preprocessing) for p in pages)
+            value = extract_with_rule(indexes, rule)
+            logger.debug(f"Ankerregel {rule.describe()}: '{value}'")
+            return value
+        except Exception as e:
+            logger.error(f"Fehler bei Anker-Extraktion für {os.path.basename(pdf_path)}: {e}")
+            return ""
+
     def extract_text_from_zone(self, pdf_path: str, page_num: int,
                               zone: Tuple[int, int, int, int],
-                              language: str = 'deu') -> str:
+                              language: Optional[str] = None,
+                              validation_regex: str = "",
+                              strategy_key: Optional[str] = None,
+                              min_confidence: int = DEFAULT_MIN_CONFIDENCE,
+                              preprocessing: Any = None) -> str:
         """
-        Extrahiert Text aus einer bestimmten Zone einer PDF-Seite mit Bildvorverarbeitung.
+        Extrahiert Text aus einer bestimmten Zone einer PDF-Seite.
+
+        Die Zone wird zunächst mit niedriger Auflösung gelesen und nur bei
+        leerem Ergebnis, nicht erfülltem Prüfmuster oder niedriger Konfidenz
+        über ZONE_OCR_LADDER eskaliert. Mit `strategy_key` beginnt die Zone bei
+        der zuletzt erfolgreichen Stufe.
+
+        Seiten werden im Raster-Cache geteilt; die Zone wird dem Worker als
+        Rechteck übergeben, ohne Pixeldaten zu kopieren.
+
+        Args:
+            page_num: Seitennummer (1-basiert, negativ vom Ende: -1 = letzte Seite)
+            zone: (x, y, Breite, Höhe) in Pixeln bei 300 DPI
+            language: Sprache der Zone (None = Standard, 'auto' = je Dokument erkannt)
+            validation_regex: Optionales Prüfmuster für das Ergebnis
+            strategy_key: Schlüssel für die gespeicherte Stufe (siehe zone_strategy_key)
+            min_confidence: Mindestkonfidenz (0-100)
+            preprocessing: Vorverarbeitung der Zone (Preset-Name oder Dictionary)
         """
         try:
             # WICHTIG: Normalisiere den Pfad für Windows
@@ -218,45 +625,55 @@ class OCRProcessor:
                 logger.error(f"PDF-Datei nicht gefunden für Zone-OCR: {pdf_path}")
                 return ""
             
-            logger.debug(f"OCR-Zone-Extraktion: {pdf_path}, Seite {page_num}, Zone {zone}")
+            # Negative Seitennummern zählen vom Ende (-1 = letzte Seite)
+            if page_num < 0:
+                page_num = self._page_count(pdf_path) + 1 + page_num
 
-            # Konvertiere spezifische Seite
-            poppler_path = self._get_poppler_path()
-            
-            # Prüfe ob Poppler existiert
-            if not poppler_path or not os.path.exists(poppler_path):
-                logger.error(f"Poppler nicht gefunden. Bitte im dependencies Ordner platzieren.")
-                return ""
-            
-            images = convert_from_path(
-                pdf_path, 
-                dpi=300,
-                first_page=page_num, 
-                last_page=page_num, 
-                poppler_path=poppler_path
-            )
+            language = self.resolve_language(pdf_path, language)
+            logger.debug(f"OCR-Zone-Extraktion: {pdf_path}, Seite {page_num}, Zone {zone} ({language})")
 
-            if not images:
-                logger.warning(f"Keine Bilder aus PDF-Seite {page_num} konvertiert")
-                return ""
+            options = PreprocessOptions.from_value(preprocessing)
+            store = get_zone_strategy_store() if strategy_key else None
+            start = store.start_index(strategy_key) if store else 0
 
-            image = images[0]
+            best_text, best_conf = "", -2
+            tried = set()
+            for index in range(start, len(ZONE_OCR_LADDER)):
+                dpi, psm = ZONE_OCR_LADDER[index]
+                frame = self.raster_cache.acquire(pdf_path, page_num, dpi)
+                try:
+                    # Scan-Seiten werden nie hochskaliert - gleiche Stufe nicht wiederholen
+                    attempt = (frame.dpi, psm)
+                    if attempt in tried:
+                        continue
+                    tried.add(attempt)
 
-            # Schneide Zone aus
-            x, y, w, h = zone
-            cropped = image.crop((x, y, x + w, y + h))
+                    # Zonen-Koordinaten beziehen sich auf 300 DPI
+                    text, conf = self._recognize(
+                        frame, language, config=f'--oem 3 --psm {psm}',
+                        rect=frame.map_rect(tuple(zone), 300), options=options,
+                        with_confidence=True
+                    )
+                finally:
+                    self.raster_cache.release(frame)
 
-            # Wende Bildvorverarbeitung an
-            preprocessed_cropped = self._preprocess_image_for_ocr(cropped)
+                text = text.strip()
+                if is_zone_result_acceptable(text, conf, validation_regex, min_confidence):
+                    if store:
+                        store.record_success(strategy_key, index)
+                    logger.debug(f"Zone-OCR Ergebnis bei {frame.dpi} DPI, PSM {psm}: "
+                                 f"'{text[:50]}...' ({len(text)} Zeichen, Konfidenz {conf})")
+                    return text
 
-            # OCR auf vorverarbeiteter Zone mit optimierter Konfiguration
-            custom_config = r'--oem 3 --psm 6'
-            text = pytesseract.image_to_string(preprocessed_cropped, lang=language, config=custom_config)
-            result = text.strip()
+                logger.debug(f"Zone-OCR bei {frame.dpi} DPI, PSM {psm} unzureichend "
+                             f"(Konfidenz {conf}), eskaliere")
+                if text and conf >= best_conf:
+                    best_text, best_conf = text, conf
 
-            logger.debug(f"Zone-OCR Ergebnis: '{result[:50]}...' ({len(result)} Zeichen)")
-            return result
+            logger.warning(f"Zone {zone} auf Seite {page_num} ohne gültiges Ergebnis, "
+                           f"verwende bestes Ergebnis (Konfidenz {best_conf})")
+            return best_text
 
         except Exception as e:
             logger.error(f"Fehler bei Zone OCR für {os.path.basename(pdf_path)}, Seite {page_num}: {e}", exc_info=True)
-            return ""
\ No newline at end of file
+            return ""
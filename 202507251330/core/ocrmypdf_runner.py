@@ -0,0 +1,200 @@
+"""
+OCRmyPDF-Aufrufe mit seitengenauer Texterkennung und Zeitmessung
+
+Statt nur die ersten Seiten auf Text zu prüfen und dann alle Seiten neu zu
+erkennen (force_ocr), wird jede Seite einzeln untersucht:
+
+    - sichtbarer Text          -> Seite bleibt unverändert (skip_text)
+    - nur unsichtbarer Text    -> vorhandene OCR-Textebene; bleibt, außer
+                                  ocr_mode 'redo_ocr' ist eingestellt
+    - kein Text                -> Seite wird erkannt
+
+Je Export einstellbar (format_params):
+    ocr_mode       'auto' (Standard), 'skip_text', 'redo_ocr', 'force'
+    jobs           parallel erkannte Seiten (0/leer = alle Kerne)
+    optimize       OCRmyPDF-Optimierungsstufe 0-3 (Standard 0)
+    rotate_pages   Seitenausrichtung erkennen (Standard an)
+    timeout        Zeitlimit je Seite für Tesseract in Sekunden
+
+OCRmyPDF-Läufe werden nacheinander ausgeführt: jeder Lauf nutzt bereits alle
+Kerne, und die OCRmyPDF-API ist nicht für parallele Aufrufe aus mehreren
+Threads eines Prozesses ausgelegt.
+"""
+import os
+import time
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+import fitz
+import ocrmypdf
+
+from core.ocrmypdf_timing import PhaseTimer
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Plugin für die Zeitmessung (Modulname, damit es auch in Worker-Prozessen ladbar ist)
+TIMING_PLUGIN = 'core.ocrmypdf_timing'
+
+# Ab dieser Zeichenzahl gilt eine Seite als "mit Text"
+MIN_PAGE_TEXT_CHARS = 20
+
+OCR_MODES = ('auto', 'skip_text', 'redo_ocr', 'force')
+
+# Unsichtbarer Text (Render-Modus 3) in PyMuPDF-Texttraces
+_INVISIBLE_TEXT = 3
+
+_ocrmypdf_lock = threading.Lock()
+
+
+@dataclass
+class TextLayerInfo:
+    """Textzustand der Seiten eines PDFs (Seitennummern 1-basiert)"""
+    page_count: int = 0
+    text_pages: Set[int] = field(default_factory=set)     # sichtbarer Text
+    ocr_pages: Set[int] = field(default_factory=set)      # nur unsichtbarer Text (OCR-Ebene)
+
+    @property
+    def scanned_pages(self) -> Set[int]:
+        """Seiten ohne jeden Text"""
+        return set(range(1, self.page_count + 1)) - self.text_pages - self.ocr_pages
+
+    @property
+    def needs_ocr(self) -> bool:
+        return bool(self.scanned_pages)
+
+    @property
+    def fully_scanned(self) -> bool:
+        """Kein einziger Text im Dokument"""
+        return self.page_count > 0 and not self.text_pages and not self.ocr_pages
+
+    def describe(self) -> str:
+        return (f"{self.page_count} Seiten: {len(self.scanned_pages)} ohne Text, "
+                f"{len(self.text_pages)} mit Text, {len(self.ocr_pages)} mit OCR-Ebene")
+
+
+def analyze_text_layer(pdf_path: str) -> TextLayerInfo:
+    """
+    Untersucht jede Seite auf vorhandenen Text.
+
+    Bei Fehlern gilt das Dokument als Scan ohne Text (wie bisher).
+    """
+    info = TextLayerInfo()
+    try:
+        with fitz.open(pdf_path) as doc:
+            info.page_count = doc.page_count
+            for index, page in enumerate(doc):
+                visible = hidden = 0
+                for span in page.get_texttrace():
+                    chars = sum(1 for char in span['chars'] if chr(char[0]).strip())
+                    if span['type'] == _INVISIBLE_TEXT or span.get('opacity', 1) == 0:
+                        hidden += chars
+                    else:
+                        visible += chars
+                if visible >= MIN_PAGE_TEXT_CHARS:
+                    info.text_pages.add(index + 1)
+                elif hidden >= MIN_PAGE_TEXT_CHARS:
+                    info.ocr_pages.add(index + 1)
+    except Exception as e:
+        logger.error(f"Fehler beim Prüfen auf Text: {e}")
+        try:
+            with fitz.open(pdf_path) as doc:
+                info.page_count = doc.page_count
+        except Exception:
+            pass
+        info.text_pages.clear()
+        info.ocr_pages.clear()
+    return info
+
+
+@dataclass(frozen=True)
+class OCRmyPDFOptions:
+    """Einstellungen eines OCRmyPDF-Laufs (aus den Format-Parametern eines Exports)"""
+    ocr_mode: str = 'auto'
+    jobs: Optional[int] = None
+    optimize: int = 0
+    rotate_pages: bool = True
+    timeout: float = 600
+
+    @classmethod
+    def from_params(cls, params: Optional[Dict[str, Any]]) -> 'OCRmyPDFOptions':
+        params = params or {}
+        mode = params.get('ocr_mode') or 'auto'
+        if mode not in OCR_MODES:
+            logger.warning(f"Unbekannter OCR-Modus '{mode}', verwende 'auto'")
+            mode = 'auto'
+        try:
+            jobs = int(params.get('jobs') or 0) or None
+        except (TypeError, ValueError):
+            jobs = None
+        try:
+            optimize = min(3, max(0, int(params.get('optimize', 0))))
+        except (TypeError, ValueError):
+            optimize = 0
+        return cls(ocr_mode=mode, jobs=jobs, optimize=optimize,
+                   rotate_pages=bool(params.get('rotate_pages', True)),
+                   timeout=params.get('timeout', 600))
+
+    def mode_kwargs(self, layer: Optional[TextLayerInfo] = None) -> Dict[str, Any]:
+        """OCRmyPDF-Schalter für den Umgang mit vorhandenem Text"""
+        if self.ocr_mode == 'force':
+            return {'force_ocr': True}
+        if self.ocr_mode == 'redo_ocr' and (layer is None or layer.ocr_pages):
+            return {'redo_ocr': True}
+        # auto/skip_text: Seiten mit Text bleiben, der Rest wird erkannt
+        return {'skip_text': True}
+
+
+def run_ocrmypdf(input_file: str, output_file: str, language: str = 'deu',
+                 options: Optional[OCRmyPDFOptions] = None,
+                 layer: Optional[TextLayerInfo] = None,
+                 sidecar: Optional[str] = None,
+                 output_type: str = 'pdfa'):
+    """
+    Führt OCRmyPDF aus (Standard: PDF/A-Ausgabe) und protokolliert die Zeiten
+    je Schritt.
+
+    Args:
+        layer: Ergebnis von analyze_text_layer (None = Seiten ohne Text erkennen,
+               Seiten mit Text überspringen)
+        output_type: 'pdfa' oder 'pdf' (nur Textebene, ohne Ghostscript)
+
+    Returns:
+        ocrmypdf.ExitCode
+    """
+    options = options or OCRmyPDFOptions()
+    needs_ocr = layer is None or layer.needs_ocr or options.ocr_mode in ('force', 'redo_ocr')
+    kwargs = dict(
+        input_file=input_file,
+        output_file=output_file,
+        output_type=output_type,
+        language=language,
+        clean=False,
+        deskew=False,
+        rotate_pages=options.rotate_pages and needs_ocr,
+        optimize=options.optimize,
+        jpg_quality=0,  # Keine JPEG-Komprimierung
+        png_quality=0,  # Keine PNG-Komprimierung
+        jbig2_lossy=False,
+        progress_bar=False,
+        tesseract_timeout=options.timeout if needs_ocr else 0,
+        sidecar=sidecar,
+        jobs=options.jobs,
+        plugins=[TIMING_PLUGIN],
+        **options.mode_kwargs(layer)
+    )
+
+    name = os.path.basename(input_file)
+    with _ocrmypdf_lock:
+        started = time.perf_counter()
+        with PhaseTimer() as timer:
+            try:
+                result = ocrmypdf.ocr(**kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                summary = timer.summary()
+                logger.info(f"OCRmyPDF {name}: {elapsed:.1f}s"
+                            + (f" (Summe je Schritt: {summary})" if summary else ""))
+    return result
@@ -0,0 +1,124 @@
+"""
+OCRmyPDF-Plugin zur Zeitmessung je Verarbeitungsschritt
+
+Wird von run_ocrmypdf als Plugin geladen. Die Hooks umschließen die
+eingebauten Implementierungen (hookwrapper) und melden ihre Laufzeit als
+Log-Eintrag. OCRmyPDF leitet Log-Einträge aus seinen Worker-Prozessen an den
+Hauptprozess weiter; dort summiert der PhaseTimer die Zeiten je Schritt.
+"""
+import time
+import logging
+from collections import defaultdict
+from typing import Dict
+
+from ocrmypdf import hookimpl
+
+# Eigener Logger für die Messwerte (auch in Worker-Prozessen auf DEBUG)
+timing_logger = logging.getLogger(__name__ + '.records')
+timing_logger.setLevel(logging.DEBUG)
+
+PHASE_RASTER = "Rasterung"
+PHASE_OCR = "OCR"
+PHASE_ORIENTATION = "Ausrichtung"
+PHASE_PDFA = "PDF/A"
+PHASE_OPTIMIZE = "Optimierung"
+
+# Methoden der OCR-Engine -> Schritt
+_ENGINE_PHASES = {
+    'generate_pdf': PHASE_OCR,
+    'generate_hocr': PHASE_OCR,
+    'get_orientation': PHASE_ORIENTATION,
+    'get_deskew': PHASE_ORIENTATION,
+}
+
+
+def _record(phase: str, started: float):
+    elapsed = time.perf_counter() - started
+    timing_logger.debug(f"{phase}: {elapsed:.3f}s",
+                        extra={'ocr_phase': phase, 'ocr_seconds': elapsed})
+
+
+class _TimedEngine:
+    """Stellvertreter für die OCR-Engine, der die Erkennungsaufrufe misst"""
+
+    def __init__(self, engine):
+        self._engine = engine
+
+    def __getattr__(self, name):
+        if name == '_engine':
+            raise AttributeError(name)
+        attr = getattr(self._engine, name)
+        phase = _ENGINE_PHASES.get(name)
+        if phase is None or not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                _record(phase, started)
+        return timed
+
+    def __str__(self):
+        return str(self._engine)
+
+
+@hookimpl(hookwrapper=True)
+def rasterize_pdf_page():
+    started = time.perf_counter()
+    yield
+    _record(PHASE_RASTER, started)
+
+
+@hookimpl(hookwrapper=True)
+def get_ocr_engine():
+    outcome = yield
+    engine = outcome.get_result()
+    if engine is not None and not isinstance(engine, _TimedEngine):
+        outcome.force_result(_TimedEngine(engine))
+
+
+@hookimpl(hookwrapper=True)
+def generate_pdfa():
+    started = time.perf_counter()
+    yield
+    _record(PHASE_PDFA, started)
+
+
+@hookimpl(hookwrapper=True)
+def optimize_pdf():
+    started = time.perf_counter()
+    yield
+    _record(PHASE_OPTIMIZE, started)
+
+
+class PhaseTimer(logging.Handler):
+    """Sammelt die Messwerte eines OCRmyPDF-Laufs (als Kontextmanager)"""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def emit(self, record: logging.LogRecord):
+        phase = getattr(record, 'ocr_phase', None)
+        if phase:
+            self.totals[phase] += getattr(record, 'ocr_seconds', 0.0)
+            self.counts[phase] += 1
+
+    def __enter__(self) -> 'PhaseTimer':
+        timing_logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        timing_logger.removeHandler(self)
+        return False
+
+    def summary(self) -> str:
+        """z.B. 'Rasterung 1.2s (3x), OCR 5.4s (3x), PDF/A 2.1s'"""
+        parts = []
+        for phase, seconds in sorted(self.totals.items(), key=lambda item: -item[1]):
+            count = self.counts[phase]
+            parts.append(f"{phase} {seconds:.1f}s" + (f" ({count}x)" if count > 1 else ""))
+        return ", ".join(parts)
@@ -0,0 +1,408 @@
+"""
+Seiten-Raster im Shared Memory
+
+Gerenderte Seitenbilder werden in multiprocessing.shared_memory abgelegt.
+OCR-Worker erhalten nur einen kleinen Deskriptor (Name, Größe, Zeilenlänge)
+und lesen die Pixel direkt aus dem gemeinsamen Speicher - ohne Pickling und
+ohne Kopie. Zonen werden über Rechtecke adressiert statt ausgeschnitten.
+
+Reine Scan-Seiten (ein Bild, kein Text) werden nicht neu gerendert: das
+eingebettete Bild wird in nativer Auflösung dekodiert und Zonen-Koordinaten
+über die Bildmatrix der Seite auf Bildpixel abgebildet.
+"""
+import io
+import os
+import math
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple, Any
+
+from PIL import Image
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherbudget für nicht benutzte Frames im Cache (Bytes)
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Mindestanteil der Seitenfläche, den ein eingebettetes Scan-Bild abdecken muss
+MIN_IMAGE_COVERAGE = 0.9
+
+
+def file_signature(pdf_path: str) -> Tuple[str, int, int]:
+    """Dateistand (normalisierter Pfad, Größe, Änderungszeit) als Cache-Schlüssel"""
+    stat = os.stat(pdf_path)
+    return (os.path.normcase(os.path.abspath(pdf_path)), stat.st_size, stat.st_mtime_ns)
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Öffnet einen bestehenden Shared-Memory-Block ohne Besitz zu übernehmen.
+
+    Freigegeben (unlink) wird der Block ausschließlich vom Renderer. Worker
+    teilen sich den resource_tracker mit dem Hauptprozess, daher ist die
+    erneute Registrierung unter Python < 3.13 unschädlich.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 kennt track nicht
+        return shared_memory.SharedMemory(name=name)
+
+
+@dataclass(frozen=True)
+class FrameDescriptor:
+    """Beschreibt einen Frame im Shared Memory (wird an Worker übergeben)"""
+    name: str
+    width: int
+    height: int
+    stride: int
+    bpp: int
+    dpi: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def mode(self) -> str:
+        return 'L' if self.bpp == 1 else 'RGB'
+
+
+class SharedFrame:
+    """
+    Ein Seitenbild im Shared Memory.
+
+    `scale` und `origin` bilden Seitenkoordinaten (Punkte, 1/72 Zoll) auf
+    Frame-Pixel ab: pixel = (punkt - origin) * scale. Für gerenderte Seiten
+    ist das dpi / 72 ab dem Seitenursprung, für eingebettete Scan-Bilder
+    ergibt es sich aus der Bildmatrix der Seite.
+    """
+
+    def __init__(self, width: int, height: int, bpp: int = 1, dpi: int = 300,
+                 scale: Optional[Tuple[float, float]] = None,
+                 origin: Tuple[float, float] = (0.0, 0.0)):
+        self.width = width
+        self.height = height
+        self.bpp = bpp
+        self.dpi = dpi
+        self.stride = width * bpp
+        self.scale = scale or (dpi / 72.0, dpi / 72.0)
+        self.origin = origin
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.stride * height))
+        self._pins = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.stride * self.height
+
+    @property
+    def descriptor(self) -> FrameDescriptor:
+        return FrameDescriptor(self._shm.name, self.width, self.height,
+                               self.stride, self.bpp, self.dpi)
+
+    @property
+    def buffer(self) -> memoryview:
+        """Beschreibbare Sicht auf die Pixeldaten"""
+        return self._shm.buf[:self.nbytes]
+
+    @classmethod
+    def from_image(cls, image: Image.Image, dpi: int = 300) -> 'SharedFrame':
+        """Legt einen Frame mit dem Inhalt eines Graustufenbilds an (eine Kopie)"""
+        if image.mode != 'L':
+            image = image.convert('L')
+        frame = cls(image.width, image.height, bpp=1, dpi=dpi)
+        try:
+            frame.buffer[:] = image.tobytes()
+        except Exception:
+            frame.release()
+            raise
+        return frame
+
+    def map_rect(self, rect: Tuple[int, int, int, int],
+                 rect_dpi: int = 300) -> Tuple[int, int, int, int]:
+        """
+        Bildet ein Zonen-Rechteck (x, y, Breite, Höhe) in Pixeln bei
+        `rect_dpi` auf Pixel dieses Frames ab.
+        """
+        x, y, w, h = rect
+        to_points = 72.0 / rect_dpi
+        sx, sy = self.scale
+        ox, oy = self.origin
+        x0 = (x * to_points - ox) * sx
+        y0 = (y * to_points - oy) * sy
+        x1 = ((x + w) * to_points - ox) * sx
+        y1 = ((y + h) * to_points - oy) * sy
+        # Rundungsrauschen der Umrechnung nicht als zusätzliches Pixel zählen
+        eps = 1e-6
+        left, top = int(math.floor(x0 + eps)), int(math.floor(y0 + eps))
+        return (left, top, int(math.ceil(x1 - eps)) - left, int(math.ceil(y1 - eps)) - top)
+
+    def to_image(self) -> Image.Image:
+        """
+        PIL-Bild, das direkt auf den Shared Memory zeigt (keine Kopie).
+        Das Bild darf nur benutzt werden, solange der Frame gepinnt ist.
+        """
+        mode = 'L' if self.bpp == 1 else 'RGB'
+        image = Image.frombuffer(mode, (self.width, self.height), self._shm.buf,
+                                 'raw', mode, self.stride, 1)
+        image.info['dpi'] = (self.dpi, self.dpi)
+        return image
+
+    def release(self):
+        """Gibt den Shared Memory frei"""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            self._shm.close()
+        except Exception as e:
+            logger.debug(f"Frame {self._shm.name} konnte nicht freigegeben werden: {e}")
+
+
+def image_from_descriptor(shm: shared_memory.SharedMemory, descriptor: FrameDescriptor) -> Image.Image:
+    """PIL-Bild über einen angehängten Shared-Memory-Block (keine Kopie)"""
+    mode = descriptor.mode
+    image = Image.frombuffer(mode, (descriptor.width, descriptor.height), shm.buf,
+                             'raw', mode, descriptor.stride, 1)
+    image.info['dpi'] = (descriptor.dpi, descriptor.dpi)
+    return image
+
+
+class PageRasterCache:
+    """
+    Cache gerenderter Seiten im Shared Memory.
+
+    Frames werden über (Datei-Signatur, Seite, DPI) adressiert. Benutzte Frames
+    sind gepinnt; ungepinnte Frames werden nach LRU verdrängt, sobald das
+    Speicherbudget überschritten ist. Ändert sich die Datei (z.B. durch
+    Komprimierung), greift die neue Signatur.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Tuple, SharedFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_locks: Dict[Tuple, threading.Lock] = {}
+
+    def acquire(self, pdf_path: str, page_num: int, dpi: int = 300) -> SharedFrame:
+        """
+        Liefert den gepinnten Frame einer Seite (rendert bei Bedarf).
+        Muss mit release() wieder freigegeben werden.
+        """
+        key = (file_signature(pdf_path), page_num, dpi)
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                frame._pins += 1
+                self._frames.move_to_end(key)
+                return frame
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+
+        # Nur ein Thread rendert dieselbe Seite
+        with render_lock:
+            with self._lock:
+                frame = self._frames.get(key)
+                if frame is not None:
+                    frame._pins += 1
+                    self._frames.move_to_end(key)
+                    return frame
+
+            try:
+                frame = self._render(pdf_path, page_num, dpi)
+            except Exception:
+                with self._lock:
+                    self._render_locks.pop(key, None)
+                raise
+            frame._pins = 1
+
+            with self._lock:
+                self._frames[key] = frame
+                self._render_locks.pop(key, None)
+                self._evict_locked()
+            return frame
+
+    def release(self, frame: SharedFrame):
+        """Löst den Pin eines Frames"""
+        with self._lock:
+            frame._pins = max(0, frame._pins - 1)
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Verdrängt ungepinnte Frames bis das Budget eingehalten ist"""
+        total = sum(f.nbytes for f in self._frames.values())
+        for key in list(self._frames.keys()):
+            if total <= self.max_bytes:
+                break
+            frame = self._frames[key]
+            if frame._pins == 0:
+                total -= frame.nbytes
+                del self._frames[key]
+                frame.release()
+
+    def drop(self, pdf_path: str):
+        """Entfernt alle ungepinnten Frames einer Datei"""
+        path_key = os.path.normcase(os.path.abspath(pdf_path))
+        with self._lock:
+            for key in list(self._frames.keys()):
+                frame = self._frames[key]
+                if key[0][0] == path_key and frame._pins == 0:
+                    del self._frames[key]
+                    frame.release()
+
+    def clear(self):
+        """Gibt alle ungepinnten Frames frei"""
+        with self._lock:
+            for key in list(self._frames.keys()):
+                frame = self._frames[key]
+                if frame._pins == 0:
+                    del self._frames[key]
+                    frame.release()
+
+    @classmethod
+    def _render(cls, pdf_path: str, page_num: int, dpi: int) -> SharedFrame:
+        """Rendert eine Seite in Graustufen direkt in einen neuen Frame"""
+        import fitz
+
+        doc = fitz.open(pdf_path)
+        try:
+            if page_num < 1 or page_num > doc.page_count:
+                raise ValueError(f"Seite {page_num} existiert nicht (PDF hat {doc.page_count} Seiten)")
+            page = doc[page_num - 1]
+
+            # Schneller Weg für reine Scan-Seiten
+            try:
+                frame = cls._extract_scan_image(doc, page, dpi)
+            except Exception as e:
+                logger.debug(f"Scan-Bild von Seite {page_num} nicht direkt lesbar, rendere: {e}")
+                frame = None
+            if frame is not None:
+                return frame
+
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+            frame = SharedFrame(pix.width, pix.height, bpp=1, dpi=dpi)
+            # Einzige Kopie: Pixmap des Renderers -> Shared Memory
+            if pix.stride == frame.stride:
+                frame.buffer[:] = pix.samples_mv[:frame.nbytes]
+            else:
+                samples = pix.samples_mv
+                for row in range(pix.height):
+                    src = row * pix.stride
+                    dst = row * frame.stride
+                    frame.buffer[dst:dst + frame.stride] = samples[src:src + frame.stride]
+            pix = None
+            return frame
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _scan_image_info(doc, page) -> Optional[Dict[str, Any]]:
+        """
+        Liefert die Bildinfo, wenn die Seite nur aus einem einzelnen,
+        achsenparallelen Scan-Bild ohne Text, Maske oder Annotationen besteht.
+        Gedrehte Seiten (/Rotate) werden gerendert, damit Bild und Zonen der
+        angezeigten Ausrichtung entsprechen.
+        """
+        if page.rotation != 0:
+            return None
+        if page.first_annot is not None or page.get_text("text").strip():
+            return None
+
+        infos = page.get_image_info(xrefs=True)
+        if len(infos) != 1:
+            return None
+        info = infos[0]
+        xref = info.get('xref', 0)
+        if xref <= 0 or info.get('has-mask'):
+            return None
+
+        # Nur Graustufen/RGB mit Standard-Dekodierung
+        if info.get('colorspace') not in (1, 3):
+            return None
+        if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+            return None
+        if doc.xref_get_key(xref, "Decode")[0] != "null":
+            return None
+
+        # Bildmatrix: nur unverdreht und ungespiegelt
+        a, b, c, d, e, f = info['transform']
+        if abs(b) > 1e-6 or abs(c) > 1e-6 or a <= 0 or d <= 0:
+            return None
+
+        page_area = page.rect.width * page.rect.height
+        if page_area <= 0 or (a * d) / page_area < MIN_IMAGE_COVERAGE:
+            return None
+        return info
+
+    @classmethod
+    def _extract_scan_image(cls, doc, page, dpi: int) -> Optional[SharedFrame]:
+        """
+        Dekodiert das eingebettete Scan-Bild einer Seite direkt in einen Frame.
+
+        Das Bild wird in nativer Auflösung verwendet (nie hochskaliert). JPEGs
+        werden im Draft-Modus direkt als Graustufen dekodiert und - falls die
+        angeforderte Auflösung deutlich darunter liegt - schon beim Dekodieren
+        verkleinert.
+
+        Returns:
+            Frame oder None, wenn die Seite kein reines Scan-Bild ist
+        """
+        info = cls._scan_image_info(doc, page)
+        if info is None:
+            return None
+
+        a, _, _, d, e, f = info['transform']
+        width, height = info['width'], info['height']
+        native_dpi_x = width * 72.0 / a
+        native_dpi_y = height * 72.0 / d
+        # Tesseract kennt nur eine Auflösung pro Bild
+        if abs(native_dpi_x - native_dpi_y) > 0.02 * native_dpi_x:
+            return None
+
+        extracted = doc.extract_image(info['xref'])
+        if not extracted or not extracted.get('image'):
+            return None
+
+        image = Image.open(io.BytesIO(extracted['image']))
+        if image.size != (width, height):
+            return None
+        if image.format == 'JPEG':
+            target_scale = min(1.0, dpi / native_dpi_x)
+            image.draft('L', (max(1, math.ceil(width * target_scale)),
+                              max(1, math.ceil(height * target_scale))))
+        if image.mode != 'L':
+            image = image.convert('L')
+
+        # Tatsächliche Auflösung nach einer eventuellen Draft-Verkleinerung
+        factor = image.width / width
+        scale = (factor * width / a, factor * height / d)
+        frame = SharedFrame(image.width, image.height, bpp=1,
+                            dpi=int(round(native_dpi_x * factor)),
+                            scale=scale, origin=(e, f))
+        try:
+            frame.buffer[:] = image.tobytes()
+        except Exception:
+            frame.release()
+            raise
+        logger.debug(f"Scan-Bild direkt übernommen: {image.width}x{image.height} "
+                     f"bei {frame.dpi} DPI (angefordert {dpi} DPI)")
+        return frame
+
+
+# Globale Cache-Instanz
+_raster_cache = None
+_raster_cache_lock = threading.Lock()
+
+
+def get_page_raster_cache() -> PageRasterCache:
+    """Gibt die globale PageRasterCache-Instanz zurück"""
+    global _raster_cache
+    with _raster_cache_lock:
+        if _raster_cache is None:
+            _raster_cache = PageRasterCache()
+            logger.debug("Globale PageRasterCache-Instanz erstellt")
+        return _raster_cache
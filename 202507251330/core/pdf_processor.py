@@ -25,8 +25,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.xml_field_processor import XMLFieldProcessor, FieldMapping
 from core.ocr_processor import OCRProcessor
 from core.export_processor import ExportProcessor
+from core.page_raster import get_page_raster_cache
+from core.zone_strategy import zone_strategy_key
+from core.document_text import get_document_text_cache, read_sidecar
+from core.word_index import get_word_index_cache
+from core.ocr_language import get_ocr_language_resolver
+from core.ocrmypdf_runner import OCRmyPDFOptions, TextLayerInfo, analyze_text_layer, run_ocrmypdf
+from core.pdfa_converter import convert_to_pdfa, is_pdfa
+from core.document_splitter import DocumentSplitter, SplitRules
 from models.hotfolder_config import HotfolderConfig, ProcessingAction, DocumentPair
-from models.export_config import ExportSettings
+from models.export_config import ExportSettings, ExportConfig, ExportFormat, ExportMethod
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +97,12 @@ class PDFProcessor:
         }
     }
     
+    # Reihenfolge der Aktionen unabhängig von der Auswahl (SPLIT läuft vorher,
+    # siehe _process_split): Komprimieren vor der
+    # OCR (Tesseract verarbeitet weniger Pixel), PDF/A zuletzt - ist auch OCR
+    # gewählt, entsteht PDF/A bereits im selben OCRmyPDF-Lauf
+    ACTION_ORDER = [ProcessingAction.COMPRESS, ProcessingAction.OCR, ProcessingAction.PDF_A]
+    
     def __init__(self):
         self.xml_processor = XMLFieldProcessor()
         self.ocr_processor = OCRProcessor()
@@ -99,7 +113,9 @@ class PDFProcessor:
         self._zone_cache = {}
         
         self.supported_actions = {
-            ProcessingAction.COMPRESS: self._compress_pdf
+            ProcessingAction.COMPRESS: self._compress_pdf,
+            ProcessingAction.OCR: self._ocr_pdf,
+            ProcessingAction.PDF_A: self._convert_pdf_a
         }
         
         # Erstelle zentralen temporären Arbeitsordner
@@ -280,16 +296,13 @@ class PDFProcessor:
         """
         work_dir = os.path.join(self.temp_base_dir, f"work_{uuid.uuid4().hex}")
         os.makedirs(work_dir, exist_ok=True)
-        
-        # Variable für verarbeitete XML
-        processed_xml_path = None
+        temp_pdf_path = os.path.join(work_dir, os.path.basename(doc_pair.pdf_path))
+        temp_xml_path = None
         
         try:
             # Verschiebe Dateien in temporären Arbeitsordner
-            temp_pdf_path = os.path.join(work_dir, os.path.basename(doc_pair.pdf_path))
             shutil.move(doc_pair.pdf_path, temp_pdf_path)
             
-            temp_xml_path = None
             if doc_pair.has_xml and doc_pair.xml_path is not None:
                 temp_xml_path = os.path.join(work_dir, os.path.basename(doc_pair.xml_path))
                 shutil.move(doc_pair.xml_path, temp_xml_path)
@@ -298,142 +311,319 @@ class PDFProcessor:
             if not self._validate_pdf(temp_pdf_path):
                 raise Exception("PDF-Validierung fehlgeschlagen - Datei möglicherweise beschädigt")
             
-            # Analysiere PDF für optimale Verarbeitung
-            pdf_info = self._analyze_pdf(temp_pdf_path)
-            logger.info(f"PDF-Analyse: {pdf_info}")
-            
-            # XML-Feld-Mappings anwenden - auch ohne XML-Datei verarbeiten
-            if hotfolder.xml_field_mappings:
-                mappings = [FieldMapping.from_dict(m) for m in hotfolder.xml_field_mappings]
-                ocr_zones = [
-                    zone if isinstance(zone, dict) else zone.to_dict()
-                    for zone in hotfolder.ocr_zones
-                ]
-                
-                # Wenn keine XML vorhanden, erstelle eine temporäre XML
-                if not temp_xml_path:
-                    # Erstelle eine minimale XML-Datei für die Feldverarbeitung
-                    temp_xml_path = os.path.join(work_dir, "temp_fields.xml")
-                    with open(temp_xml_path, 'w', encoding='utf-8') as f:
-                        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                        f.write('<root>\n')
-                        f.write('  <Document>\n')
-                        f.write('    <Fields>\n')
-                        # Erstelle leere Felder für alle definierten Mappings
-                        for mapping in mappings:
-                            f.write(f'      <{mapping.field_name}></{mapping.field_name}>\n')
-                        f.write('    </Fields>\n')
-                        f.write('  </Document>\n')
-                        f.write('</root>\n')
-                
-                # Verarbeite XML-Felder
-                success = self.xml_processor.process_xml_with_mappings(
-                    temp_xml_path, temp_pdf_path, mappings, ocr_zones, 
-                    input_path=hotfolder.input_path,
-                    original_pdf_path=doc_pair.pdf_path
-                )
-                
-                if success:
-                    logger.info(f"XML-Felder erfolgreich verarbeitet")
-                    processed_xml_path = temp_xml_path
-                else:
-                    logger.error("XML-Feldverarbeitung fehlgeschlagen")
-            
-            # Führe nur noch unterstützte PDF-Aktionen aus (nur COMPRESS)
-            compression_enabled = False
-            for action in hotfolder.actions:
-                if action in self.supported_actions:
-                    params = hotfolder.action_params.get(action.value, {})
-                    
-                    # Füge PDF-Info zu Parametern hinzu für intelligente Verarbeitung
-                    params['pdf_info'] = pdf_info
-                    
-                    logger.info(f"Führe Aktion aus: {action.value}")
-                    success = self.supported_actions[action](temp_pdf_path, params)
-                    
-                    if not success:
-                        raise Exception(f"Aktion {action.value} fehlgeschlagen")
-                    
-                    if action == ProcessingAction.COMPRESS:
-                        compression_enabled = True
-                    
-                    # Qualitätskontrolle nach jeder Aktion
-                    if not self._validate_pdf(temp_pdf_path):
-                        raise Exception(f"PDF-Validierung nach {action.value} fehlgeschlagen")
-            
-            # Führe Exporte durch
-            if hasattr(hotfolder, 'export_configs') and hotfolder.export_configs:
-                ocr_zones = [
-                    zone if isinstance(zone, dict) else zone.to_dict()
-                    for zone in hotfolder.ocr_zones
-                ]
-                
-                export_results = self.export_processor.process_exports(
-                    temp_pdf_path,
-                    processed_xml_path or temp_xml_path,
-                    hotfolder.export_configs,
-                    ocr_zones,
-                    hotfolder.xml_field_mappings,
-                    original_pdf_path=doc_pair.pdf_path,
-                    input_path=hotfolder.input_path,
-                    compression_enabled=compression_enabled
-                )
-                
-                all_successful = all(success for success, _ in export_results)
-                if not all_successful:
-                    failed_exports = [msg for success, msg in export_results if not success]
-                    raise Exception(f"Export-Fehler: {', '.join(failed_exports)}")
-            
-            # Abschließende Qualitätskontrolle
-            final_info = self._analyze_pdf(temp_pdf_path)
-            logger.info(f"Finale PDF-Analyse: {final_info}")
+            # Stapel-Scans zuerst aufteilen - jeder Teil ist ein eigenes Dokument
+            if ProcessingAction.SPLIT in hotfolder.actions:
+                return self._process_split(doc_pair, hotfolder, temp_pdf_path, temp_xml_path, work_dir)
             
-            # Leere Caches
-            self._ocr_cache.clear()
-            self._zone_cache.clear()
+            self._process_working_copy(doc_pair, hotfolder, temp_pdf_path, temp_xml_path)
             
             logger.info(f"Erfolgreich verarbeitet: {os.path.basename(doc_pair.pdf_path)}")
             return True
             
         except Exception as e:
             logger.error(f"Fehler bei der Verarbeitung: {e}")
-            
-            # Verschiebe in Fehlerpfad
-            error_path = self._get_error_path(doc_pair, hotfolder)
-            os.makedirs(error_path, exist_ok=True)
-            
-            try:
-                if os.path.exists(temp_pdf_path):
-                    error_pdf = os.path.join(error_path, os.path.basename(doc_pair.pdf_path))
-                    if os.path.exists(error_pdf):
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        base, ext = os.path.splitext(error_pdf)
-                        error_pdf = f"{base}_{timestamp}{ext}"
-                    shutil.move(temp_pdf_path, error_pdf)
-                    
-                if temp_xml_path and os.path.exists(temp_xml_path):
-                    error_xml = os.path.join(error_path, os.path.basename(doc_pair.xml_path or "temp_fields.xml"))
-                    if os.path.exists(error_xml):
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        base, ext = os.path.splitext(error_xml)
-                        error_xml = f"{base}_{timestamp}{ext}"
-                    shutil.move(temp_xml_path, error_xml)
-                    
-                logger.info(f"Dateien in Fehlerpfad verschoben: {error_path}")
-                
-            except Exception as move_error:
-                logger.error(f"Fehler beim Verschieben in Fehlerpfad: {move_error}")
-            
+            self._move_to_error_path(doc_pair, hotfolder, temp_pdf_path, temp_xml_path)
             return False
             
         finally:
+            # Gerenderte Seiten dieses Dokuments freigeben
+            self._drop_document_caches(temp_pdf_path)
+            
             # Aufräumen
             try:
                 if os.path.exists(work_dir):
                     shutil.rmtree(work_dir)
             except Exception as cleanup_error:
                 logger.error(f"Fehler beim Aufräumen: {cleanup_error}")
+    
+    def _process_working_copy(self, doc_pair: DocumentPair, hotfolder: HotfolderConfig,
+                              temp_pdf_path: str, temp_xml_path: Optional[str],
+                              document_variables: Optional[Dict[str, str]] = None):
+        """
+        Aktionen, XML-Felder und Exporte für die Arbeitskopie eines Dokuments.
+        Fehler werden als Exception gemeldet.
+        
+        Args:
+            document_variables: Zusätzliche Variablen dieses Dokuments (z.B. Split_Index)
+        """
+        work_dir = os.path.dirname(temp_pdf_path)
+        
+        # Variable für verarbeitete XML
+        processed_xml_path = None
+        
+        # Analysiere PDF für optimale Verarbeitung
+        pdf_info = self._analyze_pdf(temp_pdf_path)
+        logger.info(f"PDF-Analyse: {pdf_info}")
+        
+        # PDF-Aktionen verändern die Arbeitsdatei einmal je Dokument;
+        # XML-Felder und alle Exporte verwenden das Ergebnis
+        compression_enabled = False
+        for action in self.ACTION_ORDER:
+            if action not in hotfolder.actions or action not in self.supported_actions:
+                continue
+            params = dict(hotfolder.action_params.get(action.value, {}))
+            
+            # Füge PDF-Info zu Parametern hinzu für intelligente Verarbeitung
+            params['pdf_info'] = pdf_info
+            
+            if action in (ProcessingAction.OCR, ProcessingAction.PDF_A):
+                params.setdefault('language', self._ocr_language(hotfolder))
+            if action == ProcessingAction.OCR:
+                params['pdf_a'] = ProcessingAction.PDF_A in hotfolder.actions
+            
+            logger.info(f"Führe Aktion aus: {action.value}")
+            success = self.supported_actions[action](temp_pdf_path, params)
+            
+            if not success:
+                raise Exception(f"Aktion {action.value} fehlgeschlagen")
+            
+            if action == ProcessingAction.COMPRESS:
+                compression_enabled = True
+            
+            # Qualitätskontrolle nach jeder Aktion
+            if not self._validate_pdf(temp_pdf_path):
+                raise Exception(f"PDF-Validierung nach {action.value} fehlgeschlagen")
+        
+        # Ein OCR-Lauf für OCR_FullText und durchsuchbares PDF/A
+        self._plan_shared_ocr(temp_pdf_path, hotfolder)
+        
+        # XML-Feld-Mappings anwenden - auch ohne XML-Datei verarbeiten
+        if hotfolder.xml_field_mappings:
+            mappings = [FieldMapping.from_dict(m) for m in hotfolder.xml_field_mappings]
+            ocr_zones = self._zone_dicts(hotfolder)
+            
+            # Wenn keine XML vorhanden, erstelle eine temporäre XML
+            if not temp_xml_path:
+                # Erstelle eine minimale XML-Datei für die Feldverarbeitung
+                temp_xml_path = os.path.join(work_dir, "temp_fields.xml")
+                with open(temp_xml_path, 'w', encoding='utf-8') as f:
+                    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                    f.write('<root>\n')
+                    f.write('  <Document>\n')
+                    f.write('    <Fields>\n')
+                    # Erstelle leere Felder für alle definierten Mappings
+                    for mapping in mappings:
+                        f.write(f'      <{mapping.field_name}></{mapping.field_name}>\n')
+                    f.write('    </Fields>\n')
+                    f.write('  </Document>\n')
+                    f.write('</root>\n')
+            
+            # Verarbeite XML-Felder
+            success = self.xml_processor.process_xml_with_mappings(
+                temp_xml_path, temp_pdf_path, mappings, ocr_zones, 
+                input_path=hotfolder.input_path,
+                original_pdf_path=doc_pair.pdf_path,
+                ocr_preprocessing=self._ocr_preprocessing(hotfolder),
+                ocr_language=self._ocr_language(hotfolder),
+                document_variables=document_variables
+            )
+            
+            if success:
+                logger.info(f"XML-Felder erfolgreich verarbeitet")
+                processed_xml_path = temp_xml_path
+            else:
+                logger.error("XML-Feldverarbeitung fehlgeschlagen")
+        
+        # Führe Exporte durch
+        if hasattr(hotfolder, 'export_configs') and hotfolder.export_configs:
+            ocr_zones = self._zone_dicts(hotfolder)
+            
+            export_results = self.export_processor.process_exports(
+                temp_pdf_path,
+                processed_xml_path or temp_xml_path,
+                hotfolder.export_configs,
+                ocr_zones,
+                hotfolder.xml_field_mappings,
+                original_pdf_path=doc_pair.pdf_path,
+                input_path=hotfolder.input_path,
+                compression_enabled=compression_enabled,
+                ocr_preprocessing=self._ocr_preprocessing(hotfolder),
+                ocr_language=self._ocr_language(hotfolder),
+                document_variables=document_variables
+            )
+            
+            all_successful = all(success for success, _ in export_results)
+            if not all_successful:
+                failed_exports = [msg for success, msg in export_results if not success]
+                raise Exception(f"Export-Fehler: {', '.join(failed_exports)}")
+        
+        # Abschließende Qualitätskontrolle
+        final_info = self._analyze_pdf(temp_pdf_path)
+        logger.info(f"Finale PDF-Analyse: {final_info}")
+        
+        # Leere Caches
+        self._ocr_cache.clear()
+        self._zone_cache.clear()
+    
+    def _process_split(self, doc_pair: DocumentPair, hotfolder: HotfolderConfig,
+                       temp_pdf_path: str, temp_xml_path: Optional[str], work_dir: str) -> bool:
+        """
+        Teilt einen Stapel an den Trennstellen auf (core.document_splitter) und
+        verarbeitet jeden Teil als eigenes Dokument, sobald er geschrieben ist.
+        Ein fehlerhafter Teil landet im Fehlerpfad, die übrigen laufen weiter.
+        """
+        rules = SplitRules.from_params(hotfolder.action_params.get(ProcessingAction.SPLIT.value, {}))
+        if not rules.active:
+            self._process_working_copy(doc_pair, hotfolder, temp_pdf_path, temp_xml_path)
+            logger.info(f"Erfolgreich verarbeitet: {os.path.basename(doc_pair.pdf_path)}")
+            return True
+        
+        source_dir = os.path.dirname(doc_pair.pdf_path)
+        source_name = os.path.basename(doc_pair.pdf_path)
+        parts_dir = os.path.join(work_dir, "parts")
+        os.makedirs(parts_dir, exist_ok=True)
+        
+        logger.info(f"Führe Aktion aus: {ProcessingAction.SPLIT.value}")
+        failed = []
+        count = 0
+        # Letzte Seite des zuletzt übergebenen Teils - bei einem Fehler des
+        # Aufteilens gehen nur die folgenden Seiten in den Fehlerpfad
+        handled_until = 0
+        parts = DocumentSplitter(rules).iter_parts(temp_pdf_path, parts_dir)
+        while True:
+            try:
+                part = next(parts, None)
+            except Exception as e:
+                if count == 0:
+                    raise
+                logger.error(f"Fehler beim Aufteilen von {source_name} nach Seite {handled_until}: {e}")
+                remainder = self._move_remaining_pages_to_error_path(
+                    doc_pair, hotfolder, temp_pdf_path, temp_xml_path, handled_until + 1, parts_dir)
+                if remainder:
+                    count += 1
+                    failed.append(remainder)
+                break
+            if part is None:
+                break
+            
+            count += 1
+            if part.path == temp_pdf_path:
+                # Keine Trennstelle - das Original wird unverändert verarbeitet
+                self._process_working_copy(doc_pair, hotfolder, temp_pdf_path, temp_xml_path)
+                logger.info(f"Erfolgreich verarbeitet: {source_name}")
+                return True
+            
+            # Jeder Teil im eigenen Ordner mit eigener Kopie der XML
+            part_dir = os.path.join(parts_dir, f"{part.index:03d}")
+            part_pdf = os.path.join(part_dir, os.path.basename(part.path))
+            part_xml = None
+            if temp_xml_path:
+                part_xml = os.path.join(part_dir, os.path.splitext(os.path.basename(part_pdf))[0] + '.xml')
+            
+            # Variablen wie für eine eigene Datei im Hotfolder
+            part_pair = DocumentPair(pdf_path=os.path.join(source_dir, os.path.basename(part_pdf)),
+                                     xml_path=part_xml and os.path.join(source_dir, os.path.basename(part_xml)))
+            variables = {
+                'Split_Index': str(part.index),
+                'Split_Source': os.path.splitext(source_name)[0],
+                'Split_FirstPage': str(part.first_page),
+                'Split_LastPage': str(part.last_page),
+            }
+            try:
+                os.makedirs(part_dir, exist_ok=True)
+                shutil.move(part.path, part_pdf)
+                if part_xml:
+                    shutil.copy2(temp_xml_path, part_xml)
+                self._process_working_copy(part_pair, hotfolder, part_pdf, part_xml, variables)
+                logger.info(f"Teildokument erfolgreich verarbeitet: {os.path.basename(part_pdf)}")
+            except Exception as e:
+                logger.error(f"Fehler bei der Verarbeitung von {os.path.basename(part_pdf)}: {e}")
+                self._move_to_error_path(part_pair, hotfolder, part_pdf, part_xml)
+                failed.append(os.path.basename(part_pdf))
+            finally:
+                self._drop_document_caches(part_pdf)
+                shutil.rmtree(part_dir, ignore_errors=True)
+                handled_until = part.last_page
+        
+        if count == 0:
+            raise Exception("Aufteilen ergab kein Dokument - alle Seiten sind Trennseiten")
+        
+        if failed:
+            logger.error(f"{source_name}: {len(failed)} von {count} Teildokumenten fehlgeschlagen: "
+                         f"{', '.join(failed)}")
+            return False
+        
+        logger.info(f"Erfolgreich verarbeitet: {source_name} ({count} Teildokumente)")
+        return True
+    
+    def _move_remaining_pages_to_error_path(self, doc_pair: DocumentPair, hotfolder: HotfolderConfig,
+                                            temp_pdf_path: str, temp_xml_path: Optional[str],
+                                            first_page: int, parts_dir: str) -> Optional[str]:
+        """
+        Legt die noch nicht übergebenen Seiten ab first_page (1-basiert) als
+        eigenes PDF in den Fehlerpfad. Bereits exportierte Teile werden so bei
+        einer erneuten Verarbeitung nicht doppelt exportiert.
+        
+        Returns:
+            Dateiname im Fehlerpfad oder None, wenn keine Seiten übrig sind
+        """
+        base = os.path.splitext(os.path.basename(doc_pair.pdf_path))[0]
+        try:
+            with fitz.open(temp_pdf_path) as src:
+                last_page = src.page_count
+                if first_page > last_page:
+                    return None
+                rest_name = f"{base}_S{first_page}-{last_page}.pdf"
+                rest_pdf = os.path.join(parts_dir, rest_name)
+                with fitz.open() as rest:
+                    rest.insert_pdf(src, from_page=first_page - 1, to_page=last_page - 1)
+                    rest.save(rest_pdf, garbage=3, deflate=True)
+        except Exception as e:
+            # Seiten nicht lesbar - Original ablegen, bereits exportierte Teile protokollieren
+            logger.error(f"Restseiten ab Seite {first_page} nicht extrahierbar, verschiebe Original "
+                         f"(Seiten 1-{first_page - 1} wurden bereits exportiert): {e}")
+            self._move_to_error_path(doc_pair, hotfolder, temp_pdf_path, temp_xml_path)
+            return os.path.basename(doc_pair.pdf_path)
+        
+        rest_xml = None
+        if temp_xml_path and os.path.exists(temp_xml_path):
+            rest_xml = os.path.join(parts_dir, os.path.splitext(rest_name)[0] + '.xml')
+            shutil.copy2(temp_xml_path, rest_xml)
+        
+        source_dir = os.path.dirname(doc_pair.pdf_path)
+        rest_pair = DocumentPair(pdf_path=os.path.join(source_dir, rest_name),
+                                 xml_path=rest_xml and os.path.join(source_dir, os.path.basename(rest_xml)))
+        logger.info(f"Nicht verarbeitete Seiten {first_page}-{last_page} von "
+                    f"{os.path.basename(doc_pair.pdf_path)} in den Fehlerpfad: {rest_name}")
+        self._move_to_error_path(rest_pair, hotfolder, rest_pdf, rest_xml)
+        return rest_name
+    
+    def _move_to_error_path(self, doc_pair: DocumentPair, hotfolder: HotfolderConfig,
+                            temp_pdf_path: str, temp_xml_path: Optional[str]):
+        """Verschiebt die Arbeitskopie eines fehlgeschlagenen Dokuments in den Fehlerpfad"""
+        error_path = self._get_error_path(doc_pair, hotfolder)
+        os.makedirs(error_path, exist_ok=True)
+        
+        try:
+            if os.path.exists(temp_pdf_path):
+                error_pdf = os.path.join(error_path, os.path.basename(doc_pair.pdf_path))
+                if os.path.exists(error_pdf):
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    base, ext = os.path.splitext(error_pdf)
+                    error_pdf = f"{base}_{timestamp}{ext}"
+                shutil.move(temp_pdf_path, error_pdf)
+                
+            if temp_xml_path and os.path.exists(temp_xml_path):
+                error_xml = os.path.join(error_path, os.path.basename(doc_pair.xml_path or "temp_fields.xml"))
+                if os.path.exists(error_xml):
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    base, ext = os.path.splitext(error_xml)
+                    error_xml = f"{base}_{timestamp}{ext}"
+                shutil.move(temp_xml_path, error_xml)
+                
+            logger.info(f"Dateien in Fehlerpfad verschoben: {error_path}")
             
+        except Exception as move_error:
+            logger.error(f"Fehler beim Verschieben in Fehlerpfad: {move_error}")
+    
+    @staticmethod
+    def _drop_document_caches(pdf_path: str):
+        """Gibt die Cache-Einträge eines Dokuments frei"""
+        get_page_raster_cache().drop(pdf_path)
+        get_document_text_cache().drop(pdf_path)
+        get_word_index_cache().drop(pdf_path)
+        get_ocr_language_resolver().drop(pdf_path)
+    
     def _validate_pdf(self, pdf_path: str) -> bool:
         """Validiert ob PDF gültig und nicht beschädigt ist"""
         try:
@@ -457,6 +647,66 @@ class PDFProcessor:
             logger.error(f"PDF-Validierung fehlgeschlagen: {e}")
             return False
     
+    def _plan_shared_ocr(self, pdf_path: str, hotfolder: HotfolderConfig):
+        """
+        Merkt ein gescanntes Dokument mit PDF/A-Export für einen gemeinsamen
+        OCRmyPDF-Lauf vor. Die erste Textanfrage (OCR_FullText) erzeugt dann
+        gleich die PDF/A-Fassung, der Export verwendet sie weiter.
+
+        Läuft nach den PDF-Aktionen; hat die OCR-Aktion bereits eine Textebene
+        ergänzt, ist das Dokument kein reiner Scan mehr und nichts wird vorgemerkt.
+        """
+        for export_dict in hotfolder.export_configs or []:
+            try:
+                export = ExportConfig.from_dict(export_dict) if isinstance(export_dict, dict) else export_dict
+            except Exception:
+                continue
+            if not export.enabled or export.export_format != ExportFormat.SEARCHABLE_PDF_A:
+                continue
+            
+            # Gesammelte Datei-Exporte laufen zeitversetzt im PDFABatcher
+            if export.format_params.get('batch') and export.export_method == ExportMethod.FILE:
+                continue
+            
+            # Gleiche Prüfung wie beim Export: nur Dokumente ganz ohne Text
+            # laufen über den gemeinsamen Durchlauf
+            if not analyze_text_layer(pdf_path).fully_scanned:
+                return
+            
+            # Gleiche Sprache wie OCR_FullText, sonst wären es zwei Cache-Einträge
+            language = self.ocr_processor.resolve_language(
+                pdf_path, export.format_params.get('language'), self._ocr_language(hotfolder))
+            get_document_text_cache().plan_searchable_pdfa(
+                pdf_path,
+                language=language,
+                options=OCRmyPDFOptions.from_params(export.format_params)
+            )
+            return
+
+    def _ocr_preprocessing(self, hotfolder: HotfolderConfig) -> Any:
+        """Bildvorverarbeitung für die OCR des Hotfolders (Preset oder Dictionary)"""
+        return hotfolder.action_params.get(ProcessingAction.OCR.value, {}).get('preprocessing')
+
+    def _ocr_language(self, hotfolder: HotfolderConfig) -> str:
+        """OCR-Sprache des Hotfolders ('deu', 'deu+eng', 'auto'), leer = Einstellungen"""
+        return hotfolder.action_params.get(ProcessingAction.OCR.value, {}).get('language', '')
+
+    def _zone_dicts(self, hotfolder: HotfolderConfig) -> List[Dict[str, Any]]:
+        """
+        OCR-Zonen als Dictionaries, ergänzt um den Schlüssel der gespeicherten
+        OCR-Stufe sowie die wirksame Vorverarbeitung und Sprache (Zone vor Hotfolder)
+        """
+        zones = []
+        for zone in hotfolder.ocr_zones:
+            zone_dict = dict(zone) if isinstance(zone, dict) else zone.to_dict()
+            zone_dict['strategy_key'] = zone_strategy_key(hotfolder.id, zone_dict)
+            if not zone_dict.get('preprocessing'):
+                zone_dict['preprocessing'] = self._ocr_preprocessing(hotfolder)
+            if not zone_dict.get('language'):
+                zone_dict['language'] = self._ocr_language(hotfolder)
+            zones.append(zone_dict)
+        return zones
+
     def _analyze_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """Analysiert PDF für optimale Verarbeitung"""
         try:
@@ -470,7 +720,8 @@ class PDFProcessor:
                 "is_scanned": True,
                 "avg_dpi": 0,
                 "file_size_mb": os.path.getsize(pdf_path) / (1024 * 1024),
-                "needs_ocr": False
+                "needs_ocr": False,
+                "is_pdfa": is_pdfa(pdf_path)
             }
             
             total_dpi = 0
@@ -569,6 +820,114 @@ class PDFProcessor:
             logger.error(f"Komprimierung fehlgeschlagen: {e}")
             return False
     
+    def _ocr_pdf(self, pdf_path: str, params: Dict[str, Any]) -> bool:
+        """
+        OCR-Aktion: ergänzt die Textebene für Seiten ohne Text (OCRmyPDF).
+        Mit params['pdf_a'] entsteht im selben Lauf PDF/A.
+        """
+        try:
+            layer = analyze_text_layer(pdf_path)
+            logger.info(f"Textprüfung: {layer.describe()}")
+            
+            # Ohne Seitendrehung, damit OCR-Zonen auf die Originallage passen
+            options = OCRmyPDFOptions.from_params({'rotate_pages': False, **params})
+            if not layer.needs_ocr and options.ocr_mode in ('auto', 'skip_text'):
+                logger.info("OCR übersprungen - alle Seiten haben bereits Text")
+                return True
+            
+            output_type = 'pdfa' if params.get('pdf_a') else 'pdf'
+            return self._run_ocrmypdf_action(pdf_path, params, layer, options, output_type)
+            
+        except Exception as e:
+            logger.error(f"OCR fehlgeschlagen: {e}")
+            return False
+    
+    def _convert_pdf_a(self, pdf_path: str, params: Dict[str, Any]) -> bool:
+        """
+        PDF/A-Aktion: digital erzeugte PDFs ohne OCR (core.pdfa_converter),
+        sonst OCRmyPDF - Seiten ohne Text werden dabei erkannt.
+        """
+        try:
+            if is_pdfa(pdf_path):
+                logger.info("PDF/A übersprungen - Datei ist bereits PDF/A")
+                return True
+            
+            layer = analyze_text_layer(pdf_path)
+            logger.info(f"Textprüfung: {layer.describe()}")
+            options = OCRmyPDFOptions.from_params({'rotate_pages': False, **params})
+            
+            if params.get('fast_pdfa', True) and not layer.needs_ocr:
+                gs_cmd = self._get_ghostscript_cmd() if self._is_ghostscript_available() else None
+                temp_output = os.path.join(os.path.dirname(pdf_path), f"pdfa_{uuid.uuid4().hex}.pdf")
+                conversion = convert_to_pdfa(pdf_path, temp_output, gs_command=gs_cmd)
+                if conversion.success:
+                    shutil.move(temp_output, pdf_path)
+                    logger.info("PDF/A erstellt (ohne OCR)")
+                    return True
+                logger.info(f"Schnelle PDF/A-Konvertierung nicht möglich ({conversion.describe()}), "
+                            f"verwende OCRmyPDF")
+            
+            return self._run_ocrmypdf_action(pdf_path, params, layer, options, 'pdfa')
+            
+        except Exception as e:
+            logger.error(f"PDF/A-Konvertierung fehlgeschlagen: {e}")
+            return False
+    
+    def _run_ocrmypdf_action(self, pdf_path: str, params: Dict[str, Any], layer: TextLayerInfo,
+                             options: OCRmyPDFOptions, output_type: str) -> bool:
+        """Ersetzt die Arbeitsdatei durch das OCRmyPDF-Ergebnis und übernimmt den Text"""
+        if not self._is_tesseract_available():
+            raise Exception("Tesseract nicht verfügbar - bitte im dependencies Ordner platzieren")
+        if output_type == 'pdfa' and not self._is_ghostscript_available():
+            raise Exception("Ghostscript nicht verfügbar - bitte im dependencies Ordner platzieren")
+        
+        language = self.ocr_processor.resolve_language(pdf_path, params.get('language'))
+        work_dir = os.path.dirname(pdf_path)
+        token = uuid.uuid4().hex
+        temp_output = os.path.join(work_dir, f"ocr_{token}.pdf")
+        sidecar = os.path.join(work_dir, f"ocr_{token}.txt")
+        try:
+            run_ocrmypdf(pdf_path, temp_output, language, options, layer=layer,
+                         sidecar=sidecar, output_type=output_type)
+            recognized = dict(read_sidecar(sidecar))
+            shutil.move(temp_output, pdf_path)
+        finally:
+            for path in (temp_output, sidecar):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        # Sprache neu bestimmen: "auto" gilt je Dateistand
+        self._store_recognized_text(
+            pdf_path, self.ocr_processor.resolve_language(pdf_path, params.get('language')),
+            layer, options, recognized)
+        return True
+    
+    def _store_recognized_text(self, pdf_path: str, language: str, layer: TextLayerInfo,
+                               options: OCRmyPDFOptions, recognized: Dict[int, str]):
+        """
+        Legt den Seitentext der neuen Arbeitsdatei ab, damit OCR_FullText das
+        Dokument nicht erneut erkennt. Übersprungene Seiten liefern ihre Textebene.
+        """
+        if options.ocr_mode == 'force':
+            ocr_pages = set(range(1, layer.page_count + 1))
+        elif options.ocr_mode == 'redo_ocr':
+            ocr_pages = layer.scanned_pages | layer.ocr_pages
+        else:
+            ocr_pages = layer.scanned_pages
+        
+        try:
+            page_texts = []
+            with fitz.open(pdf_path) as doc:
+                for index, page in enumerate(doc):
+                    page_no = index + 1
+                    if page_no in ocr_pages and page_no in recognized:
+                        page_texts.append((page_no, recognized[page_no]))
+                    else:
+                        page_texts.append((page_no, page.get_text().strip()))
+            get_document_text_cache().store_page_texts(pdf_path, language, page_texts)
+        except Exception as e:
+            logger.warning(f"OCR-Text der Aktion nicht übernommen: {e}")
+    
     def _determine_compression_profile(self, params: Dict[str, Any], pdf_info: Dict[str, Any]) -> Dict[str, Any]:
         """Bestimmt das optimale Komprimierungsprofil"""
         # Prüfe ob explizites Profil gewählt wurde
@@ -813,7 +1172,10 @@ class PDFProcessor:
                         zone_coords = zone_dict.get('zone', (0, 0, 100, 100))
                         
                         zone_text = self.ocr_processor.extract_text_from_zone(
-                            pdf_path, page_num, zone_coords
+                            pdf_path, page_num, zone_coords,
+                            validation_regex=zone_dict.get('validation_regex', ''),
+                            strategy_key=zone_dict.get('strategy_key'),
+                            preprocessing=zone_dict.get('preprocessing')
                         )
                         
                         context[zone_name] = zone_text
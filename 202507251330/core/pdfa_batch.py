@@ -0,0 +1,494 @@
+"""
+Sammel-Konvertierung zu durchsuchbarem PDF/A
+
+Jeder OCRmyPDF-Lauf hat feste Anlaufkosten (Plugins, Worker-Pool, Ghostscript).
+Bei vielen einseitigen Scans überwiegen diese die eigentliche Erkennung, und
+eine einzelne Seite nutzt nur einen Prozessorkern.
+
+Der PDFABatcher sammelt PDF/A-Exporte gleicher Sprache und OCRmyPDF-
+Einstellungen für ein kurzes Zeitfenster oder bis zu einer Seitenzahl, fügt
+sie zu einem Dokument zusammen und erkennt es in einem OCRmyPDF-Lauf mit
+einem Job je Kern (sofern der Export keine eigene Anzahl vorgibt). Das Ergebnis wird
+anschließend wieder in die einzelnen Dokumente zerlegt; jedes erhält seinen
+eigenen Dateinamen und seine eigenen Metadaten (Titel, Autor, ...).
+
+Schlägt ein Sammellauf fehl, werden seine Dokumente einzeln konvertiert, damit
+eine defekte Datei nicht die übrigen blockiert.
+
+Eingereichte Dokumente liegen mit Ziel und Einstellungen in pending/ und werden
+nach einem Absturz oder Neustart mit start() erneut eingereiht. Scheitert auch
+die Einzelkonvertierung, bleibt die Quelldatei samt Ziel und Fehlermeldung in
+failed/ erhalten.
+"""
+import os
+import json
+import uuid
+import shutil
+import tempfile
+import threading
+import time
+import logging
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace, asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import ocrmypdf
+import pikepdf
+
+from core.document_text import run_searchable_pdfa, read_sidecar
+from core.filename_allocator import get_filename_allocator
+from core.ocrmypdf_runner import OCRmyPDFOptions
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_DIR = "config/pdfa_batch"
+
+# Standard-Sammelfenster in Sekunden (ab dem ersten Dokument einer Sprache)
+BATCH_WINDOW = 10.0
+
+# Ein Sammellauf startet spätestens bei dieser Seitenzahl
+BATCH_MAX_PAGES = 50
+
+# Zeitlimit für flush() beim Beenden
+FLUSH_TIMEOUT = 600
+
+
+@dataclass
+class PDFABatchJob:
+    """Ein zur Sammel-Konvertierung eingereichtes Dokument"""
+    id: str
+    source_path: str                    # Kopie in pending/ des Batchers
+    output_file: str                    # gewünschter Zielpfad
+    language: str
+    options: OCRmyPDFOptions
+    page_count: int
+    docinfo: Dict[str, str] = field(default_factory=dict)
+    document: str = ""                  # Name des Originaldokuments
+    done: threading.Event = field(default_factory=threading.Event)
+    success: bool = False
+    message: str = ""
+    written_file: str = ""
+    page_texts: List = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.output_file)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wartet auf das Ergebnis; True wenn erfolgreich geschrieben"""
+        self.done.wait(timeout)
+        return self.success
+
+    def finish(self, success: bool, message: str):
+        self.success = success
+        self.message = message
+        if success:
+            logger.info(message)
+        else:
+            logger.error(message)
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        """Ziel und Einstellungen für pending/ bzw. failed/"""
+        return {
+            'id': self.id,
+            'output_file': self.output_file,
+            'language': self.language,
+            'options': asdict(self.options),
+            'page_count': self.page_count,
+            'docinfo': self.docinfo,
+            'document': self.document,
+            'message': self.message,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, source_path: str) -> 'PDFABatchJob':
+        return cls(id=data['id'], source_path=source_path,
+                   output_file=data['output_file'], language=data['language'],
+                   options=OCRmyPDFOptions(**data.get('options', {})),
+                   page_count=data['page_count'], docinfo=data.get('docinfo', {}),
+                   document=data.get('document', ''))
+
+
+@dataclass
+class _BatchGroup:
+    """Wartende Dokumente einer Sprache und Einstellung"""
+    jobs: List[PDFABatchJob] = field(default_factory=list)
+    deadline: float = 0.0
+    max_pages: int = BATCH_MAX_PAGES
+
+    @property
+    def page_count(self) -> int:
+        return sum(job.page_count for job in self.jobs)
+
+    def ready(self, now: float) -> bool:
+        return bool(self.jobs) and (now >= self.deadline or self.page_count >= self.max_pages)
+
+
+class PDFABatcher:
+    """Sammelt PDF/A-Konvertierungen und führt sie gemeinsam aus"""
+
+    def __init__(self, jobs: Optional[int] = None, batch_dir: str = DEFAULT_BATCH_DIR):
+        self.jobs = jobs or os.cpu_count() or 1
+        self._groups: Dict[Tuple[str, OCRmyPDFOptions], _BatchGroup] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = 0
+        self._stopped = False
+        self._work_dir = os.path.join(batch_dir, "work")
+        self.pending_dir = os.path.join(batch_dir, "pending")
+        self.failed_dir = os.path.join(batch_dir, "failed")
+        for directory in (self._work_dir, self.pending_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+        # Zwischendateien abgebrochener Läufe
+        for name in os.listdir(self._work_dir):
+            self._remove_file(os.path.join(self._work_dir, name))
+        # In diesem Lauf eingereichte, noch nicht abgeschlossene Dokumente
+        self._active_ids: Set[str] = set()
+        self._recovered = False
+
+    def submit(self, pdf_path: str, output_file: str, language: str = 'deu',
+               options: Optional[OCRmyPDFOptions] = None, window: float = BATCH_WINDOW,
+               max_pages: int = BATCH_MAX_PAGES, document: str = "") -> PDFABatchJob:
+        """
+        Reiht ein Dokument zur Konvertierung ein.
+
+        Die Quelldatei wird sofort nach pending/ kopiert; der Aufrufer darf sie
+        danach verschieben oder löschen. Der Zielname wird erst beim Schreiben
+        eindeutig gemacht (siehe FilenameAllocator.publish).
+
+        Returns:
+            PDFABatchJob (wait() liefert das Ergebnis)
+        """
+        job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:12]}"
+        source_copy = self._source_path(self.pending_dir, job_id)
+        shutil.copy2(pdf_path, source_copy)
+        try:
+            with pikepdf.open(source_copy) as pdf:
+                page_count = len(pdf.pages)
+                docinfo = {str(key): str(value) for key, value in pdf.docinfo.items()}
+            job = PDFABatchJob(id=job_id, source_path=source_copy,
+                               output_file=os.path.abspath(output_file),
+                               language=language, options=options or OCRmyPDFOptions(),
+                               page_count=page_count, docinfo=docinfo,
+                               document=document or os.path.basename(pdf_path))
+            self._save(job, self.pending_dir)
+        except Exception:
+            self._remove_file(source_copy)
+            raise
+
+        self._enqueue(job, window, max_pages)
+        return job
+
+    def _enqueue(self, job: PDFABatchJob, window: float = BATCH_WINDOW,
+                 max_pages: int = BATCH_MAX_PAGES):
+        """Fügt ein Dokument seiner Gruppe hinzu"""
+        with self._cond:
+            self._active_ids.add(job.id)
+            key = (job.language, job.options)
+            group = self._groups.get(key)
+            if group is None:
+                group = _BatchGroup(deadline=time.monotonic() + window, max_pages=max_pages)
+                self._groups[key] = group
+            group.deadline = min(group.deadline, time.monotonic() + window)
+            group.max_pages = min(group.max_pages, max_pages)
+            group.jobs.append(job)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+        logger.debug(f"PDF/A-Sammellauf: {job.name} eingereiht ({job.language}, "
+                     f"{group.page_count} Seiten wartend)")
+
+    def start(self):
+        """Reiht Dokumente ein, die in einem früheren Lauf nicht mehr konvertiert wurden"""
+        with self._cond:
+            if self._recovered:
+                return
+            self._recovered = True
+        try:
+            names = sorted(name for name in os.listdir(self.pending_dir) if name.endswith('.json'))
+        except OSError as e:
+            logger.error(f"PDF/A-Warteschlange nicht lesbar: {e}")
+            return
+        recovered = 0
+        for name in names:
+            job = self._load(os.path.join(self.pending_dir, name))
+            if job is None or not os.path.exists(job.source_path):
+                continue
+            with self._cond:
+                if job.id in self._active_ids:
+                    continue
+            self._enqueue(job, window=0.0)
+            recovered += 1
+        if recovered:
+            logger.info(f"{recovered} PDF/A-Export(e) aus früheren Läufen erneut eingereiht")
+
+    def _ensure_thread(self):
+        """Startet den Sammel-Thread bei Bedarf (Sperre gehalten)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="pdfa_batch", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Startet fällige Sammelläufe"""
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    ready = [key for key, group in self._groups.items() if group.ready(now)]
+                    if ready:
+                        break
+                    if self._stopped and not self._groups:
+                        return
+                    deadlines = [group.deadline for group in self._groups.values()]
+                    self._cond.wait(max(0.0, min(deadlines) - now) if deadlines else None)
+                group = self._groups.pop(ready[0])
+                self._running += 1
+
+            try:
+                self._process(group.jobs)
+            except Exception as e:
+                logger.exception(f"Unerwarteter Fehler im PDF/A-Sammellauf: {e}")
+                for job in group.jobs:
+                    if not job.done.is_set():
+                        job.finish(False, f"PDF/A-Export fehlgeschlagen: {job.name}: {e}")
+            finally:
+                for job in group.jobs:
+                    self._complete(job)
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def _complete(self, job: PDFABatchJob):
+        """Entfernt ein geschriebenes Dokument aus pending/, legt fehlgeschlagene in failed/ ab"""
+        try:
+            if job.success:
+                self._remove_file(job.source_path)
+                self._remove_file(self._json_path(self.pending_dir, job.id))
+            else:
+                if not job.message:
+                    job.message = f"PDF/A-Export nicht abgeschlossen: {job.name}"
+                source = self._source_path(self.failed_dir, job.id)
+                os.replace(job.source_path, source)
+                job.source_path = source
+                self._save(job, self.failed_dir)
+                self._remove_file(self._json_path(self.pending_dir, job.id))
+                logger.error(f"PDF/A-Export von {job.document or job.name} nach {job.output_file} "
+                             f"fehlgeschlagen - Quelldatei liegt in {self.failed_dir}")
+        except OSError as e:
+            logger.error(f"PDF/A-Sammellauf: {job.name} konnte nicht abgeschlossen werden "
+                         f"(bleibt in {self.pending_dir}): {e}")
+        finally:
+            with self._cond:
+                self._active_ids.discard(job.id)
+
+    def _process(self, jobs: List[PDFABatchJob]):
+        """Konvertiert eine Gruppe gemeinsam, bei Fehlern einzeln"""
+        if len(jobs) == 1:
+            self._convert_single(jobs[0])
+            return
+
+        pages = sum(job.page_count for job in jobs)
+        logger.info(f"PDF/A-Sammellauf: {len(jobs)} Dokumente, {pages} Seiten, "
+                    f"{self.jobs} Jobs ({jobs[0].language})")
+        started = time.monotonic()
+        try:
+            self._convert_batch(jobs)
+        except Exception as e:
+            logger.warning(f"PDF/A-Sammellauf fehlgeschlagen, konvertiere einzeln: {e}")
+            for job in jobs:
+                if not job.done.is_set():
+                    self._convert_single(job)
+            return
+        logger.info(f"PDF/A-Sammellauf abgeschlossen in {time.monotonic() - started:.1f}s")
+
+    def _convert_batch(self, jobs: List[PDFABatchJob]):
+        """Ein OCRmyPDF-Lauf für alle Dokumente, danach Aufteilung"""
+        batch_id = uuid.uuid4().hex
+        merged_path = os.path.join(self._work_dir, f"{batch_id}_in.pdf")
+        output_path = os.path.join(self._work_dir, f"{batch_id}_out.pdf")
+        sidecar_path = os.path.join(self._work_dir, f"{batch_id}.txt")
+        try:
+            # Zusammenfügen - Quellen bleiben bis zum Speichern geöffnet,
+            # da pikepdf Seiteninhalte erst dann kopiert
+            ranges = []
+            with ExitStack() as stack:
+                merged = stack.enter_context(pikepdf.new())
+                for job in jobs:
+                    source = stack.enter_context(pikepdf.open(job.source_path))
+                    start = len(merged.pages)
+                    merged.pages.extend(source.pages)
+                    ranges.append((start, len(merged.pages)))
+                merged.save(merged_path)
+
+            result = run_searchable_pdfa(merged_path, output_path, jobs[0].language,
+                                         self._run_options(jobs[0].options),
+                                         sidecar=sidecar_path)
+            if result != ocrmypdf.ExitCode.ok:
+                raise RuntimeError(f"OCRmyPDF fehlgeschlagen mit Code: {result}")
+
+            page_texts = read_sidecar(sidecar_path)
+            with pikepdf.open(output_path) as output:
+                for job, (start, end) in zip(jobs, ranges):
+                    try:
+                        self._write_part(output, start, end, job)
+                        job.page_texts = [(page_no - start, text) for page_no, text
+                                          in page_texts[start:end]]
+                        job.finish(True, f"PDF/A (Durchsuchbar) exportiert: "
+                                         f"{os.path.basename(job.written_file)}")
+                    except Exception as e:
+                        logger.warning(f"Aufteilen des Sammellaufs fehlgeschlagen für {job.name}, "
+                                       f"konvertiere einzeln: {e}")
+                        self._convert_single(job)
+        finally:
+            for path in (merged_path, output_path, sidecar_path):
+                self._remove_file(path)
+
+    def _write_part(self, output: pikepdf.Pdf, start: int, end: int, job: PDFABatchJob):
+        """Schreibt die Seiten [start, end) als eigenes PDF/A mit den Metadaten des Originals"""
+        with pikepdf.new() as part:
+            part.pages.extend(output.pages[start:end])
+
+            # PDF/A-Kennzeichnung (OutputIntent, XMP) aus dem Sammellauf übernehmen
+            for key in ('/OutputIntents', '/Metadata'):
+                if key in output.Root:
+                    part.Root[key] = part.copy_foreign(output.make_indirect(output.Root[key]))
+
+            # Dokumenteigenschaften des Originals
+            for key, value in job.docinfo.items():
+                part.docinfo[pikepdf.Name(key)] = pikepdf.String(value)
+            with part.open_metadata(set_pikepdf_as_editor=False) as meta:
+                meta.load_from_docinfo(part.docinfo)
+
+            self._save_to(part, job)
+
+    def _convert_single(self, job: PDFABatchJob):
+        """Konvertiert ein Dokument allein (eigener OCRmyPDF-Lauf)"""
+        output_path = os.path.join(self._work_dir, f"{uuid.uuid4().hex}_out.pdf")
+        sidecar_path = output_path[:-4] + '.txt'
+        try:
+            result = run_searchable_pdfa(job.source_path, output_path, job.language,
+                                         self._run_options(job.options), sidecar=sidecar_path)
+            if result != ocrmypdf.ExitCode.ok:
+                job.finish(False, f"PDF/A-Export fehlgeschlagen (Code: {result}): {job.name}")
+                return
+            job.page_texts = read_sidecar(sidecar_path)
+            with pikepdf.open(output_path) as pdf:
+                self._save_to(pdf, job)
+            job.finish(True, f"PDF/A (Durchsuchbar) exportiert: "
+                             f"{os.path.basename(job.written_file)}")
+        except Exception as e:
+            job.finish(False, f"PDF/A-Export fehlgeschlagen: {job.name}: {e}")
+        finally:
+            self._remove_file(output_path)
+            self._remove_file(sidecar_path)
+
+    def _run_options(self, options: OCRmyPDFOptions) -> OCRmyPDFOptions:
+        """Ohne eigene Vorgabe ein Job je Kern"""
+        return options if options.jobs else replace(options, jobs=self.jobs)
+
+    def _save_to(self, pdf: pikepdf.Pdf, job: PDFABatchJob):
+        """Speichert ins Zielverzeichnis (erst temporär, dann eindeutig umbenannt)"""
+        target_dir = os.path.dirname(job.output_file) or '.'
+        os.makedirs(target_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=target_dir)
+        os.close(fd)
+        try:
+            pdf.save(temp_path)
+            job.written_file = get_filename_allocator().publish(temp_path, job.output_file)
+        except Exception:
+            self._remove_file(temp_path)
+            raise
+
+    def pending(self) -> int:
+        """Anzahl wartender oder laufender Dokumente"""
+        with self._cond:
+            return sum(len(group.jobs) for group in self._groups.values()) + self._running
+
+    def failed(self) -> int:
+        """Anzahl fehlgeschlagener Dokumente in failed/"""
+        try:
+            return len([name for name in os.listdir(self.failed_dir) if name.endswith('.json')])
+        except OSError:
+            return 0
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """
+        Startet alle wartenden Sammelläufe sofort und wartet auf ihr Ende.
+
+        Returns:
+            True wenn alle Dokumente verarbeitet wurden
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for group in self._groups.values():
+                group.deadline = 0.0
+            self._cond.notify_all()
+            while self._groups or self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("PDF/A-Sammelläufe beim Beenden nicht abgeschlossen")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = FLUSH_TIMEOUT):
+        """
+        Verarbeitet Wartendes und beendet den Sammel-Thread.
+        Nicht mehr konvertierte Dokumente bleiben in pending/ (siehe start()).
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._recovered = False
+            self._cond.notify_all()
+
+    def _save(self, job: PDFABatchJob, directory: str):
+        path = self._json_path(directory, job.id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _load(self, path: str) -> Optional[PDFABatchJob]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return PDFABatchJob.from_dict(data, self._source_path(self.pending_dir, data['id']))
+        except Exception as e:
+            logger.error(f"PDF/A-Warteschlangeneintrag {os.path.basename(path)} nicht lesbar: {e}")
+            return None
+
+    @staticmethod
+    def _source_path(directory: str, job_id: str) -> str:
+        return os.path.join(directory, f"{job_id}.pdf")
+
+    @staticmethod
+    def _json_path(directory: str, job_id: str) -> str:
+        return os.path.join(directory, f"{job_id}.json")
+
+    @staticmethod
+    def _remove_file(path: Optional[str]):
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.debug(f"Temporäre Datei {path} konnte nicht gelöscht werden: {e}")
+
+
+# Globale Instanz
+_pdfa_batcher = None
+_pdfa_batcher_lock = threading.Lock()
+
+
+def get_pdfa_batcher() -> PDFABatcher:
+    """Gibt die globale PDFABatcher-Instanz zurück"""
+    global _pdfa_batcher
+    with _pdfa_batcher_lock:
+        if _pdfa_batcher is None:
+            _pdfa_batcher = PDFABatcher()
+            logger.debug("Globale PDFABatcher-Instanz erstellt")
+        return _pdfa_batcher
@@ -0,0 +1,378 @@
+"""
+Schnelle PDF/A-Konvertierung für digital erzeugte PDFs
+
+ERP-Rechnungen und andere digital erzeugte Dokumente haben auf jeder Seite
+Text und brauchen keine OCR. Für sie ist der volle OCRmyPDF-Lauf (Analyse,
+Rasterung für die Ausrichtung, Ghostscript für PDF/A) unnötig teuer.
+
+Der Konverter ergänzt direkt mit pikepdf, was PDF/A-2b verlangt:
+
+    - OutputIntent mit sRGB-Farbprofil
+    - XMP-Metadaten mit PDF/A-Kennung, abgeglichen mit den Dokumenteigenschaften
+    - keine Verschlüsselung, kein JavaScript, keine Auto-Aktionen
+    - druckbare Anmerkungen
+
+Nur wenn Schriften nicht eingebettet sind oder geräteabhängige CMYK-Farben
+verwendet werden, läuft vorher ein einzelner Ghostscript-Durchgang (pdfwrite,
+Schriften einbetten, Farben nach RGB). Das Ergebnis wird anschließend auf die
+geprüften Anforderungen validiert; bei Abweichungen meldet der Konverter die
+Gründe und der Aufrufer fällt auf OCRmyPDF zurück.
+
+Die Validierung deckt die für diese Dokumente typischen Verstöße ab und
+ersetzt keine vollständige Prüfung (z.B. veraPDF).
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import logging
+import importlib.resources
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+import pikepdf
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+PDFA_PART = '2'
+PDFA_CONFORMANCE = 'B'
+
+# Anmerkungs-Flags (PDF 1.7, Tabelle 165)
+_ANNOT_INVISIBLE = 1
+_ANNOT_HIDDEN = 2
+_ANNOT_PRINT = 4
+_ANNOT_NOVIEW = 32
+
+# Anmerkungen ohne Pflicht zur Erscheinung (PDF/A-2, 6.3.3)
+_ANNOTS_WITHOUT_APPEARANCE = {'/Popup', '/Link'}
+
+_CMYK_OPERATORS = {'k', 'K'}
+_COLORSPACE_OPERATORS = {'cs', 'CS'}
+
+_GS_TIMEOUT = 300
+
+
+@dataclass
+class PDFAConversionResult:
+    """Ergebnis der schnellen Konvertierung"""
+    success: bool = False
+    issues: List[str] = field(default_factory=list)
+    used_ghostscript: bool = False
+
+    def describe(self) -> str:
+        return "; ".join(self.issues)
+
+
+def _srgb_profile() -> bytes:
+    """sRGB-Farbprofil (wird mit OCRmyPDF ausgeliefert)"""
+    return importlib.resources.files('ocrmypdf.data').joinpath('sRGB.icc').read_bytes()
+
+
+def find_ghostscript() -> Optional[str]:
+    """Ghostscript-Befehl im PATH (gswin64c/gswin32c unter Windows)"""
+    names = ['gswin64c', 'gswin32c'] if os.name == 'nt' else ['gs']
+    for name in names:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _iter_resources(pdf: pikepdf.Pdf):
+    """Ressourcen-Dictionaries aller Seiten und (verschachtelten) Form-XObjects"""
+    seen: Set = set()
+    stack = []
+    for page in pdf.pages:
+        if '/Resources' in page.obj:
+            stack.append(page.obj.Resources)
+    while stack:
+        resources = stack.pop()
+        key = resources.objgen if resources.is_indirect else id(resources)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield resources
+        for xobject in (resources.get('/XObject') or {}).values():
+            if xobject.get('/Subtype') == '/Form' and '/Resources' in xobject:
+                stack.append(xobject.Resources)
+
+
+def _font_embedded(font: pikepdf.Dictionary) -> bool:
+    """Prüft ob eine Schrift eingebettet ist (Type3-Schriften sind es immer)"""
+    subtype = font.get('/Subtype')
+    if subtype == '/Type3':
+        return True
+    if subtype == '/Type0':
+        descendants = font.get('/DescendantFonts')
+        if not descendants:
+            return False
+        font = descendants[0]
+    descriptor = font.get('/FontDescriptor')
+    if descriptor is None:
+        return False
+    return any(key in descriptor for key in ('/FontFile', '/FontFile2', '/FontFile3'))
+
+
+def unembedded_fonts(pdf: pikepdf.Pdf) -> List[str]:
+    """Namen der nicht eingebetteten Schriften"""
+    missing = set()
+    for resources in _iter_resources(pdf):
+        for font in (resources.get('/Font') or {}).values():
+            if not _font_embedded(font):
+                missing.add(str(font.get('/BaseFont', '?')).lstrip('/'))
+    return sorted(missing)
+
+
+def _is_cmyk(colorspace) -> bool:
+    """Geräteabhängiges CMYK (auch als Alternative von Separation/DeviceN)"""
+    if colorspace is None:
+        return False
+    if isinstance(colorspace, pikepdf.Name):
+        return colorspace == '/DeviceCMYK'
+    if isinstance(colorspace, pikepdf.Array) and len(colorspace) > 0:
+        family = colorspace[0]
+        if family in ('/Separation', '/DeviceN') and len(colorspace) > 2:
+            return _is_cmyk(colorspace[2])
+        if family == '/Indexed' and len(colorspace) > 1:
+            return _is_cmyk(colorspace[1])
+    return False
+
+
+def uses_device_cmyk(pdf: pikepdf.Pdf) -> bool:
+    """Prüft Inhalte, Bilder und Farbräume auf geräteabhängiges CMYK"""
+    for resources in _iter_resources(pdf):
+        for colorspace in (resources.get('/ColorSpace') or {}).values():
+            if _is_cmyk(colorspace):
+                return True
+        for xobject in (resources.get('/XObject') or {}).values():
+            if xobject.get('/Subtype') == '/Image' and _is_cmyk(xobject.get('/ColorSpace')):
+                return True
+
+    def stream_uses_cmyk(owner) -> bool:
+        for operands, operator in pikepdf.parse_content_stream(owner):
+            op = str(operator)
+            if op in _CMYK_OPERATORS:
+                return True
+            if op in _COLORSPACE_OPERATORS and operands and operands[0] == '/DeviceCMYK':
+                return True
+        return False
+
+    for page in pdf.pages:
+        if stream_uses_cmyk(page):
+            return True
+        for xobject in (page.obj.get('/Resources', {}).get('/XObject') or {}).values():
+            if xobject.get('/Subtype') == '/Form' and stream_uses_cmyk(xobject):
+                return True
+    return False
+
+
+def is_pdfa(pdf_path: str) -> bool:
+    """Prüft ob ein PDF als PDF/A gekennzeichnet ist (OutputIntent und XMP-Kennung)"""
+    try:
+        with pikepdf.open(pdf_path) as pdf:
+            intents = pdf.Root.get('/OutputIntents')
+            if not intents or not any(intent.get('/S') == '/GTS_PDFA1' for intent in intents):
+                return False
+            return bool(str(pdf.open_metadata().get('pdfaid:part', '')))
+    except Exception as e:
+        logger.debug(f"PDF/A-Kennung nicht lesbar: {e}")
+        return False
+
+
+def check_pdfa(pdf: pikepdf.Pdf) -> List[str]:
+    """
+    Prüft die wichtigsten PDF/A-2b-Anforderungen.
+
+    Returns:
+        Liste der gefundenen Verstöße (leer = in Ordnung)
+    """
+    issues = []
+    root = pdf.Root
+
+    if pdf.is_encrypted:
+        issues.append("verschlüsselt")
+
+    intents = root.get('/OutputIntents')
+    if not intents or not any(intent.get('/S') == '/GTS_PDFA1' for intent in intents):
+        issues.append("kein PDF/A-OutputIntent")
+
+    try:
+        meta = pdf.open_metadata()
+        if str(meta.get('pdfaid:part', '')) != PDFA_PART:
+            issues.append("XMP ohne PDF/A-Kennung")
+        elif '/Filter' in root.Metadata:
+            issues.append("komprimierte XMP-Metadaten")
+    except Exception as e:
+        issues.append(f"XMP-Metadaten nicht lesbar: {e}")
+
+    missing_fonts = unembedded_fonts(pdf)
+    if missing_fonts:
+        issues.append(f"Schriften nicht eingebettet: {', '.join(missing_fonts[:5])}")
+
+    if uses_device_cmyk(pdf):
+        issues.append("geräteabhängiges CMYK ohne passendes Farbprofil")
+
+    names = root.get('/Names')
+    if names is not None and '/JavaScript' in names:
+        issues.append("JavaScript")
+    if names is not None and '/EmbeddedFiles' in names:
+        issues.append("eingebettete Dateien")
+    if '/AA' in root:
+        issues.append("Auto-Aktionen im Dokument")
+
+    acroform = root.get('/AcroForm')
+    if acroform is not None:
+        if '/XFA' in acroform:
+            issues.append("XFA-Formular")
+        if acroform.get('/NeedAppearances', False):
+            issues.append("Formular ohne Erscheinungsbilder (NeedAppearances)")
+
+    for number, page in enumerate(pdf.pages, start=1):
+        if '/AA' in page.obj:
+            issues.append(f"Auto-Aktionen auf Seite {number}")
+        for annot in page.obj.get('/Annots') or []:
+            subtype = str(annot.get('/Subtype', ''))
+            flags = int(annot.get('/F', 0))
+            if subtype not in _ANNOTS_WITHOUT_APPEARANCE:
+                if not flags & _ANNOT_PRINT or flags & (_ANNOT_INVISIBLE | _ANNOT_HIDDEN | _ANNOT_NOVIEW):
+                    issues.append(f"nicht druckbare Anmerkung auf Seite {number}")
+                    break
+                if '/AP' not in annot:
+                    issues.append(f"Anmerkung ohne Erscheinungsbild auf Seite {number}")
+                    break
+            action = annot.get('/A')
+            if action is not None and action.get('/S') in ('/JavaScript', '/Launch'):
+                issues.append(f"unzulässige Aktion auf Seite {number}")
+                break
+
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream):
+            filters = obj.get('/Filter')
+            filters = [filters] if isinstance(filters, pikepdf.Name) else list(filters or [])
+            if '/LZWDecode' in filters:
+                issues.append("LZW-Komprimierung")
+                break
+
+    return issues
+
+
+def _repair(pdf: pikepdf.Pdf):
+    """Behebt einfache Verstöße direkt (Aktionen, Anmerkungs-Flags)"""
+    root = pdf.Root
+    names = root.get('/Names')
+    if names is not None and '/JavaScript' in names:
+        del names['/JavaScript']
+    if '/AA' in root:
+        del root['/AA']
+    open_action = root.get('/OpenAction')
+    if isinstance(open_action, pikepdf.Dictionary) and open_action.get('/S') in ('/JavaScript', '/Launch'):
+        del root['/OpenAction']
+
+    acroform = root.get('/AcroForm')
+    if acroform is not None and '/NeedAppearances' in acroform:
+        del acroform['/NeedAppearances']
+
+    for page in pdf.pages:
+        if '/AA' in page.obj:
+            del page.obj['/AA']
+        for annot in page.obj.get('/Annots') or []:
+            if str(annot.get('/Subtype', '')) in _ANNOTS_WITHOUT_APPEARANCE:
+                continue
+            flags = int(annot.get('/F', 0))
+            flags = (flags | _ANNOT_PRINT) & ~(_ANNOT_INVISIBLE | _ANNOT_HIDDEN | _ANNOT_NOVIEW)
+            annot.F = flags
+
+
+def _add_output_intent(pdf: pikepdf.Pdf):
+    """Setzt einen sRGB-OutputIntent (ersetzt vorhandene)"""
+    icc = pikepdf.Stream(pdf, _srgb_profile())
+    icc.N = 3
+    intent = pikepdf.Dictionary(
+        Type=pikepdf.Name.OutputIntent,
+        S=pikepdf.Name.GTS_PDFA1,
+        OutputConditionIdentifier=pikepdf.String('sRGB'),
+        Info=pikepdf.String('sRGB IEC61966-2.1'),
+        DestOutputProfile=icc,
+    )
+    pdf.Root.OutputIntents = pikepdf.Array([pdf.make_indirect(intent)])
+
+
+def _write_metadata(pdf: pikepdf.Pdf):
+    """XMP mit PDF/A-Kennung, abgeglichen mit den Dokumenteigenschaften"""
+    with pdf.open_metadata(set_pikepdf_as_editor=False) as meta:
+        meta.load_from_docinfo(pdf.docinfo)
+        meta['pdfaid:part'] = PDFA_PART
+        meta['pdfaid:conformance'] = PDFA_CONFORMANCE
+
+
+def _ghostscript_pass(gs_command: str, input_file: str, output_file: str):
+    """Ein pdfwrite-Durchgang: Schriften einbetten, Farben nach RGB"""
+    args = [
+        gs_command, '-dQUIET', '-dBATCH', '-dNOPAUSE', '-dSAFER',
+        '-sDEVICE=pdfwrite', '-dCompatibilityLevel=1.7',
+        '-dEmbedAllFonts=true', '-dSubsetFonts=true',
+        '-sColorConversionStrategy=RGB', '-dAutoRotatePages=/None',
+        f'-sOutputFile={output_file}', input_file,
+    ]
+    creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    result = subprocess.run(args, capture_output=True, text=True, timeout=_GS_TIMEOUT,
+                            creationflags=creationflags)
+    if result.returncode != 0:
+        raise RuntimeError(f"Ghostscript fehlgeschlagen ({result.returncode}): "
+                           f"{(result.stderr or result.stdout).strip()[:200]}")
+
+
+def convert_to_pdfa(input_file: str, output_file: str,
+                    gs_command: Optional[str] = None) -> PDFAConversionResult:
+    """
+    Konvertiert ein digital erzeugtes PDF ohne OCR nach PDF/A-2b.
+
+    Args:
+        gs_command: Ghostscript-Befehl für Schrifteinbettung/Farbumwandlung
+                    (None = im PATH suchen, nur bei Bedarf verwendet)
+
+    Returns:
+        PDFAConversionResult; bei success=False wurde output_file nicht geschrieben
+    """
+    result = PDFAConversionResult()
+    work_dir = tempfile.mkdtemp(prefix='belegpilot_pdfa_fast_')
+    try:
+        source = input_file
+        with pikepdf.open(source) as pdf:
+            if pdf.is_encrypted:
+                result.issues.append("verschlüsselt")
+                return result
+            needs_gs = bool(unembedded_fonts(pdf)) or uses_device_cmyk(pdf)
+
+        if needs_gs:
+            gs_command = gs_command or find_ghostscript()
+            if not gs_command:
+                result.issues.append("Ghostscript für Schrifteinbettung/Farbumwandlung nicht gefunden")
+                return result
+            source = os.path.join(work_dir, 'gs.pdf')
+            _ghostscript_pass(gs_command, input_file, source)
+            result.used_ghostscript = True
+
+        converted = os.path.join(work_dir, 'pdfa.pdf')
+        with pikepdf.open(source) as pdf:
+            _repair(pdf)
+            _add_output_intent(pdf)
+            _write_metadata(pdf)
+            pdf.save(converted, fix_metadata_version=True)
+
+        # Validierung des geschriebenen Ergebnisses
+        with pikepdf.open(converted) as pdf:
+            result.issues = check_pdfa(pdf)
+        if result.issues:
+            return result
+
+        shutil.move(converted, output_file)
+        result.success = True
+        return result
+
+    except Exception as e:
+        result.issues.append(f"Fehler: {e}")
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,413 @@
+"""
+Pool persistenter SMTP-Verbindungen
+
+Bisher wurde für jede E-Mail eine neue Verbindung aufgebaut (TCP, TLS bzw.
+STARTTLS, EHLO, Anmeldung) und danach beendet - gegen Exchange 300-800 ms je
+Nachricht. Der Pool hält je Serverkonfiguration (Server, Port, Verschlüsselung,
+Anmeldung) Verbindungen offen und verwendet sie wieder:
+
+    - Verbindungen, die länger unbenutzt waren, werden vor dem Senden mit
+      NOOP geprüft und bei Bedarf neu aufgebaut
+    - bricht eine wiederverwendete Verbindung beim Senden ab, wird die
+      Nachricht einmal über eine neue Verbindung gesendet
+    - höchstens max_messages Nachrichten je Verbindung
+    - höchstens max_connections gleichzeitige Verbindungen je Server und
+      optional höchstens messages_per_minute Nachrichten (Drosselung des Anbieters)
+    - unbenutzte Verbindungen werden nach idle_timeout geschlossen
+
+OAuth2-Konten melden sich mit XOAUTH2 an; der Access Token kommt aus dem
+Speicher des OAuth2TokenRefresher (core.oauth2_refresher).
+
+Der Verbindungsaufbau ist austauschbar (connect), damit der Pool auch gegen
+einen lokalen Test-Server (z.B. aiosmtpd) ohne TLS und Anmeldung läuft.
+"""
+import os
+import ssl
+import base64
+import time
+import hashlib
+import smtplib
+import threading
+import logging
+from dataclasses import dataclass
+from email.message import Message
+from typing import Callable, Dict, List, Optional, Sequence
+
+from models.export_config import AuthMethod
+from core.oauth2_refresher import get_oauth2_refresher, oauth2_account
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 2
+DEFAULT_MAX_MESSAGES = 50
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+# Unbenutzt länger als diese Zeit: vor dem Senden mit NOOP prüfen
+HEALTH_CHECK_AFTER = 5.0
+
+CONNECT_TIMEOUT = 30
+
+# Antwort "Dienst nicht verfügbar, Verbindung wird geschlossen" (z.B. Drosselung)
+_SERVICE_CLOSING = 421
+
+# Blockgröße beim Senden einer Nachricht aus einer Datei
+_SEND_BUFFER = 64 * 1024
+
+
+@dataclass(frozen=True)
+class SMTPServerKey:
+    """Schlüssel eines Pools: Serverkonfiguration einschließlich Anmeldung und Grenzen"""
+    server: str
+    port: int
+    use_ssl: bool
+    use_tls: bool
+    username: str = ""
+    credential: str = ""  # Prüfsumme des Passworts - Änderung ergibt neuen Pool
+    auth_method: str = "basic"
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_messages: int = DEFAULT_MAX_MESSAGES
+    messages_per_minute: int = 0
+
+    def describe(self) -> str:
+        return f"{self.server}:{self.port}"
+
+
+@dataclass
+class _PooledConnection:
+    smtp: smtplib.SMTP
+    last_used: float
+    messages: int = 0
+
+
+class SMTPConnectionPool:
+    """Wiederverwendbare SMTP-Verbindungen zu einem Server"""
+
+    def __init__(self, name: str, connect: Callable[[], smtplib.SMTP],
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_messages: int = DEFAULT_MAX_MESSAGES,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 messages_per_minute: int = 0):
+        self.name = name
+        self.max_connections = max(1, int(max_connections))
+        self.max_messages = max(1, int(max_messages))
+        self.idle_timeout = idle_timeout
+        self._connect = connect
+        self._min_interval = 60.0 / messages_per_minute if messages_per_minute else 0.0
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_send = 0.0
+        self._closed = False
+
+    def send_message(self, msg: Message, from_addr: Optional[str] = None,
+                     to_addrs: Optional[Sequence[str]] = None) -> dict:
+        """
+        Sendet eine Nachricht über eine Verbindung aus dem Pool.
+
+        Returns:
+            Abgelehnte Empfänger wie smtplib.SMTP.send_message
+        """
+        return self._deliver(lambda smtp: smtp.send_message(msg, from_addr=from_addr, to_addrs=to_addrs))
+
+    def send_file(self, from_addr: str, to_addrs: Sequence[str], path: str) -> dict:
+        """
+        Sendet eine fertig erzeugte Nachricht (Zeilenenden CRLF) aus einer Datei,
+        ohne sie vollständig in den Speicher zu lesen.
+
+        Returns:
+            Abgelehnte Empfänger wie smtplib.SMTP.sendmail
+        """
+        return self._deliver(lambda smtp: sendmail_file(smtp, from_addr, list(to_addrs), path))
+
+    def _deliver(self, send: Callable[[smtplib.SMTP], dict]) -> dict:
+        """Führt send über eine Verbindung aus dem Pool aus (einmalige Wiederholung bei Abbruch)"""
+        with self._slots:
+            conn = self._checkout()
+            reused = conn.messages > 0
+            try:
+                try:
+                    refused = self._send(conn, send)
+                except Exception as e:
+                    if not (reused and self._is_connection_error(e)):
+                        raise
+                    logger.info(f"SMTP-Verbindung zu {self.name} abgebrochen ({e}), baue neu auf")
+                    self._close(conn)
+                    conn = self._open()
+                    refused = self._send(conn, send)
+            except Exception:
+                # Zustand der Verbindung unklar - nicht wiederverwenden
+                self._close(conn)
+                raise
+            self._checkin(conn)
+            return refused
+
+    def close_idle(self, max_idle: Optional[float] = None):
+        """Schließt Verbindungen, die länger als max_idle (Standard idle_timeout) unbenutzt sind"""
+        limit = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._lock:
+            expired = [conn for conn in self._idle if now - conn.last_used >= limit]
+            self._idle = [conn for conn in self._idle if now - conn.last_used < limit]
+        for conn in expired:
+            self._close(conn)
+
+    def shutdown(self):
+        """Schließt alle Verbindungen; spätere Sendungen bauen neue auf"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+    def _checkout(self) -> _PooledConnection:
+        self.close_idle()
+        with self._lock:
+            self._closed = False
+            conn = self._idle.pop() if self._idle else None
+
+        if conn is not None and time.monotonic() - conn.last_used > HEALTH_CHECK_AFTER:
+            if not self._is_alive(conn):
+                logger.debug(f"SMTP-Verbindung zu {self.name} nicht mehr aktiv, baue neu auf")
+                self._close(conn)
+                conn = None
+
+        return conn if conn is not None else self._open()
+
+    def _checkin(self, conn: _PooledConnection):
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages:
+            logger.debug(f"SMTP-Verbindung zu {self.name} nach {conn.messages} Nachrichten geschlossen")
+            self._close(conn)
+            return
+        with self._lock:
+            if not self._closed:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    def _open(self) -> _PooledConnection:
+        started = time.perf_counter()
+        smtp = self._connect()
+        logger.debug(f"SMTP-Verbindung zu {self.name} aufgebaut ({time.perf_counter() - started:.2f}s)")
+        return _PooledConnection(smtp=smtp, last_used=time.monotonic())
+
+    def _send(self, conn: _PooledConnection, send: Callable[[smtplib.SMTP], dict]) -> dict:
+        self._throttle()
+        refused = send(conn.smtp)
+        conn.messages += 1
+        return refused
+
+    def _throttle(self):
+        """Hält den Mindestabstand zwischen zwei Nachrichten an diesen Server ein"""
+        if not self._min_interval:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            self._next_send = max(now, self._next_send) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    @staticmethod
+    def _is_alive(conn: _PooledConnection) -> bool:
+        try:
+            code, _ = conn.smtp.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == _SERVICE_CLOSING
+        # Übrige SMTP-Fehler (z.B. abgelehnte Empfänger) betreffen die Nachricht
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    @staticmethod
+    def _close(conn: _PooledConnection):
+        try:
+            conn.smtp.quit()
+        except Exception:
+            try:
+                conn.smtp.close()
+            except Exception:
+                pass
+
+
+def sendmail_file(smtp: smtplib.SMTP, from_addr: str, to_addrs: List[str], path: str) -> dict:
+    """
+    Wie smtplib.SMTP.sendmail, überträgt den Inhalt aber blockweise aus der Datei
+    (Punkte am Zeilenanfang werden verdoppelt).
+    """
+    smtp.ehlo_or_helo_if_needed()
+    options = []
+    if smtp.does_esmtp and smtp.has_extn('size'):
+        options.append(f"size={os.path.getsize(path)}")
+
+    code, resp = smtp.mail(from_addr, options)
+    if code != 250:
+        if code == _SERVICE_CLOSING:
+            smtp.close()
+        else:
+            smtp._rset()
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+
+    refused = {}
+    for address in to_addrs:
+        code, resp = smtp.rcpt(address)
+        if code not in (250, 251):
+            refused[address] = (code, resp)
+        if code == _SERVICE_CLOSING:
+            smtp.close()
+            raise smtplib.SMTPRecipientsRefused(refused)
+    if len(refused) == len(to_addrs):
+        smtp._rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    smtp.putcmd("data")
+    code, resp = smtp.getreply()
+    if code != 354:
+        smtp._rset()
+        raise smtplib.SMTPDataError(code, resp)
+
+    buffer = bytearray()
+    last = b"\r\n"
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b"."):
+                buffer += b"."
+            buffer += line
+            last = line
+            if len(buffer) >= _SEND_BUFFER:
+                smtp.send(bytes(buffer))
+                buffer.clear()
+    if not last.endswith(b"\r\n"):
+        buffer += b"\r\n"
+    buffer += b".\r\n"
+    smtp.send(bytes(buffer))
+
+    code, resp = smtp.getreply()
+    if code != 250:
+        if code == _SERVICE_CLOSING:
+            smtp.close()
+        else:
+            smtp._rset()
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+def _uses_oauth2(settings) -> bool:
+    return getattr(settings.smtp_auth_method, 'value', settings.smtp_auth_method) == AuthMethod.OAUTH2.value
+
+
+def smtp_server_key(settings) -> SMTPServerKey:
+    """Pool-Schlüssel aus den Export-Einstellungen"""
+    if _uses_oauth2(settings):
+        # Tokens wechseln laufend - das Konto bestimmt den Pool
+        username, password = oauth2_account(settings), ""
+    else:
+        username, password = settings.smtp_username or "", settings.smtp_password or ""
+    return SMTPServerKey(
+        server=settings.smtp_server,
+        port=int(settings.smtp_port),
+        use_ssl=bool(settings.smtp_use_ssl and int(settings.smtp_port) == 465),
+        use_tls=bool(settings.smtp_use_tls),
+        username=username,
+        credential=hashlib.sha256(password.encode('utf-8')).hexdigest() if password else "",
+        auth_method=AuthMethod.OAUTH2.value if _uses_oauth2(settings) else AuthMethod.BASIC.value,
+        max_connections=int(getattr(settings, 'smtp_max_connections', DEFAULT_MAX_CONNECTIONS)),
+        max_messages=int(getattr(settings, 'smtp_messages_per_connection', DEFAULT_MAX_MESSAGES)),
+        messages_per_minute=int(getattr(settings, 'smtp_messages_per_minute', 0))
+    )
+
+
+def login_xoauth2(server: smtplib.SMTP, account: str, access_token: str):
+    """SASL XOAUTH2-Anmeldung mit einem Access Token"""
+    server.ehlo_or_helo_if_needed()
+    auth_string = f"user={account}\x01auth=Bearer {access_token}\x01\x01"
+    code, resp = server.docmd('AUTH', 'XOAUTH2 ' + base64.b64encode(auth_string.encode()).decode())
+    if code == 334:
+        # Fehlerdetails des Servers (JSON) - leere Antwort beendet den Austausch
+        code, resp = server.docmd('')
+    if code != 235:
+        raise smtplib.SMTPAuthenticationError(code, resp)
+
+
+def smtp_connector(settings) -> Callable[[], smtplib.SMTP]:
+    """Verbindungsaufbau wie bisher: SSL (Port 465) oder STARTTLS, dann Anmeldung (Passwort oder XOAUTH2)"""
+    server_name = settings.smtp_server
+    port = int(settings.smtp_port)
+    use_ssl = bool(settings.smtp_use_ssl and port == 465)
+    use_tls = bool(settings.smtp_use_tls)
+    username = settings.smtp_username
+    password = settings.smtp_password
+    oauth2 = _uses_oauth2(settings)
+    if oauth2:
+        account = oauth2_account(settings)
+        get_oauth2_refresher().register(settings)
+
+    def connect() -> smtplib.SMTP:
+        if use_ssl:
+            server = smtplib.SMTP_SSL(server_name, port, context=ssl.create_default_context(),
+                                      timeout=CONNECT_TIMEOUT)
+        else:
+            server = smtplib.SMTP(server_name, port, timeout=CONNECT_TIMEOUT)
+            server.ehlo()
+            if use_tls:
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+        try:
+            if oauth2:
+                # Token aus dem Speicher des Refreshers - keine HTTP-Anfrage beim Versand
+                login_xoauth2(server, account, get_oauth2_refresher().access_token(settings))
+            elif username and password:
+                server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    return connect
+
+
+# Globale Pools je Serverkonfiguration
+_smtp_pools: Dict[SMTPServerKey, SMTPConnectionPool] = {}
+_smtp_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(settings) -> SMTPConnectionPool:
+    """Gibt den Pool für die SMTP-Einstellungen zurück (legt ihn bei Bedarf an)"""
+    key = smtp_server_key(settings)
+    with _smtp_pools_lock:
+        pool = _smtp_pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                key.describe(), smtp_connector(settings),
+                max_connections=key.max_connections,
+                max_messages=key.max_messages,
+                messages_per_minute=key.messages_per_minute
+            )
+            _smtp_pools[key] = pool
+            logger.debug(f"SMTP-Pool für {key.describe()} erstellt")
+        return pool
+
+
+def close_idle_smtp_connections():
+    """Schließt unbenutzte Verbindungen aller Pools (regelmäßig aufgerufen)"""
+    with _smtp_pools_lock:
+        pools = list(_smtp_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
+
+def shutdown_smtp_pools():
+    """Schließt alle Verbindungen und verwirft die Pools"""
+    with _smtp_pools_lock:
+        pools = list(_smtp_pools.values())
+        _smtp_pools.clear()
+    for pool in pools:
+        pool.shutdown()
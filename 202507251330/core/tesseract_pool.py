@@ -0,0 +1,715 @@
+"""
+Pool persistenter Tesseract-Engines
+
+Statt für jeden OCR-Aufruf einen neuen tesseract-Prozess zu starten (pytesseract),
+hält dieser Pool pro CPU-Kern einen Worker-Prozess vor. Jeder Worker lädt die
+Tesseract-Bibliothek über die C-API (ctypes) und behält die Sprachmodelle im
+Speicher. Bilddaten werden über eine Pipe übergeben.
+
+Ist die Bibliothek nicht verfügbar oder fällt ein Worker aus, wird auf den
+bisherigen pytesseract-Weg zurückgegriffen.
+"""
+import os
+import sys
+import glob
+import ctypes
+import ctypes.util
+import queue
+import threading
+import logging
+import multiprocessing
+from typing import Dict, List, Optional, Tuple, Any
+
+from PIL import Image
+
+from core.page_raster import FrameDescriptor, attach_shared_memory, image_from_descriptor
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Standard-Timeout pro OCR-Aufruf in Sekunden
+DEFAULT_CALL_TIMEOUT = 120
+
+# Timeout für das Starten eines Workers (Laden der Modelle)
+WORKER_START_TIMEOUT = 60
+
+
+class TesseractEngineError(Exception):
+    """Fehler einer Tesseract-Engine (Absturz, Initialisierung, Kommunikation)"""
+
+
+class TesseractTimeoutError(TesseractEngineError):
+    """OCR-Aufruf hat das Zeitlimit überschritten"""
+
+
+class TesseractRequestError(TesseractEngineError):
+    """Einzelne Anfrage fehlgeschlagen (z.B. fehlendes Sprachmodell) - Worker bleibt nutzbar"""
+
+
+def text_and_confidence(data: Dict[str, List[Any]]) -> Tuple[str, int]:
+    """
+    Setzt Text und mittlere Wort-Konfidenz aus pytesseract.image_to_data
+    (Output.DICT) zusammen - Zeilen durch Zeilenumbruch, Absätze durch eine
+    Leerzeile getrennt.
+
+    Returns:
+        Tuple (Text, mittlere Konfidenz 0-100; -1 wenn keine Wörter erkannt)
+    """
+    paragraphs: List[List[str]] = []
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    paragraph_keys: List[Tuple[int, int]] = []
+    confidences: List[float] = []
+    for i, word in enumerate(data.get('text', [])):
+        if data['level'][i] != 5 or not str(word).strip():
+            continue
+        paragraph = (data['block_num'][i], data['par_num'][i])
+        line = paragraph + (data['line_num'][i],)
+        if not paragraph_keys or paragraph_keys[-1] != paragraph:
+            paragraph_keys.append(paragraph)
+            paragraphs.append([])
+        if line not in lines:
+            lines[line] = []
+            paragraphs[-1].append(line)
+        lines[line].append(str(word))
+        try:
+            confidence = float(data['conf'][i])
+        except (TypeError, ValueError):
+            continue
+        if confidence >= 0:
+            confidences.append(confidence)
+
+    text = "\n\n".join("\n".join(" ".join(lines[line]) for line in paragraph)
+                       for paragraph in paragraphs)
+    if not confidences:
+        return text, -1
+    return text, int(round(sum(confidences) / len(confidences)))
+
+
+def find_tesseract_library() -> Optional[str]:
+    """Sucht die Tesseract-Bibliothek (libtesseract) für die C-API"""
+    search_dirs = []
+
+    # Verzeichnis des konfigurierten tesseract-Befehls (von OCRProcessor gesetzt)
+    try:
+        import pytesseract
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        if tesseract_cmd and os.path.isabs(tesseract_cmd):
+            search_dirs.append(os.path.dirname(tesseract_cmd))
+    except Exception:
+        pass
+
+    # dependencies Ordner
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    search_dirs.append(os.path.join(base_dir, 'dependencies', 'Tesseract-OCR'))
+
+    # Installationsverzeichnis
+    search_dirs.append(os.path.join(os.environ.get('ProgramFiles', 'C:\\Program Files'),
+                                    'belegpilot', 'dependencies', 'Tesseract-OCR'))
+
+    if os.name == 'nt':
+        patterns = ['libtesseract-*.dll', 'libtesseract*.dll', 'tesseract*.dll']
+    elif sys.platform == 'darwin':
+        patterns = ['libtesseract*.dylib']
+    else:
+        patterns = ['libtesseract.so*']
+
+    for directory in search_dirs:
+        if not os.path.isdir(directory):
+            continue
+        for pattern in patterns:
+            matches = sorted(glob.glob(os.path.join(directory, pattern)))
+            if matches:
+                return matches[0]
+
+    # Fallback auf Systembibliothek
+    for name in ('tesseract', 'libtesseract', 'libtesseract-5'):
+        found = ctypes.util.find_library(name)
+        if found:
+            return found
+
+    return None
+
+
+def find_tessdata_dir(library_path: Optional[str]) -> Optional[str]:
+    """Bestimmt das tessdata-Verzeichnis passend zur Bibliothek"""
+    env_prefix = os.environ.get('TESSDATA_PREFIX')
+    if env_prefix and os.path.isdir(env_prefix):
+        return env_prefix
+
+    if library_path and os.path.isabs(library_path):
+        candidate = os.path.join(os.path.dirname(library_path), 'tessdata')
+        if os.path.isdir(candidate):
+            return candidate
+
+    # None = Standardpfad der Bibliothek
+    return None
+
+
+def parse_tesseract_config(config: str) -> Tuple[int, Optional[int], Tuple[Tuple[str, str], ...]]:
+    """
+    Zerlegt einen pytesseract-Konfigurationsstring (z.B. '--oem 3 --psm 6 -c key=value')
+
+    Returns:
+        Tuple (oem, psm, variables)
+    """
+    oem = 3
+    psm = None
+    variables = []
+
+    tokens = (config or '').split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--oem' and i + 1 < len(tokens):
+            oem = int(tokens[i + 1])
+            i += 2
+        elif token == '--psm' and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 2
+        elif token == '-c' and i + 1 < len(tokens) and '=' in tokens[i + 1]:
+            key, value = tokens[i + 1].split('=', 1)
+            variables.append((key, value))
+            i += 2
+        else:
+            i += 1
+
+    return oem, psm, tuple(sorted(variables))
+
+
+def clamp_rect(rect: Tuple[int, int, int, int], width: int,
+               height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Begrenzt ein Rechteck (x, y, Breite, Höhe) auf die Bildgröße"""
+    x, y, w, h = (int(v) for v in rect)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class _TessCAPI:
+    """Dünner ctypes-Wrapper um die Tesseract C-API"""
+
+    def __init__(self, library_path: str):
+        if os.name == 'nt' and os.path.isabs(library_path) and hasattr(os, 'add_dll_directory'):
+            # Abhängige DLLs (leptonica etc.) liegen neben der Bibliothek
+            os.add_dll_directory(os.path.dirname(library_path))
+
+        lib = ctypes.CDLL(library_path)
+        handle = ctypes.c_void_p
+
+        lib.TessVersion.restype = ctypes.c_char_p
+        lib.TessBaseAPICreate.restype = handle
+        lib.TessBaseAPIDelete.argtypes = [handle]
+        lib.TessBaseAPIInit2.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        lib.TessBaseAPIInit2.restype = ctypes.c_int
+        lib.TessBaseAPISetVariable.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetVariable.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int,
+                                            ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPISetSourceResolution.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetRectangle.argtypes = [handle, ctypes.c_int, ctypes.c_int,
+                                                ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessBaseAPIGetTsvText.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPIGetTsvText.restype = ctypes.c_void_p
+        lib.TessBaseAPIMeanTextConf.argtypes = [handle]
+        lib.TessBaseAPIMeanTextConf.restype = ctypes.c_int
+        lib.TessBaseAPIClear.argtypes = [handle]
+        lib.TessBaseAPIEnd.argtypes = [handle]
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+
+        self.lib = lib
+
+    def version(self) -> str:
+        return self.lib.TessVersion().decode('utf-8', 'replace')
+
+    def create(self, datapath: Optional[str], language: str, oem: int) -> int:
+        api = self.lib.TessBaseAPICreate()
+        if not api:
+            raise TesseractEngineError("TessBaseAPICreate fehlgeschlagen")
+        path_arg = datapath.encode('utf-8') if datapath else None
+        if self.lib.TessBaseAPIInit2(api, path_arg, language.encode('utf-8'), oem) != 0:
+            self.lib.TessBaseAPIDelete(api)
+            raise TesseractEngineError(f"Tesseract-Initialisierung fehlgeschlagen für Sprache '{language}'")
+        return api
+
+    def set_variable(self, api: int, name: str, value: str):
+        self.lib.TessBaseAPISetVariable(api, name.encode('utf-8'), value.encode('utf-8'))
+
+    def take_text(self, pointer: int) -> str:
+        if not pointer:
+            return ""
+        try:
+            return ctypes.string_at(pointer).decode('utf-8', 'replace')
+        finally:
+            self.lib.TessDeleteText(pointer)
+
+    def destroy(self, api: int):
+        self.lib.TessBaseAPIEnd(api)
+        self.lib.TessBaseAPIDelete(api)
+
+
+def _engine_worker_main(conn, library_path: str, tessdata_dir: Optional[str],
+                        preload_languages: List[str]):
+    """
+    Hauptschleife eines Engine-Worker-Prozesses.
+
+    Hält pro (Sprache, OEM, Variablen) eine initialisierte TessBaseAPI vor und
+    beantwortet OCR-Anfragen über die Pipe.
+    """
+    try:
+        capi = _TessCAPI(library_path)
+        engines: Dict[Tuple[str, int, Tuple[Tuple[str, str], ...]], int] = {}
+
+        def get_engine(language: str, oem: int, variables) -> int:
+            key = (language, oem, variables)
+            api = engines.get(key)
+            if api is None:
+                api = capi.create(tessdata_dir, language, oem)
+                for name, value in variables:
+                    capi.set_variable(api, name, value)
+                engines[key] = api
+            return api
+
+        def preload(languages):
+            # Fehlende Sprachmodelle dürfen den Worker nicht verhindern
+            for language in languages:
+                try:
+                    get_engine(language, 3, ())
+                except TesseractEngineError:
+                    pass
+
+        preload(preload_languages)
+
+        conn.send(('ready', capi.version()))
+    except Exception as e:
+        try:
+            conn.send(('error', str(e)))
+        except Exception:
+            pass
+        return
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if request is None:
+            break
+
+        if 'preload' in request:
+            preload(request['preload'])
+            conn.send(('ok', '', -1))
+            continue
+
+        shm = None
+        buffer = None
+        try:
+            api = get_engine(request['lang'], request['oem'], request['variables'])
+
+            frame = request.get('frame')
+            if frame:
+                # Pixel direkt aus dem Shared Memory des Renderers (keine Kopie)
+                shm = attach_shared_memory(frame['name'])
+                buffer = (ctypes.c_ubyte * (frame['stride'] * frame['height'])).from_buffer(shm.buf)
+                image = frame
+            else:
+                data = request['data']
+                buffer = ctypes.create_string_buffer(data, len(data))
+                image = request
+
+            capi.lib.TessBaseAPISetPageSegMode(api, request['psm'])
+            capi.lib.TessBaseAPISetImage(api, buffer, image['width'], image['height'],
+                                         image['bpp'], image['stride'])
+            capi.lib.TessBaseAPISetSourceResolution(api, image['dpi'])
+
+            rect = request.get('rect')
+            if rect:
+                capi.lib.TessBaseAPISetRectangle(api, *rect)
+
+            if request['output'] == 'tsv':
+                result = capi.take_text(capi.lib.TessBaseAPIGetTsvText(api, 0))
+            else:
+                result = capi.take_text(capi.lib.TessBaseAPIGetUTF8Text(api))
+
+            confidence = capi.lib.TessBaseAPIMeanTextConf(api)
+            capi.lib.TessBaseAPIClear(api)
+            conn.send(('ok', result, confidence))
+        except Exception as e:
+            conn.send(('error', str(e)))
+        finally:
+            # ctypes-Sicht muss vor dem Schließen des Shared Memory freigegeben werden
+            buffer = None
+            if shm is not None:
+                shm.close()
+
+    for api in engines.values():
+        try:
+            capi.destroy(api)
+        except Exception:
+            pass
+
+
+class _EngineProcess:
+    """Verwaltet einen einzelnen Engine-Worker-Prozess aus Sicht des Pools"""
+
+    def __init__(self, library_path: str, tessdata_dir: Optional[str],
+                 preload_languages: List[str]):
+        self.library_path = library_path
+        self.tessdata_dir = tessdata_dir
+        self.preload_languages = list(preload_languages)
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.version = ""
+
+    def start(self):
+        """Startet den Worker und wartet bis die Modelle geladen sind"""
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=True)
+        self.process = multiprocessing.Process(
+            target=_engine_worker_main,
+            args=(child_conn, self.library_path, self.tessdata_dir, self.preload_languages),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+        if not self.conn.poll(WORKER_START_TIMEOUT):
+            self.kill()
+            raise TesseractEngineError("Tesseract-Worker antwortet nicht beim Start")
+
+        status = self.conn.recv()
+        if status[0] != 'ready':
+            self.kill()
+            raise TesseractEngineError(f"Tesseract-Worker konnte nicht starten: {status[1]}")
+        self.version = status[1]
+
+    def call(self, request: Dict[str, Any], timeout: float) -> Tuple[str, int]:
+        """Sendet eine Anfrage und wartet auf das Ergebnis"""
+        try:
+            self.conn.send(request)
+            if not self.conn.poll(timeout):
+                raise TesseractTimeoutError(f"OCR-Zeitlimit von {timeout} Sekunden überschritten")
+            response = self.conn.recv()
+        except TesseractEngineError:
+            raise
+        except (EOFError, OSError, BrokenPipeError) as e:
+            raise TesseractEngineError(f"Verbindung zum Tesseract-Worker verloren: {e}")
+
+        if response[0] != 'ok':
+            raise TesseractRequestError(response[1])
+        return response[1], response[2]
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self):
+        """Beendet den Worker geordnet"""
+        try:
+            if self.conn:
+                self.conn.send(None)
+        except Exception:
+            pass
+        if self.process:
+            self.process.join(timeout=2)
+        self.kill()
+
+    def kill(self):
+        """Beendet den Worker sofort"""
+        if self.process and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+        if self.conn:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.process = None
+        self.conn = None
+
+
+class TesseractEnginePool:
+    """Pool langlebiger Tesseract-Engines mit pytesseract als Fallback"""
+
+    def __init__(self, size: Optional[int] = None,
+                 preload_languages: Optional[List[str]] = None,
+                 call_timeout: float = DEFAULT_CALL_TIMEOUT):
+        self.size = size or os.cpu_count() or 1
+        self.preload_languages = preload_languages or ['deu']
+        self.call_timeout = call_timeout
+        self._engines: List[_EngineProcess] = []
+        self._idle: "queue.Queue[_EngineProcess]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._available = False
+
+    def start(self) -> bool:
+        """Startet die Worker (einmalig). Gibt zurück ob der Pool nutzbar ist."""
+        with self._lock:
+            if self._started:
+                return self._available
+            self._started = True
+
+            library_path = find_tesseract_library()
+            if not library_path:
+                logger.info("Tesseract-Bibliothek nicht gefunden - verwende pytesseract")
+                return False
+
+            tessdata_dir = find_tessdata_dir(library_path)
+
+            for i in range(self.size):
+                engine = _EngineProcess(library_path, tessdata_dir, self.preload_languages)
+                try:
+                    engine.start()
+                except Exception as e:
+                    logger.warning(f"Tesseract-Engine {i+1} konnte nicht gestartet werden: {e}")
+                    break
+                self._engines.append(engine)
+                self._idle.put(engine)
+
+            self._available = bool(self._engines)
+            if self._available:
+                logger.info(f"Tesseract-Engine-Pool gestartet: {len(self._engines)} Worker, "
+                            f"Tesseract {self._engines[0].version}, "
+                            f"Sprachen vorgeladen: {'+'.join(self.preload_languages)}")
+            else:
+                logger.info("Tesseract-Engine-Pool nicht verfügbar - verwende pytesseract")
+            return self._available
+
+    @property
+    def available(self) -> bool:
+        return self.start()
+
+    def add_preload_languages(self, languages: List[str]):
+        """
+        Ergänzt die vorzuladenden Sprachmodelle.
+
+        Vor dem Start werden sie beim Start jedes Workers geladen; laufende
+        Worker laden sie im Hintergrund nach, damit die erste Seite einer neuen
+        Sprache nicht auf die Modellinitialisierung wartet.
+        """
+        with self._lock:
+            new = [lang for lang in languages if lang and lang not in self.preload_languages]
+            if not new:
+                return
+            self.preload_languages.extend(new)
+            running = self._available
+        if running:
+            threading.Thread(target=self._preload_running, args=(new,),
+                             name="tesseract_preload", daemon=True).start()
+
+    def _preload_running(self, languages: List[str]):
+        """Lädt Sprachmodelle in allen laufenden Workern nach (jeder Worker einmal)"""
+        done = []
+        try:
+            for _ in range(len(self._engines)):
+                engine = self._idle.get(timeout=WORKER_START_TIMEOUT)
+                try:
+                    engine.call({'preload': languages}, WORKER_START_TIMEOUT)
+                except TesseractRequestError as e:
+                    logger.warning(f"Sprachmodelle {'+'.join(languages)} konnten nicht vorgeladen werden: {e}")
+                    done.append(engine)
+                    continue
+                except TesseractEngineError as e:
+                    logger.warning(f"Sprachmodelle {'+'.join(languages)} konnten nicht vorgeladen werden: {e}")
+                    threading.Thread(target=self._restart_engine, args=(engine,), daemon=True).start()
+                    continue
+                done.append(engine)
+        except queue.Empty:
+            logger.debug("Vorladen der Sprachmodelle abgebrochen - Worker ausgelastet")
+        finally:
+            for engine in done:
+                self._idle.put(engine)
+        logger.info(f"Sprachmodelle nachgeladen: {'+'.join(languages)}")
+
+    def shutdown(self):
+        """Beendet alle Worker"""
+        with self._lock:
+            for engine in self._engines:
+                engine.stop()
+            self._engines.clear()
+            self._idle = queue.Queue()
+            self._started = False
+            self._available = False
+
+    def _restart_engine(self, engine: _EngineProcess):
+        """Ersetzt einen abgestürzten oder hängenden Worker"""
+        engine.kill()
+        engine.preload_languages = list(self.preload_languages)
+        try:
+            engine.start()
+            self._idle.put(engine)
+        except Exception as e:
+            logger.error(f"Tesseract-Engine konnte nicht neu gestartet werden: {e}")
+            with self._lock:
+                if engine in self._engines:
+                    self._engines.remove(engine)
+                self._available = bool(self._engines)
+
+    @staticmethod
+    def _image_to_request(image: Image.Image) -> Dict[str, Any]:
+        """Wandelt ein PIL-Bild in eine Anfrage mit Rohdaten um"""
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB' if image.mode in ('RGBA', 'P', 'CMYK') else 'L')
+        bpp = 1 if image.mode == 'L' else 3
+        dpi = image.info.get('dpi', (300, 300))[0] or 300
+        return {
+            'data': image.tobytes(),
+            'width': image.width,
+            'height': image.height,
+            'bpp': bpp,
+            'stride': image.width * bpp,
+            'dpi': int(dpi),
+        }
+
+    def _run(self, request: Dict[str, Any], timeout: Optional[float]) -> Tuple[str, int]:
+        """Führt eine Anfrage auf einer freien Engine aus"""
+        timeout = timeout or self.call_timeout
+        try:
+            engine = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TesseractTimeoutError("Keine freie Tesseract-Engine verfügbar")
+
+        try:
+            result = engine.call(request, timeout)
+        except TesseractRequestError:
+            # Worker hat die Anfrage beantwortet und bleibt nutzbar
+            self._idle.put(engine)
+            raise
+        except TesseractEngineError:
+            # Absturz, Verbindungsabbruch oder Zeitüberschreitung - Worker neu starten
+            threading.Thread(target=self._restart_engine, args=(engine,), daemon=True).start()
+            raise
+        self._idle.put(engine)
+        return result
+
+    def recognize(self, image: Image.Image, lang: str = 'deu', config: str = '',
+                  output: str = 'text', timeout: Optional[float] = None) -> Tuple[str, int]:
+        """
+        Führt OCR über den Pool aus
+
+        Returns:
+            Tuple (Text bzw. TSV, mittlere Konfidenz 0-100)
+        """
+        oem, psm, variables = parse_tesseract_config(config)
+        request = self._image_to_request(image)
+        request.update({
+            'lang': lang,
+            'oem': oem,
+            'psm': 3 if psm is None else psm,
+            'variables': variables,
+            'output': output,
+        })
+        return self._run(request, timeout)
+
+    def recognize_frame(self, descriptor: FrameDescriptor, lang: str = 'deu', config: str = '',
+                        rect: Optional[Tuple[int, int, int, int]] = None,
+                        output: str = 'text', timeout: Optional[float] = None,
+                        with_confidence: bool = False) -> Tuple[str, int]:
+        """
+        Führt OCR auf einem Frame im Shared Memory aus.
+
+        Es wird nur der Deskriptor an den Worker übergeben; eine Zone wird über
+        `rect` (x, y, Breite, Höhe) adressiert statt ausgeschnitten.
+        Fällt bei Nichtverfügbarkeit auf pytesseract zurück. Dort wird die
+        Konfidenz nur mit `with_confidence` (über image_to_data) ermittelt.
+
+        Returns:
+            Tuple (Text bzw. TSV, mittlere Konfidenz 0-100; -1 wenn unbekannt)
+        """
+        if rect is not None:
+            rect = clamp_rect(rect, descriptor.width, descriptor.height)
+            if rect is None:
+                return "", -1
+
+        oem, psm, variables = parse_tesseract_config(config)
+
+        if self.available:
+            request = {
+                'frame': descriptor.to_dict(),
+                'rect': rect,
+                'lang': lang,
+                'oem': oem,
+                'psm': 3 if psm is None else psm,
+                'variables': variables,
+                'output': output,
+            }
+            try:
+                return self._run(request, timeout)
+            except TesseractTimeoutError:
+                raise
+            except TesseractEngineError as e:
+                logger.warning(f"Tesseract-Engine fehlgeschlagen, verwende pytesseract: {e}")
+
+        # Fallback im eigenen Prozess: Bild zeigt direkt auf den Shared Memory
+        import pytesseract
+        shm = attach_shared_memory(descriptor.name)
+        try:
+            image = image_from_descriptor(shm, descriptor)
+            if rect is not None:
+                x, y, w, h = rect
+                image = image.crop((x, y, x + w, y + h))
+            if output == 'tsv':
+                text = pytesseract.image_to_data(image, lang=lang, config=config,
+                                                 timeout=timeout or self.call_timeout)
+            elif with_confidence:
+                data = pytesseract.image_to_data(image, lang=lang, config=config,
+                                                 output_type=pytesseract.Output.DICT,
+                                                 timeout=timeout or self.call_timeout)
+                image = None
+                return text_and_confidence(data)
+            else:
+                text = pytesseract.image_to_string(image, lang=lang, config=config,
+                                                   timeout=timeout or self.call_timeout)
+            image = None
+            return text, -1
+        finally:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+    def image_to_string(self, image: Image.Image, lang: str = 'deu', config: str = '',
+                        timeout: Optional[float] = None) -> str:
+        """
+        Ersatz für pytesseract.image_to_string mit persistenten Engines.
+        Fällt bei Nichtverfügbarkeit oder Engine-Fehlern auf pytesseract zurück.
+        """
+        if self.available:
+            try:
+                text, _ = self.recognize(image, lang=lang, config=config, timeout=timeout)
+                return text
+            except TesseractTimeoutError:
+                raise
+            except TesseractEngineError as e:
+                logger.warning(f"Tesseract-Engine fehlgeschlagen, verwende pytesseract: {e}")
+
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=lang, config=config,
+                                           timeout=timeout or self.call_timeout)
+
+
+# Globale Pool-Instanz
+_tesseract_pool = None
+_tesseract_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool() -> TesseractEnginePool:
+    """Gibt die globale TesseractEnginePool-Instanz zurück"""
+    global _tesseract_pool
+    with _tesseract_pool_lock:
+        if _tesseract_pool is None:
+            _tesseract_pool = TesseractEnginePool()
+            logger.debug("Globale TesseractEnginePool-Instanz erstellt")
+        return _tesseract_pool
+
+
+def shutdown_tesseract_pool():
+    """Beendet die Worker der globalen Pool-Instanz"""
+    with _tesseract_pool_lock:
+        if _tesseract_pool is not None:
+            _tesseract_pool.shutdown()
@@ -0,0 +1,430 @@
+"""
+Wortindex je Seite für ankerbasierte Feldextraktion
+
+Feste OCR-Zonen brechen, sobald ein Lieferant sein Layout um einige
+Millimeter verschiebt. Der Wortindex enthält je Seite alle Wörter mit
+Position - einmal aus der Textebene des PDFs bzw. aus der TSV-Ausgabe von
+Tesseract erzeugt. Felder werden relativ zu Ankerwörtern gesucht
+("rechts von 'Rechnungsnummer:'", "unter 'Kundennummer'") oder per
+regulärem Ausdruck über die Zeilen. Abfragen sind Indexzugriffe, der Text
+wird nicht erneut durchsucht und die Seite nicht erneut gerastert.
+
+Alle Koordinaten sind Pixel bei 300 DPI (wie bei OCR-Zonen).
+"""
+import os
+import re
+import bisect
+import threading
+import logging
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.page_raster import file_signature
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Koordinatensystem des Index (wie OCR-Zonen)
+INDEX_DPI = 300
+
+# Satzzeichen, die beim Vergleich von Ankerwörtern ignoriert werden
+_TOKEN_STRIP = ".,;:!?()[]{}\"'«»„“”‚‘’"
+
+# Lücke (in Zeilenhöhen), ab der ein Wort nicht mehr zum Wert gehört
+WORD_GAP_FACTOR = 1.5
+
+ANCHOR_DIRECTIONS = {
+    "right": "Rechts vom Anker",
+    "below": "Unter dem Anker",
+    "regex": "Regulärer Ausdruck (Zeilen)",
+}
+
+
+def normalize_token(text: str) -> str:
+    """Vergleichsform eines Wortes (Groß-/Kleinschreibung und Satzzeichen egal)"""
+    return text.strip(_TOKEN_STRIP).casefold()
+
+
+def is_glued_anchor(token: str, anchor_token: str) -> bool:
+    """
+    Wort beginnt mit dem Ankerwort, gefolgt von Satzzeichen oder Ziffer
+    ("nr.:4711" für "nr") - nicht bei längeren Wörtern ("rechnungsdatum").
+    """
+    if len(token) <= len(anchor_token) or not token.startswith(anchor_token):
+        return False
+    rest = token[len(anchor_token)]
+    return rest in _TOKEN_STRIP or rest.isdigit()
+
+
+@dataclass(frozen=True)
+class Word:
+    """Ein Wort mit Begrenzungsrahmen"""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    line: int = 0       # Zeilenkennung innerhalb der Seite
+    conf: float = -1    # OCR-Konfidenz, -1 für Textebene
+
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+    @property
+    def cy(self) -> float:
+        return (self.y0 + self.y1) / 2
+
+
+@dataclass
+class AnchorRule:
+    """Extraktionsregel relativ zu einem Ankertext"""
+    anchor: str = ""
+    direction: str = "right"     # right, below, regex
+    pattern: str = ""            # regex: Muster über die Zeilen; sonst optionaler Filter
+    page: int = 1                # 1-basiert, negativ vom Ende, 0 = alle Seiten
+    occurrence: int = 1          # welches Vorkommen des Ankers
+    max_words: int = 0           # 0 = bis zur nächsten Lücke
+    lines: int = 1               # nur "below": Anzahl Zeilen
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'AnchorRule':
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (data or {}).items() if k in names})
+
+    def describe(self) -> str:
+        """Kurzbeschreibung für Listen"""
+        if self.direction == "regex":
+            return f"Muster '{self.pattern}'"
+        where = "rechts von" if self.direction == "right" else "unter"
+        return f"{where} '{self.anchor}'"
+
+
+class PageWordIndex:
+    """Wörter einer Seite mit Nachschlagetabellen für Anker und Zeilen"""
+
+    def __init__(self, words: Sequence[Word], source: str = "text"):
+        self.source = source  # "text" (Textebene) oder "ocr"
+
+        # Zeilen in Leserichtung, Wörter innerhalb einer Zeile von links nach rechts
+        by_line: Dict[int, List[Word]] = {}
+        for word in words:
+            if word.text.strip():
+                by_line.setdefault(word.line, []).append(word)
+        ordered = self._merge_rows(list(by_line.values()))
+
+        self.words: List[Word] = []
+        self.lines: List[Tuple[int, int]] = []        # (erstes Wort, Ende) je Zeile
+        self._line_of: List[int] = []                 # Zeile je Wort
+        for line_no, line_words in enumerate(ordered):
+            start = len(self.words)
+            self.words.extend(sorted(line_words, key=lambda w: w.x0))
+            self.lines.append((start, len(self.words)))
+            self._line_of.extend([line_no] * (len(self.words) - start))
+
+        self.line_texts: List[str] = [
+            " ".join(w.text for w in self.words[s:e]) for s, e in self.lines
+        ]
+
+        # Wort -> Positionen; sortierte Schlüssel für Präfixsuche
+        self._tokens: Dict[str, List[int]] = {}
+        for index, word in enumerate(self.words):
+            self._tokens.setdefault(normalize_token(word.text), []).append(index)
+        self._token_keys = sorted(self._tokens)
+
+        # Zeilen nach vertikaler Mitte für "unter"-Abfragen
+        self._rows = sorted(range(len(self.lines)), key=self._line_cy)
+        self._row_cy = [self._line_cy(i) for i in self._rows]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @staticmethod
+    def _merge_rows(source_lines: List[List[Word]]) -> List[List[Word]]:
+        """
+        Fasst Quellzeilen zu sichtbaren Zeilen zusammen. Bezeichnung und Wert
+        stehen im PDF oft in getrennten Textobjekten auf gleicher Höhe.
+        """
+        spans = sorted(
+            ((min(w.y0 for w in ws), max(w.y1 for w in ws), ws) for ws in source_lines),
+            key=lambda span: (span[0] + span[1]) / 2
+        )
+        rows: List[Tuple[float, float, List[Word]]] = []
+        for top, bottom, line_words in spans:
+            if rows:
+                row_top, row_bottom, row_words = rows[-1]
+                overlap = min(bottom, row_bottom) - max(top, row_top)
+                if overlap >= 0.5 * min(bottom - top, row_bottom - row_top):
+                    row_words.extend(line_words)
+                    continue
+            rows.append((top, bottom, list(line_words)))
+        return [row_words for _, _, row_words in rows]
+
+    def _line_cy(self, line_no: int) -> float:
+        start, end = self.lines[line_no]
+        return sum(w.cy for w in self.words[start:end]) / (end - start)
+
+    def _token_positions(self, token: str, prefix: bool = False) -> List[int]:
+        """Positionen eines Wortes; mit prefix auch Wörter die damit beginnen"""
+        if not prefix:
+            return self._tokens.get(token, [])
+        result = []
+        i = bisect.bisect_left(self._token_keys, token)
+        while i < len(self._token_keys) and self._token_keys[i].startswith(token):
+            result.extend(self._tokens[self._token_keys[i]])
+            i += 1
+        return sorted(result)
+
+    def find_anchor(self, anchor: str) -> List[Tuple[int, int]]:
+        """
+        Sucht einen Ankertext (ein oder mehrere Wörter in einer Zeile).
+
+        Returns:
+            Liste von (erstes Wort, letztes Wort); exakte Treffer vor mit dem
+            Wert verklebten, jeweils in Leserichtung
+        """
+        tokens = [normalize_token(t) for t in anchor.split()]
+        tokens = [t for t in tokens if t]
+        if not tokens:
+            return []
+
+        # Das letzte Ankerwort darf mit dem Wert verklebt sein ("Nr.:4711")
+        single = len(tokens) == 1
+        exact, glued = [], []
+        for first in self._token_positions(tokens[0], prefix=single):
+            last = first + len(tokens) - 1
+            if last >= len(self.words) or self._line_of[last] != self._line_of[first]:
+                continue
+            if all(normalize_token(self.words[first + k].text) == tokens[k]
+                   for k in range(1, len(tokens) - 1)):
+                token = normalize_token(self.words[last].text)
+                if token == tokens[-1]:
+                    exact.append((first, last))
+                elif is_glued_anchor(token, tokens[-1]):
+                    glued.append((first, last))
+        return exact + glued
+
+    def _remainder(self, word: Word, anchor_token: str) -> str:
+        """Rest eines mit dem Wert verklebten Ankerworts"""
+        text = word.text
+        position = text.casefold().find(anchor_token)
+        if position < 0:
+            return ""
+        return text[position + len(anchor_token):].lstrip(_TOKEN_STRIP + " ")
+
+    def _group(self, start: int, end: int, seed: int, max_words: int = 0) -> List[Word]:
+        """Zusammenhängende Wörter einer Zeile ab `seed` (bis zur nächsten Lücke)"""
+        group = [self.words[seed]]
+        for index in range(seed + 1, end):
+            previous, word = self.words[index - 1], self.words[index]
+            if word.x0 - previous.x1 > WORD_GAP_FACTOR * max(previous.height, word.height):
+                break
+            if max_words and len(group) >= max_words:
+                break
+            group.append(word)
+        return group
+
+    def right_of(self, first: int, last: int, max_words: int = 0, anchor_token: str = "") -> str:
+        """Text rechts eines Ankers in derselben Zeile"""
+        parts = []
+        # Mit dem Anker verklebter Wert ("Nr.:4711")
+        anchor_word = self.words[last]
+        if anchor_token and normalize_token(anchor_word.text) != anchor_token:
+            remainder = self._remainder(anchor_word, anchor_token)
+            if remainder:
+                parts.append(remainder)
+
+        _, end = self.lines[self._line_of[last]]
+        if last + 1 < end:
+            # Die erste Lücke (Anker -> Wert) darf beliebig groß sein
+            limit = max(0, max_words - len(parts)) if max_words else 0
+            if not max_words or limit:
+                parts.extend(w.text for w in self._group(last + 1, end, last + 1, limit))
+        return " ".join(parts)
+
+    def below(self, first: int, last: int, lines: int = 1, max_words: int = 0) -> str:
+        """Text unter einem Anker (horizontal überlappend)"""
+        x0 = self.words[first].x0
+        x1 = self.words[last].x1
+        bottom = max(w.y1 for w in self.words[first:last + 1])
+        height = max(w.height for w in self.words[first:last + 1])
+        tolerance = WORD_GAP_FACTOR * height
+
+        result = []
+        row = bisect.bisect_right(self._row_cy, bottom)
+        while row < len(self._rows) and len(result) < lines:
+            start, end = self.lines[self._rows[row]]
+            row += 1
+            overlapping = [i for i in range(start, end)
+                           if self.words[i].x1 >= x0 - tolerance and self.words[i].x0 <= x1 + tolerance]
+            if not overlapping:
+                continue
+            # Zusammenhängende Gruppe um das erste überlappende Wort
+            seed = overlapping[0]
+            while seed > start:
+                previous, word = self.words[seed - 1], self.words[seed]
+                if word.x0 - previous.x1 > WORD_GAP_FACTOR * max(previous.height, word.height) \
+                        or previous.x1 < x0 - tolerance:
+                    break
+                seed -= 1
+            result.append(" ".join(w.text for w in self._group(start, end, seed, max_words)))
+        return "\n".join(result)
+
+    def search_lines(self, pattern: str) -> List[str]:
+        """
+        Regulärer Ausdruck über die Zeilen.
+
+        Returns:
+            Treffer je Vorkommen (Gruppe 1 falls vorhanden, sonst ganzer Treffer)
+        """
+        regex = re.compile(pattern)
+        group = 1 if regex.groups else 0
+        return [m.group(group) or "" for text in self.line_texts for m in regex.finditer(text)]
+
+    def extract(self, rule: AnchorRule) -> List[str]:
+        """Alle Kandidaten einer Regel auf dieser Seite (in Leserichtung)"""
+        if rule.direction == "regex":
+            return self.search_lines(rule.pattern) if rule.pattern else []
+
+        anchor_tokens = [normalize_token(t) for t in rule.anchor.split()] or [""]
+        candidates = []
+        for first, last in self.find_anchor(rule.anchor):
+            if rule.direction == "below":
+                value = self.below(first, last, max(1, rule.lines), rule.max_words)
+            else:
+                value = self.right_of(first, last, rule.max_words, anchor_tokens[-1])
+            if rule.pattern:
+                match = re.search(rule.pattern, value)
+                if not match:
+                    continue
+                value = match.group(1 if match.re.groups else 0) or ""
+            value = value.strip()
+            if value:
+                candidates.append(value)
+        return candidates
+
+
+def extract_with_rule(indexes: Sequence[PageWordIndex], rule: AnchorRule) -> str:
+    """Wendet eine Regel auf die Seiten an (in Seitenreihenfolge) und liefert das n-te Vorkommen"""
+    wanted = max(1, rule.occurrence)
+    seen = 0
+    for index in indexes:
+        try:
+            candidates = index.extract(rule)
+        except re.error as e:
+            logger.warning(f"Ungültiges Muster in Ankerregel '{rule.describe()}': {e}")
+            return ""
+        if seen + len(candidates) >= wanted:
+            return candidates[wanted - seen - 1]
+        seen += len(candidates)
+    return ""
+
+
+def words_from_text_layer(raw_words: Sequence[Tuple], dpi: int = INDEX_DPI) -> List[Word]:
+    """
+    Wörter aus PyMuPDF page.get_text("words")
+    (x0, y0, x1, y1, Text, Block, Zeile, Wort; Koordinaten in Punkten).
+    """
+    factor = dpi / 72.0
+    words = []
+    for x0, y0, x1, y1, text, block_no, line_no, _ in raw_words:
+        words.append(Word(text, x0 * factor, y0 * factor, x1 * factor, y1 * factor,
+                          line=block_no * 10000 + line_no))
+    return words
+
+
+def words_from_tsv(tsv: str, scale: Tuple[float, float], origin: Tuple[float, float] = (0.0, 0.0),
+                   dpi: int = INDEX_DPI, min_confidence: float = 0) -> List[Word]:
+    """
+    Wörter aus der Tesseract-TSV-Ausgabe (Ebene 5).
+
+    Args:
+        scale: Frame-Pixel je Punkt (SharedFrame.scale)
+        origin: Frame-Ursprung in Punkten (SharedFrame.origin)
+    """
+    factor = dpi / 72.0
+    sx, sy = scale
+    ox, oy = origin
+    words = []
+    for row in tsv.splitlines():
+        columns = row.split('\t')
+        # Kopfzeile (pytesseract) und Nicht-Wort-Ebenen überspringen
+        if len(columns) < 12 or columns[0] != '5':
+            continue
+        text = columns[11].strip()
+        if not text:
+            continue
+        try:
+            block, paragraph, line = int(columns[2]), int(columns[3]), int(columns[4])
+            left, top, width, height = (float(v) for v in columns[6:10])
+            conf = float(columns[10])
+        except ValueError:
+            continue
+        if 0 <= conf < min_confidence:
+            continue
+        x0 = (left / sx + ox) * factor
+        y0 = (top / sy + oy) * factor
+        x1 = ((left + width) / sx + ox) * factor
+        y1 = ((top + height) / sy + oy) * factor
+        words.append(Word(text, x0, y0, x1, y1,
+                          line=(block * 1000 + paragraph) * 1000 + line, conf=conf))
+    return words
+
+
+class WordIndexCache:
+    """Wortindizes je Dateistand, Seite und Sprache"""
+
+    def __init__(self):
+        self._indexes: Dict[Tuple, PageWordIndex] = {}
+        self._lock = threading.Lock()
+        self._page_locks: Dict[Tuple, threading.Lock] = {}
+
+    def get(self, pdf_path: str, page_no: int, language: str, builder) -> PageWordIndex:
+        """Liefert den Index einer Seite; `builder()` erzeugt ihn beim ersten Zugriff"""
+        key = (file_signature(pdf_path), page_no, language)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                return index
+            page_lock = self._page_locks.setdefault(key, threading.Lock())
+
+        with page_lock:
+            with self._lock:
+                index = self._indexes.get(key)
+            if index is None:
+                index = builder()
+                with self._lock:
+                    self._indexes[key] = index
+            return index
+
+    def drop(self, pdf_path: str):
+        """Entfernt alle Indizes einer Datei"""
+        path_key = os.path.normcase(os.path.abspath(pdf_path))
+        with self._lock:
+            for key in [k for k in self._indexes if k[0][0] == path_key]:
+                del self._indexes[key]
+                self._page_locks.pop(key, None)
+
+    def clear(self):
+        """Entfernt alle Indizes"""
+        with self._lock:
+            self._indexes.clear()
+            self._page_locks.clear()
+
+
+# Globale Cache-Instanz
+_word_index_cache = None
+_word_index_cache_lock = threading.Lock()
+
+
+def get_word_index_cache() -> WordIndexCache:
+    """Gibt die globale WordIndexCache-Instanz zurück"""
+    global _word_index_cache
+    with _word_index_cache_lock:
+        if _word_index_cache is None:
+            _word_index_cache = WordIndexCache()
+            logger.debug("Globale WordIndexCache-Instanz erstellt")
+        return _word_index_cache
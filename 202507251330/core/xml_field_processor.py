@@ -13,6 +13,7 @@ import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.ocr_processor import OCRProcessor
+from core.ocr_page_scope import collect_page_scope, LazyText
 from core.function_parser import FunctionParser, VariableExtractor
 
 # Logger für dieses Modul
@@ -24,13 +25,15 @@ class FieldMapping:
     
     def __init__(self, field_name: str, source_type: str = "expression", 
                  expression: str = "", zone: Optional[Tuple[int, int, int, int]] = None,
-                 page_num: int = 1, zones: Optional[List[Dict]] = None):
+                 page_num: int = 1, zones: Optional[List[Dict]] = None,
+                 anchor: Optional[Dict] = None):
         self.field_name = field_name
-        self.source_type = source_type  # "expression", "ocr_zone"
+        self.source_type = source_type  # "expression", "ocr_zone", "anchor"
         self.expression = expression  # Funktionsausdruck
         self.zone = zone  # (x, y, width, height) für OCR-Zone (legacy)
         self.page_num = page_num
         self.zones = zones or []  # Liste von OCR-Zonen für Multi-Zone Support
+        self.anchor = anchor  # Ankerregel (siehe AnchorRule) für source_type "anchor"
     
     def to_dict(self) -> dict:
         """Konvertiert zu Dictionary für Speicherung"""
@@ -40,7 +43,8 @@ class FieldMapping:
             "expression": self.expression,
             "zone": self.zone,
             "page_num": self.page_num,
-            "zones": self.zones
+            "zones": self.zones,
+            "anchor": self.anchor
         }
     
     @classmethod
@@ -52,7 +56,8 @@ class FieldMapping:
             expression=data.get("expression", ""),
             zone=data.get("zone"),
             page_num=data.get("page_num", 1),
-            zones=data.get("zones", [])
+            zones=data.get("zones", []),
+            anchor=data.get("anchor")
         )
 
 
@@ -69,7 +74,10 @@ class XMLFieldProcessor:
                                   mappings: List[FieldMapping] = [], 
                                   ocr_zones: List[Dict] = [],
                                   input_path: str = "",
-                                  original_pdf_path: str = "") -> bool:
+                                  original_pdf_path: str = "",
+                                  ocr_preprocessing: Any = None,
+                                  ocr_language: str = "",
+                                  document_variables: Optional[Dict[str, str]] = None) -> bool:
         """
         Verarbeitet eine XML-Datei mit den definierten Feld-Mappings
         
@@ -80,10 +88,14 @@ class XMLFieldProcessor:
             ocr_zones: Liste der OCR-Zonen vom Hotfolder
             input_path: Pfad zum Hotfolder (für Level-Variablen)
             original_pdf_path: Original-Pfad der PDF (für Level-Variablen)
+            ocr_preprocessing: Bildvorverarbeitung für die Volltext-OCR
+            ocr_language: OCR-Sprache des Hotfolders (leer = Einstellungen, 'auto')
+            document_variables: Zusätzliche Variablen des Dokuments (z.B. Split_Index)
             
         Returns:
             True wenn erfolgreich
         """
+        ocr_streams = []  # Laufende Seiten-OCR (OCR_Page1, ...)
         try:
             # NEU: Prüfe auf zirkuläre Abhängigkeiten
             has_cycle, error_msg = self._check_circular_dependencies(mappings)
@@ -109,7 +121,9 @@ class XMLFieldProcessor:
             
             # Sammle alle verfügbaren Variablen (ohne bereits evaluierte Felder)
             context = self._build_context(xml_path, pdf_path, mappings, ocr_zones, 
-                                        input_path, original_pdf_path)
+                                        input_path, original_pdf_path, ocr_preprocessing,
+                                        ocr_streams, ocr_language)
+            context.update(document_variables or {})
             
             # Dictionary für bereits evaluierte Felder
             evaluated_fields = {}
@@ -161,13 +175,24 @@ class XMLFieldProcessor:
         except Exception as e:
             logger.error(f"Fehler bei XML-Verarbeitung: {e}")
             return False
+        finally:
+            for stream in ocr_streams:
+                stream.close()
 
     def _build_context(self, xml_path: str = "", pdf_path: str = "", 
                       mappings: List[FieldMapping] = [], 
                       ocr_zones: List[Dict] = [],
                       input_path: str = "",
-                      original_pdf_path: str = "") -> Dict[str, Any]:
-        """Baut den Kontext mit allen verfügbaren Variablen auf"""
+                      original_pdf_path: str = "",
+                      ocr_preprocessing: Any = None,
+                      ocr_streams: Optional[List] = None,
+                      ocr_language: str = "") -> Dict[str, Any]:
+        """
+        Baut den Kontext mit allen verfügbaren Variablen auf
+
+        Args:
+            ocr_streams: Nimmt gestartete Seiten-OCR auf; der Aufrufer schließt sie
+        """
         context = {}
         
         # Standard-Variablen
@@ -198,13 +223,25 @@ class XMLFieldProcessor:
         if xml_path and os.path.exists(xml_path):
             context.update(VariableExtractor.get_xml_variables(xml_path))
         
-        # OCR-Text (lazy loading)
-        if any(m.expression and 'OCR' in m.expression for m in mappings):
-            if pdf_path not in self._ocr_cache:
-                logger.info(f"Führe OCR aus auf: {pdf_path}")
-                self._ocr_cache[pdf_path] = self.ocr_processor.extract_text_from_pdf(pdf_path)
-            
-            context['OCR_FullText'] = self._ocr_cache[pdf_path]
+        # Wirksame OCR-Sprache (bei "auto" erst bei Verwendung erkannt)
+        context['OCR_Language'] = LazyText(
+            lambda: self.ocr_processor.resolve_language(pdf_path, ocr_language))
+        
+        # OCR-Text (lazy loading): nur die referenzierten Seiten, die Seiten
+        # werden im Hintergrund erkannt und beim Einsetzen abgewartet
+        scope = collect_page_scope(m.expression for m in mappings if m.expression)
+        if scope.needed:
+            logger.info(f"Führe OCR aus auf: {pdf_path}")
+            variables, stream = self.ocr_processor.page_scope_variables(
+                pdf_path, scope, language=ocr_language or None, preprocessing=ocr_preprocessing)
+            if stream is not None:
+                if ocr_streams is not None:
+                    ocr_streams.append(stream)
+                else:
+                    # Ohne Aufrufer, der den Stream schließt: Text sofort ermitteln
+                    variables = {name: str(value) for name, value in variables.items()}
+                    stream.close()
+            context.update(variables)
         
         # OCR-Zonen vom Hotfolder
         if ocr_zones:
@@ -213,7 +250,11 @@ class XMLFieldProcessor:
                 if zone_key not in self._zone_cache:
                     logger.info(f"Führe OCR aus für Zone '{zone_info['name']}' auf Seite {zone_info['page_num']}")
                     zone_text = self.ocr_processor.extract_text_from_zone(
-                        pdf_path, zone_info['page_num'], zone_info['zone']
+                        pdf_path, zone_info['page_num'], zone_info['zone'],
+                        language=zone_info.get('language') or ocr_language or None,
+                        validation_regex=zone_info.get('validation_regex', ''),
+                        strategy_key=zone_info.get('strategy_key'),
+                        preprocessing=zone_info.get('preprocessing')
                     )
                     self._zone_cache[zone_key] = zone_text
                 
@@ -230,7 +271,10 @@ class XMLFieldProcessor:
                     zone_key = f"{zone_info['page_num']}_{zone_info['zone']}"
                     if zone_key not in self._zone_cache:
                         zone_text = self.ocr_processor.extract_text_from_zone(
-                            pdf_path, zone_info['page_num'], zone_info['zone']
+                            pdf_path, zone_info['page_num'], zone_info['zone'],
+                            language=zone_info.get('language') or ocr_language or None,
+                            validation_regex=zone_info.get('validation_regex', ''),
+                            preprocessing=zone_info.get('preprocessing', ocr_preprocessing)
                         )
                         self._zone_cache[zone_key] = zone_text
                     
@@ -238,12 +282,27 @@ class XMLFieldProcessor:
                     zone_name = zone_info.get('name', f'OCR_Zone_{len(self._zone_cache)+1}')
                     context[zone_name] = self._zone_cache[zone_key]
         
+        # Anker-Felder über den Wortindex (Textebene bzw. einmalige OCR je Seite)
+        for mapping in mappings:
+            if mapping.source_type == "anchor" and mapping.anchor:
+                context[f"ANCHOR_{mapping.field_name}"] = self.ocr_processor.extract_with_anchor(
+                    pdf_path, mapping.anchor, language=ocr_language or None,
+                    preprocessing=ocr_preprocessing)
+        
         return context
  
     def _evaluate_mapping(self, mapping: FieldMapping, 
                          context: Dict[str, Any]) -> Optional[str]:
         """Evaluiert ein Mapping und gibt den Wert zurück"""
         
+        # Anker-Feld: Wert aus dem Wortindex, Ausdruck optional mit <ANCHOR>
+        if mapping.source_type == "anchor":
+            anchor_var = f"ANCHOR_{mapping.field_name}"
+            if mapping.expression:
+                expression = mapping.expression.replace("<ANCHOR>", f"<{anchor_var}>")
+                return self.function_parser.parse_and_evaluate(expression, context)
+            return context.get(anchor_var, "")
+        
         # ÄNDERUNG: Wenn keine Expression definiert ist, gebe leeren String zurück
         if not mapping.expression:
             return ""
@@ -335,7 +394,8 @@ class XMLFieldProcessor:
         """Gibt alle verfügbaren Variablen gruppiert zurück"""
         variables = {
             "Standard": [],
-            "OCR": ["OCR_FullText"],
+            "OCR": ["OCR_FullText", "OCR_Page1", "OCR_FirstPages(2)",
+                    "OCR_LastPages(2)", "OCR_LastPage", "OCR_Language"],
             "Datei": [],
             "XML": [],
             "Datum": [],
@@ -0,0 +1,164 @@
+"""
+Adaptive Auflösung für die Zonen-OCR
+
+Zonen werden zuerst mit niedriger Auflösung gelesen. Die nächste Stufe
+(höhere DPI bzw. anderer Seitensegmentierungsmodus) wird nur versucht, wenn
+das Ergebnis leer ist, das Prüfmuster der Zone nicht erfüllt oder Tesseract
+eine niedrige Konfidenz meldet. Die erfolgreiche Stufe wird je Hotfolder-Zone
+gespeichert und beim nächsten Dokument direkt verwendet.
+"""
+import os
+import re
+import json
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Any
+
+from core.config_manager import ensure_config_directory
+
+# Logger für dieses Modul
+logger = logging.getLogger(__name__)
+
+# Stufen (DPI, PSM) in Reihenfolge steigender Kosten
+ZONE_OCR_LADDER: Tuple[Tuple[int, int], ...] = (
+    (150, 6),
+    (200, 6),
+    (300, 6),
+    (300, 7),
+    (400, 6),
+    (400, 11),
+)
+
+# Mindestkonfidenz (0-100), unter der eskaliert wird
+DEFAULT_MIN_CONFIDENCE = 60
+
+# Nach so vielen Erfolgen auf einer gespeicherten Stufe wird einmal die
+# nächstniedrigere Stufe probiert, damit einzelne Ausreißer nicht dauerhaft
+# die Kosten erhöhen
+PROBE_INTERVAL = 50
+
+
+def zone_strategy_key(hotfolder_id: str, zone: Dict[str, Any]) -> str:
+    """
+    Schlüssel für die gespeicherte Strategie einer Hotfolder-Zone.
+    Enthält die Koordinaten, damit eine geänderte Zone neu lernt.
+    """
+    coords = ",".join(str(int(v)) for v in zone.get('zone', ()))
+    return f"{hotfolder_id}|{zone.get('name', '')}|{zone.get('page_num', 1)}|{coords}"
+
+
+def is_zone_result_acceptable(text: str, confidence: int, validation_regex: str = "",
+                              min_confidence: int = DEFAULT_MIN_CONFIDENCE) -> bool:
+    """
+    Prüft ein Zonen-Ergebnis.
+
+    Args:
+        text: Erkannter Text (bereits getrimmt)
+        confidence: Mittlere Konfidenz, -1 wenn unbekannt (wird dann ignoriert)
+        validation_regex: Optionales Prüfmuster (re.search)
+        min_confidence: Mindestkonfidenz
+    """
+    if not text:
+        return False
+    if 0 <= confidence < min_confidence:
+        return False
+    if validation_regex:
+        try:
+            if not re.search(validation_regex, text):
+                return False
+        except re.error as e:
+            logger.warning(f"Ungültiges Prüfmuster '{validation_regex}': {e}")
+    return True
+
+
+class ZoneStrategyStore:
+    """Speichert die erfolgreiche OCR-Stufe je Hotfolder-Zone"""
+
+    DEFAULT_STRATEGIES_FILE = "config/zone_strategies.json"
+
+    def __init__(self, strategies_file: Optional[str] = None):
+        ensure_config_directory()
+        if strategies_file is None:
+            strategies_file = self.DEFAULT_STRATEGIES_FILE
+        self.strategies_file = str(strategies_file)
+        self.strategies: Dict[str, Dict[str, Any]] = {}
+        self._successes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.load_strategies()
+
+    def load_strategies(self) -> None:
+        """Lädt die gespeicherten Strategien"""
+        if not os.path.exists(self.strategies_file):
+            return
+        try:
+            with open(self.strategies_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if content.strip():
+                self.strategies = json.loads(content).get("strategies", {})
+        except Exception as e:
+            logger.error(f"Fehler beim Laden der Zonen-Strategien: {e}")
+            self.strategies = {}
+
+    def save_strategies(self) -> None:
+        """Speichert die Strategien (atomar über eine temporäre Datei)"""
+        with self._lock:
+            data = {"strategies": dict(self.strategies)}
+            temp_file = f"{self.strategies_file}.tmp"
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(temp_file, self.strategies_file)
+                logger.debug("Zonen-Strategien gespeichert")
+            except Exception as e:
+                logger.error(f"Fehler beim Speichern der Zonen-Strategien: {e}")
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+    def start_index(self, key: str) -> int:
+        """Index der Stufe, mit der eine Zone begonnen wird"""
+        with self._lock:
+            entry = self.strategies.get(key)
+            if not entry:
+                return 0
+            try:
+                index = ZONE_OCR_LADDER.index((entry['dpi'], entry['psm']))
+            except (KeyError, ValueError):
+                return 0
+            # Gelegentlich eine Stufe tiefer probieren
+            if index > 0 and self._successes.get(key, 0) >= PROBE_INTERVAL:
+                self._successes[key] = 0
+                return index - 1
+            return index
+
+    def record_success(self, key: str, index: int) -> None:
+        """Merkt sich die Stufe, mit der eine Zone erfolgreich gelesen wurde"""
+        dpi, psm = ZONE_OCR_LADDER[index]
+        with self._lock:
+            entry = self.strategies.get(key)
+            if entry and entry.get('dpi') == dpi and entry.get('psm') == psm:
+                self._successes[key] = self._successes.get(key, 0) + 1
+                return
+            self.strategies[key] = {
+                "dpi": dpi,
+                "psm": psm,
+                "updated": datetime.now().isoformat(timespec='seconds'),
+            }
+            self._successes[key] = 0
+        logger.info(f"Zonen-Strategie für '{key}': {dpi} DPI, PSM {psm}")
+        self.save_strategies()
+
+
+# Globale Instanz
+_zone_strategy_store = None
+_zone_strategy_store_lock = threading.Lock()
+
+
+def get_zone_strategy_store() -> ZoneStrategyStore:
+    """Gibt die globale ZoneStrategyStore-Instanz zurück"""
+    global _zone_strategy_store
+    with _zone_strategy_store_lock:
+        if _zone_strategy_store is None:
+            _zone_strategy_store = ZoneStrategyStore()
+        return _zone_strategy_store
@@ -11,7 +11,7 @@ import re
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.export_config import ExportConfig, ExportFormat, ExportMethod, EmailConfig
+from models.export_config import ExportConfig, ExportFormat, ExportMethod, EmailConfig, FtpConfig, FtpProtocol
 from gui.expression_dialog import ExpressionDialog
 
 
@@ -200,7 +200,8 @@ class ExportDialog:
        
        methode = {
            ExportMethod.FILE: "Datei",
-           ExportMethod.EMAIL: "E-Mail"
+           ExportMethod.EMAIL: "E-Mail",
+           ExportMethod.FTP: "FTP"
        }.get(export.export_method, export.export_method.value)
        
        format_name = {
@@ -212,6 +213,8 @@ class ExportDialog:
        # Ziel je nach Methode
        if export.export_method == ExportMethod.EMAIL and export.email_config:
            ziel = export.email_config.recipient
+       elif export.export_method == ExportMethod.FTP and export.ftp_config:
+           ziel = f"{export.ftp_config.protocol.value}://{export.ftp_config.host}/{export.export_path_expression}"
        else:
            ziel = export.export_path_expression[:50] + "..." if len(export.export_path_expression) > 50 else export.export_path_expression
        
@@ -390,6 +393,14 @@ class ExportDialog:
 class ExportEditDialog:
    """Dialog zum Bearbeiten eines einzelnen Exports"""
    
+   # OCR-Modi für PDF/A (siehe core.ocrmypdf_runner)
+   OCR_MODE_LABELS = {
+       'auto': "Automatisch (nur Seiten ohne Text)",
+       'skip_text': "Seiten mit Text überspringen",
+       'redo_ocr': "Vorhandene OCR-Ebene erneuern",
+       'force': "Alle Seiten neu erkennen",
+   }
+   
    def __init__(self, parent, export: Optional[ExportConfig] = None,
                 xml_field_mappings: List[Dict] = None):
        self.parent = parent
@@ -431,9 +442,38 @@ class ExportEditDialog:
            self.email_cc_var = tk.StringVar()
            self.email_bcc_var = tk.StringVar()
        
+       # Sammelversand
+       email_defaults = export.email_config if export and export.email_config else EmailConfig("", "", "")
+       self.email_digest_var = tk.BooleanVar(value=email_defaults.digest_enabled)
+       self.email_digest_group_var = tk.StringVar(value=email_defaults.digest_group_expression)
+       self.email_digest_window_var = tk.IntVar(value=email_defaults.digest_window_minutes)
+       self.email_digest_count_var = tk.IntVar(value=email_defaults.digest_max_attachments)
+       self.email_digest_mb_var = tk.IntVar(value=email_defaults.digest_max_mb)
+       
+       # FTP-Variablen
+       ftp_defaults = export.ftp_config if export and export.ftp_config else FtpConfig("")
+       self.ftp_protocol_var = tk.StringVar(value=ftp_defaults.protocol.value)
+       self.ftp_host_var = tk.StringVar(value=ftp_defaults.host)
+       self.ftp_port_var = tk.IntVar(value=ftp_defaults.port)
+       self.ftp_username_var = tk.StringVar(value=ftp_defaults.username)
+       self.ftp_password_var = tk.StringVar(value=ftp_defaults.password)
+       self.ftp_passive_var = tk.BooleanVar(value=ftp_defaults.passive)
+       self.ftp_parallel_var = tk.IntVar(value=ftp_defaults.max_parallel)
+       self.ftp_resume_var = tk.IntVar(value=ftp_defaults.resume_mb)
+       
        # Format-Parameter
        self.format_params = export.format_params.copy() if export else {}
        
+       # PDF/A-Optionen (OCRmyPDF)
+       self.ocr_mode_var = tk.StringVar(
+           value=self.OCR_MODE_LABELS.get(self.format_params.get('ocr_mode', 'auto'),
+                                          self.OCR_MODE_LABELS['auto']))
+       self.jobs_var = tk.IntVar(value=int(self.format_params.get('jobs') or 0))
+       self.optimize_var = tk.IntVar(value=int(self.format_params.get('optimize', 0)))
+       self.rotate_pages_var = tk.BooleanVar(value=self.format_params.get('rotate_pages', True))
+       self.batch_var = tk.BooleanVar(value=bool(self.format_params.get('batch', False)))
+       self.fast_pdfa_var = tk.BooleanVar(value=self.format_params.get('fast_pdfa', True))
+       
        self._create_widgets()
        self._layout_widgets()
        
@@ -481,6 +521,9 @@ class ExportEditDialog:
        self.method_email = ttk.Radiobutton(self.method_frame, text="Per E-Mail versenden", 
                                           variable=self.method_var, value=ExportMethod.EMAIL.value,
                                           command=self._on_method_changed)
+       self.method_ftp = ttk.Radiobutton(self.method_frame, text="Per FTP/SFTP hochladen",
+                                        variable=self.method_var, value=ExportMethod.FTP.value,
+                                        command=self._on_method_changed)
        
        # Export-Format
        self.format_frame = ttk.LabelFrame(self.main_frame, text="Export-Format", padding="10")
@@ -559,6 +602,71 @@ class ExportEditDialog:
        self.email_body_expr_button = ttk.Button(self.email_body_frame, text="📝", width=3,
                                                command=self._edit_body_expression)
        
+       # Sammelversand
+       self.email_digest_frame = ttk.Frame(self.email_frame)
+       self.email_digest_check = ttk.Checkbutton(self.email_digest_frame,
+                                                text="Sammelversand (mehrere Dokumente je E-Mail)",
+                                                variable=self.email_digest_var)
+       self.email_digest_limits_frame = ttk.Frame(self.email_digest_frame)
+       ttk.Label(self.email_digest_limits_frame, text="Zeitfenster (Min.):").pack(side=tk.LEFT)
+       ttk.Spinbox(self.email_digest_limits_frame, from_=1, to=1440, width=5,
+                   textvariable=self.email_digest_window_var).pack(side=tk.LEFT, padx=(5, 10))
+       ttk.Label(self.email_digest_limits_frame, text="Max. Anhänge:").pack(side=tk.LEFT)
+       ttk.Spinbox(self.email_digest_limits_frame, from_=1, to=500, width=5,
+                   textvariable=self.email_digest_count_var).pack(side=tk.LEFT, padx=(5, 10))
+       ttk.Label(self.email_digest_limits_frame, text="Max. MB:").pack(side=tk.LEFT)
+       ttk.Spinbox(self.email_digest_limits_frame, from_=1, to=100, width=5,
+                   textvariable=self.email_digest_mb_var).pack(side=tk.LEFT, padx=(5, 0))
+       self.email_digest_group_frame = ttk.Frame(self.email_digest_frame)
+       ttk.Label(self.email_digest_group_frame, text="Gruppierung (leer = Betreff):").pack(side=tk.LEFT)
+       ttk.Entry(self.email_digest_group_frame, textvariable=self.email_digest_group_var,
+                 width=30).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+       
+       # FTP-Export Einstellungen
+       self.ftp_frame = ttk.LabelFrame(self.main_frame, text="FTP-Export", padding="10")
+       
+       self.ftp_server_label = ttk.Label(self.ftp_frame, text="Server:")
+       self.ftp_server_frame = ttk.Frame(self.ftp_frame)
+       self.ftp_protocol_combo = ttk.Combobox(self.ftp_server_frame, textvariable=self.ftp_protocol_var,
+                                             values=[protocol.value for protocol in FtpProtocol],
+                                             state="readonly", width=6)
+       self.ftp_host_entry = ttk.Entry(self.ftp_server_frame, textvariable=self.ftp_host_var, width=30)
+       self.ftp_port_label = ttk.Label(self.ftp_server_frame, text="Port:")
+       self.ftp_port_spinbox = ttk.Spinbox(self.ftp_server_frame, from_=0, to=65535, width=6,
+                                          textvariable=self.ftp_port_var)
+       
+       self.ftp_username_label = ttk.Label(self.ftp_frame, text="Benutzer:")
+       self.ftp_username_entry = ttk.Entry(self.ftp_frame, textvariable=self.ftp_username_var, width=40)
+       self.ftp_password_label = ttk.Label(self.ftp_frame, text="Passwort:")
+       self.ftp_password_entry = ttk.Entry(self.ftp_frame, textvariable=self.ftp_password_var,
+                                          show="*", width=40)
+       
+       self.ftp_path_label = ttk.Label(self.ftp_frame, text="Zielordner:")
+       self.ftp_path_frame = ttk.Frame(self.ftp_frame)
+       self.ftp_path_entry = ttk.Entry(self.ftp_path_frame, textvariable=self.path_var, width=40)
+       self.ftp_path_expr_button = ttk.Button(self.ftp_path_frame, text="📝", width=3,
+                                             command=self._edit_path_expression)
+       
+       self.ftp_filename_label = ttk.Label(self.ftp_frame, text="Dateiname:")
+       self.ftp_filename_frame = ttk.Frame(self.ftp_frame)
+       self.ftp_filename_entry = ttk.Entry(self.ftp_filename_frame, textvariable=self.filename_var, width=40)
+       self.ftp_filename_expr_button = ttk.Button(self.ftp_filename_frame, text="📝", width=3,
+                                                 command=self._edit_filename_expression)
+       
+       self.ftp_options_frame = ttk.Frame(self.ftp_frame)
+       self.ftp_passive_check = ttk.Checkbutton(self.ftp_options_frame, text="Passiver Modus",
+                                               variable=self.ftp_passive_var)
+       self.ftp_limits_frame = ttk.Frame(self.ftp_options_frame)
+       ttk.Label(self.ftp_limits_frame, text="Parallele Uploads:").pack(side=tk.LEFT)
+       ttk.Spinbox(self.ftp_limits_frame, from_=1, to=16, width=5,
+                   textvariable=self.ftp_parallel_var).pack(side=tk.LEFT, padx=(5, 10))
+       ttk.Label(self.ftp_limits_frame, text="Fortsetzen ab MB:").pack(side=tk.LEFT)
+       ttk.Spinbox(self.ftp_limits_frame, from_=0, to=1000, width=5,
+                   textvariable=self.ftp_resume_var).pack(side=tk.LEFT, padx=(5, 0))
+       self.ftp_hint = ttk.Label(self.ftp_options_frame,
+                                 text="Port 0 = Standard (21, SFTP 22). SFTP benötigt paramiko.",
+                                 foreground="gray")
+       
        # Buttons
        self.button_frame = ttk.Frame(self.main_frame)
        self.cancel_button = ttk.Button(self.button_frame, text="Abbrechen", 
@@ -581,6 +689,7 @@ class ExportEditDialog:
        self.method_frame.pack(fill=tk.X, pady=(0, 10))
        self.method_file.pack(anchor=tk.W)
        self.method_email.pack(anchor=tk.W, pady=(5, 0))
+       self.method_ftp.pack(anchor=tk.W, pady=(5, 0))
        
        # Export-Format
        self.format_frame.pack(fill=tk.X, pady=(0, 10))
@@ -635,8 +744,45 @@ class ExportEditDialog:
        self.email_body_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
        self.email_body_expr_button.pack(side=tk.LEFT, anchor=tk.N, padx=(5, 0))
        
+       # Sammelversand
+       self.email_digest_frame.grid(row=5, column=0, columnspan=2, sticky="we", pady=(10, 0))
+       self.email_digest_check.pack(anchor=tk.W)
+       self.email_digest_limits_frame.pack(fill=tk.X, pady=(5, 0))
+       self.email_digest_group_frame.pack(fill=tk.X, pady=(5, 0))
+       
        self.email_frame.columnconfigure(1, weight=1)
        
+       # FTP-Export
+       self.ftp_frame.pack(fill=tk.X, pady=(0, 10))
+       self.ftp_server_label.grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+       self.ftp_server_frame.grid(row=0, column=1, sticky="we", pady=(0, 5))
+       self.ftp_protocol_combo.pack(side=tk.LEFT)
+       self.ftp_host_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+       self.ftp_port_label.pack(side=tk.LEFT, padx=(10, 0))
+       self.ftp_port_spinbox.pack(side=tk.LEFT, padx=(5, 0))
+       
+       self.ftp_username_label.grid(row=1, column=0, sticky=tk.W, padx=(0, 10))
+       self.ftp_username_entry.grid(row=1, column=1, sticky="we", pady=(0, 5))
+       self.ftp_password_label.grid(row=2, column=0, sticky=tk.W, padx=(0, 10))
+       self.ftp_password_entry.grid(row=2, column=1, sticky="we", pady=(0, 5))
+       
+       self.ftp_path_label.grid(row=3, column=0, sticky=tk.W, padx=(0, 10))
+       self.ftp_path_frame.grid(row=3, column=1, sticky="we", pady=(0, 5))
+       self.ftp_path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+       self.ftp_path_expr_button.pack(side=tk.LEFT, padx=(5, 0))
+       
+       self.ftp_filename_label.grid(row=4, column=0, sticky=tk.W, padx=(0, 10))
+       self.ftp_filename_frame.grid(row=4, column=1, sticky="we", pady=(0, 5))
+       self.ftp_filename_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+       self.ftp_filename_expr_button.pack(side=tk.LEFT, padx=(5, 0))
+       
+       self.ftp_options_frame.grid(row=5, column=0, columnspan=2, sticky="we", pady=(5, 0))
+       self.ftp_passive_check.pack(anchor=tk.W)
+       self.ftp_limits_frame.pack(fill=tk.X, pady=(5, 0))
+       self.ftp_hint.pack(anchor=tk.W, pady=(5, 0))
+       
+       self.ftp_frame.columnconfigure(1, weight=1)
+       
        # Buttons
        self.button_frame.pack(fill=tk.X)
        self.cancel_button.pack(side=tk.RIGHT, padx=(5, 0))
@@ -649,9 +795,15 @@ class ExportEditDialog:
        if method == ExportMethod.FILE.value:
            self.file_frame.pack(fill=tk.X, pady=(0, 10), before=self.button_frame)
            self.email_frame.pack_forget()
+           self.ftp_frame.pack_forget()
        elif method == ExportMethod.EMAIL.value:
            self.file_frame.pack_forget()
+           self.ftp_frame.pack_forget()
            self.email_frame.pack(fill=tk.X, pady=(0, 10), before=self.button_frame)
+       elif method == ExportMethod.FTP.value:
+           self.file_frame.pack_forget()
+           self.email_frame.pack_forget()
+           self.ftp_frame.pack(fill=tk.X, pady=(0, 10), before=self.button_frame)
    
    def _on_format_changed(self):
        """Wird aufgerufen wenn das Export-Format geändert wird"""
@@ -670,9 +822,54 @@ class ExportEditDialog:
        format_value = format_display_map.get(display_value, ExportFormat.PDF.value)
        self.format_var.set(format_value)
        
-       # Format-spezifische Optionen (aktuell keine für die 3 Formate)
-       # Könnte später erweitert werden
-       pass
+       # Format-spezifische Optionen
+       if format_value == ExportFormat.SEARCHABLE_PDF_A.value:
+           self._create_pdfa_options()
+   
+   def _create_pdfa_options(self):
+       """Optionen für durchsuchbares PDF/A (OCRmyPDF)"""
+       frame = self.format_options_frame
+       
+       ttk.Label(frame, text="OCR-Modus:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+       ttk.Combobox(frame, textvariable=self.ocr_mode_var, state="readonly", width=35,
+                    values=list(self.OCR_MODE_LABELS.values())).grid(row=0, column=1, sticky=tk.W, pady=2)
+       
+       ttk.Label(frame, text="Parallele Seiten:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+       jobs_frame = ttk.Frame(frame)
+       jobs_frame.grid(row=1, column=1, sticky=tk.W, pady=2)
+       ttk.Spinbox(jobs_frame, from_=0, to=64, textvariable=self.jobs_var, width=5).pack(side=tk.LEFT)
+       ttk.Label(jobs_frame, text="0 = alle Prozessorkerne", foreground="gray").pack(side=tk.LEFT, padx=(5, 0))
+       
+       ttk.Label(frame, text="Optimierung:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+       optimize_frame = ttk.Frame(frame)
+       optimize_frame.grid(row=2, column=1, sticky=tk.W, pady=2)
+       ttk.Spinbox(optimize_frame, from_=0, to=3, textvariable=self.optimize_var, width=5,
+                   state="readonly").pack(side=tk.LEFT)
+       ttk.Label(optimize_frame, text="0 = aus, 3 = stärkste Verkleinerung",
+                 foreground="gray").pack(side=tk.LEFT, padx=(5, 0))
+       
+       ttk.Checkbutton(frame, text="Seitenausrichtung erkennen und drehen",
+                       variable=self.rotate_pages_var).grid(row=3, column=0, columnspan=2,
+                                                            sticky=tk.W, pady=(5, 0))
+       ttk.Checkbutton(frame, text="Scans sammeln und gemeinsam erkennen (Datei erscheint zeitversetzt)",
+                       variable=self.batch_var).grid(row=4, column=0, columnspan=2, sticky=tk.W)
+       ttk.Checkbutton(frame, text="Digital erzeugte PDFs direkt konvertieren (ohne OCRmyPDF)",
+                       variable=self.fast_pdfa_var).grid(row=5, column=0, columnspan=2, sticky=tk.W)
+   
+   def _pdfa_params(self) -> Dict:
+       """Format-Parameter aus den PDF/A-Optionen"""
+       params = dict(self.format_params)
+       label_to_mode = {label: mode for mode, label in self.OCR_MODE_LABELS.items()}
+       params['ocr_mode'] = label_to_mode.get(self.ocr_mode_var.get(), 'auto')
+       try:
+           params['jobs'] = max(0, int(self.jobs_var.get()))
+       except (tk.TclError, ValueError):
+           params['jobs'] = 0
+       params['optimize'] = self.optimize_var.get()
+       params['rotate_pages'] = self.rotate_pages_var.get()
+       params['batch'] = self.batch_var.get()
+       params['fast_pdfa'] = self.fast_pdfa_var.get()
+       return params
    
    def _browse_path(self):
        """Öffnet Dialog zur Auswahl des Export-Pfads"""
@@ -823,6 +1020,17 @@ class ExportEditDialog:
                messagebox.showerror("Fehler", "Bitte geben Sie einen Dateinamen für den E-Mail-Anhang ein.")
                self.email_filename_entry.focus()
                return False
+               
+       elif method == ExportMethod.FTP.value:
+           if not self.ftp_host_var.get().strip():
+               messagebox.showerror("Fehler", "Bitte geben Sie einen FTP-Server ein.")
+               self.ftp_host_entry.focus()
+               return False
+           
+           if not self.filename_var.get().strip():
+               messagebox.showerror("Fehler", "Bitte geben Sie einen Dateinamen ein.")
+               self.ftp_filename_entry.focus()
+               return False
        
        return True
    
@@ -840,7 +1048,9 @@ class ExportEditDialog:
            'export_format': self.format_var.get(),
            'export_path_expression': self.path_var.get().strip(),
            'export_filename_expression': self.filename_var.get().strip(),
-           'format_params': self.format_params
+           'format_params': (self._pdfa_params()
+                             if self.format_var.get() == ExportFormat.SEARCHABLE_PDF_A.value
+                             else self.format_params)
        }
        
        # E-Mail-Konfiguration hinzufügen wenn E-Mail-Export
@@ -850,12 +1060,47 @@ class ExportEditDialog:
                subject_expression=self.email_subject_var.get().strip(),
                body_expression=self.email_body_text.get("1.0", tk.END).strip(),
                cc=self.email_cc_var.get().strip(),
-               bcc=""  # BCC entfernt für Vereinfachung
+               bcc="",  # BCC entfernt für Vereinfachung
+               digest_enabled=self.email_digest_var.get(),
+               digest_group_expression=self.email_digest_group_var.get().strip(),
+               digest_window_minutes=self._spin_value(self.email_digest_window_var, 15),
+               digest_max_attachments=self._spin_value(self.email_digest_count_var, 20),
+               digest_max_mb=self._spin_value(self.email_digest_mb_var, 20)
            )
            self.result['email_config'] = email_config.to_dict()
        
+       # FTP-Konfiguration hinzufügen wenn FTP-Export
+       if self.method_var.get() == ExportMethod.FTP.value:
+           try:
+               port = max(0, int(self.ftp_port_var.get()))
+           except (tk.TclError, ValueError):
+               port = 0
+           try:
+               resume_mb = max(0, int(self.ftp_resume_var.get()))
+           except (tk.TclError, ValueError):
+               resume_mb = 5
+           ftp_config = FtpConfig(
+               host=self.ftp_host_var.get().strip(),
+               protocol=self.ftp_protocol_var.get(),
+               port=port,
+               username=self.ftp_username_var.get().strip(),
+               password=self.ftp_password_var.get(),
+               passive=self.ftp_passive_var.get(),
+               max_parallel=self._spin_value(self.ftp_parallel_var, 2),
+               resume_mb=resume_mb
+           )
+           self.result['ftp_config'] = ftp_config.to_dict()
+       
        self.dialog.destroy()
    
+   @staticmethod
+   def _spin_value(var, default: int) -> int:
+       """Positive Ganzzahl aus einer Spinbox; default bei ungültiger Eingabe"""
+       try:
+           return max(1, int(var.get()))
+       except (tk.TclError, ValueError):
+           return default
+   
    def _on_cancel(self):
        """Bricht ab ohne zu speichern"""
        self.dialog.destroy()
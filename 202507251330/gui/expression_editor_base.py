@@ -218,9 +218,17 @@ class ExpressionEditorBase:
         for var in level_vars:
             self.var_func_tree.insert(level_node, "end", text=var, tags=("variable",))
         
+        # Aufteilen (Aktion SPLIT)
+        split_node = self.var_func_tree.insert(var_root, "end", text="Aufteilen", open=False, tags=("category",))
+        for var in ["Split_Index", "Split_Source", "Split_FirstPage", "Split_LastPage"]:
+            self.var_func_tree.insert(split_node, "end", text=var, tags=("variable",))
+        
         # OCR-Variablen
         ocr_node = self.var_func_tree.insert(var_root, "end", text="OCR", open=False, tags=("category",))
         self.var_func_tree.insert(ocr_node, "end", text="OCR_FullText", tags=("variable",))
+        for var in ["OCR_Page1", "OCR_FirstPages(2)", "OCR_LastPages(2)", "OCR_LastPage",
+                    "OCR_Language"]:
+            self.var_func_tree.insert(ocr_node, "end", text=var, tags=("variable",))
         
         # OCR-Zonen vom Hotfolder
         if self.ocr_zones:
@@ -475,11 +483,29 @@ Ergebnis:
 - <level4> = "" (leer)
 - <level5> = "" (leer)""",
                 
+                "Aufteilen": """AUFTEILEN-VARIABLEN
+
+Nur gesetzt, wenn der Hotfolder Stapel aufteilt (Aktion SPLIT).
+Jedes Teildokument wird als eigene Datei verarbeitet, <FileName>
+ist z.B. "Stapel_002".
+
+<Split_Index>: Nummer des Teildokuments (1, 2, ...)
+<Split_Source>: Dateiname des Stapels ohne Endung
+<Split_FirstPage>: Erste Seite im Stapel
+<Split_LastPage>: Letzte Seite im Stapel""",
+                
                 "OCR": """OCR-VARIABLEN
 
 Text, der aus der PDF mittels OCR erkannt wurde.
 
 <OCR_FullText>: Kompletter erkannter Text
+<OCR_Page1>: Text von Seite 1 (beliebige Seitennummer)
+<OCR_FirstPages(2)>: Text der ersten 2 Seiten
+<OCR_LastPages(2)>: Text der letzten 2 Seiten
+<OCR_LastPage>: Text der letzten Seite
+<OCR_Language>: Verwendete OCR-Sprache (z.B. deu+eng)
+
+Es werden nur die verwendeten Seiten erkannt.
 
 OCR-Zonen werden im Hotfolder-Dialog definiert.""",
                 
@@ -786,7 +812,44 @@ Enthält den gesamten OCR-Text aller Seiten.
 
 Verwendung: <OCR_FullText>
 
-Kann mit REGEXP.MATCH durchsucht werden."""
+Kann mit REGEXP.MATCH durchsucht werden.
+Wird nur eine Seite benötigt, ist <OCR_Page1> deutlich schneller.""",
+
+                "OCR_Page1": """VARIABLE: OCR_Page<N>
+
+Text einer einzelnen Seite (z.B. <OCR_Page1>, <OCR_Page3>)
+
+Nur diese Seite wird erkannt - die Auswertung beginnt,
+sobald die Seite fertig ist.
+
+Verwendung: <OCR_Page1>""",
+
+                "OCR_FirstPages(2)": """VARIABLE: OCR_FirstPages(<N>)
+
+Text der ersten N Seiten im Format von OCR_FullText
+(mit "--- Seite N ---" je Seite)
+
+Verwendung: <OCR_FirstPages(2)>""",
+
+                "OCR_LastPages(2)": """VARIABLE: OCR_LastPages(<N>)
+
+Text der letzten N Seiten im Format von OCR_FullText
+
+Verwendung: <OCR_LastPages(2)>""",
+
+                "OCR_LastPage": """VARIABLE: OCR_LastPage
+
+Text der letzten Seite (z.B. Summen auf mehrseitigen Rechnungen)
+
+Verwendung: <OCR_LastPage>""",
+
+                "OCR_Language": """VARIABLE: OCR_Language
+
+Für das Dokument verwendete OCR-Sprache (Tesseract-Kürzel).
+Reihenfolge: Zone, Hotfolder, Einstellungen; bei 'auto' die
+erkannte Sprachkombination (z.B. deu+eng)
+
+Verwendung: <OCR_Language>"""
             },
             
             "functions": {
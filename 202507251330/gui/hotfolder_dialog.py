@@ -2,10 +2,11 @@
 Dialog zum Erstellen und Bearbeiten von Hotfoldern
 """
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from typing import Optional, List, Dict
 import sys
 import os
+import re
 import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,7 +18,10 @@ from gui.zone_selector import ZoneSelector
 from gui.expression_dialog import ExpressionDialog
 from gui.export_dialog import ExportEditDialog
 from gui.compress_settings_dialog import CompressSettingsDialog
+from gui.split_settings_dialog import SplitSettingsDialog
 from core.license_manager import get_license_manager
+from core.image_preprocessing import PRESET_LABELS
+from core.ocr_language import get_ocr_language_resolver, split_languages, AUTO_LANGUAGE
 
 # Logger für dieses Modul
 logger = logging.getLogger(__name__)
@@ -50,9 +54,10 @@ class HotfolderDialog:
         self.input_path_var = tk.StringVar(value=hotfolder.input_path if hotfolder else "")
         self.process_pairs_var = tk.BooleanVar(value=hotfolder.process_pairs if hotfolder else False)
         
-        # Action Variablen - OCR wurde entfernt
+        # Action Variablen (Ausführung immer in der Reihenfolge Aufteilen, Komprimieren, OCR, PDF/A)
         self.action_vars = {}
-        basic_actions = [ProcessingAction.COMPRESS]
+        basic_actions = [ProcessingAction.SPLIT, ProcessingAction.COMPRESS,
+                         ProcessingAction.OCR, ProcessingAction.PDF_A]
         for action in basic_actions:
             is_selected = hotfolder and action in hotfolder.actions
             self.action_vars[action] = tk.BooleanVar(value=is_selected)
@@ -158,13 +163,25 @@ class HotfolderDialog:
             variable=self.process_pairs_var,
         )
         
-        # Basis-Aktionen (ohne OCR)
+        # Basis-Aktionen
         self.actions_frame = ttk.LabelFrame(self.basic_frame, text="Vorverarbeitungsschritte", padding="10")
         
         action_descriptions = {
+            ProcessingAction.SPLIT: {
+                "text": "Stapel aufteilen",
+                "desc": "Trennt an Leerseiten, Trennblättern oder nach fester Seitenzahl - jeder Teil ist ein eigenes Dokument"
+            },
             ProcessingAction.COMPRESS: {
                 "text": "PDF komprimieren",
                 "desc": "Reduziert die Dateigröße durch Komprimierung"
+            },
+            ProcessingAction.OCR: {
+                "text": "Texterkennung (OCR)",
+                "desc": "Ergänzt eine Textebene für Seiten ohne Text - einmal für alle Exporte"
+            },
+            ProcessingAction.PDF_A: {
+                "text": "PDF/A erstellen",
+                "desc": "Wandelt die Datei einmal nach PDF/A - PDF/A-Exporte übernehmen das Ergebnis"
             }
         }
         
@@ -193,6 +210,16 @@ class HotfolderDialog:
                     if ProcessingAction.COMPRESS.value in self.action_params:
                         settings_btn.config(text="⚙️ Konfiguriert")
                 
+                # Settings-Button für Aufteilen
+                if action == ProcessingAction.SPLIT:
+                    settings_btn = ttk.Button(check_frame, text="⚙️",
+                                            command=self._configure_split_settings)
+                    settings_btn.pack(side=tk.LEFT, padx=(10, 0))
+                    self.action_settings_buttons[action] = settings_btn
+                    
+                    if ProcessingAction.SPLIT.value in self.action_params:
+                        settings_btn.config(text="⚙️ Konfiguriert")
+                
                 check_frame.pack(anchor=tk.W)
                 
                 desc_label = ttk.Label(frame, text=info["desc"], foreground="gray", 
@@ -223,6 +250,26 @@ class HotfolderDialog:
             text="Definieren Sie Bereiche im PDF, aus denen Text extrahiert werden soll.",
             wraplength=600, foreground="gray")
         
+        # Bildvorverarbeitung für die OCR (Hotfolder-Standard)
+        self.preprocessing_frame = ttk.Frame(self.ocr_zones_frame)
+        self.preprocessing_label = ttk.Label(self.preprocessing_frame, text="Bildvorverarbeitung:")
+        current_preprocessing = self.action_params.get('ocr', {}).get('preprocessing')
+        self.preprocessing_var = tk.StringVar(value=self._preprocessing_label(current_preprocessing))
+        self.preprocessing_combo = ttk.Combobox(
+            self.preprocessing_frame, textvariable=self.preprocessing_var,
+            values=self._preprocessing_choices(current_preprocessing),
+            state="readonly", width=50
+        )
+        
+        # OCR-Sprache (Hotfolder-Standard, leer = Einstellungen)
+        self.language_label = ttk.Label(self.preprocessing_frame, text="Sprache:")
+        current_language = self.action_params.get('ocr', {}).get('language', '')
+        self.language_var = tk.StringVar(value=current_language or self.INHERIT_LANGUAGE_LABEL)
+        self.language_combo = ttk.Combobox(
+            self.preprocessing_frame, textvariable=self.language_var,
+            values=self._language_choices(), width=20
+        )
+        
         # OCR-Zonen Toolbar
         self.ocr_toolbar = ttk.Frame(self.ocr_zones_frame)
         self.add_zone_button = ttk.Button(self.ocr_toolbar, text="➕ Neue Zone", 
@@ -231,6 +278,12 @@ class HotfolderDialog:
                                           command=self._edit_ocr_zone, state=tk.DISABLED)
         self.rename_zone_button = ttk.Button(self.ocr_toolbar, text="📝 Umbenennen", 
                                             command=self._rename_ocr_zone, state=tk.DISABLED)
+        self.validate_zone_button = ttk.Button(self.ocr_toolbar, text="🔍 Prüfmuster", 
+                                              command=self._set_zone_validation, state=tk.DISABLED)
+        self.zone_preprocessing_button = ttk.Button(self.ocr_toolbar, text="🖼️ Vorverarbeitung", 
+                                                   command=self._set_zone_preprocessing, state=tk.DISABLED)
+        self.zone_language_button = ttk.Button(self.ocr_toolbar, text="🌐 Sprache", 
+                                              command=self._set_zone_language, state=tk.DISABLED)
         self.delete_zone_button = ttk.Button(self.ocr_toolbar, text="🗑️ Löschen", 
                                             command=self._delete_ocr_zone, state=tk.DISABLED)
         
@@ -365,10 +418,18 @@ class HotfolderDialog:
         # OCR-Zonen (jetzt unten)
         self.ocr_zones_frame.pack(fill=tk.BOTH, expand=True)
         self.ocr_zones_desc.pack(anchor=tk.W, pady=(0, 10))
+        self.preprocessing_frame.pack(fill=tk.X, pady=(0, 10))
+        self.preprocessing_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.preprocessing_combo.pack(side=tk.LEFT)
+        self.language_label.pack(side=tk.LEFT, padx=(15, 5))
+        self.language_combo.pack(side=tk.LEFT)
         self.ocr_toolbar.pack(fill=tk.X, pady=(0, 5))
         self.add_zone_button.pack(side=tk.LEFT, padx=(0, 5))
         self.edit_zone_button.pack(side=tk.LEFT, padx=(0, 5))
         self.rename_zone_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.validate_zone_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.zone_preprocessing_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.zone_language_button.pack(side=tk.LEFT, padx=(0, 5))
         self.delete_zone_button.pack(side=tk.LEFT)
         self.zones_listbox.pack(fill=tk.BOTH, expand=True)
         
@@ -418,7 +479,14 @@ class HotfolderDialog:
         self.zones_listbox.delete(0, tk.END)
         for zone in self.ocr_zones:
             # Zone-Name hat bereits OCR_ Präfix
-            zone_text = f"{zone['name']} - Seite {zone['page_num']}"
+            page = "letzte Seite" if zone['page_num'] < 0 else f"Seite {zone['page_num']}"
+            zone_text = f"{zone['name']} - {page}"
+            if zone.get('validation_regex'):
+                zone_text += f"  [Prüfmuster: {zone['validation_regex']}]"
+            if zone.get('preprocessing'):
+                zone_text += f"  [Vorverarbeitung: {self._preprocessing_label(zone['preprocessing'])}]"
+            if zone.get('language'):
+                zone_text += f"  [Sprache: {zone['language']}]"
             self.zones_listbox.insert(tk.END, zone_text)
     
     def _refresh_export_list(self):
@@ -652,10 +720,16 @@ class HotfolderDialog:
         if selection:
             self.edit_zone_button.config(state=tk.NORMAL)
             self.rename_zone_button.config(state=tk.NORMAL)
+            self.validate_zone_button.config(state=tk.NORMAL)
+            self.zone_preprocessing_button.config(state=tk.NORMAL)
+            self.zone_language_button.config(state=tk.NORMAL)
             self.delete_zone_button.config(state=tk.NORMAL)
         else:
             self.edit_zone_button.config(state=tk.DISABLED)
             self.rename_zone_button.config(state=tk.DISABLED)
+            self.validate_zone_button.config(state=tk.DISABLED)
+            self.zone_preprocessing_button.config(state=tk.DISABLED)
+            self.zone_language_button.config(state=tk.DISABLED)
             self.delete_zone_button.config(state=tk.DISABLED)
 
     def _add_ocr_zone(self):
@@ -736,6 +810,159 @@ class HotfolderDialog:
             zone['name'] = new_name
             self._refresh_zones_list()
 
+    def _set_zone_validation(self):
+        """Setzt das Prüfmuster (regulärer Ausdruck) der ausgewählten OCR-Zone"""
+        selection = self.zones_listbox.curselection()
+        if not selection:
+            return
+        
+        index = selection[0]
+        zone = self.ocr_zones[index]
+        
+        pattern = simpledialog.askstring(
+            "Prüfmuster",
+            "Regulärer Ausdruck, den das OCR-Ergebnis erfüllen muss\n"
+            "(leer = nur nicht-leeres Ergebnis prüfen).\n"
+            "Bei Nichterfüllung wird mit höherer Auflösung erneut gelesen.",
+            initialvalue=zone.get('validation_regex', ''),
+            parent=self.dialog
+        )
+        if pattern is None:
+            return
+        
+        pattern = pattern.strip()
+        if pattern:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                messagebox.showerror("Fehler", f"Ungültiger regulärer Ausdruck: {e}")
+                return
+        
+        zone['validation_regex'] = pattern
+        self._refresh_zones_list()
+
+    CUSTOM_PREPROCESSING_LABEL = "Benutzerdefiniert (Konfigurationsdatei)"
+    INHERIT_PREPROCESSING_LABEL = "Wie Hotfolder"
+
+    def _preprocessing_label(self, value) -> str:
+        """Anzeigename einer Vorverarbeitungs-Einstellung"""
+        if not value:
+            return PRESET_LABELS["off"]
+        if isinstance(value, str) and value in PRESET_LABELS:
+            return PRESET_LABELS[value]
+        return self.CUSTOM_PREPROCESSING_LABEL
+
+    def _preprocessing_choices(self, current) -> List[str]:
+        """Auswahlliste; eigene Einstellungen aus der Konfiguration bleiben wählbar"""
+        choices = list(PRESET_LABELS.values())
+        if self._preprocessing_label(current) == self.CUSTOM_PREPROCESSING_LABEL:
+            choices.append(self.CUSTOM_PREPROCESSING_LABEL)
+        return choices
+
+    def _preprocessing_value(self, label: str, current):
+        """Wandelt einen Anzeigenamen zurück in den gespeicherten Wert"""
+        if label == self.CUSTOM_PREPROCESSING_LABEL:
+            return current
+        for key, preset_label in PRESET_LABELS.items():
+            if preset_label == label:
+                return key
+        return "off"
+
+    def _set_zone_preprocessing(self):
+        """Setzt die Bildvorverarbeitung der ausgewählten OCR-Zone"""
+        selection = self.zones_listbox.curselection()
+        if not selection:
+            return
+        
+        index = selection[0]
+        zone = self.ocr_zones[index]
+        current = zone.get('preprocessing')
+        
+        dialog = tk.Toplevel(self.dialog)
+        dialog.title("Vorverarbeitung der Zone")
+        dialog.resizable(False, False)
+        dialog.transient(self.dialog)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="20")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=f"Bildvorverarbeitung für {zone['name']}:").pack(anchor=tk.W)
+        
+        choices = [self.INHERIT_PREPROCESSING_LABEL] + self._preprocessing_choices(current)
+        var = tk.StringVar(value=self._preprocessing_label(current) if current
+                           else self.INHERIT_PREPROCESSING_LABEL)
+        ttk.Combobox(frame, textvariable=var, values=choices, state="readonly",
+                     width=50).pack(fill=tk.X, pady=(5, 20))
+        
+        def on_ok():
+            label = var.get()
+            if label == self.INHERIT_PREPROCESSING_LABEL:
+                zone.pop('preprocessing', None)
+            else:
+                zone['preprocessing'] = self._preprocessing_value(label, current)
+            self._refresh_zones_list()
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(anchor=tk.E)
+        ttk.Button(button_frame, text="Abbrechen", command=dialog.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="OK", command=on_ok, default=tk.ACTIVE).pack(side=tk.RIGHT)
+        
+        dialog.wait_window()
+
+    INHERIT_LANGUAGE_LABEL = "Wie Einstellungen"
+
+    def _language_choices(self) -> List[str]:
+        """Vorschläge: Erkennung und die in den Einstellungen konfigurierten Sprachen"""
+        configured = get_ocr_language_resolver().configured_languages()
+        choices = [self.INHERIT_LANGUAGE_LABEL, AUTO_LANGUAGE] + configured
+        if len(configured) > 1:
+            choices.append("+".join(configured[:2]))
+        return choices
+
+    def _language_value(self, text: str) -> Optional[str]:
+        """
+        Prüft eine Spracheingabe ('deu', 'deu+eng', 'auto').
+        Gibt "" für die geerbte Sprache und None bei ungültiger Eingabe zurück.
+        """
+        text = (text or "").strip()
+        if not text or text == self.INHERIT_LANGUAGE_LABEL:
+            return ""
+        if text == AUTO_LANGUAGE:
+            return text
+        languages = split_languages(text)
+        if not languages or not all(re.fullmatch(r'[A-Za-z_]+', lang) for lang in languages):
+            return None
+        return "+".join(languages)
+
+    def _set_zone_language(self):
+        """Setzt die OCR-Sprache der ausgewählten OCR-Zone"""
+        selection = self.zones_listbox.curselection()
+        if not selection:
+            return
+        
+        index = selection[0]
+        zone = self.ocr_zones[index]
+        
+        text = simpledialog.askstring(
+            "Sprache der Zone",
+            "Tesseract-Sprache(n) für diese Zone, z.B. 'eng' oder 'deu+eng'\n"
+            "('auto' = erkennen, leer = wie Hotfolder).",
+            initialvalue=zone.get('language', ''),
+            parent=self.dialog
+        )
+        if text is None:
+            return
+        
+        language = self._language_value(text)
+        if language is None:
+            messagebox.showerror("Fehler", f"Ungültige Sprachangabe: {text}")
+            return
+        
+        zone['language'] = language
+        self._refresh_zones_list()
+
     def _delete_ocr_zone(self):
         """Löscht die ausgewählte OCR-Zone"""
         selection = self.zones_listbox.curselection()
@@ -852,6 +1079,20 @@ class HotfolderDialog:
             if settings_btn:
                 settings_btn.config(text="⚙️ Konfiguriert")
 
+    def _configure_split_settings(self):
+        """Öffnet Dialog zur Konfiguration der Trennstellen"""
+        current_params = self.action_params.get(ProcessingAction.SPLIT.value, {})
+        
+        dialog = SplitSettingsDialog(self.dialog, current_params)
+        result = dialog.show()
+        
+        if result:
+            self.action_params[ProcessingAction.SPLIT.value] = result
+            
+            settings_btn = self.action_settings_buttons.get(ProcessingAction.SPLIT)
+            if settings_btn:
+                settings_btn.config(text="⚙️ Konfiguriert")
+
     def _validate(self) -> bool:
         """Validiert die Eingaben"""
         # Name prüfen
@@ -886,6 +1127,17 @@ class HotfolderDialog:
         selected_actions = [action.value for action, var in self.action_vars.items() 
                            if var.get()]
         
+        # OCR-Bildvorverarbeitung des Hotfolders
+        ocr_params = dict(self.action_params.get('ocr', {}))
+        ocr_params['preprocessing'] = self._preprocessing_value(
+            self.preprocessing_var.get(), ocr_params.get('preprocessing'))
+        language = self._language_value(self.language_var.get())
+        if language is None:
+            messagebox.showerror("Fehler", f"Ungültige OCR-Sprache: {self.language_var.get()}")
+            return
+        ocr_params['language'] = language
+        self.action_params['ocr'] = ocr_params
+        
         # Hole Beschreibung aus dem Text-Widget
         description = self.description_text.get("1.0", tk.END).strip()
         
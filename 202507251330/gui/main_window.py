@@ -16,6 +16,9 @@ from gui.database_config_dialog import DatabaseConfigDialog
 from core.hotfolder_manager import HotfolderManager
 from models.hotfolder_config import ProcessingAction
 from core.license_manager import get_license_manager
+from core.email_spool import get_email_spool, QUEUED, FAILED, DIGEST
+from core.export_publisher import get_export_publisher
+from core.pdfa_batch import get_pdfa_batcher
 
 
 class MainWindow:
@@ -51,7 +54,9 @@ class MainWindow:
         self._bind_keyboard_shortcuts()
 
         # Initialisiere Statusleiste
+        self._status_message_shown = False
         self._update_status()
+        self.root.after(30000, self._refresh_status)
 
     def _configure_styles(self):
         """Konfiguriert alle ttk-Stile für ein modernes Aussehen."""
@@ -672,12 +677,42 @@ class MainWindow:
     def _update_status(self, message: str = None):
         """Aktualisiert die Statusleiste."""
         if message:
+            self._status_message_shown = True
             self.status_label.config(text=message)
             self.root.after(4000, self._update_status) # Nachricht nach 4s zurücksetzen
         else:
+            self._status_message_shown = False
             active_count = len([h for h in self.manager.get_hotfolders() if h.enabled])
             total_count = len(self.manager.get_hotfolders())
-            self.status_label.config(text=f"{active_count} von {total_count} Hotfoldern aktiv")
+            text = f"{active_count} von {total_count} Hotfoldern aktiv"
+            
+            # Zustellstatus der E-Mail-Warteschlange
+            mail_status = get_email_spool().status()
+            if mail_status[QUEUED]:
+                text += f" | {mail_status[QUEUED]} E-Mail(s) in Warteschlange"
+            if mail_status[DIGEST]:
+                text += f" | {mail_status[DIGEST]} Dokument(e) für Sammelversand"
+            if mail_status[FAILED]:
+                text += f" | {mail_status[FAILED]} E-Mail(s) fehlgeschlagen"
+            
+            # Übertragung der Datei-Exporte in die Exportordner
+            publisher = get_export_publisher()
+            transfers = publisher.pending()
+            if transfers:
+                text += f" | {transfers} Export(e) in Übertragung"
+            failed_transfers = publisher.failed()
+            if failed_transfers:
+                text += f" | {failed_transfers} Übertragung(en) fehlgeschlagen"
+            failed_pdfa = get_pdfa_batcher().failed()
+            if failed_pdfa:
+                text += f" | {failed_pdfa} PDF/A-Export(e) fehlgeschlagen"
+            self.status_label.config(text=text)
+
+    def _refresh_status(self):
+        """Aktualisiert die Statusleiste regelmäßig (Zustellstatus der E-Mails und Exporte)"""
+        if not self._status_message_shown:
+            self._update_status()
+        self.root.after(30000, self._refresh_status)
 
     def _on_closing(self):
         """Wird beim Schließen des Fensters aufgerufen."""
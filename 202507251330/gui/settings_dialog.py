@@ -16,6 +16,7 @@ from gui.oauth2_setup_dialog import OAuth2SetupDialog
 from core.license_manager import get_license_manager
 from core.hotfolder_manager import HotfolderManager
 from core.config_manager import ConfigManager
+from core.ocr_language import split_languages, AUTO_LANGUAGE
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)  # GUI-Komponenten nur INFO und höher
@@ -121,6 +122,41 @@ class SettingsDialog:
         self.error_path_button = ttk.Button(self.error_path_frame, text="Durchsuchen...", 
                                            command=self._browse_error_path)
         
+        # Datei-Export
+        self.export_frame_content = ttk.LabelFrame(self.general_frame,
+                                                  text="Datei-Export", padding="10")
+        self.export_write_behind_var = tk.BooleanVar()
+        self.export_write_behind_check = ttk.Checkbutton(self.export_frame_content,
+            text="Im Hintergrund in die Exportordner übertragen (Netzlaufwerke)",
+            variable=self.export_write_behind_var)
+        self.export_queue_grid = ttk.Frame(self.export_frame_content)
+        self.export_queue_label = ttk.Label(self.export_queue_grid, text="Warteschlange je Laufwerk:")
+        self.export_queue_var = tk.IntVar()
+        self.export_queue_spinbox = ttk.Spinbox(self.export_queue_grid, from_=1, to=1000,
+                                               textvariable=self.export_queue_var, width=10)
+        self.export_queue_hint = ttk.Label(self.export_queue_grid, text="Dateien (ist sie voll, wartet der Export)",
+                                          foreground="gray")
+        
+        # OCR-Sprachen
+        self.ocr_frame_content = ttk.LabelFrame(self.general_frame, 
+                                               text="OCR-Sprachen", padding="10")
+        self.ocr_desc = ttk.Label(self.ocr_frame_content, 
+            text="Standard für Hotfolder und Zonen ohne eigene Sprache. 'auto' wählt je Dokument\n"
+                 "aus Standard- und zusätzlichen Sprachen die kleinste passende Kombination.\n"
+                 "Die Sprachmodelle werden beim Start vorgeladen.",
+            wraplength=500, foreground="gray")
+        self.ocr_grid = ttk.Frame(self.ocr_frame_content)
+        self.ocr_language_label = ttk.Label(self.ocr_grid, text="Standardsprache:")
+        self.ocr_language_var = tk.StringVar()
+        self.ocr_language_combo = ttk.Combobox(self.ocr_grid, textvariable=self.ocr_language_var,
+                                               values=["deu", "eng", "deu+eng", AUTO_LANGUAGE],
+                                               width=20)
+        self.ocr_additional_label = ttk.Label(self.ocr_grid, text="Zusätzliche Sprachen:")
+        self.ocr_additional_var = tk.StringVar()
+        self.ocr_additional_entry = ttk.Entry(self.ocr_grid, 
+                                             textvariable=self.ocr_additional_var, width=30)
+        self.ocr_additional_hint = ttk.Label(self.ocr_grid, text="z.B. eng, fra", foreground="gray")
+        
         # E-Mail-Einstellungen
         self.email_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.email_frame, text="E-Mail")
@@ -160,6 +196,29 @@ class SettingsDialog:
                                              variable=self.smtp_tls_var,
                                              command=self._on_tls_changed)
         
+        # Verbindungs-Pool
+        self.smtp_connections_label = ttk.Label(self.smtp_frame, text="Max. Verbindungen:")
+        self.smtp_connections_var = tk.IntVar()
+        self.smtp_connections_spinbox = ttk.Spinbox(self.smtp_frame, from_=1, to=10,
+                                                   textvariable=self.smtp_connections_var, width=10)
+        
+        self.smtp_per_connection_label = ttk.Label(self.smtp_frame, text="Nachrichten je Verbindung:")
+        self.smtp_per_connection_var = tk.IntVar()
+        self.smtp_per_connection_spinbox = ttk.Spinbox(self.smtp_frame, from_=1, to=1000,
+                                                      textvariable=self.smtp_per_connection_var, width=10)
+        
+        self.smtp_rate_label = ttk.Label(self.smtp_frame, text="Nachrichten pro Minute:")
+        self.smtp_rate_var = tk.IntVar()
+        self.smtp_rate_spinbox = ttk.Spinbox(self.smtp_frame, from_=0, to=10000,
+                                            textvariable=self.smtp_rate_var, width=10)
+        self.smtp_rate_hint = ttk.Label(self.smtp_frame, text="0 = unbegrenzt (Drosselung des Anbieters beachten)",
+                                       foreground="gray", font=('TkDefaultFont', 9))
+        
+        self.smtp_spool_var = tk.BooleanVar()
+        self.smtp_spool_check = ttk.Checkbutton(self.smtp_frame,
+                                               text="Im Hintergrund senden (Warteschlange mit Wiederholung)",
+                                               variable=self.smtp_spool_var)
+        
         # Standard-Anmeldung
         self.smtp_auth_frame = ttk.LabelFrame(self.email_frame, text="Standard-Anmeldung", padding="10")
         
@@ -269,6 +328,22 @@ class SettingsDialog:
         self.error_path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.error_path_button.pack(side=tk.LEFT, padx=(5, 0))
         
+        self.export_frame_content.pack(fill=tk.X, pady=(0, 10))
+        self.export_write_behind_check.pack(anchor=tk.W)
+        self.export_queue_grid.pack(fill=tk.X, pady=(5, 0))
+        self.export_queue_label.grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.export_queue_spinbox.grid(row=0, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+        self.export_queue_hint.grid(row=0, column=2, sticky=tk.W, padx=(5, 0), pady=2)
+        
+        self.ocr_frame_content.pack(fill=tk.X, pady=(0, 10))
+        self.ocr_desc.pack(anchor=tk.W, pady=(0, 10))
+        self.ocr_grid.pack(fill=tk.X)
+        self.ocr_language_label.grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.ocr_language_combo.grid(row=0, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+        self.ocr_additional_label.grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.ocr_additional_entry.grid(row=1, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+        self.ocr_additional_hint.grid(row=1, column=2, sticky=tk.W, padx=(5, 0), pady=2)
+        
         # E-Mail-Einstellungen
         # Authentifizierung
         self.auth_frame.pack(fill=tk.X, pady=(0, 10))
@@ -285,6 +360,16 @@ class SettingsDialog:
                                                                 sticky="ew", pady=10)
         self.smtp_ssl_check.grid(row=3, column=0, columnspan=2, sticky=tk.W)
         self.smtp_tls_check.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        ttk.Separator(self.smtp_frame, orient='horizontal').grid(row=5, column=0, columnspan=2,
+                                                                sticky="ew", pady=10)
+        self.smtp_connections_label.grid(row=6, column=0, sticky=tk.W, padx=(0, 10))
+        self.smtp_connections_spinbox.grid(row=6, column=1, sticky=tk.W)
+        self.smtp_per_connection_label.grid(row=7, column=0, sticky=tk.W, padx=(0, 10), pady=(5, 0))
+        self.smtp_per_connection_spinbox.grid(row=7, column=1, sticky=tk.W, pady=(5, 0))
+        self.smtp_rate_label.grid(row=8, column=0, sticky=tk.W, padx=(0, 10), pady=(5, 0))
+        self.smtp_rate_spinbox.grid(row=8, column=1, sticky=tk.W, pady=(5, 0))
+        self.smtp_rate_hint.grid(row=9, column=0, columnspan=2, sticky=tk.W, pady=(2, 0))
+        self.smtp_spool_check.grid(row=10, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
         self.smtp_frame.columnconfigure(1, weight=1)
         
         # Standard-Anmeldung (initial sichtbar)
@@ -330,10 +415,18 @@ class SettingsDialog:
     def _load_values(self):
         """Lädt die aktuellen Einstellungen in die UI"""
         self.error_path_var.set(self.settings.default_error_path)
+        self.export_write_behind_var.set(self.settings.export_write_behind)
+        self.export_queue_var.set(self.settings.export_queue_per_target)
+        self.ocr_language_var.set(self.settings.ocr_default_language)
+        self.ocr_additional_var.set(", ".join(self.settings.ocr_additional_languages))
         self.smtp_server_var.set(self.settings.smtp_server)
         self.smtp_port_var.set(self.settings.smtp_port)
         self.smtp_ssl_var.set(self.settings.smtp_use_ssl)
         self.smtp_tls_var.set(self.settings.smtp_use_tls)
+        self.smtp_connections_var.set(self.settings.smtp_max_connections)
+        self.smtp_per_connection_var.set(self.settings.smtp_messages_per_connection)
+        self.smtp_rate_var.set(self.settings.smtp_messages_per_minute)
+        self.smtp_spool_var.set(self.settings.smtp_use_spool)
         self.smtp_username_var.set(self.settings.smtp_username)
         self.smtp_password_var.set(self.settings.smtp_password)
         self.smtp_from_var.set(self.settings.smtp_from_address)
@@ -680,8 +773,36 @@ class SettingsDialog:
                 f"Der Fehlerpfad konnte nicht erstellt werden:\n{e}")
             return False
         
+        # OCR-Sprachen: Tesseract-Kürzel, mit + kombinierbar
+        language = self.ocr_language_var.get().strip()
+        if language and language != AUTO_LANGUAGE and not self._valid_languages(language):
+            messagebox.showerror("Fehler", f"Ungültige OCR-Standardsprache: {language}")
+            return False
+        for additional in self._additional_languages():
+            if not self._valid_languages(additional):
+                messagebox.showerror("Fehler", f"Ungültige zusätzliche OCR-Sprache: {additional}")
+                return False
+        
         return True
     
+    @staticmethod
+    def _valid_languages(value: str) -> bool:
+        """Prüft eine Sprachangabe wie 'deu' oder 'deu+eng'"""
+        languages = split_languages(value)
+        return bool(languages) and all(lang.replace('_', '').isalpha() for lang in languages)
+    
+    def _additional_languages(self):
+        """Zusätzliche Sprachen aus dem Eingabefeld (Komma- oder Leerzeichen-getrennt)"""
+        return [part for part in self.ocr_additional_var.get().replace(',', ' ').split() if part]
+    
+    @staticmethod
+    def _int_value(var, default: int) -> int:
+        """Ganzzahl aus einer Spinbox; default bei ungültiger Eingabe"""
+        try:
+            return int(var.get())
+        except (tk.TclError, ValueError):
+            return default
+    
     def _on_save(self):
         """Speichert die Einstellungen"""
         if not self._validate():
@@ -689,10 +810,18 @@ class SettingsDialog:
         
         # Aktualisiere Settings-Objekt
         self.settings.default_error_path = self.error_path_var.get().strip()
+        self.settings.export_write_behind = self.export_write_behind_var.get()
+        self.settings.export_queue_per_target = max(1, self._int_value(self.export_queue_var, 32))
+        self.settings.ocr_default_language = self.ocr_language_var.get().strip() or "deu"
+        self.settings.ocr_additional_languages = self._additional_languages()
         self.settings.smtp_server = self.smtp_server_var.get()
         self.settings.smtp_port = self.smtp_port_var.get()
         self.settings.smtp_use_ssl = self.smtp_ssl_var.get()
         self.settings.smtp_use_tls = self.smtp_tls_var.get()
+        self.settings.smtp_max_connections = max(1, self._int_value(self.smtp_connections_var, 2))
+        self.settings.smtp_messages_per_connection = max(1, self._int_value(self.smtp_per_connection_var, 50))
+        self.settings.smtp_messages_per_minute = max(0, self._int_value(self.smtp_rate_var, 0))
+        self.settings.smtp_use_spool = self.smtp_spool_var.get()
         self.settings.smtp_username = self.smtp_username_var.get()
         self.settings.smtp_password = self.smtp_password_var.get()
         self.settings.smtp_from_address = self.smtp_from_var.get()
@@ -0,0 +1,197 @@
+"""
+Dialog für die Einstellungen der Aktion "Stapel aufteilen"
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from typing import Dict, Optional
+import sys
+import os
+import re
+import shutil
+import tempfile
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.document_splitter import DocumentSplitter, SplitRules
+
+logger = logging.getLogger(__name__)
+
+
+class SplitSettingsDialog:
+    """Dialog für Trennstellen beim Aufteilen von Stapel-Scans"""
+
+    def __init__(self, parent, initial_params: Optional[Dict] = None):
+        self.parent = parent
+        self.result = None
+
+        rules = SplitRules.from_params(initial_params)
+
+        # Dialog erstellen
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Stapel aufteilen")
+        self.dialog.geometry("520x520")
+        self.dialog.resizable(False, False)
+
+        # Dialog zentrieren
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() - 520) // 2
+        y = (self.dialog.winfo_screenheight() - 520) // 2
+        self.dialog.geometry(f"+{x}+{y}")
+
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # Variablen
+        self.split_blank_var = tk.BooleanVar(value=rules.split_blank)
+        self.blank_threshold_var = tk.DoubleVar(value=rules.blank_threshold * 100)
+        self.pages_var = tk.IntVar(value=rules.pages_per_document)
+        self.marker_var = tk.StringVar(value=rules.marker_text)
+        self.marker_regex_var = tk.BooleanVar(value=rules.marker_regex)
+        self.keep_separators_var = tk.BooleanVar(value=rules.keep_separators)
+        self.blank_dpi = rules.blank_dpi
+
+        # GUI erstellen
+        self._create_gui()
+
+        # Events
+        self.dialog.bind('<Return>', lambda e: self._on_ok())
+        self.dialog.bind('<Escape>', lambda e: self._on_cancel())
+        self.dialog.protocol("WM_DELETE_WINDOW", self._on_cancel)
+
+    def _create_gui(self):
+        """Erstellt die GUI"""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Leerseiten
+        blank_frame = ttk.LabelFrame(main_frame, text="Leerseiten", padding="10")
+        blank_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Checkbutton(blank_frame, text="An Leerseiten trennen",
+                        variable=self.split_blank_var).pack(anchor=tk.W)
+
+        threshold_frame = ttk.Frame(blank_frame)
+        threshold_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(threshold_frame, text="Max. Tintenanteil (%):").pack(side=tk.LEFT)
+        ttk.Spinbox(threshold_frame, from_=0.0, to=5.0, increment=0.1, width=6,
+                    textvariable=self.blank_threshold_var).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(blank_frame, text="Seiten mit Textebene gelten nie als leer",
+                  foreground="gray", font=('TkDefaultFont', 9)).pack(anchor=tk.W, pady=(5, 0))
+
+        # Trennblatt
+        marker_frame = ttk.LabelFrame(main_frame, text="Trennblatt", padding="10")
+        marker_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(marker_frame, text="Text auf dem Trennblatt (leer = aus):").pack(anchor=tk.W)
+        ttk.Entry(marker_frame, textvariable=self.marker_var, width=40).pack(fill=tk.X, pady=(5, 0))
+        ttk.Checkbutton(marker_frame, text="Als regulären Ausdruck auswerten",
+                        variable=self.marker_regex_var).pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(marker_frame, text="Gesucht wird in der Textebene der Seite",
+                  foreground="gray", font=('TkDefaultFont', 9)).pack(anchor=tk.W, pady=(5, 0))
+
+        # Seitenzahl
+        pages_frame = ttk.LabelFrame(main_frame, text="Feste Seitenzahl", padding="10")
+        pages_frame.pack(fill=tk.X, pady=(0, 10))
+
+        row = ttk.Frame(pages_frame)
+        row.pack(fill=tk.X)
+        ttk.Label(row, text="Seiten je Dokument (0 = aus):").pack(side=tk.LEFT)
+        ttk.Spinbox(row, from_=0, to=999, width=6,
+                    textvariable=self.pages_var).pack(side=tk.LEFT, padx=(5, 0))
+
+        ttk.Checkbutton(main_frame, text="Trennseiten am Ende des vorherigen Dokuments behalten",
+                        variable=self.keep_separators_var).pack(anchor=tk.W, pady=(0, 10))
+
+        # Test
+        test_frame = ttk.Frame(main_frame)
+        test_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Button(test_frame, text="🔍 Mit PDF testen...",
+                   command=self._test_split).pack(side=tk.LEFT)
+
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, side=tk.BOTTOM)
+
+        ttk.Button(button_frame, text="Abbrechen",
+                   command=self._on_cancel).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="OK", command=self._on_ok,
+                   default=tk.ACTIVE).pack(side=tk.RIGHT)
+
+    def _collect_params(self) -> Optional[Dict]:
+        """Liest die Eingaben; None bei ungültigen Werten"""
+        try:
+            threshold = float(self.blank_threshold_var.get()) / 100
+            pages = int(self.pages_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Fehler", "Bitte gültige Zahlen eingeben.", parent=self.dialog)
+            return None
+
+        marker = self.marker_var.get().strip()
+        if marker and self.marker_regex_var.get():
+            try:
+                re.compile(marker)
+            except re.error as e:
+                messagebox.showerror("Fehler", f"Ungültiger regulärer Ausdruck: {e}", parent=self.dialog)
+                return None
+
+        return {
+            'split_blank': self.split_blank_var.get(),
+            'blank_threshold': max(0.0, threshold),
+            'blank_dpi': self.blank_dpi,
+            'pages_per_document': max(0, pages),
+            'marker_text': marker,
+            'marker_regex': self.marker_regex_var.get(),
+            'keep_separators': self.keep_separators_var.get()
+        }
+
+    def _test_split(self):
+        """Zeigt die Teildokumente, die für eine Beispiel-PDF entstehen würden"""
+        params = self._collect_params()
+        if params is None:
+            return
+
+        filename = filedialog.askopenfilename(
+            parent=self.dialog,
+            title="Test-PDF auswählen",
+            filetypes=[("PDF-Dateien", "*.pdf"), ("Alle Dateien", "*.*")]
+        )
+        if not filename:
+            return
+
+        temp_dir = tempfile.mkdtemp(prefix="belegpilot_split_test_")
+        try:
+            splitter = DocumentSplitter(SplitRules.from_params(params))
+            parts = list(splitter.iter_parts(filename, temp_dir))
+            lines = [f"Teil {part.index}: Seiten {part.first_page}-{part.last_page}" for part in parts]
+            if not parts:
+                message = "Alle Seiten wurden als Trennseiten erkannt."
+            elif parts[0].path == filename:
+                message = "Keine Trennstelle gefunden - die Datei bleibt ein Dokument."
+            else:
+                message = f"{len(lines)} Dokumente:\n\n" + "\n".join(lines[:30])
+                if len(lines) > 30:
+                    message += f"\n... und {len(lines) - 30} weitere"
+            messagebox.showinfo("Testergebnis", message, parent=self.dialog)
+        except Exception as e:
+            logger.error(f"Test der Aufteilung fehlgeschlagen: {e}")
+            messagebox.showerror("Fehler", f"Test fehlgeschlagen: {e}", parent=self.dialog)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _on_ok(self):
+        """Speichert Einstellungen"""
+        params = self._collect_params()
+        if params is None:
+            return
+        self.result = params
+        self.dialog.destroy()
+
+    def _on_cancel(self):
+        """Schließt Dialog"""
+        self.dialog.destroy()
+
+    def show(self) -> Optional[Dict]:
+        """Zeigt Dialog und wartet auf Ergebnis"""
+        self.dialog.wait_window()
+        return self.result
@@ -1,6 +1,7 @@
 """
 Dialog zur Konfiguration von XML-Feld-Mappings mit erweiterter Funktionsunterstützung
 """
+import re
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from typing import List, Dict, Optional, Tuple
@@ -10,6 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.xml_field_processor import FieldMapping, XMLFieldProcessor
+from core.word_index import AnchorRule, ANCHOR_DIRECTIONS
 from gui.expression_editor_base import ExpressionEditorBase
 
 
@@ -183,6 +185,9 @@ class XMLFieldDialog:
     def _add_to_tree(self, mapping: FieldMapping, description: str = ''):
         """Fügt ein Mapping zur Baumanzeige hinzu"""
         expression_text = mapping.expression[:60] + "..." if len(mapping.expression) > 60 else mapping.expression
+        if mapping.source_type == "anchor":
+            anchor_text = f"[Anker: {AnchorRule.from_dict(mapping.anchor).describe()}]"
+            expression_text = f"{anchor_text} {expression_text}".strip()
         
         item = self.tree.insert("", "end", 
                         values=(mapping.field_name, description, expression_text))
@@ -362,6 +367,14 @@ class FieldMappingEditDialog(ExpressionEditorBase):
         self.field_name_var = tk.StringVar(value=mapping.field_name if mapping else "")
         self.description_var = tk.StringVar(value=description)
         
+        # Ankerregel (source_type "anchor")
+        rule = AnchorRule.from_dict(mapping.anchor if mapping else None)
+        self.anchor_enabled_var = tk.BooleanVar(value=bool(mapping and mapping.source_type == "anchor"))
+        self.anchor_text_var = tk.StringVar(value=rule.anchor)
+        self.anchor_direction_var = tk.StringVar(value=ANCHOR_DIRECTIONS.get(rule.direction, ANCHOR_DIRECTIONS["right"]))
+        self.anchor_pattern_var = tk.StringVar(value=rule.pattern)
+        self.anchor_page_var = tk.IntVar(value=rule.page)
+        
         # Initialisiere mit der Basis-Klasse
         super().__init__(
             parent=parent,
@@ -391,6 +404,26 @@ class FieldMappingEditDialog(ExpressionEditorBase):
         # Beschreibung
         self.desc_label = ttk.Label(self.field_frame, text="Beschreibung:")
         self.desc_entry = ttk.Entry(self.field_frame, textvariable=self.description_var, width=40)
+        
+        # Anker-Extraktion
+        self.anchor_check = ttk.Checkbutton(self.field_frame, text="Wert über Ankertext ermitteln",
+                                            variable=self.anchor_enabled_var,
+                                            command=self._update_anchor_state)
+        self.anchor_frame = ttk.Frame(self.field_frame)
+        self.anchor_text_label = ttk.Label(self.anchor_frame, text="Ankertext:")
+        self.anchor_text_entry = ttk.Entry(self.anchor_frame, textvariable=self.anchor_text_var, width=25)
+        self.anchor_direction_combo = ttk.Combobox(self.anchor_frame, textvariable=self.anchor_direction_var,
+                                                   values=list(ANCHOR_DIRECTIONS.values()),
+                                                   state="readonly", width=26)
+        self.anchor_page_label = ttk.Label(self.anchor_frame, text="Seite (0 = alle, -1 = letzte):")
+        self.anchor_page_spinbox = ttk.Spinbox(self.anchor_frame, from_=-10, to=100,
+                                               textvariable=self.anchor_page_var, width=5)
+        self.anchor_pattern_label = ttk.Label(self.anchor_frame, text="Muster:")
+        self.anchor_pattern_entry = ttk.Entry(self.anchor_frame, textvariable=self.anchor_pattern_var, width=25)
+        self.anchor_hint = ttk.Label(self.anchor_frame,
+                                     text="Im Ausdruck steht der gefundene Wert als <ANCHOR> zur Verfügung "
+                                          "(leerer Ausdruck = Wert direkt übernehmen).",
+                                     foreground="gray")
     
     def _layout_additional_widgets(self):
         """Layoutet die zusätzlichen Widgets"""
@@ -401,7 +434,40 @@ class FieldMappingEditDialog(ExpressionEditorBase):
             self.field_name_entry.grid(row=0, column=1, sticky="we")
             self.desc_label.grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(5, 0))
             self.desc_entry.grid(row=1, column=1, sticky="we", pady=(5, 0))
+            self.anchor_check.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+            self.anchor_frame.grid(row=3, column=0, columnspan=2, sticky="we", pady=(5, 0))
+            self.anchor_text_label.grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+            self.anchor_text_entry.grid(row=0, column=1, sticky="we", padx=(0, 10))
+            self.anchor_direction_combo.grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
+            self.anchor_page_label.grid(row=0, column=3, sticky=tk.W, padx=(0, 5))
+            self.anchor_page_spinbox.grid(row=0, column=4, sticky=tk.W)
+            self.anchor_pattern_label.grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+            self.anchor_pattern_entry.grid(row=1, column=1, sticky="we", padx=(0, 10), pady=(5, 0))
+            self.anchor_hint.grid(row=1, column=2, columnspan=3, sticky=tk.W, pady=(5, 0))
+            self.anchor_frame.columnconfigure(1, weight=1)
             self.field_frame.columnconfigure(1, weight=1)
+            self._update_anchor_state()
+    
+    def _update_anchor_state(self):
+        """Aktiviert bzw. deaktiviert die Anker-Eingaben"""
+        state = tk.NORMAL if self.anchor_enabled_var.get() else tk.DISABLED
+        for widget in (self.anchor_text_entry, self.anchor_page_spinbox, self.anchor_pattern_entry):
+            widget.config(state=state)
+        self.anchor_direction_combo.config(state="readonly" if self.anchor_enabled_var.get() else tk.DISABLED)
+    
+    def _anchor_rule(self) -> AnchorRule:
+        """Ankerregel aus den Eingaben"""
+        directions = {label: key for key, label in ANCHOR_DIRECTIONS.items()}
+        try:
+            page = int(self.anchor_page_var.get())
+        except (tk.TclError, ValueError):
+            page = 1
+        rule = AnchorRule.from_dict(self.mapping.anchor if self.mapping else None)
+        rule.anchor = self.anchor_text_var.get().strip()
+        rule.direction = directions.get(self.anchor_direction_var.get(), "right")
+        rule.pattern = self.anchor_pattern_var.get().strip()
+        rule.page = page
+        return rule
     
     def _create_buttons(self):
         """Erstellt spezielle Buttons für Feld-Mapping"""
@@ -436,6 +502,21 @@ class FieldMappingEditDialog(ExpressionEditorBase):
         # ÄNDERUNG: Leere Ausdrücke sind jetzt erlaubt
         # Keine Validierung des Ausdrucks mehr notwendig
         
+        if self.anchor_enabled_var.get():
+            rule = self._anchor_rule()
+            if rule.direction == "regex" and not rule.pattern:
+                messagebox.showerror("Fehler", "Bitte geben Sie ein Muster für die Zeilensuche ein.")
+                return False
+            if rule.direction != "regex" and not rule.anchor:
+                messagebox.showerror("Fehler", "Bitte geben Sie einen Ankertext ein.")
+                return False
+            if rule.pattern:
+                try:
+                    re.compile(rule.pattern)
+                except re.error as e:
+                    messagebox.showerror("Fehler", f"Ungültiges Muster: {e}")
+                    return False
+        
         return True
     
     def _on_save(self):
@@ -444,15 +525,17 @@ class FieldMappingEditDialog(ExpressionEditorBase):
             return
         
         expression = self.expr_text.get("1.0", tk.END).strip()
+        use_anchor = self.anchor_enabled_var.get()
         
         self.result = {
             "field_name": self.field_name_var.get().strip(),
             "description": self.description_var.get().strip(),
-            "source_type": "expression",
+            "source_type": "anchor" if use_anchor else "expression",
             "expression": expression,  # Kann jetzt auch leer sein
             "zone": None,
             "page_num": 1,
-            "zones": []  # Keine Zonen hier, da sie vom Hotfolder kommen
+            "zones": [],  # Keine Zonen hier, da sie vom Hotfolder kommen
+            "anchor": self._anchor_rule().to_dict() if use_anchor else None
         }
         
         self.dialog.destroy()
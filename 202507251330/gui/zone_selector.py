@@ -5,7 +5,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from typing import Optional, Tuple
 from PIL import Image, ImageTk
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import tempfile
 import os
 import json
@@ -145,10 +145,17 @@ class ZoneSelector:
                                      command=self._load_pdf)
         
         self.page_label = ttk.Label(self.toolbar, text="Seite:")
-        self.page_var = tk.IntVar(value=self.page_num)
+        # Negative Seitennummer = vom Ende gezählt (-1 = letzte Seite)
+        self.page_var = tk.IntVar(value=max(self.page_num, 1))
         self.page_spinbox = ttk.Spinbox(self.toolbar, from_=1, to=100, 
                                        textvariable=self.page_var, width=5,
                                        command=self._on_page_change)
+        self.last_page_var = tk.BooleanVar(value=self.page_num < 0)
+        self.last_page_check = ttk.Checkbutton(self.toolbar, text="Letzte Seite",
+                                              variable=self.last_page_var,
+                                              command=self._on_last_page_toggle)
+        if self.page_num < 0:
+            self.page_spinbox.config(state=tk.DISABLED)
         
         self.zoom_label = ttk.Label(self.toolbar, text="Zoom:")
         self.zoom_out_button = ttk.Button(self.toolbar, text="-", width=3,
@@ -203,7 +210,8 @@ class ZoneSelector:
         self.load_button.pack(side=tk.LEFT, padx=(0, 10))
         ttk.Separator(self.toolbar, orient="vertical").pack(side=tk.LEFT, fill=tk.Y, padx=5)
         self.page_label.pack(side=tk.LEFT)
-        self.page_spinbox.pack(side=tk.LEFT, padx=(5, 10))
+        self.page_spinbox.pack(side=tk.LEFT, padx=(5, 5))
+        self.last_page_check.pack(side=tk.LEFT, padx=(0, 10))
         ttk.Separator(self.toolbar, orient="vertical").pack(side=tk.LEFT, fill=tk.Y, padx=5)
         self.zoom_label.pack(side=tk.LEFT)
         self.zoom_out_button.pack(side=tk.LEFT, padx=2)
@@ -255,6 +263,11 @@ class ZoneSelector:
                 messagebox.showerror("Fehler", "Poppler nicht gefunden! Bitte überprüfen Sie die Installation.")
                 return
             
+            # Letzte Seite: Seitenanzahl des Beispiel-PDFs ermitteln
+            if self.last_page_var.get():
+                info = pdfinfo_from_path(self.pdf_path, poppler_path=self.poppler_path)
+                self.page_var.set(int(info.get("Pages", 1)))
+            
             # Konvertiere PDF-Seite zu Bild
             with tempfile.TemporaryDirectory() as temp_dir:
                 images = convert_from_path(
@@ -305,6 +318,15 @@ class ZoneSelector:
         self._clear_zone()
         self._load_pdf_page()
     
+    def _on_last_page_toggle(self):
+        """Zone auf der letzten Seite (unabhängig von der Seitenanzahl)"""
+        if self.last_page_var.get():
+            self.page_spinbox.config(state=tk.DISABLED)
+            self._clear_zone()
+            self._load_pdf_page()
+        else:
+            self.page_spinbox.config(state=tk.NORMAL)
+    
     def _zoom_in(self):
         """Vergrößert die Ansicht"""
         self.current_scale *= 1.2
@@ -450,7 +472,7 @@ class ZoneSelector:
         if self.zone:
             self.result = {
                 'zone': self.zone,
-                'page_num': self.page_var.get(),
+                'page_num': -1 if self.last_page_var.get() else self.page_var.get(),
                 'pdf_path': self.pdf_path
             }
             self.dialog.destroy()
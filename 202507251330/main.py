@@ -4,6 +4,7 @@ belegpilot
 import sys
 import os
 import logging
+import multiprocessing
 import tkinter as tk
 from tkinter import messagebox
 
@@ -91,4 +92,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Notwendig für Worker-Prozesse (Tesseract-Engines) in der gebündelten EXE
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -29,6 +29,13 @@ class AuthMethod(Enum):
     OAUTH2 = "oauth2"
 
 
+class FtpProtocol(Enum):
+    """Protokolle für den FTP-Export"""
+    FTP = "ftp"
+    FTPS = "ftps"  # explizites TLS (AUTH TLS)
+    SFTP = "sftp"  # benötigt paramiko
+
+
 @dataclass
 class EmailConfig:
     """E-Mail-Konfiguration für Exporte"""
@@ -37,6 +44,12 @@ class EmailConfig:
     body_expression: str
     cc: Optional[str] = ""
     bcc: Optional[str] = ""
+    # Sammelversand: Dokumente je Empfänger und Gruppe in einer E-Mail bündeln
+    digest_enabled: bool = False
+    digest_group_expression: str = ""  # leer = Betreff
+    digest_window_minutes: int = 15
+    digest_max_attachments: int = 20
+    digest_max_mb: int = 20
     
     def to_dict(self) -> dict:
         return {
@@ -44,7 +57,12 @@ class EmailConfig:
             "subject_expression": self.subject_expression,
             "body_expression": self.body_expression,
             "cc": self.cc,
-            "bcc": self.bcc
+            "bcc": self.bcc,
+            "digest_enabled": self.digest_enabled,
+            "digest_group_expression": self.digest_group_expression,
+            "digest_window_minutes": self.digest_window_minutes,
+            "digest_max_attachments": self.digest_max_attachments,
+            "digest_max_mb": self.digest_max_mb
         }
     
     @classmethod
@@ -52,6 +70,39 @@ class EmailConfig:
         return cls(**data)
 
 
+@dataclass
+class FtpConfig:
+    """FTP-/SFTP-Konfiguration für Exporte (Zielordner: export_path_expression)"""
+    host: str
+    protocol: FtpProtocol = FtpProtocol.FTP
+    port: int = 0  # 0 = Standard (21 bzw. 22)
+    username: str = ""
+    password: str = ""
+    passive: bool = True
+    max_parallel: int = 2  # gleichzeitige Uploads (Verbindungen) je Server
+    resume_mb: int = 5  # größere Dateien werden nach Abbruch fortgesetzt
+    
+    def __post_init__(self):
+        if isinstance(self.protocol, str):
+            self.protocol = FtpProtocol(self.protocol)
+    
+    def to_dict(self) -> dict:
+        return {
+            "host": self.host,
+            "protocol": self.protocol.value,
+            "port": self.port,
+            "username": self.username,
+            "password": self.password,
+            "passive": self.passive,
+            "max_parallel": self.max_parallel,
+            "resume_mb": self.resume_mb
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FtpConfig':
+        return cls(**data)
+
+
 @dataclass
 class ExportConfig:
     """Konfiguration für einen einzelnen Export"""
@@ -64,6 +115,7 @@ class ExportConfig:
     export_filename_expression: str = "<FileName>"
     format_params: Dict[str, Any] = field(default_factory=dict)
     email_config: Optional[EmailConfig] = None
+    ftp_config: Optional[FtpConfig] = None
     
     def __post_init__(self):
         # Konvertiere Strings zu Enums wenn nötig
@@ -82,7 +134,8 @@ class ExportConfig:
             "export_path_expression": self.export_path_expression,
             "export_filename_expression": self.export_filename_expression,
             "format_params": self.format_params,
-            "email_config": self.email_config.to_dict() if self.email_config else None
+            "email_config": self.email_config.to_dict() if self.email_config else None,
+            "ftp_config": self.ftp_config.to_dict() if self.ftp_config else None
         }
     
     @classmethod
@@ -90,6 +143,9 @@ class ExportConfig:
         email_config = None
         if data.get("email_config"):
             email_config = EmailConfig.from_dict(data["email_config"])
+        ftp_config = None
+        if data.get("ftp_config"):
+            ftp_config = FtpConfig.from_dict(data["ftp_config"])
         
         return cls(
             id=data["id"],
@@ -100,7 +156,8 @@ class ExportConfig:
             export_path_expression=data.get("export_path_expression", ""),
             export_filename_expression=data.get("export_filename_expression", "<FileName>"),
             format_params=data.get("format_params", {}),
-            email_config=email_config
+            email_config=email_config,
+            ftp_config=ftp_config
         )
 
 
@@ -116,6 +173,10 @@ class ExportSettings:
     smtp_use_tls: bool = True
     smtp_use_ssl: bool = False
     smtp_auth_method: AuthMethod = AuthMethod.BASIC
+    smtp_max_connections: int = 2
+    smtp_messages_per_connection: int = 50
+    smtp_messages_per_minute: int = 0  # 0 = unbegrenzt
+    smtp_use_spool: bool = True  # im Hintergrund über die Warteschlange senden
     
     # OAuth2 Einstellungen
     oauth2_provider: str = ""
@@ -129,6 +190,10 @@ class ExportSettings:
     default_export_path: str = ""
     default_error_path: str = ""
     
+    # Datei-Export: Übertragung in die Exportordner im Hintergrund
+    export_write_behind: bool = True
+    export_queue_per_target: int = 32  # wartende Dateien je Laufwerk/Freigabe
+    
     # OCR-Einstellungen
     ocr_default_language: str = "deu"
     ocr_additional_languages: List[str] = field(default_factory=lambda: ["eng"])
@@ -147,6 +212,10 @@ class ExportSettings:
             "smtp_use_tls": self.smtp_use_tls,
             "smtp_use_ssl": self.smtp_use_ssl,
             "smtp_auth_method": self.smtp_auth_method.value,
+            "smtp_max_connections": self.smtp_max_connections,
+            "smtp_messages_per_connection": self.smtp_messages_per_connection,
+            "smtp_messages_per_minute": self.smtp_messages_per_minute,
+            "smtp_use_spool": self.smtp_use_spool,
             "oauth2_provider": self.oauth2_provider,
             "oauth2_client_id": self.oauth2_client_id,
             "oauth2_client_secret": self.oauth2_client_secret,
@@ -155,6 +224,8 @@ class ExportSettings:
             "oauth2_token_expiry": self.oauth2_token_expiry,
             "default_export_path": self.default_export_path,
             "default_error_path": self.default_error_path,
+            "export_write_behind": self.export_write_behind,
+            "export_queue_per_target": self.export_queue_per_target,
             "ocr_default_language": self.ocr_default_language,
             "ocr_additional_languages": self.ocr_additional_languages
         }
@@ -168,9 +239,12 @@ class ExportSettings:
         field_names = {
             'smtp_server', 'smtp_port', 'smtp_username', 'smtp_password',
             'smtp_from_address', 'smtp_use_tls', 'smtp_use_ssl', 'smtp_auth_method',
+            'smtp_max_connections', 'smtp_messages_per_connection', 'smtp_messages_per_minute',
+            'smtp_use_spool',
             'oauth2_provider', 'oauth2_client_id', 'oauth2_client_secret',
             'oauth2_access_token', 'oauth2_refresh_token', 'oauth2_token_expiry',
             'default_export_path', 'default_error_path',
+            'export_write_behind', 'export_queue_per_target',
             'ocr_default_language', 'ocr_additional_languages'
         }
         
@@ -21,6 +21,9 @@ class OCRZone:
     name: str
     zone: tuple  # (x, y, width, height)
     page_num: int
+    validation_regex: str = ""  # Optionales Prüfmuster für das OCR-Ergebnis
+    preprocessing: Any = None  # Bildvorverarbeitung (Preset oder Dict), None = wie Hotfolder
+    language: str = ""  # OCR-Sprache ('deu', 'deu+eng', 'auto'), leer = wie Hotfolder
     
     def __post_init__(self):
         """Stelle sicher, dass der Name ein OCR_ Präfix hat"""
@@ -31,7 +34,10 @@ class OCRZone:
         return {
             "name": self.name,
             "zone": list(self.zone),
-            "page_num": self.page_num
+            "page_num": self.page_num,
+            "validation_regex": self.validation_regex,
+            "preprocessing": self.preprocessing,
+            "language": self.language
         }
     
     @classmethod
@@ -40,7 +46,10 @@ class OCRZone:
         return cls(
             name=data["name"],
             zone=tuple(data["zone"]),
-            page_num=data["page_num"]
+            page_num=data["page_num"],
+            validation_regex=data.get("validation_regex", ""),
+            preprocessing=data.get("preprocessing"),
+            language=data.get("language", "")
         )
 
 